@@ -0,0 +1,2 @@
+"""SQLite catalog of raw_vectors / classified / virtual_trades artifacts, queried instead of globbing."""
+from .catalog import CATALOG_NAME, ArtifactCatalog, code_version, find_artifacts, parse_stem, register_outputs
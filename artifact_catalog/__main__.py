@@ -0,0 +1,63 @@
+"""CLI: rebuild or query the artifact catalog.
+
+Usage:
+  python -m artifact_catalog rebuild-catalog [--data-base DIR]
+  python -m artifact_catalog query --kind classified [--ticker SPY] [--date-from YYMMDD] [--date-to YYMMDD] [--tf 5] [--tier elite]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from .catalog import CATALOG_NAME, DIR_NAMES, KINDS, ArtifactCatalog, find_artifacts
+
+
+def main() -> None:
+    data_base = os.environ.get("DATA_BASE") or os.environ.get("FIN_DATA") or os.path.expanduser("~/Fin/Data")
+
+    p = argparse.ArgumentParser(description="Catalog of pipeline artifacts (raw_vectors, classified, virtual_trades).")
+    p.add_argument("--data-base", default=data_base, help=f"Data root holding the dirs and {CATALOG_NAME}.")
+    sub = p.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild-catalog", help="Scan the data dirs and re-register every file.")
+    q = sub.add_parser("query", help="Print paths matching the filters.")
+    q.add_argument("--kind", choices=KINDS, default="classified")
+    q.add_argument("--ticker", default=None)
+    q.add_argument("--date", default=None, metavar="YYMMDD")
+    q.add_argument("--date-from", default=None, metavar="YYMMDD")
+    q.add_argument("--date-to", default=None, metavar="YYMMDD")
+    q.add_argument("--tf", default=None)
+    q.add_argument("--tier", default=None)
+    args = p.parse_args()
+
+    base = Path(args.data_base)
+    if not base.is_dir():
+        print(f"Data base not found: {base}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == "rebuild-catalog":
+        t0 = time.perf_counter()
+        with ArtifactCatalog(base / CATALOG_NAME) as cat:
+            counts = cat.rebuild({kind: base / name for kind, name in DIR_NAMES.items()})
+        print(", ".join(f"{k}: {n}" for k, n in counts.items()) + f" files in {base / CATALOG_NAME} ({time.perf_counter() - t0:.2f}s)")
+        return
+
+    paths = find_artifacts(
+        args.kind,
+        base / DIR_NAMES[args.kind],
+        ticker=args.ticker,
+        date=args.date,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        tf=args.tf,
+        tier=args.tier,
+    )
+    for path in paths:
+        print(path)
+    print(f"{len(paths)} files", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""SQLite catalog of pipeline artifacts (raw_vectors, classified, virtual_trades files).
+
+Writers register every file they produce (stem fields, bar count, size, content hash, last-record tier,
+producing stage and code version); readers ask for paths by ticker, date range, tf or tier with an
+indexed query instead of listing and parsing a flat directory.
+
+The catalog lives at {data base}/artifact_catalog.sqlite (sibling of the data dirs). A directory is only
+answered from the catalog once it is marked complete for a kind (a full writer run or rebuild-catalog
+scanned it); until then find_artifacts globs, so a partially registered tree never hides files.
+
+Files may be stored compressed (common.compressed): stem and bar count are those of the uncompressed
+content, bytes and sha1 those of the file on disk.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from common.compressed import codec_of, data_files, data_stem, read_bytes
+
+CATALOG_NAME = "artifact_catalog.sqlite"
+KINDS = ("raw", "classified", "trades")
+DIR_NAMES = {"raw": "raw_vectors", "classified": "classified", "trades": "virtual_trades"}
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    dir TEXT NOT NULL,
+    stem TEXT NOT NULL,
+    ticker TEXT,
+    date TEXT,
+    tf TEXT,
+    start_hhmm TEXT,
+    end_hhmm TEXT,
+    bars INTEGER,
+    tier TEXT,
+    bytes INTEGER,
+    sha1 TEXT,
+    mtime_ns INTEGER,
+    stage TEXT,
+    version TEXT,
+    registered_at REAL
+);
+CREATE INDEX IF NOT EXISTS artifacts_kind_date ON artifacts (kind, dir, date);
+CREATE INDEX IF NOT EXISTS artifacts_kind_ticker ON artifacts (kind, dir, ticker, date);
+CREATE TABLE IF NOT EXISTS complete_dirs (
+    kind TEXT NOT NULL,
+    dir TEXT NOT NULL,
+    marked_at REAL,
+    PRIMARY KEY (kind, dir)
+);
+"""
+
+
+def parse_stem(stem: str) -> dict | None:
+    """Stem fields. Segments: TICKER_YYMMDD_TF_START_END, or TICKER_YYMMDD_START_END (tf D);
+    trades: TICKER_YYMMDD_TF. None if the stem matches neither."""
+    parts = stem.split("_")
+    if len(parts) == 5:
+        ticker, date, tf, start, end = parts
+    elif len(parts) == 4:
+        ticker, date, start, end = parts
+        tf = "D"
+    elif len(parts) == 3:
+        ticker, date, tf = parts
+        start = end = None
+    else:
+        return None
+    if not (len(date) == 6 and date.isdigit()):
+        return None
+    return {"ticker": ticker, "date": date, "tf": tf, "start_hhmm": start, "end_hhmm": end}
+
+
+def code_version(*rels: str) -> str:
+    """sha1 of the Python sources under the given repo-relative files/dirs (path + content)."""
+    h = hashlib.sha1()
+    for rel in rels:
+        root = REPO_ROOT / rel
+        files = [root] if root.is_file() else sorted(root.rglob("*.py"))
+        for f in files:
+            h.update(str(f.relative_to(REPO_ROOT)).encode())
+            h.update(f.read_bytes())
+    return h.hexdigest()
+
+
+def _file_info(path: Path, kind: str) -> dict:
+    """One read: size, sha1, line count and (classified) the last record's tier."""
+    raw = path.read_bytes()
+    data = raw if codec_of(path) == "none" else read_bytes(path)
+    st = path.stat()
+    bars = data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+    tier = None
+    if kind == "classified" and data.strip():
+        try:
+            tier = json.loads(data.rstrip().rsplit(b"\n", 1)[-1]).get("tier")
+        except (json.JSONDecodeError, AttributeError):
+            tier = None
+    return {
+        "bars": bars,
+        "tier": tier,
+        "bytes": len(raw),
+        "sha1": hashlib.sha1(raw).hexdigest(),
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+class ArtifactCatalog:
+    """Connection to one catalog file. Safe for concurrent writer processes (WAL, busy timeout)."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    @classmethod
+    def for_dir(cls, directory: Path) -> "ArtifactCatalog":
+        """Catalog of the data base that contains directory (its parent)."""
+        return cls(Path(directory).resolve().parent / CATALOG_NAME)
+
+    def register(self, kind: str, paths, stage: str, version: str = "") -> int:
+        """Insert or replace rows for files just written. Returns rows written."""
+        now = time.time()
+        rows = []
+        for p in paths:
+            p = Path(p).resolve()
+            stem = data_stem(p)
+            fields = parse_stem(stem) or {"ticker": None, "date": None, "tf": None, "start_hhmm": None, "end_hhmm": None}
+            info = _file_info(p, kind)
+            rows.append((
+                str(p), kind, str(p.parent), stem, fields["ticker"], fields["date"], fields["tf"],
+                fields["start_hhmm"], fields["end_hhmm"], info["bars"], info["tier"], info["bytes"],
+                info["sha1"], info["mtime_ns"], stage, version, now,
+            ))
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO artifacts VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+        return len(rows)
+
+    def forget(self, kind: str, directory: Path, date: str | None = None, stems=None) -> int:
+        """Delete rows of a directory (all, one date, or the given stems). Returns rows deleted."""
+        d = str(Path(directory).resolve())
+        sql, args = "DELETE FROM artifacts WHERE kind = ? AND dir = ?", [kind, d]
+        if date:
+            sql += " AND date = ?"
+            args.append(date)
+        with self.conn:
+            if stems is None:
+                return self.conn.execute(sql, args).rowcount
+            return sum(self.conn.execute(sql + " AND stem = ?", [*args, s]).rowcount for s in stems)
+
+    def mark_complete(self, kind: str, directory: Path) -> None:
+        """Record that every file of this kind in directory is registered (after a full run or scan)."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO complete_dirs VALUES (?, ?, ?)",
+                (kind, str(Path(directory).resolve()), time.time()),
+            )
+
+    def is_complete(self, kind: str, directory: Path) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM complete_dirs WHERE kind = ? AND dir = ?", (kind, str(Path(directory).resolve()))
+        ).fetchone()
+        return row is not None
+
+    def query(
+        self,
+        kind: str,
+        directory: Path | None = None,
+        ticker: str | None = None,
+        date: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        tf: str | None = None,
+        tier: str | None = None,
+    ) -> list[dict]:
+        """Rows matching every given filter (dates are YYMMDD, ranges inclusive), ordered by path."""
+        sql = "SELECT * FROM artifacts WHERE kind = ?"
+        args: list = [kind]
+        for col, op, val in (
+            ("dir", "=", str(Path(directory).resolve()) if directory else None),
+            ("ticker", "=", ticker),
+            ("date", "=", date),
+            ("date", ">=", date_from),
+            ("date", "<=", date_to),
+            ("tf", "=", tf),
+            ("tier", "=", tier),
+        ):
+            if val:
+                sql += f" AND {col} {op} ?"
+                args.append(val)
+        cur = self.conn.execute(sql + " ORDER BY path", args)
+        cols = [c[0] for c in cur.description]
+        return [dict(zip(cols, row)) for row in cur]
+
+    def rebuild(self, directories: dict[str, Path]) -> dict[str, int]:
+        """Re-register every *.jsonl file (any codec) of each {kind: dir} and mark the dirs complete. Returns counts."""
+        counts = {}
+        for kind, d in directories.items():
+            self.forget(kind, d)
+            if not Path(d).is_dir():
+                counts[kind] = 0
+                continue
+            counts[kind] = self.register(kind, data_files(Path(d), "*.jsonl"), stage="rebuild-catalog")
+            self.mark_complete(kind, d)
+        return counts
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ArtifactCatalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _matches(fields: dict | None, ticker, date, date_from, date_to, tf) -> bool:
+    if fields is None:
+        return not (ticker or date or date_from or date_to or tf)
+    if ticker and fields["ticker"] != ticker:
+        return False
+    if date and fields["date"] != date:
+        return False
+    if date_from and fields["date"] < date_from:
+        return False
+    if date_to and fields["date"] > date_to:
+        return False
+    return not (tf and fields["tf"] != tf)
+
+
+def find_artifacts(
+    kind: str,
+    directory: Path,
+    ticker: str | None = None,
+    date: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    tf: str | None = None,
+    tier: str | None = None,
+) -> list[Path]:
+    """Sorted *.jsonl paths (any codec) of one kind in directory matching the filters.
+
+    Answered from the catalog when it exists and directory is marked complete (rows whose file is gone are
+    skipped); otherwise by globbing and parsing stems (tier then reads each file's last record).
+    """
+    directory = Path(directory)
+    db = directory.resolve().parent / CATALOG_NAME
+    if db.is_file():
+        with ArtifactCatalog(db) as cat:
+            if cat.is_complete(kind, directory):
+                rows = cat.query(kind, directory, ticker, date, date_from, date_to, tf, tier)
+                return [Path(r["path"]) for r in rows if Path(r["path"]).is_file()]
+    out = []
+    for p in data_files(directory, "*.jsonl"):
+        if not _matches(parse_stem(data_stem(p)), ticker, date, date_from, date_to, tf):
+            continue
+        if tier and _file_info(p, kind)["tier"] != tier:
+            continue
+        out.append(p)
+    return out
+
+
+def register_outputs(kind: str, directory: Path, paths, stage: str, version: str = "", full: bool = False, date: str | None = None) -> None:
+    """Writer hook: register what a run wrote. full=True (directory was cleared and rebuilt) replaces all rows
+    and marks the directory complete; date drops that date's rows first (they were deleted/overwritten)."""
+    with ArtifactCatalog.for_dir(directory) as cat:
+        if full:
+            cat.forget(kind, directory)
+        elif date:
+            cat.forget(kind, directory, date=date)
+        cat.register(kind, paths, stage, version)
+        if full:
+            cat.mark_complete(kind, directory)
@@ -1,19 +1,155 @@
 #!/usr/bin/env python3
 """Compare raw_vectors and classified dirs: same stems, same line counts.
 Reports why they might not match (extension, parse, path).
-Usage: python3 check_raw_classified_match.py [RAW_DIR [CLASSIFIED_DIR]]
+Usage: python3 check_raw_classified_match.py [RAW_DIR [CLASSIFIED_DIR]] [--deep] [--json PATH|-] [--jobs N]
   Defaults: RAW_VECTORS_DIR or $DATA_BASE/raw_vectors, $DATA_BASE/classified.
+
+Lines are counted by scanning bytes for newlines in a thread pool; counts are cached per file
+(keyed by mtime and size) in a stats file next to the data dirs, so unchanged files are not re-read.
+--deep also checks classified files line by line (segment_id = stem, closing_bar_index = 0..n-1,
+start_time and duration_min consistent with the raw bar times) using byte regexes, not JSON decodes.
+Files may be stored compressed (.jsonl.gz / .jsonl.zst, common.compressed); they are matched by stem and
+their uncompressed lines are counted.
 """
+import argparse
+import json
 import os
+import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.compressed import codec_of, data_file, data_stem, open_bytes, strip_codec  # noqa: E402
+from common.timeparse import parse_time  # noqa: E402
+
+CACHE_NAME = ".check_raw_classified_cache.json"
+CHUNK = 1 << 20
+MAX_ISSUES_PER_FILE = 5
+
+SEGMENT_RE = re.compile(rb'"segment_id":\s*"([^"]*)"')
+CLOSING_IX_RE = re.compile(rb'"closing_bar_index":\s*(-?\d+)')
+START_TIME_RE = re.compile(rb'"start_time":\s*"([^"]*)"')
+DURATION_RE = re.compile(rb'"duration_min":\s*(-?[0-9.eE+-]+|NaN)')
+BAR_TIME_RE = re.compile(rb'"time":\s*"([^"]*)"')
+
+
+def count_lines(p: Path) -> int:
+    """Newline count, plus one for a final line without newline. -1 if unreadable."""
+    try:
+        n = 0
+        last = b"\n"
+        buf = bytearray(CHUNK)
+        with open(p, "rb", buffering=0) if codec_of(p) == "none" else open_bytes(p) as f:
+            while True:
+                got = f.readinto(buf)
+                if not got:
+                    break
+                view = buf if got == CHUNK else buf[:got]
+                n += view.count(b"\n")
+                last = view[-1:]
+        return n + (0 if last == b"\n" else 1)
+    except OSError:
+        return -1
+
+
+def _load_cache(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_cache(path: Path, cache: dict) -> None:
+    try:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(cache, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Could not write stats cache {path}: {e}", file=sys.stderr)
+
+
+def count_dir(d: Path, cache: dict, pool: ThreadPoolExecutor) -> tuple[dict, int]:
+    """{stem: line count} for *.jsonl (any codec) in d, using cache entries [mtime_ns, size, count]. Returns (counts, hits)."""
+    counts = {}
+    todo = []
+    hits = 0
+    for f in d.iterdir():
+        if not f.is_file() or not strip_codec(f.name).lower().endswith(".jsonl"):
+            continue
+        st = f.stat()
+        key = str(f.resolve())
+        hit = cache.get(key)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            counts[data_stem(f)] = hit[2]
+            hits += 1
+        else:
+            todo.append((f, key, st))
+    for (f, key, st), n in zip(todo, pool.map(lambda t: count_lines(t[0]), todo)):
+        counts[data_stem(f)] = n
+        cache[key] = [st.st_mtime_ns, st.st_size, n]
+    return counts, hits
+
+
+def deep_check(stem: str, raw_path: Path, classified_path: Path) -> list[str]:
+    """Stream both files; return problems found (at most MAX_ISSUES_PER_FILE)."""
+    issues = []
+    bar_times = []
+    with open_bytes(raw_path) as f:
+        for line in f:
+            if line.strip():
+                m = BAR_TIME_RE.search(line)
+                bar_times.append(parse_time(m.group(1).decode("utf-8", "replace")) if m else None)
+    # vector_calc sorts bars by time before computing records.
+    bar_times.sort(key=lambda t: (t is None, t or datetime.min))
+    t0 = bar_times[0] if bar_times else None
+    expected_start = t0.strftime("%Y-%m-%d %H:%M:%S") if t0 else None
+    k = 0
+    with open_bytes(classified_path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if len(issues) >= MAX_ISSUES_PER_FILE:
+                break
+            m = SEGMENT_RE.search(line)
+            if not m or m.group(1).decode("utf-8", "replace") != stem:
+                issues.append(f"line {k}: segment_id {m.group(1).decode('utf-8', 'replace') if m else None!r} != stem")
+            m = CLOSING_IX_RE.search(line)
+            if not m or int(m.group(1)) != k:
+                issues.append(f"line {k}: closing_bar_index {int(m.group(1)) if m else None} != {k}")
+            m = START_TIME_RE.search(line)
+            if t0 and (not m or parse_time(m.group(1).decode("utf-8", "replace")) != t0):
+                issues.append(f"line {k}: start_time {m.group(1).decode('utf-8', 'replace') if m else None!r} != raw first bar {expected_start}")
+            m = DURATION_RE.search(line)
+            tk = bar_times[k] if k < len(bar_times) else None
+            if m and m.group(1) != b"NaN" and t0 and tk:
+                want = (tk - t0).total_seconds() / 60
+                got = float(m.group(1))
+                if abs(got - want) > 1e-3:
+                    issues.append(f"line {k}: duration_min {got} != raw bar time offset {want:.3f}")
+            k += 1
+    if k != len(bar_times) and len(issues) < MAX_ISSUES_PER_FILE:
+        issues.append(f"{k} classified records vs {len(bar_times)} raw bars")
+    return issues
+
 
 def main():
     data_base = os.environ.get("DATA_BASE") or os.environ.get("FIN_DATA") or os.path.expanduser("~/Fin/Data")
-    raw_dir = Path(sys.argv[1] if len(sys.argv) > 1 else os.environ.get("RAW_VECTORS_DIR", data_base + "/raw_vectors"))
-    classified_dir = Path(sys.argv[2] if len(sys.argv) > 2 else data_base + "/classified")
+    p = argparse.ArgumentParser(description="Check raw_vectors and classified are 1:1 (stems and line counts).")
+    p.add_argument("raw_dir", nargs="?", default=os.environ.get("RAW_VECTORS_DIR", data_base + "/raw_vectors"))
+    p.add_argument("classified_dir", nargs="?", default=data_base + "/classified")
+    p.add_argument("--deep", action="store_true", help="Also check record ids and bar times in every matched file.")
+    p.add_argument("--json", default="", metavar="PATH", help="Write a JSON report to PATH ('-' = stdout only).")
+    p.add_argument("--jobs", type=int, default=min(32, (os.cpu_count() or 1) * 4), help="Reader threads.")
+    p.add_argument("--cache", default="", help=f"Stats cache file (default: {CACHE_NAME} next to classified dir).")
+    p.add_argument("--no-cache", action="store_true", help="Ignore and do not write the stats cache.")
+    args = p.parse_args()
 
+    raw_dir = Path(args.raw_dir)
+    classified_dir = Path(args.classified_dir)
     if not raw_dir.is_dir():
         print(f"Raw dir not found: {raw_dir}", file=sys.stderr)
         sys.exit(1)
@@ -21,32 +157,60 @@ def main():
         print(f"Classified dir not found: {classified_dir}", file=sys.stderr)
         sys.exit(1)
 
-    def line_count(p: Path) -> int:
-        try:
-            return sum(1 for line in p.read_text().splitlines() if line.strip())
-        except Exception:
-            return -1
+    t_start = time.perf_counter()
+    cache_path = Path(args.cache) if args.cache else classified_dir.parent / CACHE_NAME
+    cache = {} if args.no_cache else _load_cache(cache_path)
 
     # vector_calc globs "*.jsonl". Splitter writes .jsonl. Both use .jsonl.
-    raw_stems = {}
-    for f in raw_dir.iterdir():
-        if not f.is_file() or f.suffix.lower() != ".jsonl":
-            continue
-        raw_stems[f.stem] = line_count(f)
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        raw_stems, raw_hits = count_dir(raw_dir, cache, pool)
+        classified, classified_hits = count_dir(classified_dir, cache, pool)
+
+        in_raw_not_classified = set(raw_stems) - set(classified)
+        in_classified_not_raw = set(classified) - set(raw_stems)
+        count_mismatch = [(s, raw_stems[s], classified[s]) for s in set(raw_stems) & set(classified) if raw_stems[s] != classified[s]]
 
-    classified = {}
-    for f in classified_dir.iterdir():
-        if f.is_file() and f.suffix.lower() == ".jsonl":
-            classified[f.stem] = line_count(f)
+        deep_issues = {}
+        deep_checked = 0
+        if args.deep:
+            common = sorted(set(raw_stems) & set(classified))
+            results = pool.map(
+                lambda s: deep_check(s, data_file(raw_dir, f"{s}.jsonl"), data_file(classified_dir, f"{s}.jsonl")), common
+            )
+            for s, issues in zip(common, results):
+                deep_checked += 1
+                if issues:
+                    deep_issues[s] = issues
 
-    in_raw_not_classified = set(raw_stems) - set(classified)
-    in_classified_not_raw = set(classified) - set(raw_stems)
-    count_mismatch = [(s, raw_stems[s], classified[s]) for s in set(raw_stems) & set(classified) if raw_stems[s] != classified[s]]
+    if not args.no_cache:
+        _save_cache(cache_path, cache)
+    elapsed = time.perf_counter() - t_start
+    ok = not in_raw_not_classified and not in_classified_not_raw and not count_mismatch and not deep_issues
+
+    report = {
+        "raw_dir": str(raw_dir),
+        "classified_dir": str(classified_dir),
+        "raw_files": len(raw_stems),
+        "classified_files": len(classified),
+        "in_raw_not_classified": {s: raw_stems[s] for s in sorted(in_raw_not_classified)},
+        "in_classified_not_raw": sorted(in_classified_not_raw),
+        "count_mismatch": [{"stem": s, "raw": rn, "classified": cn} for s, rn, cn in sorted(count_mismatch)],
+        "deep": {"checked": deep_checked, "issues": deep_issues} if args.deep else None,
+        "cache_hits": raw_hits + classified_hits,
+        "elapsed_sec": round(elapsed, 3),
+        "ok": ok,
+    }
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+        return
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
 
     print("Raw dir:", raw_dir)
     print("  *.jsonl:", len(raw_stems))
     print("Classified dir:", classified_dir)
     print("  *.jsonl:", len(classified))
+    print(f"  ({raw_hits + classified_hits} line counts from cache, {elapsed:.2f}s)")
     print()
 
     if in_raw_not_classified:
@@ -73,9 +237,18 @@ def main():
             print(f"  ... and {len(count_mismatch) - 25} more")
         print("  Why: raw has malformed lines or empty -> pandas/load_segment dropped rows or failed.")
         print()
+    if deep_issues:
+        print(f"Deep check: {len(deep_issues)} of {deep_checked} files with problems:")
+        for s in sorted(deep_issues)[:25]:
+            for issue in deep_issues[s]:
+                print(f"  {s}: {issue}")
+        if len(deep_issues) > 25:
+            print(f"  ... and {len(deep_issues) - 25} more files")
+        print("  Why: classified file is stale (raw re-split after classify) or was edited.")
+        print()
 
-    if not in_raw_not_classified and not in_classified_not_raw and not count_mismatch:
-        print("OK: same stems and same line counts (1:1).")
+    if ok:
+        print("OK: same stems and same line counts (1:1)." + (f" Deep check passed for {deep_checked} files." if args.deep else ""))
     else:
         print("Fix: run bin/run_split_then_classify.sh (same DATA_BASE); splitter and classifier use .jsonl.")
 
@@ -6,6 +6,7 @@
 # Usage: run_split_then_classify.sh [YYMMDD | all]
 #   YYMMDD  = process only this date (alerts and raw/classified for that date).
 #   all     = process all dates (default).
+# For long reprocessing runs that must survive a crash, use `python -m pipeline.backfill` (resumable, journaled).
 
 set -e
 
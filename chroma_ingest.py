@@ -1,14 +1,48 @@
 #!/usr/bin/env python3
 """Load classified JSONL records into Chroma DB (single collection intra_date_v1).
-Embedding = 10 numeric features; metadata = rest. ID = segment_id + '_' + closing_bar_index.
+Embedding = 10 numeric features; metadata = filterable fields only (METADATA_FIELDS, or --metadata-fields all
+for every non-embedding field). ID = segment_id + '_' + closing_bar_index. Full records are hydrated via a
+sidecar offset store (records.sqlite, vector_index.record_store) pointing into the classified files.
 Missing/NaN in embed fields -> 0.0. Use collection.upsert so latest overwrites.
+
+Incremental: a ledger (ingest_ledger.json in the chroma dir) records mtime, size, content hash and
+emitted id ranges (plus selection options) per classified file, keyed by stem so that a file re-written with
+another codec (X.jsonl -> X.jsonl.gz) is the same file, not a vanished one plus a new one. Unchanged files are skipped; ids that a changed or vanished
+file no longer produces are deleted. --rebuild drops the collection and ledger first.
+
+Pipelined: a process pool parses files into (ids, embeddings, metadatas, offsets) while a single writer thread
+feeds Chroma from a bounded queue. The upsert batch size adapts to measured upsert latency.
+
+--backend numpy writes an in-process exact-search index (vector_index.numpy_index) instead of Chroma:
+a memory-mappable float32 matrix plus id/metadata sidecars, rebuilt from the selected files.
+
+--granularity picks which closing bars of each segment become documents (records are expanding
+windows, so neighbours are near-duplicates): all, last, every-n, or milestones (fractions of the
+segment length). --collapse-distance additionally drops records whose embedding is within that L2
+distance of the previously kept record. Unselected lines are never JSON-decoded.
+
+Classified files may be stored compressed (.jsonl.gz / .jsonl.zst, common.compressed); record offsets are
+into the uncompressed content.
 """
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
+from typing import Iterable, Iterator
+
+from artifact_catalog import find_artifacts
+from common.compressed import data_stem, read_bytes
 
 EMBED_FIELDS = [
     "delta_pct",
@@ -23,8 +57,22 @@ EMBED_FIELDS = [
     "atrRatio_q50",
 ]
 
+# Metadata kept in the index: the fields queries filter on.
+METADATA_FIELDS = ("ticker", "tf", "date", "tier", "segment_id", "closing_bar_index")
+
 COLLECTION_NAME = "intra_date_v1"
 BATCH_SIZE = 1000
+LEDGER_NAME = "ingest_ledger.json"
+LEDGER_VERSION = 2
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+QUEUE_DEPTH = 8  # parsed files waiting for the writer
+TARGET_UPSERT_SEC = 0.5  # adaptive batch aims for this upsert latency
+MIN_BATCH_SIZE = 250
+MAX_BATCH_SIZE = 10000
+
+GRANULARITY_MODES = ("all", "last", "every-n", "milestones")
+DEFAULT_MILESTONES = (0.25, 0.5, 0.75, 1.0)
 
 
 def _safe_float(x, default: float = 0.0) -> float:
@@ -56,9 +104,11 @@ def _chroma_safe_value(v) -> str | int | float | bool | None:
     return str(v)
 
 
-def _metadata_from_record(rec: dict) -> dict:
+def _metadata_from_record(rec: dict, fields: tuple[str, ...] | None = METADATA_FIELDS) -> dict:
+    """Chroma-safe metadata: only `fields`, or every non-embedding field when fields is None."""
     out = {}
-    for k, v in rec.items():
+    items = rec.items() if fields is None else ((k, rec.get(k)) for k in fields)
+    for k, v in items:
         if k in EMBED_FIELDS:
             continue
         safe = _chroma_safe_value(v)
@@ -67,67 +117,516 @@ def _metadata_from_record(rec: dict) -> dict:
     return out
 
 
+def _file_sha1(fp: Path) -> str:
+    h = hashlib.sha1()
+    with open(fp, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _id_ranges(ids: list[str]) -> list[list]:
+    """Compress doc ids (segment_id + '_' + closing_bar_index) into [segment_id, lo, hi] runs."""
+    ranges: list[list] = []
+    for doc_id in ids:
+        seg_id, _, ix = doc_id.rpartition("_")
+        try:
+            k = int(ix)
+        except ValueError:
+            ranges.append([doc_id, None, None])
+            continue
+        if ranges and ranges[-1][0] == seg_id and ranges[-1][2] == k - 1:
+            ranges[-1][2] = k
+        else:
+            ranges.append([seg_id, k, k])
+    return ranges
+
+
+def _expand_id_ranges(ranges: list[list]) -> list[str]:
+    out: list[str] = []
+    for seg_id, lo, hi in ranges:
+        if lo is None:
+            out.append(seg_id)
+        else:
+            out.extend(f"{seg_id}_{k}" for k in range(lo, hi + 1))
+    return out
+
+
+def _load_ledger(path: Path) -> dict:
+    """Ledger {"version", "files": {file stem: {file, mtime_ns, size, sha1, options, id_ranges}}}; empty if
+    missing/unreadable. A version 1 ledger (keyed by file name) is converted."""
+    try:
+        ledger = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {"version": LEDGER_VERSION, "files": {}}
+    if not isinstance(ledger.get("files"), dict):
+        return {"version": LEDGER_VERSION, "files": {}}
+    if ledger.get("version") == 1:
+        files: dict[str, dict] = {}
+        for name, entry in sorted(ledger["files"].items()):
+            stem = data_stem(name)
+            if stem in files:  # one stem under two codecs: keep every id as stale candidate, force re-ingest
+                ids = set(_expand_id_ranges(files[stem].get("id_ranges", []))) | set(_expand_id_ranges(entry.get("id_ranges", [])))
+                entry = {**entry, "sha1": None, "mtime_ns": None, "id_ranges": _id_ranges(sorted(ids))}
+            files[stem] = {**entry, "file": name}
+        return {"version": LEDGER_VERSION, "files": files}
+    if ledger.get("version") != LEDGER_VERSION:
+        return {"version": LEDGER_VERSION, "files": {}}
+    return ledger
+
+
+def _save_ledger(path: Path, ledger: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(ledger, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@dataclass(frozen=True)
+class IngestOptions:
+    """Which records (line positions) of a segment file are ingested, and which metadata they carry."""
+
+    mode: str = "all"
+    every_n: int = 5
+    milestones: tuple[float, ...] = DEFAULT_MILESTONES
+    collapse_distance: float = 0.0
+    metadata_fields: tuple[str, ...] | None = METADATA_FIELDS
+
+    def select(self, n: int) -> list[int]:
+        """Line positions to ingest for a file of n records; the last record is always kept."""
+        if n <= 0:
+            return []
+        if self.mode == "last":
+            return [n - 1]
+        if self.mode == "every-n":
+            return [k for k in range(n) if k % self.every_n == 0 or k == n - 1]
+        if self.mode == "milestones":
+            return sorted({min(n - 1, max(0, math.ceil(f * n) - 1)) for f in self.milestones} | {n - 1})
+        return list(range(n))
+
+    def signature(self) -> str:
+        """Stable description stored in the ledger; a change forces re-ingest of every file."""
+        return json.dumps(
+            {
+                "mode": self.mode,
+                "every_n": self.every_n,
+                "milestones": list(self.milestones),
+                "collapse": self.collapse_distance,
+                "metadata": None if self.metadata_fields is None else list(self.metadata_fields),
+            }
+        )
+
+
+def _collapse(ids: list[str], embeddings: list[list[float]], metadatas: list[dict], offsets: list, distance: float):
+    """Drop records within distance (L2) of the previously kept one; the last record is always kept."""
+    keep = [0]
+    for i in range(1, len(ids)):
+        prev = embeddings[keep[-1]]
+        if math.sqrt(sum((a - b) ** 2 for a, b in zip(embeddings[i], prev))) >= distance:
+            keep.append(i)
+    if keep[-1] != len(ids) - 1:
+        keep.append(len(ids) - 1)
+    return (
+        [ids[i] for i in keep],
+        [embeddings[i] for i in keep],
+        [metadatas[i] for i in keep],
+        [offsets[i] for i in keep],
+    )
+
+
+def _read_file_records(
+    fp: Path, opts: IngestOptions = IngestOptions()
+) -> tuple[list[str], list[list[float]], list[dict], list[tuple[int, int]]]:
+    """Parse one classified file into (ids, embeddings, metadatas, (byte offset, length) per record),
+    keeping only the selected records."""
+    ids: list[str] = []
+    embeddings: list[list[float]] = []
+    metadatas: list[dict] = []
+    offsets: list[tuple[int, int]] = []
+    lines: list[tuple[int, bytes]] = []
+    pos = 0
+    for raw in read_bytes(fp).splitlines(keepends=True):
+        body = raw.rstrip(b"\r\n")
+        if body.strip():
+            lines.append((pos, body))
+        pos += len(raw)
+    for sel in opts.select(len(lines)):
+        off, body = lines[sel]
+        try:
+            rec = json.loads(body)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        seg_id = rec.get("segment_id")
+        closing_ix = rec.get("closing_bar_index")
+        if seg_id is None or closing_ix is None:
+            continue
+        ids.append(f"{seg_id}_{closing_ix}")
+        embeddings.append(_embed_from_record(rec))
+        metadatas.append(_metadata_from_record(rec, opts.metadata_fields))
+        offsets.append((off, len(body)))
+    if opts.collapse_distance > 0 and len(ids) > 1:
+        ids, embeddings, metadatas, offsets = _collapse(ids, embeddings, metadatas, offsets, opts.collapse_distance)
+    return ids, embeddings, metadatas, offsets
+
+
+def _delete_ids(collection, ids: list[str]) -> None:
+    for i in range(0, len(ids), BATCH_SIZE):
+        collection.delete(ids=ids[i : i + BATCH_SIZE])
+
+
+def _parse_ahead(
+    paths: Iterable[Path], workers: int, opts: IngestOptions = IngestOptions()
+) -> Iterator[tuple[Path, tuple]]:
+    """Yield (path, parsed records) in input order; with workers > 1 at most 2*workers files are in flight."""
+    parse = partial(_read_file_records, opts=opts)
+    if workers <= 1:
+        for fp in paths:
+            yield fp, parse(fp)
+        return
+    it = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        pending: deque = deque()
+        for fp in it:
+            pending.append((fp, ex.submit(parse, fp)))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            fp, fut = pending.popleft()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append((nxt, ex.submit(parse, nxt)))
+            yield fp, fut.result()
+
+
+@dataclass
+class FileBatch:
+    """All records of one file plus ids it no longer produces. Vanished files have only stale ids."""
+
+    name: str
+    ids: list[str] = field(default_factory=list)
+    embeddings: list[list[float]] = field(default_factory=list)
+    metadatas: list[dict] = field(default_factory=list)
+    stale: list[str] = field(default_factory=list)
+
+
+class UpsertWriter:
+    """Single owner of the collection: buffers FileBatches and upserts them in (adaptive) batches.
+
+    threaded=True runs in a background thread fed by a bounded queue; otherwise put() upserts inline.
+    done lists the batch names (ledger keys) whose records are all upserted (safe to record in the ledger).
+    """
+
+    def __init__(self, collection, batch_size: int = 0, threaded: bool = True) -> None:
+        self.collection = collection
+        self.adaptive = batch_size <= 0
+        self.batch_size = BATCH_SIZE if self.adaptive else batch_size
+        self.upserted = 0
+        self.deleted = 0
+        self.upsert_sec = 0.0
+        self.upsert_calls = 0
+        self.done: list[str] = []
+        self.error: BaseException | None = None
+        self._ids: list[str] = []
+        self._embeddings: list[list[float]] = []
+        self._metadatas: list[dict] = []
+        self._enqueued = 0
+        self._pending: deque[tuple[str, int]] = deque()  # (name, cumulative record count at end of file)
+        self._queue: queue.Queue | None = queue.Queue(maxsize=QUEUE_DEPTH) if threaded else None
+        self._thread = threading.Thread(target=self._run, name="chroma-writer", daemon=True) if threaded else None
+        if self._thread:
+            self._thread.start()
+
+    def put(self, batch: FileBatch) -> None:
+        if self._queue is None:
+            self._handle(batch)
+            return
+        while True:
+            if self.error is not None:
+                raise RuntimeError("chroma writer failed") from self.error
+            try:
+                self._queue.put(batch, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def close(self) -> None:
+        """Flush remaining records and stop the writer thread. Re-raises a writer failure."""
+        if self._queue is None:
+            self._flush_all()
+            return
+        if self.error is None:
+            self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise RuntimeError("chroma writer failed") from self.error
+
+    def _run(self) -> None:
+        try:
+            while True:
+                batch = self._queue.get()
+                if batch is None:
+                    break
+                self._handle(batch)
+            self._flush_all()
+        except BaseException as e:  # surfaced to the producer via put()/close()
+            self.error = e
+
+    def _handle(self, batch: FileBatch) -> None:
+        if batch.stale:
+            _delete_ids(self.collection, batch.stale)
+            self.deleted += len(batch.stale)
+        self._ids.extend(batch.ids)
+        self._embeddings.extend(batch.embeddings)
+        self._metadatas.extend(batch.metadatas)
+        self._enqueued += len(batch.ids)
+        self._pending.append((batch.name, self._enqueued))
+        while len(self._ids) >= self.batch_size:
+            self._flush(self.batch_size)
+        self._mark_done()
+
+    def _flush_all(self) -> None:
+        if self._ids:
+            self._flush(len(self._ids))
+        self._mark_done()
+
+    def _flush(self, n: int) -> None:
+        t0 = time.perf_counter()
+        self.collection.upsert(ids=self._ids[:n], embeddings=self._embeddings[:n], metadatas=self._metadatas[:n])
+        dt = time.perf_counter() - t0
+        del self._ids[:n], self._embeddings[:n], self._metadatas[:n]
+        self.upserted += n
+        self.upsert_sec += dt
+        self.upsert_calls += 1
+        if self.adaptive and dt > 0:
+            target = TARGET_UPSERT_SEC * n / dt
+            self.batch_size = int(min(MAX_BATCH_SIZE, max(MIN_BATCH_SIZE, 0.5 * self.batch_size + 0.5 * target)))
+
+    def _mark_done(self) -> None:
+        while self._pending and self._pending[0][1] <= self.upserted:
+            self.done.append(self._pending.popleft()[0])
+
+
+def _ingest_numpy(
+    paths: list[Path],
+    classified_dir: Path,
+    index_dir: Path,
+    date_filter: str | None,
+    workers: int,
+    opts: IngestOptions,
+) -> None:
+    """Build the NumPy index from paths. With a date filter, rows of other dates are kept from the existing index."""
+    import numpy as np
+
+    from vector_index.numpy_index import INDEX_META, NumpyIndex, NumpyIndexBuilder
+    from vector_index.record_store import STORE_NAME, RecordStore
+
+    t0 = time.perf_counter()
+    index_dir.mkdir(parents=True, exist_ok=True)
+    if not date_filter:
+        (index_dir / STORE_NAME).unlink(missing_ok=True)
+    store = RecordStore(index_dir / STORE_NAME, classified_dir)
+    builder = NumpyIndexBuilder(EMBED_FIELDS)
+    if date_filter and (index_dir / INDEX_META).is_file():
+        old = NumpyIndex(index_dir)
+        # Doc ids embed the file stem, so rows of the re-ingested date are found by id.
+        builder.add_existing(old, keep=np.char.find(old.ids, f"_{date_filter}_") < 0)
+        del old
+    for fp, (ids, embeddings, metadatas, offsets) in _parse_ahead(paths, workers, opts):
+        builder.add(ids, embeddings, metadatas)
+        store.replace_file(fp.name, ids, offsets)
+    store.close()
+    rows = builder.save(index_dir)
+    elapsed = time.perf_counter() - t0
+    print(f"Wrote NumPy index with {rows} rows from {len(paths)} files to {index_dir} ({elapsed:.2f}s).")
+
+
 def main() -> None:
     p = argparse.ArgumentParser(description="Ingest classified JSONL into Chroma (intra_dat_v1).")
     p.add_argument("--classified-dir", required=True, help="Path to classified/.")
     p.add_argument("--chroma-dir", default="", help="Chroma persistent path (default: classified_dir.parent / chroma).")
     p.add_argument("--date", default="", help="Only ingest files containing this YYMMDD in name.")
+    p.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Drop the collection and ingest ledger, then re-ingest every selected file.",
+    )
+    p.add_argument(
+        "--backend",
+        choices=("chroma", "numpy"),
+        default="chroma",
+        help="chroma (default): upsert into the persistent collection; numpy: write an exact-search matrix index.",
+    )
+    p.add_argument(
+        "--index-dir",
+        default="",
+        help="Output dir for --backend numpy (default: classified_dir.parent / vector_index).",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Parser processes (default {DEFAULT_WORKERS}); 1 = parse in main thread, 0 = no pipeline (serial).",
+    )
+    p.add_argument(
+        "--batch-size",
+        type=int,
+        default=0,
+        help=f"Fixed upsert batch size; 0 (default) adapts between {MIN_BATCH_SIZE} and {MAX_BATCH_SIZE} to upsert latency.",
+    )
+    p.add_argument(
+        "--granularity",
+        choices=GRANULARITY_MODES,
+        default="all",
+        help="Records per segment to ingest: all (default), last, every-n, milestones.",
+    )
+    p.add_argument("--every-n", type=int, default=5, help="Stride for --granularity every-n (default 5).")
+    p.add_argument(
+        "--milestones",
+        default=",".join(str(f) for f in DEFAULT_MILESTONES),
+        help="Comma-separated fractions of segment length for --granularity milestones.",
+    )
+    p.add_argument(
+        "--collapse-distance",
+        type=float,
+        default=0.0,
+        help="Drop records within this L2 distance of the previous kept record of the segment (0 = off).",
+    )
+    p.add_argument(
+        "--metadata-fields",
+        default=",".join(METADATA_FIELDS),
+        help="Comma-separated metadata kept in the index (default: filterable fields); 'all' keeps every field.",
+    )
     args = p.parse_args()
+    if args.every_n < 1:
+        p.error("--every-n must be >= 1")
+    try:
+        milestones = tuple(sorted(float(x) for x in args.milestones.split(",") if x.strip()))
+    except ValueError:
+        p.error(f"--milestones must be comma-separated numbers: {args.milestones}")
+    if not milestones or milestones[0] <= 0 or milestones[-1] > 1:
+        p.error("--milestones fractions must be in (0, 1]")
+    if args.metadata_fields.strip() == "all":
+        metadata_fields = None
+    else:
+        metadata_fields = tuple(f.strip() for f in args.metadata_fields.split(",") if f.strip())
+    opts = IngestOptions(args.granularity, args.every_n, milestones, args.collapse_distance, metadata_fields)
 
     classified_dir = Path(args.classified_dir)
     if not classified_dir.is_dir():
         p.error(f"classified-dir not found: {classified_dir}")
 
+    date_filter = args.date.strip() or None
+    paths = find_artifacts("classified", classified_dir, date=date_filter)
+
+    if args.backend == "numpy":
+        index_dir = Path(args.index_dir) if args.index_dir.strip() else classified_dir.parent / "vector_index"
+        _ingest_numpy(paths, classified_dir, index_dir, date_filter, args.workers, opts)
+        return
+
     chroma_dir = Path(args.chroma_dir) if args.chroma_dir.strip() else classified_dir.parent / "chroma"
     chroma_dir.mkdir(parents=True, exist_ok=True)
 
-    date_filter = args.date.strip() or None
-    paths = sorted(classified_dir.glob("*.jsonl"))
-    if date_filter:
-        paths = [f for f in paths if f"_{date_filter}_" in f.stem or f.stem.endswith(f"_{date_filter}")]
+    ledger_path = chroma_dir / LEDGER_NAME
+    ledger = {"version": LEDGER_VERSION, "files": {}} if args.rebuild else _load_ledger(ledger_path)
+    entries: dict[str, dict] = ledger["files"]
+    options = opts.signature()
+
+    # Ledger entries in scope whose file no longer exists (under any codec): all their ids are stale.
+    present = {data_stem(fp) for fp in paths}
+    vanished = [
+        stem
+        for stem in entries
+        if stem not in present and (not date_filter or f"_{date_filter}_" in stem or stem.endswith(f"_{date_filter}"))
+    ]
+
+    changed: list[tuple[Path, os.stat_result, str]] = []
+    unchanged = 0
+    for fp in paths:
+        st = fp.stat()
+        entry = entries.get(data_stem(fp))
+        if entry and entry.get("options", IngestOptions().signature()) != options:
+            # Different selection options emit different ids: re-ingest (old ids become stale).
+            changed.append((fp, st, _file_sha1(fp)))
+            continue
+        if entry and entry.get("mtime_ns") == st.st_mtime_ns and entry.get("size") == st.st_size:
+            unchanged += 1
+            continue
+        sha1 = _file_sha1(fp)
+        if entry and entry.get("sha1") == sha1 and entry.get("file") == fp.name:
+            entry["mtime_ns"] = st.st_mtime_ns
+            entry["size"] = st.st_size
+            unchanged += 1
+            continue
+        changed.append((fp, st, sha1))
 
-    if not paths:
-        print("No classified files to ingest.")
+    if not changed and not vanished and not args.rebuild:
+        _save_ledger(ledger_path, ledger)
+        print(f"Chroma up to date: {unchanged} files unchanged.")
         return
 
     import chromadb
 
+    from vector_index.record_store import STORE_NAME, RecordStore
+
     client = chromadb.PersistentClient(path=str(chroma_dir))
+    if args.rebuild:
+        try:
+            client.delete_collection(name=COLLECTION_NAME)
+        except Exception:
+            pass  # collection did not exist
+        (chroma_dir / STORE_NAME).unlink(missing_ok=True)
     collection = client.get_or_create_collection(name=COLLECTION_NAME, metadata={"description": "intraday vectors v1"})
+    store = RecordStore(chroma_dir / STORE_NAME, classified_dir)
 
-    total = 0
-    ids_batch: list[str] = []
-    embeddings_batch: list[list[float]] = []
-    metadatas_batch: list[dict] = []
-
-    for fp in paths:
-        text = fp.read_text(encoding="utf-8")
-        for line in text.strip().splitlines():
-            if not line.strip():
-                continue
-            try:
-                rec = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            seg_id = rec.get("segment_id")
-            closing_ix = rec.get("closing_bar_index")
-            if seg_id is None or closing_ix is None:
-                continue
-            doc_id = f"{seg_id}_{closing_ix}"
-            ids_batch.append(doc_id)
-            embeddings_batch.append(_embed_from_record(rec))
-            metadatas_batch.append(_metadata_from_record(rec))
-
-            if len(ids_batch) >= BATCH_SIZE:
-                collection.upsert(ids=ids_batch, embeddings=embeddings_batch, metadatas=metadatas_batch)
-                total += len(ids_batch)
-                ids_batch, embeddings_batch, metadatas_batch = [], [], []
-
-    if ids_batch:
-        collection.upsert(ids=ids_batch, embeddings=embeddings_batch, metadatas=metadatas_batch)
-        total += len(ids_batch)
+    t0 = time.perf_counter()
+    writer = UpsertWriter(collection, batch_size=args.batch_size, threaded=args.workers > 0)
+    stats = {fp.name: (st, sha1) for fp, st, sha1 in changed}
+    new_entries: dict[str, dict] = {}
+    try:
+        for fp, (ids, embeddings, metadatas, offsets) in _parse_ahead((c[0] for c in changed), args.workers, opts):
+            st, sha1 = stats[fp.name]
+            stem = data_stem(fp)
+            old = entries.get(stem)
+            if old and old.get("file", fp.name) != fp.name:
+                store.drop_file(old["file"])  # same stem, previous codec
+            store.replace_file(fp.name, ids, offsets)
+            stale = sorted(set(_expand_id_ranges(old.get("id_ranges", []))) - set(ids)) if old else []
+            writer.put(FileBatch(stem, ids, embeddings, metadatas, stale))
+            new_entries[stem] = {
+                "file": fp.name,
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "sha1": sha1,
+                "options": options,
+                "id_ranges": _id_ranges(ids),
+            }
+        for stem in vanished:
+            writer.put(FileBatch(stem, stale=_expand_id_ranges(entries[stem].get("id_ranges", []))))
+            store.drop_file(entries[stem].get("file", stem))
+    finally:
+        store.close()
+        try:
+            writer.close()
+        finally:
+            # Record only files whose records fully reached Chroma; the rest are retried next run.
+            for name in writer.done:
+                if name in new_entries:
+                    entries[name] = new_entries[name]
+                else:
+                    entries.pop(name, None)
+            _save_ledger(ledger_path, ledger)
+    elapsed = time.perf_counter() - t0
+    total, deleted = writer.upserted, writer.deleted
+    rate = total / elapsed if elapsed > 0 else 0.0
+    upsert_rate = total / writer.upsert_sec if writer.upsert_sec > 0 else 0.0
 
-    print(f"Ingested {total} records into {chroma_dir} collection '{COLLECTION_NAME}'.")
+    print(
+        f"Ingested {total} records from {len(changed)} changed files into {chroma_dir} collection '{COLLECTION_NAME}' "
+        f"({unchanged} files unchanged, {len(vanished)} vanished, {deleted} stale ids deleted)."
+    )
+    print(
+        f"{elapsed:.2f}s, {rate:.0f} records/s overall, {upsert_rate:.0f} records/s in upsert "
+        f"({writer.upsert_calls} upserts, final batch size {writer.batch_size})."
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,4 @@
+"""Helpers shared by the pipeline tools."""
+from .atomic_output import OutputStats, StagedOutput, same_content
+from .compressed import CODEC_NAMES, codec_of, data_files, data_stem, open_bytes, open_text, read_bytes, with_codec
+from .timeparse import INVALID, epoch_seconds, minute_of_day, parse_time, to_datetime64
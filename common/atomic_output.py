@@ -0,0 +1,108 @@
+"""Diff-aware output directory: build a run's files in a staging dir, then replace only what changed.
+
+    with StagedOutput(classified_dir) as out:
+        write files into out.staging ...
+        stats = out.commit(scope=lambda name: ...)
+
+commit() compares every staged file with the file of the same name in the target (size, then sha1):
+equal -> the staged copy is dropped and the target keeps its inode and mtime; different or new -> moved
+into place with os.replace (atomic, same filesystem: the staging dir is a hidden sibling of the target).
+Target files in scope that the run did not produce are removed. Readers never see a missing or
+half-written file, and downstream caches keyed on mtime (UI listings, chroma, rsync) only see real changes.
+Leaving the block without commit (or on an exception) discards the staging dir.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+STAGING_PREFIX = ".staging-"
+
+
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def same_content(a: Path, b: Path) -> bool:
+    """True if both files have the same size and sha1."""
+    return a.stat().st_size == b.stat().st_size and _sha1(a) == _sha1(b)
+
+
+@dataclass
+class OutputStats:
+    """File names per outcome of one commit."""
+
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    @property
+    def produced(self) -> list[str]:
+        """Every file the run produced (now in the target), sorted."""
+        return sorted(self.added + self.changed + self.unchanged)
+
+    def select(self, keep: Callable[[str], bool]) -> "OutputStats":
+        """The same outcomes restricted to the names keep() accepts (e.g. data files without sidecars)."""
+        return OutputStats(*([n for n in names if keep(n)] for names in (self.added, self.changed, self.unchanged, self.removed)))
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.unchanged)} unchanged, {len(self.removed)} removed"
+        )
+
+
+class StagedOutput:
+    """Staging dir for one output directory (created next to it, removed on commit or exit)."""
+
+    def __init__(self, target: Path):
+        self.target = Path(target)
+        self.target.mkdir(parents=True, exist_ok=True)
+        self.staging = Path(tempfile.mkdtemp(prefix=f".{self.target.name}{STAGING_PREFIX}", dir=self.target.parent))
+        self.stats: OutputStats | None = None
+
+    def commit(self, scope: Callable[[str], bool] | None = None) -> OutputStats:
+        """Move changed/new staged files into the target; remove target files in scope that were not staged.
+
+        scope(name) -> bool: which existing target files this run owns (default: all files of the target).
+        """
+        stats = OutputStats()
+        staged = sorted(p.name for p in self.staging.iterdir() if p.is_file())
+        for name in staged:
+            src, dst = self.staging / name, self.target / name
+            if not dst.is_file():
+                os.replace(src, dst)
+                stats.added.append(name)
+            elif same_content(src, dst):
+                src.unlink()
+                stats.unchanged.append(name)
+            else:
+                os.replace(src, dst)
+                stats.changed.append(name)
+        produced = set(staged)
+        for p in sorted(self.target.iterdir()):
+            if p.is_file() and p.name not in produced and (scope is None or scope(p.name)):
+                p.unlink()
+                stats.removed.append(p.name)
+        self.discard()
+        self.stats = stats
+        return stats
+
+    def discard(self) -> None:
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+    def __enter__(self) -> "StagedOutput":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.discard()
@@ -0,0 +1,168 @@
+"""Transparent compressed storage for the JSONL data dirs (alerts, raw_vectors, classified).
+
+The codec is the file name suffix: `X.jsonl` (none), `X.jsonl.gz` (gzip), `X.jsonl.zst` (zstd). Readers open
+any of them through open_text / open_bytes / read_bytes; writers pick the codec (the tools' --codec flag) and
+add its suffix with with_codec. Names are compared without the suffix (data_stem), so a segment keeps its
+stem whatever it is stored as.
+
+Streams are read and written in BLOCK_SIZE blocks: the compressed file is read with a BLOCK_SIZE buffer and
+the decompressed stream is pulled through a BLOCK_SIZE BufferedReader, so a line iterator costs one
+decompress call per block, not per line. Compressed output is deterministic (gzip header mtime 0), so
+common.atomic_output still sees an unchanged file as unchanged.
+
+gzip is in the standard library; zstd needs `zstandard` (or Python 3.14's compression.zstd) and is only
+imported when a .zst file is opened.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import os
+from pathlib import Path
+
+CODECS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+CODEC_NAMES = tuple(CODECS)
+BLOCK_SIZE = 1 << 20
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def codec_of(path) -> str:
+    """Codec of a file from its name suffix ("none" for plain files)."""
+    name = str(path)
+    for codec, suffix in CODECS.items():
+        if suffix and name.endswith(suffix):
+            return codec
+    return "none"
+
+
+def with_codec(name: str, codec: str) -> str:
+    """name (e.g. "X.jsonl") as stored with codec."""
+    return name + CODECS[codec]
+
+
+def strip_codec(name: str) -> str:
+    """File name without its codec suffix."""
+    suffix = CODECS[codec_of(name)]
+    return name[: -len(suffix)] if suffix else name
+
+
+def data_stem(path) -> str:
+    """Stem of the uncompressed name: X for X.jsonl, X.jsonl.gz and X.jsonl.zst."""
+    return Path(strip_codec(Path(path).name)).stem
+
+
+def data_files(directory: Path, pattern: str) -> list[Path]:
+    """Sorted files matching pattern (e.g. "*.jsonl") in any codec."""
+    directory = Path(directory)
+    return sorted(p for suffix in CODECS.values() for p in directory.glob(pattern + suffix))
+
+
+def data_file(directory: Path, name: str) -> Path | None:
+    """The existing file name (e.g. "X.jsonl") in directory in any codec, plain first; None if there is none."""
+    for suffix in CODECS.values():
+        p = Path(directory) / (name + suffix)
+        if p.is_file():
+            return p
+    return None
+
+
+def codec_available(codec: str) -> bool:
+    if codec != "zstd":
+        return codec in CODECS
+    try:
+        _zstd()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _zstd():
+    """(module, kind): compression.zstd (Python 3.14+) or zstandard."""
+    try:
+        from compression import zstd
+
+        return zstd, "stdlib"
+    except ImportError:
+        pass
+    try:
+        import zstandard
+
+        return zstandard, "zstandard"
+    except ImportError:
+        raise RuntimeError("zstd codec needs the 'zstandard' package (pip install zstandard) or Python 3.14+") from None
+
+
+class _GzipFile(gzip.GzipFile):
+    """GzipFile over its own BLOCK_SIZE-buffered file (closed with it); header mtime 0 for reproducible bytes."""
+
+    def __init__(self, path, mode: str):
+        fileobj = open(path, mode, buffering=BLOCK_SIZE)
+        try:
+            super().__init__(fileobj=fileobj, mode=mode, compresslevel=GZIP_LEVEL, mtime=0)
+        except BaseException:
+            fileobj.close()
+            raise
+        self.myfileobj = fileobj
+
+
+def _zstd_stream(path, mode: str):
+    module, kind = _zstd()
+    if kind == "stdlib":
+        return module.ZstdFile(path, mode, level=ZSTD_LEVEL if mode == "wb" else None)
+    fh = open(path, mode, buffering=BLOCK_SIZE)
+    if mode == "wb":
+        cctx = module.ZstdCompressor(level=ZSTD_LEVEL)
+        return cctx.stream_writer(fh, write_size=BLOCK_SIZE, closefd=True, write_return_read=True)
+    return module.ZstdDecompressor().stream_reader(fh, read_size=BLOCK_SIZE, read_across_frames=True, closefd=True)
+
+
+def open_bytes(path, mode: str = "rb"):
+    """Binary stream of the uncompressed content ("rb" or "wb"), codec from the name."""
+    if mode not in ("rb", "wb"):
+        raise ValueError(f"mode must be 'rb' or 'wb': {mode!r}")
+    codec = codec_of(path)
+    if codec == "none":
+        return open(path, mode)
+    stream = _GzipFile(path, mode) if codec == "gzip" else _zstd_stream(path, mode)
+    if mode == "rb":
+        return io.BufferedReader(stream, buffer_size=BLOCK_SIZE)
+    return io.BufferedWriter(stream, buffer_size=BLOCK_SIZE)
+
+
+def open_text(path, mode: str = "r"):
+    """UTF-8 text stream of the uncompressed content ("r" or "w"), codec from the name."""
+    if mode not in ("r", "w"):
+        raise ValueError(f"mode must be 'r' or 'w': {mode!r}")
+    if codec_of(path) == "none":
+        return open(path, mode, encoding="utf-8")
+    return io.TextIOWrapper(open_bytes(path, mode + "b"), encoding="utf-8")
+
+
+def read_bytes(path) -> bytes:
+    """Whole uncompressed content."""
+    if codec_of(path) == "none":
+        return Path(path).read_bytes()
+    with open_bytes(path) as f:
+        return f.read()
+
+
+def read_text(path) -> str:
+    return read_bytes(path).decode("utf-8")
+
+
+def write_text(path, text: str) -> None:
+    with open_text(path, "w") as f:
+        f.write(text)
+
+
+def data_size(path) -> int:
+    """Uncompressed size in bytes (st_size for plain files; compressed files are streamed through once)."""
+    if codec_of(path) == "none":
+        return os.stat(path).st_size
+    n = 0
+    buf = bytearray(BLOCK_SIZE)
+    with open_bytes(path) as f:
+        while got := f.readinto(buf):
+            n += got
+    return n
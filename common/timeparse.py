@@ -0,0 +1,132 @@
+"""Alert timestamp parsing shared by the splitter, vector_calc, virtual_trades and live_tail.
+
+Bar times are "YYYY-MM-DD HH:MM:SS zzz" (e.g. "2026-02-24 09:30:00 EST", or ISO "2026-02-24T09:30:00");
+the zone suffix is ignored everywhere, times are naive wall-clock. Arrays are parsed without a Python loop: the first 19 characters
+become a fixed-width array of character codes (bytes, or the UCS4 code points of a str array as they are),
+the digit fields are sliced out as columns and combined with NumPy (days from civil date as in H. Hinnant's
+algorithm). Entries that do not match the fixed layout (leading
+whitespace, several spaces, non-ASCII, non-strings) fall back to the scalar parser, which accepts
+`^YYYY-MM-DD(\\s+|T)HH:MM:SS` after strip() and is memoized (the same strings are parsed many times per bar
+stream: sort keys, segment names, RTH checks).
+
+Unparseable values (or impossible dates such as month 13) are None / INVALID / NaT.
+"""
+from __future__ import annotations
+
+import re
+from datetime import datetime
+
+import numpy as np
+
+TIME_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})(?:\s+|T)(\d{2}):(\d{2}):(\d{2})")
+WIDTH = 19  # len("YYYY-MM-DD HH:MM:SS")
+INVALID = np.iinfo(np.int64).min
+_EPOCH = datetime(1970, 1, 1)
+MEMO_SIZE = 1 << 16
+_MEMO: dict[str, datetime | None] = {}
+
+_DIGITS = np.array([0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18])
+_SEPARATORS = np.array([4, 7, 10, 13, 16])
+_SEPARATOR_BYTES = np.frombuffer(b"-- ::", dtype=np.uint8)
+_ISO_SEPARATOR = np.frombuffer(b"\0\0T\0\0", dtype=np.uint8)  # date/time separator may also be "T"
+_DAYS_IN_MONTH = np.array([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def parse_time(s: str) -> datetime | None:
+    """datetime of one time string, or None (not a string, no match, or not a valid date/time). Memoized."""
+    if not s or not isinstance(s, str):
+        return None
+    try:
+        return _MEMO[s]
+    except KeyError:
+        pass
+    dt = _parse_str(s)
+    if len(_MEMO) >= MEMO_SIZE:
+        _MEMO.clear()  # bounded (follow mode runs for days); a clear costs one re-parse per live string
+    _MEMO[s] = dt
+    return dt
+
+
+def _parse_str(s: str) -> datetime | None:
+    m = TIME_RE.match(s.strip())
+    if not m:
+        return None
+    try:
+        return datetime(*map(int, m.groups()))
+    except ValueError:
+        return None
+
+
+def _days_from_civil(y: np.ndarray, m: np.ndarray, d: np.ndarray) -> np.ndarray:
+    y = y - (m <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    doy = (153 * (m + np.where(m > 2, -3, 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _codes(values: np.ndarray) -> np.ndarray | None:
+    """(n, 19) array of the first 19 character codes (0-padded), or None if the values cannot be encoded."""
+    n = len(values)
+    if values.dtype.kind == "U":
+        # UCS4 code points as they are: no encoding pass; non-ASCII simply fails the layout check.
+        width = values.dtype.itemsize // 4
+        codes = values.view(np.uint32).reshape(n, width)[:, :WIDTH]
+        return codes if width >= WIDTH else np.pad(codes, ((0, 0), (0, WIDTH - width)))
+    try:
+        raw = values.astype(f"S{WIDTH}")
+    except UnicodeEncodeError:
+        return None
+    return np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(n, WIDTH)
+
+
+def _fixed_width(codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(epoch seconds, ok) from character codes; ok is False where the layout or the value check fails."""
+    digits = codes[:, _DIGITS].astype(np.int32) - 48
+    seps = codes[:, _SEPARATORS]
+    ok = ((digits >= 0) & (digits <= 9)).all(axis=1) & ((seps == _SEPARATOR_BYTES) | (seps == _ISO_SEPARATOR)).all(axis=1)
+    y = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    mo, d, h, mi, s = (digits[:, k] * 10 + digits[:, k + 1] for k in (4, 6, 8, 10, 12))
+    leap = (y % 4 == 0) & ((y % 100 != 0) | (y % 400 == 0))
+    dim = _DAYS_IN_MONTH[np.clip(mo, 0, 12)] - ((mo == 2) & ~leap)
+    ok &= (y >= 1) & (mo >= 1) & (mo <= 12) & (d >= 1) & (d <= dim) & (h < 24) & (mi < 60) & (s < 60)
+    days = _days_from_civil(y.astype(np.int64), mo, d)
+    secs = days * 86400 + (h * 3600 + mi * 60 + s)
+    return np.where(ok, secs, 0), ok
+
+
+def epoch_seconds(values) -> np.ndarray:
+    """int64 seconds since 1970-01-01 (naive) for each time string; INVALID where unparseable."""
+    arr = np.asarray(values)
+    n = len(arr)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if arr.dtype.kind == "U":
+        strs = np.ones(n, dtype=bool)
+    else:
+        arr = arr.astype(object)
+        strs = np.fromiter((type(v) is str for v in arr), dtype=bool, count=n)
+    codes = _codes(arr)
+    if codes is None:
+        codes = _codes(np.where(strs, arr, "").astype(str))
+    secs, ok = _fixed_width(codes)
+    ok &= strs
+    out = np.where(ok, secs, INVALID)
+    for i in np.flatnonzero(strs & ~ok):
+        dt = _parse_str(arr[i])
+        if dt is not None:
+            out[i] = int((dt - _EPOCH).total_seconds())
+    return out
+
+
+def minute_of_day(values) -> np.ndarray:
+    """int32 minutes since midnight (e.g. 09:30 -> 570) for each time string; -1 where unparseable."""
+    secs = epoch_seconds(values)
+    return np.where(secs == INVALID, -1, (secs % 86400) // 60).astype(np.int32)
+
+
+def to_datetime64(values) -> np.ndarray:
+    """datetime64[s] for each time string; NaT where unparseable."""
+    secs = epoch_seconds(values)
+    return np.where(secs == INVALID, np.datetime64("NaT", "s"), secs.astype("datetime64[s]"))
@@ -1,14 +1,63 @@
-"""Run daily_alerts_splitter: clean raw_vectors, then split each alerts file by revDir edges."""
+"""Run daily_alerts_splitter: split each alerts file by revDir edges, resuming from per-file checkpoints (--full: re-split everything, replacing only changed files)."""
 import argparse
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from .splitter import run_file
+from artifact_catalog import ArtifactCatalog, code_version, register_outputs
+from common.atomic_output import StagedOutput
+from common.compressed import CODEC_NAMES, codec_available, data_file, data_files, data_stem
+
+from .incremental import CHECKPOINT_DIRNAME, SplitResult, split_incremental, unit_raw_files
 
 DEFAULT_ALERTS = os.environ.get("ALERTS_DIR", "")
 
 
+def _follow(args, alerts_dir: Path) -> None:
+    """Run follow mode, in --jobs processes each owning a shard of the alerts files."""
+    import multiprocessing
+
+    from live_tail import follow
+
+    live_dir = Path(args.live_dir) if args.live_dir else alerts_dir.parent / "live"
+    kwargs = dict(
+        watcher=args.watcher,
+        interval=args.poll_interval,
+        date=args.date.strip() or None,
+        stats_every=args.stats_every,
+        idle_exit=args.idle_exit,
+    )
+    print(f"Following {alerts_dir} -> {live_dir} (Ctrl-C to stop)", flush=True)
+    jobs = max(1, args.jobs)
+    if jobs == 1:
+        follow(alerts_dir, live_dir, **kwargs)
+        return
+    procs = [
+        multiprocessing.Process(target=follow, args=(alerts_dir, live_dir), kwargs=dict(kwargs, shard=(i, jobs)))
+        for i in range(jobs)
+    ]
+    for proc in procs:
+        proc.start()
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.join()
+
+
+def _split_one(
+    path: Path, raw_vectors_dir: Path, checkpoint_dir: Path, version: str, codec: str = "none"
+) -> tuple[SplitResult, list[str]]:
+    """Split one alerts file (top-level so worker processes can pickle it). Returns (result, sanity messages)."""
+    messages: list[str] = []
+    res = split_incremental(
+        path, raw_vectors_dir, data_stem(path), checkpoint_dir, code=version, log_err=messages.append, codec=codec
+    )
+    return res, messages
+
+
 def main() -> None:
     p = argparse.ArgumentParser(description="Split alerts JSONL into raw_vectors by revDir edges.")
     p.add_argument(
@@ -21,39 +70,138 @@ def main() -> None:
         default="",
         help="Process only this YYMMDD; if set, only remove raw_vectors for this date and only process matching alert files.",
     )
+    p.add_argument(
+        "--full",
+        action="store_true",
+        help="Drop checkpoints (or the --date ones) and re-split every file; only changed raw_vectors files are replaced.",
+    )
+    p.add_argument(
+        "--follow",
+        action="store_true",
+        help="Tail the alerts files instead of splitting once: live classified records and trade signals under --live-dir.",
+    )
+    p.add_argument("--live-dir", default="", help="Follow-mode output folder (default: live/ next to the alerts folder).")
+    p.add_argument("--watcher", default="poll", choices=["poll", "watchdog"], help="Follow mode: how changes are detected.")
+    p.add_argument("--poll-interval", type=float, default=0.01, help="Follow mode: seconds between directory polls (default 0.01).")
+    p.add_argument("--stats-every", type=float, default=60.0, help="Follow mode: print latency stats every N seconds (0 = only at exit).")
+    p.add_argument("--idle-exit", type=float, default=None, help="Follow mode: stop after N seconds without a change.")
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes: files are split in parallel, largest first (follow mode: sharded across them).",
+    )
+    p.add_argument(
+        "--codec",
+        default="none",
+        choices=CODEC_NAMES,
+        help="Storage codec of the raw_vectors files written (.jsonl, .jsonl.gz, .jsonl.zst); any codec is read.",
+    )
     args = p.parse_args()
+    if not codec_available(args.codec):
+        p.error(f"--codec {args.codec}: codec not available (zstd needs the zstandard package)")
     if not args.alerts_dir:
         p.error("Set --alerts-dir or ALERTS_DIR")
     alerts_dir = Path(args.alerts_dir)
     if not alerts_dir.is_dir():
         print(f"Alerts dir not found: {alerts_dir}", file=sys.stderr)
         sys.exit(1)
+    if args.follow:
+        _follow(args, alerts_dir)
+        return
     raw_vectors_dir = alerts_dir.parent / "raw_vectors"
+    checkpoint_dir = alerts_dir.parent / CHECKPOINT_DIRNAME
     date_filter = args.date.strip() if args.date else None
 
-    if raw_vectors_dir.exists():
-        if date_filter:
-            for f in raw_vectors_dir.iterdir():
-                if f.is_file() and (f"_{date_filter}_" in f.stem or f.stem.endswith(f"_{date_filter}")):
-                    f.unlink()
-        else:
-            for f in raw_vectors_dir.iterdir():
-                if f.is_file():
-                    f.unlink()
-    else:
-        raw_vectors_dir.mkdir(parents=True, exist_ok=True)
+    def in_date(stem: str) -> bool:
+        return not date_filter or f"_{date_filter}_" in stem or stem.endswith(f"_{date_filter}")
 
-    alert_files = sorted(alerts_dir.glob("*.json"))
-    if date_filter:
-        alert_files = [p for p in alert_files if f"_{date_filter}" in p.stem or p.stem.endswith(f"_{date_filter}")]
-    total = 0
-    for path in alert_files:
-        written = run_file(path, raw_vectors_dir, path.stem)
-        total += len(written)
-        if written:
-            print(f"{path.name} -> {len(written)} vectors")
-    print(f"Wrote {total} vector files to {raw_vectors_dir}")
+    # --full splits into a staging dir; only segment files whose bytes changed replace raw_vectors at the end.
+    # Its checkpoints are staged too and committed after the raw files: a run killed before the commit
+    # leaves no checkpoint pointing at raw files it never wrote, so the next run re-splits.
+    staged = StagedOutput(raw_vectors_dir) if args.full else None
+    if args.full and checkpoint_dir.exists():
+        for f in checkpoint_dir.iterdir():
+            if f.is_file() and in_date(f.stem):
+                f.unlink()
+    staged_ck = StagedOutput(checkpoint_dir) if args.full else None
+    raw_vectors_dir.mkdir(parents=True, exist_ok=True)
+    out_dir = staged.staging if staged is not None else raw_vectors_dir
+    ck_dir = staged_ck.staging if staged_ck is not None else checkpoint_dir
 
+    alert_files = data_files(alerts_dir, "*.json")
+    if date_filter:
+        alert_files = [p for p in alert_files if f"_{date_filter}" in data_stem(p) or data_stem(p).endswith(f"_{date_filter}")]
+    version = code_version("daily_alerts_splitter")
+    all_written = []
+    removed: set[str] = set()
+    if checkpoint_dir.is_dir():
+        # Alerts files that are gone: drop their segments and checkpoints.
+        for ck in checkpoint_dir.glob("*.json"):
+            if in_date(ck.stem) and data_file(alerts_dir, f"{ck.stem}.json") is None:
+                for f in unit_raw_files(raw_vectors_dir, ck.stem):
+                    f.unlink()
+                    removed.add(data_stem(f))
+                ck.unlink()
+    modes: dict[str, int] = {}
+    n_warnings = 0
+    jobs = max(1, args.jobs)
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 and len(alert_files) > 1 else None
+    try:
+        if pool is not None:
+            # Largest files first so a big day does not start last; results are still reported in name order.
+            by_size = sorted(alert_files, key=lambda a: a.stat().st_size, reverse=True)
+            futures = {a: pool.submit(_split_one, a, out_dir, ck_dir, version, args.codec) for a in by_size}
+        for path in alert_files:
+            if pool is not None:
+                res, messages = futures[path].result()
+            else:
+                res, messages = _split_one(path, out_dir, ck_dir, version, args.codec)
+            for msg in messages:
+                print(msg, file=sys.stderr)
+            n_warnings += len(messages)
+            modes[res.mode] = modes.get(res.mode, 0) + 1
+            all_written.extend(res.written)
+            removed.update(res.removed)
+            if res.written:
+                print(f"{path.name} -> {len(res.written)} vectors ({res.mode})", flush=True)
+    except BaseException:
+        if staged is not None:
+            staged.discard()
+            staged_ck.discard()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    files_note = ""
+    if staged is not None:
+        try:
+            stats = staged.commit(lambda name: in_date(data_stem(name)))
+            staged_ck.commit(lambda name: in_date(Path(name).stem))
+        finally:
+            staged.discard()
+            staged_ck.discard()
+        all_written = [raw_vectors_dir / p.name for p in all_written]
+        files_note = f"; files {stats.summary()}"
+    if args.full:
+        register_outputs(
+            "raw",
+            raw_vectors_dir,
+            all_written,
+            stage="daily_alerts_splitter",
+            version=version,
+            full=not date_filter,
+            date=date_filter,
+        )
+    else:
+        with ArtifactCatalog.for_dir(raw_vectors_dir) as cat:
+            cat.forget("raw", raw_vectors_dir, stems=removed - {data_stem(p) for p in all_written})
+            cat.register("raw", all_written, stage="daily_alerts_splitter", version=version)
+    summary = ", ".join(f"{n} {mode}" for mode, n in sorted(modes.items()))
+    print(
+        f"Wrote {len(all_written)} vector files to {raw_vectors_dir} ({summary or 'no alerts files'}),"
+        f" {n_warnings} sanity warnings{files_note}"
+    )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,256 @@
+"""Resumable splitting of append-only alerts files.
+
+A checkpoint per alerts file (split_checkpoints/{unit}.json, sibling of raw_vectors) records how far the
+file was read and the splitter state at that point: the (bar_index, event) dedup keys, the sort key of the
+last bar, and the bars of the still-open trailing segment. A rerun parses only the bytes appended since,
+writes the segments they close and rewrites the open trailing segment(s); closed segment files are never
+rewritten.
+
+The result is the same as run_file on the whole file. A full re-split (with a fresh checkpoint) happens
+when the checkpoint cannot be trusted: the file shrank or its head changed (rewritten), the splitter code
+changed, one of the unit's raw files is missing, or an appended bar sorts before bars already split.
+Only complete lines are read; an unterminated last line waits for its newline. Compressed alerts files
+(.json.gz / .json.zst, see common.compressed) are tracked by offsets into their uncompressed content.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from common.compressed import data_files, data_size, data_stem, open_bytes
+
+from .splitter import _parse_time, _rev_dir, _time_to_hhmm, bar_sort_key, is_edge, write_segment
+
+CHECKPOINT_DIRNAME = "split_checkpoints"
+CHECKPOINT_VERSION = 1
+HEAD_BYTES = 4096
+RTH_CLOSE_HHMM = 1600
+SEGMENT_SUFFIX_RE = re.compile(r"^\d{4}_\d{4}$")
+
+
+@dataclass
+class SplitState:
+    """Checkpoint of one alerts file. open_bars: bars of the trailing segment (all bars while no edge was seen)."""
+
+    offset: int = 0
+    head_sha1: str = ""
+    code: str = ""
+    last_key: list = field(default_factory=lambda: [None, 0])
+    seen: list = field(default_factory=list)
+    edges_seen: bool = False
+    start_dir: int | None = None
+    open_bars: list = field(default_factory=list)
+    open_files: list = field(default_factory=list)
+    closed_files: list = field(default_factory=list)
+    version: int = CHECKPOINT_VERSION
+
+
+@dataclass
+class SplitResult:
+    mode: str  # "full", "append" or "unchanged"
+    written: list[Path]
+    removed: list[str]  # stems deleted and not rewritten
+    files: list[str]  # every raw file of the unit after the run
+
+
+def checkpoint_path(checkpoint_dir: Path, unit: str) -> Path:
+    return checkpoint_dir / f"{unit}.json"
+
+
+def load_checkpoint(path: Path) -> SplitState | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        state = SplitState(**data)
+    except (OSError, json.JSONDecodeError, TypeError):
+        return None
+    return state if state.version == CHECKPOINT_VERSION else None
+
+
+def save_checkpoint(path: Path, state: SplitState) -> None:
+    """Atomic write (tmp + os.replace); written after the raw files, so a crash only causes a re-split."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(asdict(state), ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _key_json(key: tuple[datetime, int]) -> list:
+    t, bi = key
+    return [None if t == datetime.min else t.isoformat(), bi]
+
+
+def _key_from_json(key: list) -> tuple[datetime, int]:
+    return (datetime.fromisoformat(key[0]) if key[0] else datetime.min, key[1])
+
+
+def _parse_lines(data: bytes) -> list[dict]:
+    bars = []
+    for line in data.decode("utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            bars.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return bars
+
+
+def _dedup_new(bars: list[dict], seen: set[tuple]) -> list[dict]:
+    """Drop bars whose (bar_index, event) is in seen (adding the rest). First occurrence wins, as in _dedup_bars."""
+    out = []
+    for b in bars:
+        bi = b.get("bar_index")
+        if bi is not None:
+            key = (bi, b.get("event"))
+            if key in seen:
+                continue
+            seen.add(key)
+        out.append(b)
+    return out
+
+
+def _advance(state: SplitState, bars: list[dict]) -> list[list[dict]]:
+    """Feed sorted bars through the segment rules of segments_from_edges. Returns segments they close."""
+    closed = []
+    for bar in bars:
+        if not state.edges_seen:
+            if is_edge(bar):
+                # The first edge opens the first segment; bars before it belong to no segment.
+                state.edges_seen = True
+                state.start_dir = _rev_dir(bar)
+                state.open_bars = [bar]
+            else:
+                state.open_bars.append(bar)
+            continue
+        state.open_bars.append(bar)
+        if is_edge(bar) and _rev_dir(bar) != state.start_dir:
+            closed.append(state.open_bars)
+            state.start_dir = _rev_dir(bar)
+            state.open_bars = [bar]
+    return closed
+
+
+def open_segments(state: SplitState) -> list[list[dict]]:
+    """The trailing segments as run_file would write them now.
+
+    Without an edge: the whole day. Otherwise the open bars up to the last bar <= 16:00 when one follows the
+    start edge, else to the last bar; if that end bar is itself an (same-direction) edge, segments_from_edges
+    starts another segment there, running to the last bar (and once more if that is an edge too).
+    """
+    bars = state.open_bars
+    if not state.edges_seen:
+        return [bars] if bars else []
+    last_rth = None
+    for i in range(len(bars) - 1, 0, -1):
+        dt = _parse_time(bars[i].get("time"))
+        if dt is not None and int(_time_to_hhmm(dt)) <= RTH_CLOSE_HHMM:
+            last_rth = i
+            break
+    segs = []
+    start = 0
+    while True:
+        end = last_rth if last_rth is not None and last_rth > start else len(bars) - 1
+        segs.append(bars[start : end + 1])
+        if end == start or not is_edge(bars[end]):
+            return segs
+        start = end
+
+
+def _head_sha1(path: Path, n: int) -> str:
+    with open_bytes(path) as f:
+        return hashlib.sha1(f.read(min(n, HEAD_BYTES))).hexdigest()
+
+
+def _usable(state: SplitState | None, alerts_path: Path, raw_dir: Path, size: int, code: str) -> bool:
+    if state is None or state.code != code or size < state.offset:
+        return False
+    if _head_sha1(alerts_path, state.offset) != state.head_sha1:
+        return False
+    return all((raw_dir / name).is_file() for name in state.closed_files + state.open_files)
+
+
+def _read_new(alerts_path: Path, state: SplitState) -> tuple[list[dict], int, set[tuple]]:
+    """Bars in the complete lines after state.offset, deduplicated against state.seen and sorted.
+    Returns (bars, bytes consumed, updated dedup keys)."""
+    with open_bytes(alerts_path) as f:
+        f.seek(state.offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    seen = {tuple(k) for k in state.seen}
+    bars = _dedup_new(_parse_lines(data[:end]), seen)
+    bars.sort(key=bar_sort_key)
+    return bars, end, seen
+
+
+def unit_raw_files(raw_vectors_dir: Path, parent_basename: str) -> list[Path]:
+    """Segment files {parent_basename}_{start}_{end}.jsonl (any codec) of one alerts file."""
+    n = len(parent_basename) + 1
+    return [
+        p for p in data_files(raw_vectors_dir, f"{parent_basename}_*.jsonl") if SEGMENT_SUFFIX_RE.match(data_stem(p)[n:])
+    ]
+
+
+def split_incremental(
+    alerts_path: Path,
+    raw_vectors_dir: Path,
+    parent_basename: str,
+    checkpoint_dir: Path,
+    code: str = "",
+    log_err=None,
+    codec: str = "none",
+) -> SplitResult:
+    """Bring the raw segments of one alerts file up to date, reading only what was appended since the checkpoint.
+
+    code: splitter code version; a checkpoint written by other code is not reused.
+    log_err: receives the sanity messages of the segments written (default stderr).
+    codec: storage codec of the segment files written (closed files keep the codec they were written with).
+    """
+    raw_vectors_dir.mkdir(parents=True, exist_ok=True)
+    ck_path = checkpoint_path(checkpoint_dir, parent_basename)
+    state = load_checkpoint(ck_path)
+    mode = "full"
+    if _usable(state, alerts_path, raw_vectors_dir, data_size(alerts_path), code):
+        new_bars, end, seen = _read_new(alerts_path, state)
+        if new_bars and bar_sort_key(new_bars[0]) < _key_from_json(state.last_key):
+            pass  # an appended bar sorts before bars already split: closed segments may change
+        elif not new_bars:
+            if end:
+                state.offset += end
+                state.head_sha1 = _head_sha1(alerts_path, state.offset)
+                state.seen = sorted(seen, key=lambda k: (str(k[0]), str(k[1])))
+                save_checkpoint(ck_path, state)
+            return SplitResult("unchanged", [], [], state.closed_files + state.open_files)
+        else:
+            mode = "append"
+    if mode == "full":
+        state = SplitState(code=code)
+        new_bars, end, seen = _read_new(alerts_path, state)
+        old = {p.name for p in unit_raw_files(raw_vectors_dir, parent_basename)}
+    else:
+        old = set(state.open_files)
+
+    closed = _advance(state, new_bars)
+    written = [write_segment(seg, raw_vectors_dir, parent_basename, log_err, codec) for seg in closed]
+    state.closed_files.extend(p.name for p in written)
+    state.open_files = [
+        write_segment(seg, raw_vectors_dir, parent_basename, log_err, codec).name for seg in open_segments(state)
+    ]
+    written.extend(raw_vectors_dir / name for name in state.open_files)
+
+    removed = sorted(old - set(state.closed_files) - set(state.open_files))
+    for name in removed:
+        (raw_vectors_dir / name).unlink(missing_ok=True)
+
+    state.offset += end
+    state.head_sha1 = _head_sha1(alerts_path, state.offset)
+    state.seen = sorted(seen, key=lambda k: (str(k[0]), str(k[1])))
+    if new_bars:
+        state.last_key = _key_json(bar_sort_key(new_bars[-1]))
+    save_checkpoint(ck_path, state)
+    return SplitResult(mode, written, [data_stem(n) for n in removed], state.closed_files + state.open_files)
@@ -1,23 +1,19 @@
 """Split one alerts JSONL file into vector files by revDir edges. No feature calc."""
 import json
 import math
-import re
 import sys
 from datetime import datetime
 from pathlib import Path
 
-# Alert time format: "yyyy-MM-dd HH:mm:ss z" e.g. "2026-02-22 14:30:00 UTC"
-TIME_PATTERN = re.compile(r"^(\d{4})-(\d{2})-(\d{2})\s+(\d{2}):(\d{2}):(\d{2})")
+import numpy as np
 
+from common.compressed import open_text, with_codec
 
-def _parse_time(s: str) -> datetime | None:
-    if not s or not isinstance(s, str):
-        return None
-    m = TIME_PATTERN.match(s.strip())
-    if not m:
-        return None
-    y, mo, d, h, mi, sec = map(int, m.groups())
-    return datetime(y, mo, d, h, mi, sec)
+# Alert time format: "yyyy-MM-dd HH:mm:ss z" e.g. "2026-02-22 14:30:00 UTC" (parsed by common.timeparse)
+from common.timeparse import epoch_seconds, minute_of_day
+from common.timeparse import parse_time as _parse_time
+
+RTH_CLOSE_MIN = 16 * 60
 
 
 def _time_to_hhmm(dt: datetime) -> str:
@@ -51,10 +47,17 @@ def _dedup_bars(bars: list[dict]) -> list[dict]:
     return out
 
 
+def bar_sort_key(b: dict) -> tuple[datetime, int]:
+    """Sort by time, then bar_index (unparseable time first, missing bar_index as 0)."""
+    t = _parse_time(b.get("time"))
+    bi = b.get("bar_index")
+    return (t or datetime.min, bi if isinstance(bi, int) else 0)
+
+
 def load_bars(path: Path) -> list[dict]:
-    """Load JSONL file; dedup then return list of bar dicts sorted by time (then bar_index)."""
+    """Load JSONL file (plain, .gz or .zst); dedup then return list of bar dicts sorted by time (then bar_index)."""
     bars = []
-    with open(path, "r", encoding="utf-8") as f:
+    with open_text(path) as f:
         for line in f:
             line = line.strip()
             if not line:
@@ -64,14 +67,12 @@ def load_bars(path: Path) -> list[dict]:
             except json.JSONDecodeError:
                 continue
     bars = _dedup_bars(bars)
-    # Sort by time, then bar_index
-    def key(b):
-        t = _parse_time(b.get("time"))
-        bi = b.get("bar_index")
-        return (t or datetime.min, bi if isinstance(bi, int) else 0)
-
-    bars.sort(key=key)
-    return bars
+    if not bars:
+        return bars
+    # Same order as sorted(bars, key=bar_sort_key), with the times parsed in one vectorized pass (lexsort is stable).
+    secs = epoch_seconds([b.get("time") for b in bars])
+    bar_ix = np.array([bi if isinstance(bi, int) else 0 for bi in (b.get("bar_index") for b in bars)], dtype=np.int64)
+    return [bars[i] for i in np.lexsort((bar_ix, secs))]
 
 
 def edge_indices(bars: list[dict]) -> list[int]:
@@ -87,14 +88,9 @@ def segments_from_edges(bars: list[dict], edge_ix: list[int]) -> list[list[dict]
     if not edge_ix:
         return [bars] if bars else []
     # Last RTH bar (16:00) index, if present; used when we run to end-of-day without a closing edge.
-    last_rth_ix: int | None = None
-    for idx, b in enumerate(bars):
-        dt = _parse_time(b.get("time")) if isinstance(b, dict) else None
-        if dt is None:
-            continue
-        hhmm = int(_time_to_hhmm(dt))
-        if hhmm <= 1600:
-            last_rth_ix = idx
+    minutes = minute_of_day([b.get("time") if isinstance(b, dict) else None for b in bars])
+    rth = np.flatnonzero((minutes >= 0) & (minutes <= RTH_CLOSE_MIN))
+    last_rth_ix: int | None = int(rth[-1]) if rth.size else None
     segments = []
     k = 0
     while k < len(edge_ix):
@@ -176,31 +172,43 @@ def sanity_check_segment(
             log_err(f"[sanity] {out_name}: down vector (revDir=-1) but REV_avwap start ({start_avwap}) <= end ({end_avwap})")
 
 
-def run_file(alerts_path: Path, raw_vectors_dir: Path, parent_basename: str) -> list[Path]:
-    """Split one alerts file into vector files. Returns paths written."""
+def segment_name(parent_basename: str, seg: list[dict]) -> str:
+    """Raw vector file name: {parent_basename}_{start_hhmm}_{end_hhmm}.jsonl from the first and last bar times."""
+    t0 = _parse_time(seg[0].get("time"))
+    t1 = _parse_time(seg[-1].get("time"))
+    start_hhmm = _time_to_hhmm(t0) if t0 else "0000"
+    end_hhmm = _time_to_hhmm(t1) if t1 else "0000"
+    return f"{parent_basename}_{start_hhmm}_{end_hhmm}.jsonl"
+
+
+def write_segment(seg: list[dict], raw_vectors_dir: Path, parent_basename: str, log_err=None, codec: str = "none") -> Path:
+    """Sanity-check and write one segment (one bar per line). Returns its path. log_err: see sanity_check_segment.
+    codec: storage codec (common.compressed), e.g. "gzip" writes {name}.jsonl.gz."""
+    out_name = segment_name(parent_basename, seg)
+    sanity_check_segment(seg, out_name, log_err)
+    out_path = raw_vectors_dir / with_codec(out_name, codec)
+    with open_text(out_path, "w") as f:
+        for obj in seg:
+            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    return out_path
+
+
+def split_segments(alerts_path: Path) -> list[list[dict]]:
+    """Load one alerts file and return its non-empty segments (bar dicts), as run_file writes them."""
     bars = load_bars(alerts_path)
     if not bars:
         return []
     edge_ix = edge_indices(bars)
     if not edge_ix:
         # No edges: one segment = full day
-        segs = [bars]
-    else:
-        segs = segments_from_edges(bars, edge_ix)
-    written = []
+        return [bars]
+    return [seg for seg in segments_from_edges(bars, edge_ix) if seg]
+
+
+def run_file(alerts_path: Path, raw_vectors_dir: Path, parent_basename: str, log_err=None, codec: str = "none") -> list[Path]:
+    """Split one alerts file into vector files. Returns paths written. log_err receives sanity messages (default stderr)."""
+    segs = split_segments(alerts_path)
+    if not segs:
+        return []
     raw_vectors_dir.mkdir(parents=True, exist_ok=True)
-    for seg in segs:
-        if not seg:
-            continue
-        t0 = _parse_time(seg[0].get("time"))
-        t1 = _parse_time(seg[-1].get("time"))
-        start_hhmm = _time_to_hhmm(t0) if t0 else "0000"
-        end_hhmm = _time_to_hhmm(t1) if t1 else "0000"
-        out_name = f"{parent_basename}_{start_hhmm}_{end_hhmm}.jsonl"
-        sanity_check_segment(seg, out_name)
-        out_path = raw_vectors_dir / out_name
-        with open(out_path, "w", encoding="utf-8") as f:
-            for obj in seg:
-                f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-        written.append(out_path)
-    return written
+    return [write_segment(seg, raw_vectors_dir, parent_basename, log_err, codec) for seg in segs]
@@ -0,0 +1,4 @@
+"""Follow mode: tail growing alerts files into live classified records and trade signals."""
+from .follow import LiveStats, follow
+from .session import FileTail, UnitSession
+from .watchers import WATCHERS, PollingWatcher, make_watcher
@@ -0,0 +1,131 @@
+"""Follow loop: watch the alerts dir, feed new lines to each unit's session, append outputs, track latency.
+
+Latency per emitted record:
+  line->record  record written minus the alerts file's mtime when its new lines were read (the append time
+                of the newest line), i.e. watcher delay + compute + write;
+  compute       record written minus the moment the change was picked up.
+Lines already in a file when following starts are replayed (outputs are rebuilt) and not measured.
+"""
+from __future__ import annotations
+
+import json
+import re
+import time
+import zlib
+from pathlib import Path
+
+from vector_index.service import LatencyHistogram
+
+from .session import FileTail, UnitSession
+from .watchers import make_watcher
+
+UNIT_RE = re.compile(r"^[A-Za-z0-9]+_(\d{6})_\w+$")
+
+
+class LiveStats:
+    """Counters and latency histograms of one follow run."""
+
+    def __init__(self) -> None:
+        self.e2e = LatencyHistogram()
+        self.compute = LatencyHistogram()
+        self.records = 0
+        self.replayed = 0
+        self.bad_lines = 0
+        self.resets = 0
+
+    def line(self, sessions: dict[str, UnitSession]) -> str:
+        e, c = self.e2e, self.compute
+        closed = sum(s.segments_closed for s in sessions.values())
+        return (
+            f"live: {len(sessions)} files, {self.records} records ({self.replayed} replayed), {closed} segments closed"
+            f" | line->record p50 {e.percentile(50):g} p95 {e.percentile(95):g} max {e.max_ms:.1f} ms"
+            f" | compute p50 {c.percentile(50):g} p95 {c.percentile(95):g} max {c.max_ms:.1f} ms"
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "records": self.records,
+            "replayed": self.replayed,
+            "bad_lines": self.bad_lines,
+            "resets": self.resets,
+            "line_to_record": self.e2e.to_dict(),
+            "compute": self.compute.to_dict(),
+        }
+
+
+def in_shard(unit: str, shard: tuple[int, int]) -> bool:
+    """Stable unit -> worker assignment (crc32, not hash(), so every process agrees)."""
+    i, n = shard
+    return n <= 1 or zlib.crc32(unit.encode()) % n == i
+
+
+def follow(
+    alerts_dir: Path,
+    out_dir: Path,
+    watcher: str = "poll",
+    interval: float = 0.01,
+    date: str | None = None,
+    stats_every: float = 60.0,
+    idle_exit: float | None = None,
+    shard: tuple[int, int] = (0, 1),
+) -> LiveStats:
+    """Follow {ticker}_{yymmdd}_{tf}.json files in alerts_dir until interrupted (or idle for idle_exit seconds)."""
+    alerts_dir, out_dir = Path(alerts_dir), Path(out_dir)
+    stats = LiveStats()
+    sessions: dict[str, UnitSession] = {}
+    tails: dict[str, FileTail] = {}
+    existing = {p.name for p in alerts_dir.glob("*.json")}
+    w = make_watcher(watcher, alerts_dir, "*.json", interval)
+    last_change = last_print = time.monotonic()
+    try:
+        while True:
+            changed = w.changes(timeout=0.5)
+            now = time.monotonic()
+            if changed:
+                last_change = now
+            for path in changed:
+                unit = path.stem
+                m = UNIT_RE.match(unit)
+                if not m or (date and m.group(1) != date) or not in_shard(unit, shard):
+                    continue
+                t_pick = time.time_ns()
+                replay = unit not in sessions and path.name in existing
+                if unit not in sessions:
+                    sessions[unit] = UnitSession(unit, out_dir)
+                    tails[unit] = FileTail(path)
+                session = sessions[unit]
+                try:
+                    lines, truncated, mtime_ns = tails[unit].read()
+                except FileNotFoundError:
+                    continue
+                if truncated:
+                    session.reset()
+                    stats.resets += 1
+                for line in lines:
+                    try:
+                        bar = json.loads(line)
+                    except json.JSONDecodeError:
+                        stats.bad_lines += 1
+                        continue
+                    if isinstance(bar, dict):
+                        session.add_bar(bar)
+                n = session.flush()
+                t_done = time.time_ns()
+                stats.records += n
+                if replay or truncated:
+                    stats.replayed += n
+                    continue
+                for _ in range(n):
+                    stats.e2e.observe(max(0, t_done - mtime_ns) / 1e6)
+                    stats.compute.observe((t_done - t_pick) / 1e6)
+            if stats_every and now - last_print >= stats_every:
+                print(stats.line(sessions), flush=True)
+                last_print = now
+            if idle_exit is not None and now - last_change >= idle_exit:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        w.close()
+        print(stats.line(sessions), flush=True)
+    return stats
@@ -0,0 +1,280 @@
+"""Per-alerts-file state for follow mode: incremental split, per-bar classified records, running best trade.
+
+Segments follow daily_alerts_splitter.segments_from_edges: a segment opens at the first revDir edge and
+closes at the next edge whose direction differs from its start; that edge also opens the next segment.
+Each bar added to the open segment gets its record at once (features on the segment's bars so far, scored
+incrementally), so for a closed segment the live records equal the batch classified records except
+segment_id (the end time is unknown while the segment is open) and next_* (needs the following segment).
+
+Two batch rules depend on the future and are applied by holding bars back instead of guessing:
+  - bars before the first edge are not emitted (batch keeps them only when the whole day has no edge);
+  - bars after 16:00 in a segment that already has a later RTH bar are held until a closing edge arrives
+    (batch ends a segment that never closes at the last bar <= 16:00).
+Bars are expected in time order, as the alerts writer appends them. The open segment's bars are kept as
+growing column buffers (BarColumns), so a new bar does not rebuild the segment's DataFrame from its dicts.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from common.timeparse import parse_time
+from daily_alerts_splitter.splitter import _rev_dir, _time_to_hhmm, is_edge
+from vector_calc.__main__ import record_line
+from vector_calc.calc import IncrementalScorer, compute_record_at
+from virtual_trades.finder import RunningBestTrade
+
+RTH_CLOSE_HHMM = 1600
+OUTPUT_DIRS = ("classified", "trades", "segments")
+
+
+class FileTail:
+    """New complete lines of a growing file. A trailing line without its newline stays buffered."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.offset = 0
+        self._partial = b""
+
+    def read(self) -> tuple[list[bytes], bool, int]:
+        """(new complete lines, truncated, file mtime_ns). truncated: the file shrank, reading restarted at 0."""
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            truncated = st.st_size < self.offset
+            if truncated:
+                self.offset = 0
+                self._partial = b""
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        return [line for line in lines if line.strip()], truncated, st.st_mtime_ns
+
+
+def _hhmm(bar: dict) -> int | None:
+    dt = parse_time(bar.get("time"))
+    return int(_time_to_hhmm(dt)) if dt else None
+
+
+_MISSING = object()
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def _value_kind(v) -> str:
+    if v is None or v is _MISSING:
+        return "null"
+    if isinstance(v, bool):
+        return "other"
+    if isinstance(v, int):
+        return "int" if _INT64_MIN <= v <= _INT64_MAX else "other"
+    if isinstance(v, float):
+        return "float"
+    return "str" if isinstance(v, str) else "other"
+
+
+# Column kind after adding a value of another kind (the dtype pd.DataFrame(bars) infers for the column).
+_MERGE = {
+    ("int", "float"): "float",
+    ("int", "null"): "float",
+    ("float", "int"): "float",
+    ("float", "null"): "float",
+    ("null", "int"): "float",
+    ("null", "float"): "float",
+}
+_DTYPES = {"int": np.int64, "float": np.float64, "str": object, "null": np.float64}
+
+
+class BarColumns:
+    """Bars appended one at a time into per-column buffers (capacity doubles), so adding a bar costs
+    O(columns) and frame() only wraps the filled part of the buffers.
+
+    frame() equals pd.DataFrame(bars), the frame load_segment builds for the batch run, for columns of
+    ints, floats (None or a missing key -> NaN) and non-null strings. It returns None once a column holds
+    anything else (bools, nested values, strings with gaps, only nulls); the caller then builds the frame
+    from the dicts.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self._cap = 0
+        self._cols: dict[str, np.ndarray] = {}
+        self._kinds: dict[str, str] = {}
+        self.exact = True
+
+    def _grow(self) -> None:
+        self._cap = max(64, 2 * self._cap)
+        for c, arr in self._cols.items():
+            new = np.empty(self._cap, dtype=arr.dtype)
+            new[: self.n] = arr[: self.n]
+            self._cols[c] = new
+
+    def _set_kind(self, c: str, kind: str) -> None:
+        new = np.full(self._cap, np.nan) if kind == "null" else np.empty(self._cap, dtype=_DTYPES[kind])
+        if c in self._cols:
+            new[: self.n] = self._cols[c][: self.n]
+        self._cols[c] = new
+        self._kinds[c] = kind
+
+    def append(self, bar: dict) -> None:
+        if not self.exact:
+            return
+        if self.n == self._cap:
+            self._grow()
+        for c in bar:
+            if c not in self._cols:
+                self._set_kind(c, "null")  # rows before it lack the key; the value below sets the kind
+        for c, kind in self._kinds.items():
+            v = bar.get(c, _MISSING)
+            vk = _value_kind(v)
+            if vk != kind:
+                new = vk if self.n == 0 else _MERGE.get((kind, vk), "other")
+                if new == "other":
+                    self.exact = False
+                    return
+                self._set_kind(c, new)
+            self._cols[c][self.n] = np.nan if vk == "null" else v
+        self.n += 1
+
+    def frame(self) -> pd.DataFrame | None:
+        if not self.exact or "null" in self._kinds.values():
+            return None
+        # No copy: appends only write rows >= n, and a buffer that grows or changes dtype is replaced.
+        return pd.DataFrame({c: arr[: self.n] for c, arr in self._cols.items()}, copy=False)
+
+
+class LiveSegment:
+    """The open segment of one unit: its emitted bars, scorer, running best trade and held-back bars."""
+
+    def __init__(self, unit: str, ticker: str, date: str, tf: str, first_bar: dict):
+        dt = parse_time(first_bar.get("time"))
+        self.unit = unit
+        self.ticker = ticker
+        self.date = date
+        self.tf = tf
+        self.start_hhmm = _time_to_hhmm(dt) if dt else "0000"
+        self.segment_id = f"{unit}_{self.start_hhmm}"
+        self.start_dir = _rev_dir(first_bar)
+        self.bars: list[dict] = []
+        self.columns = BarColumns()
+        self.pending: list[dict] = []
+        self.has_later_rth = False
+        self.scorer = IncrementalScorer()
+        self.trade = RunningBestTrade(self.segment_id, ticker, date, tf)
+
+    def holds(self, bar: dict) -> bool:
+        """Whether bar must wait for a closing edge (after 16:00 while an RTH bar follows the start)."""
+        if self.pending:
+            return True
+        hhmm = _hhmm(bar)
+        return self.has_later_rth and (hhmm is None or hhmm > RTH_CLOSE_HHMM)
+
+    def emit(self, bar: dict) -> tuple[str, dict | None]:
+        """Add bar to the segment. Returns (classified line, new best trade or None if unchanged)."""
+        k = len(self.bars)
+        self.bars.append(bar)
+        if k >= 1:
+            hhmm = _hhmm(bar)
+            if hhmm is not None and hhmm <= RTH_CLOSE_HHMM:
+                self.has_later_rth = True
+        self.columns.append(bar)
+        df = self.columns.frame()
+        if df is None:
+            df = pd.DataFrame(self.bars)
+        rec = compute_record_at(df, k, self.ticker, self.tf, self.date, self.segment_id)
+        self.scorer.add(rec)
+        changed = self.trade.add(bar)
+        return record_line(rec), (dict(self.trade.best or {}, segment_id=self.segment_id) if changed else None)
+
+    def stem(self) -> str:
+        """Batch raw/classified stem of the segment ({unit}_{start}_{end})."""
+        dt = parse_time(self.bars[-1].get("time"))
+        return f"{self.unit}_{self.start_hhmm}_{_time_to_hhmm(dt) if dt else '0000'}"
+
+
+class UnitSession:
+    """Follow-mode state of one alerts file {ticker}_{yymmdd}_{tf}.json.
+
+    Output (append-only, rebuilt when the session is reset):
+      {out_dir}/classified/{unit}.jsonl  one record per emitted bar (classified format)
+      {out_dir}/trades/{unit}.jsonl      trade signal per change of the open segment's best trade
+      {out_dir}/segments/{unit}.jsonl    one line per closed segment: batch stem, bars, final trade
+    """
+
+    def __init__(self, unit: str, out_dir: Path):
+        self.unit = unit
+        self.ticker, self.date, self.tf = unit.split("_")
+        self.paths = {name: Path(out_dir) / name / f"{unit}.jsonl" for name in OUTPUT_DIRS}
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all state and truncate the outputs (the alerts file is replayed from the start)."""
+        for p in self.paths.values():
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_bytes(b"")
+        self.seen: set[tuple] = set()
+        self.segment: LiveSegment | None = None
+        self.skipped = 0
+        self.segments_closed = 0
+        self._out: dict[str, list[str]] = {name: [] for name in OUTPUT_DIRS}
+
+    def _emit(self, seg: LiveSegment, bar: dict) -> None:
+        line, trade = seg.emit(bar)
+        self._out["classified"].append(line)
+        if trade is not None:
+            self._out["trades"].append(json.dumps(trade, ensure_ascii=False) + "\n")
+
+    def _close(self, seg: LiveSegment) -> None:
+        trade = dict(seg.trade.best, vector_id=seg.stem()) if seg.trade.best else None
+        info = {
+            "segment_id": seg.segment_id,
+            "stem": seg.stem(),
+            "start_time": seg.bars[0].get("time"),
+            "end_time": seg.bars[-1].get("time"),
+            "bars": len(seg.bars),
+            "trade": trade,
+        }
+        self._out["segments"].append(json.dumps(info, ensure_ascii=False) + "\n")
+        self.segments_closed += 1
+
+    def add_bar(self, bar: dict) -> None:
+        """Feed the next alerts line. Output lines are buffered until flush()."""
+        bi = bar.get("bar_index")
+        if bi is not None:
+            key = (bi, bar.get("event"))
+            if key in self.seen:
+                return
+            self.seen.add(key)
+        seg = self.segment
+        if seg is None:
+            if not is_edge(bar):
+                self.skipped += 1
+                return
+            self.segment = LiveSegment(self.unit, self.ticker, self.date, self.tf, bar)
+            self._emit(self.segment, bar)
+            return
+        if is_edge(bar) and _rev_dir(bar) != seg.start_dir:
+            for b in seg.pending:
+                self._emit(seg, b)
+            self._emit(seg, bar)
+            self._close(seg)
+            self.segment = LiveSegment(self.unit, self.ticker, self.date, self.tf, bar)
+            self._emit(self.segment, bar)
+        elif seg.holds(bar):
+            seg.pending.append(bar)
+        else:
+            self._emit(seg, bar)
+
+    def flush(self) -> int:
+        """Append buffered lines to the output files. Returns classified records written."""
+        n = len(self._out["classified"])
+        for name, lines in self._out.items():
+            if lines:
+                with open(self.paths[name], "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                lines.clear()
+        return n
@@ -0,0 +1,120 @@
+"""File watchers for follow mode: report which alerts files changed since the last call.
+
+Both implement changes(timeout) -> list[Path] and close(). "poll" stats the directory every interval
+seconds (no dependencies, works on network mounts); "watchdog" uses inotify/FSEvents through the optional
+watchdog package. Pick one by name with make_watcher().
+"""
+from __future__ import annotations
+
+import fnmatch
+import os
+import queue
+import time
+from pathlib import Path
+
+
+class PollingWatcher:
+    """Changed files by (mtime_ns, size), found with one scandir per poll."""
+
+    def __init__(self, directory: Path, pattern: str = "*.json", interval: float = 0.01):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.interval = interval
+        self._seen: dict[str, tuple[int, int]] = {}
+        self._next = 0.0
+
+    def _scan(self) -> list[Path]:
+        changed = []
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if not fnmatch.fnmatchcase(e.name, self.pattern):
+                    continue
+                try:
+                    st = e.stat()
+                except FileNotFoundError:
+                    continue
+                sig = (st.st_mtime_ns, st.st_size)
+                if self._seen.get(e.name) != sig:
+                    self._seen[e.name] = sig
+                    changed.append(Path(e.path))
+        return changed
+
+    def changes(self, timeout: float | None = None) -> list[Path]:
+        """Block until at least one file changed or timeout (seconds) passed. Returns changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._next - time.monotonic()
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+            if wait > 0:
+                time.sleep(wait)
+            if time.monotonic() >= self._next:
+                self._next = time.monotonic() + self.interval
+                changed = self._scan()
+                if changed:
+                    return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return []
+
+    def close(self) -> None:
+        pass
+
+
+class WatchdogWatcher:
+    """Changed files from watchdog events (requires: pip install watchdog)."""
+
+    def __init__(self, directory: Path, pattern: str = "*.json", interval: float = 0.01):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError as e:
+            raise RuntimeError("watcher 'watchdog' needs the watchdog package: pip install watchdog") from e
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self._events: queue.Queue[str] = queue.Queue()
+        events = self._events
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    events.put(getattr(event, "dest_path", "") or event.src_path)
+
+        self._observer = Observer()
+        self._observer.schedule(Handler(), str(self.directory), recursive=False)
+        self._observer.start()
+        self._initial = [p for p in sorted(self.directory.iterdir()) if fnmatch.fnmatchcase(p.name, pattern)]
+
+    def changes(self, timeout: float | None = None) -> list[Path]:
+        """Block until at least one event or timeout (seconds). Returns distinct changed paths."""
+        if self._initial:
+            out, self._initial = self._initial, []
+            return out
+        names: list[str] = []
+        try:
+            names.append(self._events.get(timeout=timeout))
+            while True:
+                names.append(self._events.get_nowait())
+        except queue.Empty:
+            pass
+        out = []
+        for name in dict.fromkeys(names):
+            p = Path(name)
+            if fnmatch.fnmatchcase(p.name, self.pattern) and p.is_file():
+                out.append(p)
+        return out
+
+    def close(self) -> None:
+        self._observer.stop()
+        self._observer.join()
+
+
+WATCHERS = {
+    "poll": PollingWatcher,
+    "watchdog": WatchdogWatcher,
+}
+
+
+def make_watcher(name: str, directory: Path, pattern: str = "*.json", interval: float = 0.01):
+    if name not in WATCHERS:
+        raise ValueError(f"unknown watcher {name!r} (choose from {', '.join(WATCHERS)})")
+    return WATCHERS[name](directory, pattern, interval)
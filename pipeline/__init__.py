@@ -0,0 +1,4 @@
+"""Make-style orchestrator: alerts -> raw_vectors -> classified -> {virtual_trades, chroma}, rebuilding only stale nodes."""
+from .graph import STAGES, Fingerprinter, Node, build_graph, load_state, save_state
+from .runner import plan, run
+from .stages import Layout
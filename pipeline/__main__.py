@@ -0,0 +1,99 @@
+"""CLI: rebuild stale pipeline nodes per (ticker, date, tf).
+
+Usage:
+  python -m pipeline [--alerts-dir DIR] [--date YYMMDD] [--jobs N] [--stages split,classify,trades,chroma]
+                     [--dry-run] [--force] [--backend chroma|numpy] [--codec none|gzip|zstd]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from .graph import STAGES, STATE_NAME, Fingerprinter, build_graph, load_state, save_state
+from common.compressed import CODEC_NAMES, codec_available
+
+from .runner import plan, run, summarize
+from .stages import Layout, alerts_units, unit_date
+
+
+def main() -> None:
+    data_base = os.environ.get("DATA_BASE") or os.environ.get("FIN_DATA") or os.path.expanduser("~/Fin/Data")
+
+    p = argparse.ArgumentParser(description="Rebuild only stale pipeline artifacts (alerts -> raw -> classified -> trades/chroma).")
+    p.add_argument("--alerts-dir", default=os.environ.get("ALERTS_DIR") or os.path.join(data_base, "Alerts"))
+    p.add_argument("--date", default="", help="Only units (alerts files) of this YYMMDD.")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Nodes run in parallel (1 = in this process).")
+    p.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of split,classify,trades,chroma.")
+    p.add_argument("--dry-run", action="store_true", help="Print the plan (which nodes are stale and why) and exit.")
+    p.add_argument("--force", action="store_true", help="Treat every selected node as stale.")
+    p.add_argument("--state", default="", help=f"State file (default: {STATE_NAME} next to the alerts dir).")
+    p.add_argument("--backend", choices=("chroma", "numpy"), default="chroma", help="Passed to chroma_ingest.py.")
+    p.add_argument("--chroma-dir", default="", help="Passed to chroma_ingest.py.")
+    p.add_argument(
+        "--codec",
+        choices=CODEC_NAMES,
+        default="none",
+        help="Storage codec of the raw_vectors and classified files written; inputs of any codec are read.",
+    )
+    args = p.parse_args()
+    if not codec_available(args.codec):
+        p.error(f"--codec {args.codec}: codec not available (zstd needs the zstandard package)")
+
+    alerts_dir = Path(args.alerts_dir)
+    if not alerts_dir.is_dir():
+        print(f"Alerts dir not found: {alerts_dir}", file=sys.stderr)
+        sys.exit(1)
+    stages = tuple(s.strip() for s in args.stages.split(",") if s.strip())
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        p.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    chroma_args = ["--backend", args.backend]
+    if args.chroma_dir:
+        chroma_args += ["--chroma-dir", args.chroma_dir]
+    layout = Layout.from_alerts_dir(alerts_dir, tuple(chroma_args), args.codec)
+    state_path = Path(args.state) if args.state else alerts_dir.parent / STATE_NAME
+    state = load_state(state_path)
+    date_filter = args.date.strip() or None
+
+    units = [unit for unit, _f in alerts_units(alerts_dir)]
+    if date_filter:
+        units = [u for u in units if unit_date(u) == date_filter]
+    if not units:
+        print(f"No alerts files in {alerts_dir}")
+        return
+    nodes = build_graph(units, stages)
+    fingerprinter = Fingerprinter(layout, state["files"])
+
+    if args.dry_run:
+        steps = plan(nodes, fingerprinter, state, force=args.force)
+        stale = [(n, r) for n, r in steps if r]
+        for node, reason in steps:
+            print(f"{'run ' if reason else 'ok  '} {node.id:<40} {reason or ''}")
+        print(f"{len(stale)} of {len(steps)} nodes stale")
+        return
+
+    def report(res) -> None:
+        if res.status == "skipped":
+            return
+        line = f"[{res.status}] {res.node.id} ({res.reason}) {res.sec:.2f}s"
+        if res.error:
+            line += f": {res.error}"
+        print(line, file=sys.stderr if res.status == "failed" else sys.stdout, flush=True)
+
+    t0 = time.perf_counter()
+    try:
+        results = run(nodes, layout, fingerprinter, state, jobs=max(1, args.jobs), force=args.force, on_result=report)
+    finally:
+        save_state(state_path, state)
+    for line in summarize(results, time.perf_counter() - t0):
+        print(line)
+    if any(r.status == "failed" for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""Resumable backfill: reprocess history partition by partition, journaling every completed partition.
+
+A partition is one (date, ticker): the alerts files {ticker}_{yymmdd}_{tf}.json of every tf. Its work is
+the orchestrator's per-unit stages (split -> classify -> trades, pipeline.stages) for each of its units;
+once every partition of a date is done, `{date}/chroma` ingests that date. Nothing is wiped up front: each
+stage replaces only its unit's files, so re-running a partition is safe.
+
+The journal (backfill_journal.jsonl next to the alerts dir) is append-only, one JSON line per finished
+attempt ({"partition", "status": done|failed, "attempt", "sec", "bytes", "version", ...}), flushed and
+fsynced before the next partition is reported. On restart, partitions with a "done" line for the current
+version are skipped; a killed run loses at most the partitions that were in flight. The version hashes
+the code of the selected stages (as the pipeline's fingerprints do), so after another code change the
+same journal redoes everything. Failed partitions are retried at the end of the run, up to
+--max-attempts attempts in total (across restarts); --fresh appends a reset marker and starts over.
+
+Progress lines carry an ETA: remaining alerts bytes over the bytes/s of partitions finished in this run.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from artifact_catalog import code_version
+from common.compressed import CODEC_NAMES, codec_available
+
+from .graph import CODE_PATHS, STAGES
+from .stages import STAGE_FUNCS, Layout, alerts_units, chroma_date, unit_date
+
+JOURNAL_NAME = "backfill_journal.jsonl"
+DEFAULT_MAX_ATTEMPTS = 3
+UNIT_STAGES = ("split", "classify", "trades")
+
+
+@dataclass
+class Partition:
+    id: str  # {date}/{ticker}, or {date}/chroma
+    date: str
+    units: list[str] = field(default_factory=list)
+    bytes: int = 0
+
+    @property
+    def is_chroma(self) -> bool:
+        return self.id.endswith("/chroma")
+
+
+class Journal:
+    """Append-only JSONL journal; every line is fsynced before append() returns."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> list[dict]:
+        """Entries after the last reset marker. A torn last line (crash mid-write) is ignored."""
+        if not self.path.is_file():
+            return []
+        entries = []
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("event") == "reset":
+                entries = []
+            elif "partition" in entry:
+                entries.append(entry)
+        return entries
+
+    def append(self, entry: dict) -> None:
+        new = not self.path.exists()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            if not new and f.tell() and not self._ends_with_newline():
+                f.write(b"\n")  # terminate a torn line so this entry stays parseable
+            f.write((json.dumps({"at": datetime.now().isoformat(timespec="seconds"), **entry}) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        if new:
+            fd = os.open(self.path.parent, os.O_RDONLY)
+            try:
+                os.fsync(fd)  # the new file's directory entry
+            finally:
+                os.close(fd)
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+
+def backfill_version(stages: tuple[str, ...]) -> str:
+    """Hash of the selected stages and their code (see pipeline.graph.CODE_PATHS)."""
+    h = hashlib.sha1()
+    for stage in stages:
+        h.update(f"{stage}={code_version(*CODE_PATHS[stage])};".encode())
+    return h.hexdigest()[:12]
+
+
+def partitions(
+    alerts_dir: Path, stages: tuple[str, ...], date_from: str = "", date_to: str = "", tickers: set[str] | None = None
+) -> list[Partition]:
+    """(date, ticker) partitions in date order, each date followed by its chroma partition if selected."""
+    by_key: dict[tuple[str, str], Partition] = {}
+    for unit, f in alerts_units(alerts_dir):
+        date = unit_date(unit)
+        if (date_from and date < date_from) or (date_to and date > date_to):
+            continue
+        ticker = unit.split("_")[0]
+        if tickers and ticker not in tickers:
+            continue
+        part = by_key.setdefault((date, ticker), Partition(f"{date}/{ticker}", date))
+        part.units.append(unit)
+        part.bytes += f.stat().st_size
+    out = []
+    for date in sorted({d for d, _t in by_key}):
+        if any(s in stages for s in UNIT_STAGES):
+            out.extend(by_key[k] for k in sorted(by_key) if k[0] == date)
+        if "chroma" in stages:
+            out.append(Partition(f"{date}/chroma", date))
+    return out
+
+
+def run_partition(part: Partition, stages: tuple[str, ...], layout: Layout) -> float:
+    """Run one partition's stages (top-level so worker processes can pickle it). Returns seconds."""
+    t0 = time.perf_counter()
+    if part.is_chroma:
+        chroma_date(part.date, layout)
+    else:
+        for unit in part.units:
+            for stage in UNIT_STAGES:
+                if stage in stages:
+                    STAGE_FUNCS[stage](unit, layout)
+    return time.perf_counter() - t0
+
+
+def journal_state(entries: list[dict], version: str) -> tuple[set[str], dict[str, int]]:
+    """(partitions done at version, failed attempts at version per partition not done)."""
+    done: set[str] = set()
+    failed: dict[str, int] = defaultdict(int)
+    for e in entries:
+        if e.get("version") != version:
+            continue
+        if e["status"] == "done":
+            done.add(e["partition"])
+        elif e["status"] == "failed":
+            failed[e["partition"]] += 1
+    return done, {p: n for p, n in failed.items() if p not in done}
+
+
+def format_eta(sec: float) -> str:
+    if sec != sec or sec == float("inf"):
+        return "?"
+    sec = int(sec)
+    return f"{sec // 3600}h{sec % 3600 // 60:02d}m" if sec >= 3600 else f"{sec // 60}m{sec % 60:02d}s"
+
+
+def backfill(
+    parts: list[Partition],
+    stages: tuple[str, ...],
+    layout: Layout,
+    journal: Journal,
+    jobs: int = 1,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    log=print,
+) -> dict:
+    """Run the partitions not yet done at the current version. Returns counts {done, skipped, failed, gave_up}.
+
+    A chroma partition starts once every partition of its date is done in the journal, one at a time.
+    """
+    version = backfill_version(stages)
+    done, failed = journal_state(journal.load(), version)
+    counts = {"done": 0, "skipped": 0, "failed": 0, "gave_up": 0}
+    todo = []
+    for p in parts:
+        if p.id in done:
+            counts["skipped"] += 1
+        elif failed.get(p.id, 0) >= max_attempts:
+            counts["gave_up"] += 1
+            log(f"[gave up] {p.id} ({failed[p.id]} failed attempts; raise --max-attempts to retry)")
+        else:
+            todo.append(p)
+    n_todo = len(todo)
+    total_bytes = sum(p.bytes for p in todo)
+    pending_by_date: dict[str, int] = defaultdict(int)
+    for p in parts:
+        if not p.is_chroma and p.id not in done:
+            pending_by_date[p.date] += 1
+    log(f"{len(todo)} partitions to run, {counts['skipped']} already done (journal {journal.path}, version {version})")
+
+    t_start = time.perf_counter()
+    bytes_done = 0
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    running: dict[Future, Partition] = {}
+    chroma_busy = False
+
+    def finish(part: Partition, sec: float, error: str | None) -> None:
+        nonlocal bytes_done, chroma_busy
+        attempt = failed.get(part.id, 0) + 1
+        entry = {"partition": part.id, "status": "failed" if error else "done", "attempt": attempt,
+                 "sec": round(sec, 3), "bytes": part.bytes, "version": version}
+        if error:
+            entry["error"] = error
+        journal.append(entry)
+        if part.is_chroma:
+            chroma_busy = False
+        if error:
+            failed[part.id] = attempt
+            counts["failed"] += 1
+            if attempt < max_attempts:
+                todo.append(part)  # retried after the rest
+            else:
+                counts["gave_up"] += 1
+            log(f"[failed] {part.id} attempt {attempt}/{max_attempts} {sec:.1f}s: {error}")
+            return
+        counts["done"] += 1
+        if not part.is_chroma:
+            pending_by_date[part.date] -= 1
+        bytes_done += part.bytes
+        elapsed = time.perf_counter() - t_start
+        remaining = sum(p.bytes for p in todo) + sum(p.bytes for p in running.values() if p is not part)
+        rate = bytes_done / elapsed if elapsed > 0 else 0.0
+        eta = remaining / rate if rate > 0 else (0.0 if not remaining else float("inf"))
+        log(f"[done {counts['done']}/{n_todo}] {part.id} {sec:.1f}s, {rate / 1e6:.2f} MB/s, {bytes_done / max(total_bytes, 1):.0%} of bytes, ETA {format_eta(eta)}")
+
+    def ready(part: Partition) -> bool:
+        return not part.is_chroma or (pending_by_date[part.date] == 0 and not chroma_busy)
+
+    try:
+        while todo or running:
+            started = False
+            for part in list(todo):
+                if pool is not None and len(running) >= jobs:
+                    break
+                if not ready(part):
+                    continue
+                todo.remove(part)
+                if part.is_chroma:
+                    chroma_busy = True
+                started = True
+                if pool is None:
+                    t0 = time.perf_counter()
+                    try:
+                        finish(part, run_partition(part, stages, layout), None)
+                    except Exception as e:
+                        finish(part, time.perf_counter() - t0, f"{type(e).__name__}: {e}")
+                    break  # re-scan: a retry or a date's chroma may be ready now
+                running[pool.submit(run_partition, part, stages, layout)] = part
+            if not running:
+                if not started and todo:
+                    # Only chroma partitions of dates with a partition that gave up are left.
+                    for part in todo:
+                        log(f"[blocked] {part.id} (a partition of {part.date} failed)")
+                    break
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                part = running[fut]
+                try:
+                    sec, error = fut.result(), None
+                except Exception as e:
+                    sec, error = 0.0, f"{type(e).__name__}: {e}"
+                finish(part, sec, error)
+                del running[fut]
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return counts
+
+
+def main() -> None:
+    data_base = os.environ.get("DATA_BASE") or os.environ.get("FIN_DATA") or os.path.expanduser("~/Fin/Data")
+
+    p = argparse.ArgumentParser(description="Resumable backfill by (date, ticker) with an fsynced journal of completed partitions.")
+    p.add_argument("--alerts-dir", default=os.environ.get("ALERTS_DIR") or os.path.join(data_base, "Alerts"))
+    p.add_argument("--date-from", default="", metavar="YYMMDD", help="First date (inclusive).")
+    p.add_argument("--date-to", default="", metavar="YYMMDD", help="Last date (inclusive).")
+    p.add_argument("--tickers", default="", help="Comma-separated tickers (default: all).")
+    p.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of split,classify,trades,chroma.")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Partitions run in parallel (1 = in this process).")
+    p.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="Attempts per partition, across restarts.")
+    p.add_argument("--journal", default="", help=f"Journal file (default: {JOURNAL_NAME} next to the alerts dir).")
+    p.add_argument("--fresh", action="store_true", help="Ignore earlier journal entries (appends a reset marker).")
+    p.add_argument("--dry-run", action="store_true", help="Print how many partitions are done, pending or given up, and exit.")
+    p.add_argument("--backend", choices=("chroma", "numpy"), default="chroma", help="Passed to chroma_ingest.py.")
+    p.add_argument("--chroma-dir", default="", help="Passed to chroma_ingest.py.")
+    p.add_argument(
+        "--codec",
+        choices=CODEC_NAMES,
+        default="none",
+        help="Storage codec of the raw_vectors and classified files written; inputs of any codec are read.",
+    )
+    args = p.parse_args()
+    if not codec_available(args.codec):
+        p.error(f"--codec {args.codec}: codec not available (zstd needs the zstandard package)")
+
+    alerts_dir = Path(args.alerts_dir)
+    if not alerts_dir.is_dir():
+        print(f"Alerts dir not found: {alerts_dir}", file=sys.stderr)
+        sys.exit(1)
+    stages = tuple(s for s in STAGES if s in {x.strip() for x in args.stages.split(",")})
+    unknown = [s for s in args.stages.split(",") if s.strip() and s.strip() not in STAGES]
+    if unknown or not stages:
+        p.error(f"--stages must be a subset of {','.join(STAGES)}")
+    if args.max_attempts < 1:
+        p.error("--max-attempts must be >= 1")
+
+    chroma_args = ["--backend", args.backend]
+    if args.chroma_dir:
+        chroma_args += ["--chroma-dir", args.chroma_dir]
+    layout = Layout.from_alerts_dir(alerts_dir, tuple(chroma_args), args.codec)
+    journal = Journal(Path(args.journal) if args.journal else alerts_dir.parent / JOURNAL_NAME)
+    tickers = {t.strip() for t in args.tickers.split(",") if t.strip()} or None
+    parts = partitions(alerts_dir, stages, args.date_from.strip(), args.date_to.strip(), tickers)
+    if not parts:
+        print(f"No alerts files in {alerts_dir} for the selected dates / tickers")
+        return
+
+    if args.dry_run:
+        done, failed = journal_state([] if args.fresh else journal.load(), backfill_version(stages))
+        gave_up = sum(1 for q in parts if q.id not in done and failed.get(q.id, 0) >= args.max_attempts)
+        n_done = sum(1 for q in parts if q.id in done)
+        print(f"{len(parts)} partitions: {n_done} done, {len(parts) - n_done - gave_up} to run, {gave_up} given up")
+        return
+    if args.fresh:
+        journal.append({"event": "reset"})
+
+    t0 = time.perf_counter()
+    counts = backfill(parts, stages, layout, journal, jobs=max(1, args.jobs), max_attempts=args.max_attempts,
+                      log=lambda line: print(line, flush=True))
+    print(
+        f"Backfill: {counts['done']} done, {counts['skipped']} skipped (journal), {counts['failed']} failed attempts,"
+        f" {counts['gave_up']} given up in {time.perf_counter() - t0:.1f}s"
+    )
+    if counts["gave_up"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Build graph, input fingerprints and the state file the orchestrator uses to find stale nodes.
+
+Nodes per unit (alerts file {ticker}_{yymmdd}_{tf}.json):
+  split:{unit}    alerts file            -> raw_vectors/{unit}_*.jsonl
+  classify:{unit} raw segments           -> classified/{unit}_*.jsonl   (after split)
+  trades:{unit}   raw segments           -> virtual_trades/{asset}_{date}_{tf}.jsonl (after split)
+and per date:
+  chroma:{date}   classified files of the date -> Chroma (after every classify of that date)
+
+A node's fingerprint is the hash of its stage code, its options and the content of its input files.
+It is stale when the fingerprint differs from the one recorded after its last successful run, or when
+an output it recorded is missing.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from artifact_catalog import code_version
+
+from .stages import Layout, alerts_file, date_files, unit_date, unit_files
+
+STAGES = ("split", "classify", "trades", "chroma")
+STATE_NAME = "pipeline_state.json"
+STATE_VERSION = 1
+
+# Sources whose change invalidates every node of a stage.
+CODE_PATHS = {
+    "split": ("daily_alerts_splitter",),
+    "classify": ("vector_calc",),
+    "trades": ("virtual_trades",),
+    "chroma": ("chroma_ingest.py", "vector_index"),
+}
+
+
+@dataclass
+class Node:
+    stage: str
+    key: str
+    deps: list[str] = field(default_factory=list)
+
+    @property
+    def id(self) -> str:
+        return f"{self.stage}:{self.key}"
+
+
+def build_graph(units: list[str], stages: tuple[str, ...] = STAGES) -> list[Node]:
+    """Nodes in topological order. Dependencies on stages that are not selected are dropped."""
+    selected = set(stages)
+    nodes: list[Node] = []
+    by_date: dict[str, list[str]] = {}
+    for unit in units:
+        if "split" in selected:
+            nodes.append(Node("split", unit))
+        up = [f"split:{unit}"] if "split" in selected else []
+        if "classify" in selected:
+            nodes.append(Node("classify", unit, list(up)))
+            by_date.setdefault(unit_date(unit), []).append(f"classify:{unit}")
+        elif "chroma" in selected:
+            by_date.setdefault(unit_date(unit), [])
+        if "trades" in selected:
+            nodes.append(Node("trades", unit, list(up)))
+    if "chroma" in selected:
+        for date in sorted(by_date):
+            nodes.append(Node("chroma", date, by_date[date]))
+    return nodes
+
+
+def _code_hash(stage: str) -> str:
+    return code_version(*CODE_PATHS[stage])
+
+
+class Fingerprinter:
+    """Content hashes of node inputs. File hashes are cached by (mtime_ns, size) in the state file."""
+
+    def __init__(self, layout: Layout, file_cache: dict):
+        self.layout = layout
+        self.file_cache = file_cache
+        self._code: dict[str, str] = {}
+
+    def code(self, stage: str) -> str:
+        if stage not in self._code:
+            self._code[stage] = _code_hash(stage)
+        return self._code[stage]
+
+    def inputs(self, node: Node) -> list[Path]:
+        lay = self.layout
+        if node.stage == "split":
+            return [alerts_file(lay.alerts_dir, node.key)]
+        if node.stage in ("classify", "trades"):
+            return unit_files(lay.raw_dir, node.key)
+        return date_files(lay.classified_dir, node.key)
+
+    def file_hash(self, p: Path) -> str:
+        st = p.stat()
+        key = str(p.resolve())
+        hit = self.file_cache.get(key)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+        digest = hashlib.sha1(p.read_bytes()).hexdigest()
+        self.file_cache[key] = [st.st_mtime_ns, st.st_size, digest]
+        return digest
+
+    def fingerprint(self, node: Node) -> dict:
+        h = hashlib.sha1()
+        for p in self.inputs(node):
+            if p.is_file():
+                h.update(p.name.encode())
+                h.update(self.file_hash(p).encode())
+        params = list(self.layout.chroma_args) if node.stage == "chroma" else []
+        if node.stage in ("split", "classify") and self.layout.codec != "none":
+            params = ["--codec", self.layout.codec]
+        return {"code": self.code(node.stage), "params": params, "inputs": h.hexdigest()}
+
+
+def output_dir(layout: Layout, stage: str) -> Path | None:
+    return {"split": layout.raw_dir, "classify": layout.classified_dir, "trades": layout.trades_dir}.get(stage)
+
+
+def stale_reason(node: Node, fp: dict, state: dict, layout: Layout) -> str | None:
+    """Why the node must run, or None if its recorded run is still valid."""
+    prev = state["nodes"].get(node.id)
+    if prev is None:
+        return "new"
+    if prev.get("code") != fp["code"]:
+        return "code changed"
+    if prev.get("params") != fp["params"]:
+        return "options changed"
+    if prev.get("inputs") != fp["inputs"]:
+        return "inputs changed"
+    out_dir = output_dir(layout, node.stage)
+    if out_dir is not None and any(not (out_dir / name).is_file() for name in prev.get("outputs", [])):
+        return "outputs missing"
+    return None
+
+
+def load_state(path: Path) -> dict:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        state = {}
+    if state.get("version") != STATE_VERSION:
+        state = {"version": STATE_VERSION, "files": {}, "nodes": {}}
+    return state
+
+
+def save_state(path: Path, state: dict) -> None:
+    """Write atomically (tmp + os.replace) so an interrupted run never leaves a truncated state file."""
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
@@ -0,0 +1,150 @@
+"""Run the node graph: skip up-to-date nodes, run stale ones in a process pool as their dependencies finish."""
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from .graph import STAGES, Fingerprinter, Node, stale_reason
+from .stages import Layout, run_stage
+
+# Stages whose nodes must not run concurrently with each other (Chroma persistent store = single writer).
+EXCLUSIVE_STAGES = frozenset({"chroma"})
+
+
+@dataclass
+class NodeResult:
+    node: Node
+    status: str  # ran | skipped | failed | blocked
+    reason: str = ""
+    sec: float = 0.0
+    outputs: list[str] = field(default_factory=list)
+    error: str = ""
+
+
+def plan(nodes: list[Node], fingerprinter: Fingerprinter, state: dict, force: bool = False) -> list[tuple[Node, str | None]]:
+    """Dry run: (node, reason it would run or None). Nodes downstream of a stale node are stale ("upstream")."""
+    stale: set[str] = set()
+    out = []
+    for node in nodes:
+        if force:
+            reason = "forced"
+        elif any(d in stale for d in node.deps):
+            reason = "upstream"
+        else:
+            reason = stale_reason(node, fingerprinter.fingerprint(node), state, fingerprinter.layout)
+        if reason:
+            stale.add(node.id)
+        out.append((node, reason))
+    return out
+
+
+def run(
+    nodes: list[Node],
+    layout: Layout,
+    fingerprinter: Fingerprinter,
+    state: dict,
+    jobs: int = 1,
+    force: bool = False,
+    on_result=None,
+) -> list[NodeResult]:
+    """Run stale nodes once their dependencies are done; jobs > 1 uses a process pool.
+
+    A node is fingerprinted when it becomes ready, i.e. after its inputs were (re)built, so an upstream
+    rerun that produced identical files does not make it stale. Nodes after a failure are blocked.
+    on_result(result) is called as each node finishes (e.g. to print progress and save state).
+    """
+    by_id = {n.id: n for n in nodes}
+    dependents: dict[str, list[str]] = {n.id: [] for n in nodes}
+    waiting = {}
+    for n in nodes:
+        deps = [d for d in n.deps if d in by_id]
+        waiting[n.id] = len(deps)
+        for d in deps:
+            dependents[d].append(n.id)
+    ready = [n.id for n in nodes if waiting[n.id] == 0]
+    results: dict[str, NodeResult] = {}
+    running: dict[Future, tuple[Node, dict, str]] = {}
+    running_fp: dict[str, dict] = {}
+    busy_exclusive: set[str] = set()
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    def finish(res: NodeResult) -> None:
+        results[res.node.id] = res
+        fp = running_fp.pop(res.node.id, None)
+        if res.status == "ran":
+            state["nodes"][res.node.id] = {**fp, "outputs": res.outputs, "sec": round(res.sec, 3)}
+        if on_result:
+            on_result(res)
+        for dep_id in dependents[res.node.id]:
+            waiting[dep_id] -= 1
+            if waiting[dep_id] == 0:
+                ready.append(dep_id)
+
+    try:
+        while ready or running:
+            deferred = []
+            while ready:
+                node = by_id[ready.pop(0)]
+                failed = [d for d in node.deps if d in results and results[d].status in ("failed", "blocked")]
+                if failed:
+                    finish(NodeResult(node, "blocked", reason=f"{failed[0]} failed"))
+                    continue
+                if node.stage in EXCLUSIVE_STAGES and node.stage in busy_exclusive:
+                    deferred.append(node.id)
+                    continue
+                fp = fingerprinter.fingerprint(node)
+                reason = "forced" if force else stale_reason(node, fp, state, layout)
+                if reason is None:
+                    finish(NodeResult(node, "skipped"))
+                    continue
+                running_fp[node.id] = fp
+                if pool is None:
+                    finish(_execute(node, reason, layout))
+                    continue
+                if node.stage in EXCLUSIVE_STAGES:
+                    busy_exclusive.add(node.stage)
+                running[pool.submit(run_stage, node.stage, node.key, layout)] = (node, fp, reason)
+            ready.extend(deferred)
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                node, _fp, reason = running.pop(fut)
+                busy_exclusive.discard(node.stage)
+                try:
+                    outputs, sec = fut.result()
+                    finish(NodeResult(node, "ran", reason=reason, sec=sec, outputs=outputs))
+                except Exception as e:
+                    finish(NodeResult(node, "failed", reason=reason, error=f"{type(e).__name__}: {e}"))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return [results[n.id] for n in nodes if n.id in results]
+
+
+def _execute(node: Node, reason: str, layout: Layout) -> NodeResult:
+    t0 = time.perf_counter()
+    try:
+        outputs, sec = run_stage(node.stage, node.key, layout)
+        return NodeResult(node, "ran", reason=reason, sec=sec, outputs=outputs)
+    except Exception as e:
+        return NodeResult(node, "failed", reason=reason, sec=time.perf_counter() - t0, error=f"{type(e).__name__}: {e}")
+
+
+def summarize(results: list[NodeResult], wall_sec: float) -> list[str]:
+    """Timing summary lines: per stage counts and run time, slowest node, wall clock."""
+    lines = [f"{'stage':<10}{'ran':>6}{'skipped':>9}{'failed':>8}{'blocked':>9}{'time_s':>10}{'max_s':>9}"]
+    for stage in STAGES:
+        rs = [r for r in results if r.node.stage == stage]
+        if not rs:
+            continue
+        count = {s: sum(1 for r in rs if r.status == s) for s in ("ran", "skipped", "failed", "blocked")}
+        total = sum(r.sec for r in rs)
+        slowest = max((r.sec for r in rs), default=0.0)
+        lines.append(
+            f"{stage:<10}{count['ran']:>6}{count['skipped']:>9}{count['failed']:>8}{count['blocked']:>9}{total:>10.2f}{slowest:>9.2f}"
+        )
+    busy = sum(r.sec for r in results)
+    lines.append(f"wall {wall_sec:.2f}s, node time {busy:.2f}s ({busy / wall_sec if wall_sec > 0 else 0:.1f}x parallel)")
+    return lines
@@ -0,0 +1,175 @@
+"""Per-unit stage functions for the orchestrator.
+
+A unit is one alerts file {ticker}_{yymmdd}_{tf}.json; its stem is the unit key and the prefix of every
+raw_vectors / classified segment file it produces ({unit}_{start_hhmm}_{end_hhmm}.jsonl). Inputs are read in
+any codec (common.compressed); Layout.codec is the codec of the raw and classified files written.
+"""
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from artifact_catalog import ArtifactCatalog, code_version
+from common.compressed import codec_of, data_file, data_files, data_stem, with_codec
+from daily_alerts_splitter.incremental import CHECKPOINT_DIRNAME, split_incremental
+from vector_calc.__main__ import _add_next_vector_fields, classify_raw_file
+from vector_calc.plot_summary import write_plot_summaries
+from vector_calc.record_index import index_path, write_record_index
+from virtual_trades.__main__ import STEM_RE, write_group_trades
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SEGMENT_SUFFIX_RE = re.compile(r"^\d{4}_\d{4}$")
+UNIT_RE = re.compile(r"^[A-Za-z0-9]+_(\d{6})(?:_\w+)?$")
+
+
+@dataclass(frozen=True)
+class Layout:
+    """Data dirs, following the tools' own defaults (raw_vectors next to the alerts dir, the rest next to raw_vectors)."""
+
+    alerts_dir: Path
+    raw_dir: Path
+    classified_dir: Path
+    trades_dir: Path
+    chroma_args: tuple[str, ...] = ()
+    codec: str = "none"
+
+    @classmethod
+    def from_alerts_dir(cls, alerts_dir: Path, chroma_args: tuple[str, ...] = (), codec: str = "none") -> "Layout":
+        raw_dir = alerts_dir.parent / "raw_vectors"
+        return cls(
+            alerts_dir=alerts_dir,
+            raw_dir=raw_dir,
+            classified_dir=raw_dir.parent / "classified",
+            trades_dir=raw_dir.parent / "virtual_trades",
+            chroma_args=tuple(chroma_args),
+            codec=codec,
+        )
+
+
+def unit_date(unit: str) -> str | None:
+    """YYMMDD of an alerts stem, or None if the stem is not {ticker}_{yymmdd}[_{tf}]."""
+    m = UNIT_RE.match(unit)
+    return m.group(1) if m else None
+
+
+def alerts_units(alerts_dir: Path) -> list[tuple[str, Path]]:
+    """(unit, path) of the alerts files (any codec) in alerts_dir, sorted by unit."""
+    return sorted((data_stem(f), f) for f in data_files(alerts_dir, "*.json") if unit_date(data_stem(f)))
+
+
+def alerts_file(alerts_dir: Path, unit: str) -> Path:
+    """The unit's alerts file in whatever codec it is stored (the plain name if there is none)."""
+    return data_file(alerts_dir, f"{unit}.json") or alerts_dir / f"{unit}.json"
+
+
+def unit_files(d: Path, unit: str) -> list[Path]:
+    """Segment files {unit}_{start}_{end}.jsonl (any codec) in d, sorted by stem."""
+    n = len(unit) + 1
+    return sorted(
+        (p for p in data_files(d, f"{unit}_*.jsonl") if SEGMENT_SUFFIX_RE.match(data_stem(p)[n:])), key=data_stem
+    )
+
+
+def date_files(d: Path, date: str) -> list[Path]:
+    """Segment files (any codec) of one date in d (same filter as the tools' --date)."""
+    return [
+        p for p in data_files(d, "*.jsonl") if f"_{date}_" in data_stem(p) or data_stem(p).endswith(f"_{date}")
+    ]
+
+
+def _register(kind: str, directory: Path, written: list[Path], removed: set[str], package: str) -> None:
+    """Catalog rows for a unit: forget files that were removed and not rewritten, register what was written."""
+    with ArtifactCatalog.for_dir(directory) as cat:
+        cat.forget(kind, directory, stems=removed - {data_stem(p) for p in written})
+        cat.register(kind, written, stage=package, version=code_version(package))
+
+
+def split_unit(unit: str, layout: Layout) -> list[str]:
+    """Bring the unit's raw segments up to date from its split checkpoint (only appended bytes when it is valid)."""
+    res = split_incremental(
+        alerts_file(layout.alerts_dir, unit),
+        layout.raw_dir,
+        unit,
+        layout.alerts_dir.parent / CHECKPOINT_DIRNAME,
+        code=code_version("daily_alerts_splitter"),
+        codec=layout.codec,
+    )
+    _register("raw", layout.raw_dir, res.written, set(res.removed), "daily_alerts_splitter")
+    return sorted(res.files)
+
+
+def classify_unit(unit: str, layout: Layout) -> list[str]:
+    """Classify every raw segment of the unit, drop classified files whose raw segment is gone, add next_*, write offset sidecars, refresh its plot summary."""
+    layout.classified_dir.mkdir(parents=True, exist_ok=True)
+    raw = unit_files(layout.raw_dir, unit)
+    written = []
+    for p in raw:
+        if classify_raw_file(p, layout.classified_dir, layout.codec):
+            written.append(layout.classified_dir / with_codec(f"{data_stem(p)}.jsonl", layout.codec))
+    keep = {p.name for p in written}
+    removed = set()
+    for p in unit_files(layout.classified_dir, unit):
+        if p.name not in keep:  # raw segment gone, or stored in another codec before
+            p.unlink()
+            if codec_of(p) == "none":
+                index_path(p).unlink(missing_ok=True)
+            removed.add(data_stem(p))
+    _add_next_vector_fields(layout.classified_dir, written)
+    for p in written:
+        if codec_of(p) == "none":
+            write_record_index(p)
+    _register("classified", layout.classified_dir, written, removed, "vector_calc")
+    parts = unit.split("_")
+    if len(parts) == 3:
+        write_plot_summaries(layout.classified_dir, layout.raw_dir, groups={tuple(parts)})
+    return [p.name for p in written]
+
+
+def trades_unit(unit: str, layout: Layout) -> list[str]:
+    """Virtual trades for the unit's raw segments -> virtual_trades/{asset}_{date}_{tf}.jsonl."""
+    files = unit_files(layout.raw_dir, unit)
+    m = STEM_RE.match(data_stem(files[0])) if files else None
+    if not m:
+        return []
+    asset, date, tf = m.groups()[:3]
+    layout.trades_dir.mkdir(parents=True, exist_ok=True)
+    write_group_trades(asset, date, tf, files, layout.trades_dir)
+    out = layout.trades_dir / f"{asset}_{date}_{tf}.jsonl"
+    _register("trades", layout.trades_dir, [out], set(), "virtual_trades")
+    return [out.name]
+
+
+def chroma_date(date: str, layout: Layout) -> list[str]:
+    """Run chroma_ingest.py --date for one date. Runs in a child process (its own ledger makes unchanged files no-ops)."""
+    cmd = [
+        sys.executable,
+        str(REPO_ROOT / "chroma_ingest.py"),
+        "--classified-dir",
+        str(layout.classified_dir),
+        "--date",
+        date,
+        *layout.chroma_args,
+    ]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"chroma_ingest.py --date {date} failed: {proc.stderr.strip()[-2000:]}")
+    return []
+
+
+STAGE_FUNCS = {
+    "split": split_unit,
+    "classify": classify_unit,
+    "trades": trades_unit,
+    "chroma": chroma_date,
+}
+
+
+def run_stage(stage: str, key: str, layout: Layout) -> tuple[list[str], float]:
+    """Run one node (top-level so worker processes can pickle it). Returns (output names, seconds)."""
+    t0 = time.perf_counter()
+    outputs = STAGE_FUNCS[stage](key, layout)
+    return outputs, time.perf_counter() - t0
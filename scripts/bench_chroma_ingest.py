@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Benchmark chroma_ingest against a local persistent Chroma directory.
+
+Generates synthetic classified files in a temp dir, then runs chroma_ingest.py once per configuration
+(serial fixed batch = pre-pipeline behaviour, pipelined fixed batch, pipelined adaptive) into a fresh
+persistent dir each time and reports wall time and records/sec.
+Usage: python3 scripts/bench_chroma_ingest.py [--files 200] [--records 60] [--workers 4]
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from chroma_ingest import EMBED_FIELDS  # noqa: E402
+
+EXTRA_FIELDS = ("p0_close", "p1_close", "range_pct", "dollarVol_sum", "vol_slope", "profit_score", "entry_score")
+
+
+def write_classified(classified_dir: Path, n_files: int, n_records: int, seed: int = 7) -> int:
+    rng = random.Random(seed)
+    total = 0
+    for i in range(n_files):
+        stem = f"T{i % 50:02d}_2602{1 + i // 50:02d}_5_0930_1100"
+        with open(classified_dir / f"{stem}.jsonl", "w", encoding="utf-8") as f:
+            for k in range(n_records):
+                rec = {"closing_bar_index": k, "segment_id": stem, "ticker": stem.split("_")[0], "tf": "5",
+                       "date": stem.split("_")[1], "start_time": "2026-02-22 09:30:00 EST", "bars": k + 1,
+                       "tier": rng.choice(["elite", "tradable", "non_tradable"])}
+                rec.update({k2: round(rng.gauss(0, 1), 3) for k2 in [*EMBED_FIELDS, *EXTRA_FIELDS]})
+                f.write(json.dumps(rec) + "\n")
+                total += 1
+    return total
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--files", type=int, default=200)
+    p.add_argument("--records", type=int, default=60, help="Records per file.")
+    p.add_argument("--workers", type=int, default=4)
+    args = p.parse_args()
+
+    configs = [
+        ("serial, batch 1000", ["--workers", "0", "--batch-size", "1000"]),
+        (f"pipelined x{args.workers}, batch 1000", ["--workers", str(args.workers), "--batch-size", "1000"]),
+        (f"pipelined x{args.workers}, adaptive", ["--workers", str(args.workers)]),
+    ]
+    with tempfile.TemporaryDirectory() as d:
+        classified = Path(d) / "classified"
+        classified.mkdir()
+        n = write_classified(classified, args.files, args.records)
+        print(f"{args.files} files, {n} records")
+        for i, (label, extra) in enumerate(configs):
+            chroma_dir = Path(d) / f"chroma_{i}"
+            cmd = [sys.executable, str(REPO_ROOT / "chroma_ingest.py"), "--classified-dir", str(classified),
+                   "--chroma-dir", str(chroma_dir)] + extra
+            t0 = time.perf_counter()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            dt = time.perf_counter() - t0
+            print(f"{label:32s} {dt:7.2f}s  {n / dt:9.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
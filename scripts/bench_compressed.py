@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Benchmark compressed storage (common.compressed): bytes on disk and wall time per codec vs plain .jsonl.
+
+Copies a directory of JSONL files (--source-dir, any codec; default: synthetic classified-like records) into
+a temp dir once per available codec (none, gzip, zstd) and reports, per codec: bytes on disk and ratio to
+plain, write time, read time (whole files, read_bytes) and line-stream + json.loads time (open_text), best of
+--repeat. Run against a real classified/ dir on the NAS to see whether decompression beats the I/O it saves;
+drop the page cache between runs (or use a cold dir) for the I/O-bound case.
+Usage: python3 scripts/bench_compressed.py [--source-dir DIR] [--files 400] [--records 120] [--repeat 3]
+"""
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from common.compressed import CODEC_NAMES, codec_available, data_files, data_stem, open_text, read_bytes, with_codec  # noqa: E402
+
+FIELDS = (
+    "delta_pct", "slope_pctPerMin", "efficiency", "rev_avwap_side_frac", "rev_avwap_cross_count",
+    "rev_avwap_dist_abs_mean_pct", "tShockScoreTot_density", "tTrendAbs_area", "inTrendScore_area", "atrRatio_q50",
+    "profit_score", "entry_score", "maintain_score", "tradeability_score", "duration_min", "p0_close", "p1_close",
+)
+
+
+def synthetic(files: int, records: int) -> dict[str, str]:
+    """{name: text} of classified-like files: the same keys on every line, 3-digit floats."""
+    rng = random.Random(0)
+    out = {}
+    for i in range(files):
+        stem = f"T{chr(65 + i % 26)}{chr(65 + i // 26 % 26)}_2602{22 + i % 5}_5_{930 + i % 60:04d}_{1000 + i % 60:04d}"
+        lines = []
+        for k in range(records):
+            rec = {"vector_id": f"{stem}_v", "segment_id": stem, "closing_bar_index": k, "ticker": stem[:3], "tf": "5",
+                   "start_time": "2026-02-22 09:30:00 EST", "tier": rng.choice(("A", "B", "C", "non_tradable"))}
+            rec.update({f: round(rng.gauss(0, 1), 3) for f in FIELDS})
+            lines.append(json.dumps(rec) + "\n")
+        out[f"{stem}.jsonl"] = "".join(lines)
+    return out
+
+
+def best(fn, repeat: int) -> float:
+    t = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        t = min(t, time.perf_counter() - start)
+    return t
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--source-dir", default="", help="Directory of *.jsonl files (any codec) to copy per codec.")
+    p.add_argument("--files", type=int, default=400, help="Synthetic files (without --source-dir).")
+    p.add_argument("--records", type=int, default=120, help="Synthetic records per file.")
+    p.add_argument("--repeat", type=int, default=3, help="Best of this many runs per measurement.")
+    args = p.parse_args()
+
+    if args.source_dir:
+        texts = {f"{data_stem(f)}.jsonl": read_bytes(f).decode("utf-8") for f in data_files(Path(args.source_dir), "*.jsonl")}
+    else:
+        texts = synthetic(args.files, args.records)
+    n_lines = sum(t.count("\n") for t in texts.values())
+    print(f"{len(texts)} files, {n_lines} lines, {sum(len(t.encode()) for t in texts.values()) / 1e6:.1f} MB plain")
+    print(f"{'codec':6s} {'MB on disk':>10s} {'ratio':>6s} {'write s':>8s} {'read s':>7s} {'lines+json s':>12s}")
+    plain_bytes = None
+    for codec in CODEC_NAMES:
+        if not codec_available(codec):
+            print(f"{codec:6s} (not available)")
+            continue
+        d = Path(tempfile.mkdtemp(prefix=f"bench_{codec}_"))
+        try:
+            paths = [d / with_codec(name, codec) for name in texts]
+
+            def write():
+                for path, text in zip(paths, texts.values()):
+                    with open_text(path, "w") as f:
+                        f.write(text)
+
+            def read():
+                for path in paths:
+                    read_bytes(path)
+
+            def stream():
+                for path in paths:
+                    with open_text(path) as f:
+                        for line in f:
+                            json.loads(line)
+
+            t_write = best(write, args.repeat)
+            size = sum(path.stat().st_size for path in paths)
+            plain_bytes = plain_bytes or size
+            t_read, t_stream = best(read, args.repeat), best(stream, args.repeat)
+            print(f"{codec:6s} {size / 1e6:10.2f} {size / plain_bytes:6.3f} {t_write:8.3f} {t_read:7.3f} {t_stream:12.3f}")
+        finally:
+            shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
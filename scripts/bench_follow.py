@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Benchmark follow-mode latency per bar against the length of the open segment.
+
+Takes one synthetic 1-minute day (synthetic_market), keeps its first revDir edge and clears the others, so
+every bar up to 16:00 extends one open segment. Each bar is fed to a live_tail UnitSession and timed
+(split, record and trade update, no file I/O) twice: with the segment's column buffers (BarColumns), and
+with the segment's DataFrame rebuilt from its bar dicts on every bar (the BarColumns fallback, which was
+the only path before). Reports p50 / p95 ms per bar for bars grouped by their index k in the segment, and
+checks that both runs wrote the same records.
+Usage: python3 scripts/bench_follow.py [--bars 390] [--seed 0] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from live_tail import UnitSession  # noqa: E402
+from live_tail.session import BarColumns  # noqa: E402
+from synthetic_market.generator import MarketSpec, _unit_bars  # noqa: E402
+
+BUCKETS = (10, 50, 100, 200, 300, 400)
+
+
+def one_segment(n_bars: int, seed: int) -> list[dict]:
+    spec = MarketSpec(tickers=1, days=1, tfs=(1,), seed=seed, dup_rate=0, disorder_rate=0)
+    bars = _unit_bars(spec, 0, 0, spec.trading_days()[0], (1,))[1]
+    first = next(i for i, b in enumerate(bars) if b.get("revDir"))
+    seg = [b for b in bars[first:] if b["time"][11:16] <= "16:00"][:n_bars]
+    for b in seg[1:]:
+        b["revDir"] = 0
+    return seg
+
+
+def feed(bars: list[dict], unit: str) -> tuple[list[str], list[float]]:
+    """Classified lines and seconds per add_bar of one session fed every bar."""
+    times = []
+    with TemporaryDirectory() as td:
+        session = UnitSession(unit, Path(td))
+        for b in bars:
+            t0 = time.perf_counter()
+            session.add_bar(b)
+            times.append(time.perf_counter() - t0)
+        return list(session._out["classified"]), times
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--bars", type=int, default=390, help="Bars in the open segment (at most the bars up to 16:00).")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=3, help="Per bar, the best of this many runs of each mode.")
+    args = p.parse_args()
+
+    bars = one_segment(args.bars, args.seed)
+    unit = f"SA_{bars[0]['time'][2:4]}{bars[0]['time'][5:7]}{bars[0]['time'][8:10]}_1"
+    feed(bars[:20], unit)  # warm-up
+    runs = {"columns": [], "rebuild": []}
+    lines = {}
+    for _ in range(args.repeat):
+        lines["columns"], t = feed(bars, unit)
+        runs["columns"].append(t)
+        with mock.patch.object(BarColumns, "frame", lambda self: None):
+            lines["rebuild"], t = feed(bars, unit)
+        runs["rebuild"].append(t)
+    ms = {mode: np.min(np.array(t), axis=0) * 1e3 for mode, t in runs.items()}
+    same = "records identical" if lines["columns"] == lines["rebuild"] else "RECORDS DIFFER"
+
+    print(f"{len(bars)} bars in one open segment, {len(bars[0])} fields per bar, best of {args.repeat}, {same}")
+    print(f"{'bars k':>10}  {'columns p50':>11} {'p95':>7}  {'rebuild p50':>11} {'p95':>7}  ms per bar")
+    lo = 0
+    for hi in BUCKETS:
+        if lo >= len(bars):
+            break
+        a, b = ms["columns"][lo:hi], ms["rebuild"][lo:hi]
+        print(
+            f"{f'{lo}-{min(hi, len(bars)) - 1}':>10}  {np.percentile(a, 50):11.2f} {np.percentile(a, 95):7.2f}"
+            f"  {np.percentile(b, 50):11.2f} {np.percentile(b, 95):7.2f}"
+        )
+        lo = hi
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Macro benchmark: synthetic market -> splitter -> vector_calc -> virtual_trades -> ingest, across dataset sizes.
+
+For each size NxD of --grid (N tickers x D trading days, --tfs timeframes) a synthetic alerts dataset is
+generated (synthetic_market; seeded per (ticker, day), so larger sizes contain the smaller ones' files) and
+every stage is run as its own process, as in production:
+  split     python -m daily_alerts_splitter --full
+  classify  python -m vector_calc
+  trades    python -m virtual_trades
+  ingest    python chroma_ingest.py --backend numpy|chroma (--ingest; skip to leave it out)
+Per stage and size it reports wall time, input bars (alerts lines for split, raw bars for classify / trades,
+classified records for ingest) per second, input MB/s and the child's peak RSS (ru_maxrss from wait4).
+The scaling table gives, per stage, time per 1k input bars at each size and the exponent b of t ~ bars^b
+against the smallest size (1.0 = linear). --json FILE writes the raw numbers for a before/after comparison.
+Usage: python3 scripts/bench_pipeline.py [--grid 5x1,10x1,20x1,10x2] [--tfs 1,5,15] [--ingest numpy] [--json FILE]
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic_market import MarketSpec, generate  # noqa: E402
+
+STAGES = ("split", "classify", "trades", "ingest")
+
+
+def run_stage(cmd: list[str], env: dict) -> tuple[float, int]:
+    """(wall seconds, peak RSS in MB) of one child process; raises on a non-zero exit."""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    err = proc.stderr.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - t0
+    if proc.returncode:
+        raise RuntimeError(f"{' '.join(cmd)} exited {proc.returncode}:\n{err.decode(errors='replace')[-2000:]}")
+    return wall, usage.ru_maxrss // 1024
+
+
+def dir_load(directory: Path, pattern: str) -> tuple[int, int]:
+    """(lines, bytes) of the files matching pattern."""
+    lines = size = 0
+    for p in directory.glob(pattern):
+        data = p.read_bytes()
+        lines += data.count(b"\n")
+        size += len(data)
+    return lines, size
+
+
+def bench_size(root: Path, spec: MarketSpec, ingest: str) -> dict:
+    alerts, raw, classified = root / "Alerts", root / "raw_vectors", root / "classified"
+    t0 = time.perf_counter()
+    gen = generate(spec, alerts)
+    out = {"tickers": spec.tickers, "days": spec.days, "generate_s": time.perf_counter() - t0, "stages": {}}
+    env = dict(os.environ, DATA_BASE=str(root), PYTHONPATH=str(REPO_ROOT))
+    py = sys.executable
+    cmds = {
+        "split": ([py, "-m", "daily_alerts_splitter", "--alerts-dir", str(alerts), "--full"], None),
+        "classify": ([py, "-m", "vector_calc", "--raw-dir", str(raw)], (raw, "*.jsonl")),
+        "trades": ([py, "-m", "virtual_trades", "--raw-dir", str(raw)], (raw, "*.jsonl")),
+        "ingest": ([py, "chroma_ingest.py", "--classified-dir", str(classified), "--backend", ingest], (classified, "*.jsonl")),
+    }
+    for stage in STAGES:
+        if stage == "ingest" and ingest == "skip":
+            continue
+        cmd, source = cmds[stage]
+        bars, size = (gen["lines"], gen["bytes"]) if source is None else dir_load(*source)
+        wall, rss = run_stage(cmd, env)
+        out["stages"][stage] = {"wall_s": wall, "bars": bars, "bytes": size, "peak_rss_mb": rss}
+    return out
+
+
+def parse_grid(text: str) -> list[tuple[int, int]]:
+    sizes = []
+    for item in text.split(","):
+        n, _, d = item.strip().lower().partition("x")
+        sizes.append((int(n), int(d)))
+    return sizes
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--grid", default="5x1,10x1,20x1,10x2", help="Comma-separated NxD sizes (tickers x days).")
+    p.add_argument("--tfs", default="1,5,15", help="Timeframes of the synthetic dataset.")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--ingest", choices=("numpy", "chroma", "skip"), default="numpy", help="Ingest backend (default numpy).")
+    p.add_argument("--work-dir", default="", help="Keep the datasets here (default: a temp dir, removed at exit).")
+    p.add_argument("--json", default="", help="Write the results to this file.")
+    args = p.parse_args()
+    try:
+        sizes = parse_grid(args.grid)
+        tfs = tuple(sorted({int(t) for t in args.tfs.split(",") if t.strip()}))
+    except ValueError:
+        p.error("--grid must look like 10x2,20x2 and --tfs like 1,5,15")
+
+    work = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+    results = []
+    try:
+        print(f"{'size':>7s} {'stage':8s} {'wall s':>7s} {'bars':>9s} {'bars/s':>9s} {'MB/s':>7s} {'peak RSS MB':>11s}")
+        for n, d in sizes:
+            root = work / f"{n}x{d}"
+            shutil.rmtree(root, ignore_errors=True)
+            res = bench_size(root, MarketSpec(tickers=n, days=d, tfs=tfs, seed=args.seed), args.ingest)
+            results.append(res)
+            print(f"{n}x{d:<5d} {'generate':8s} {res['generate_s']:7.2f}")
+            for stage, s in res["stages"].items():
+                print(f"{'':7s} {stage:8s} {s['wall_s']:7.2f} {s['bars']:9d} {s['bars'] / s['wall_s']:9.0f} "
+                      f"{s['bytes'] / 1e6 / s['wall_s']:7.2f} {s['peak_rss_mb']:11d}")
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work, ignore_errors=True)
+
+    base = min(results, key=lambda r: r["stages"]["split"]["bars"])
+    print("\nscaling (ms per 1k input bars; b: t ~ bars^b vs the smallest size)")
+    print(f"{'stage':8s} " + " ".join(f"{r['tickers']}x{r['days']:<9d}" for r in results))
+    for stage in base["stages"]:
+        cells = []
+        b0 = base["stages"][stage]
+        for r in results:
+            s = r["stages"][stage]
+            per_k = 1000 * s["wall_s"] / max(s["bars"], 1) * 1000
+            if r is base or s["bars"] == b0["bars"]:
+                cells.append(f"{per_k:7.1f}    ")
+            else:
+                b = math.log(s["wall_s"] / b0["wall_s"]) / math.log(s["bars"] / b0["bars"])
+                cells.append(f"{per_k:7.1f} b={b:.2f}")
+        print(f"{stage:8s} " + " ".join(f"{c:12s}" for c in cells))
+    if args.json:
+        Path(args.json).write_text(json.dumps({"grid": args.grid, "tfs": tfs, "ingest": args.ingest, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
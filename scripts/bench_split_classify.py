@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark split -> classify: two-step (raw_vectors round trip) vs fused (vector_calc.fused).
+
+Generates synthetic alerts files in a temp dir, then runs each configuration in-process into fresh output
+dirs: two-step (run_file writes raw_vectors, classify_raw_file reads them back), fused with raw written
+inline (sync), by a background thread (async), or not at all (skip). Reports wall time, process CPU time
+and bytes read/written by the process (rchar/wchar from /proc/self/io, where available); checks that every
+configuration produced the same classified bytes.
+Usage: python3 scripts/bench_split_classify.py [--files 40] [--bars 78]
+"""
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from daily_alerts_splitter.splitter import run_file  # noqa: E402
+from vector_calc.__main__ import classify_raw_file  # noqa: E402
+from vector_calc.fused import split_classify_file  # noqa: E402
+
+
+def write_alerts(alerts_dir: Path, n_files: int, n_bars: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    for i in range(n_files):
+        price = 50 + 100 * rng.random()
+        with open(alerts_dir / f"T{i:03d}_260222_5.json", "w", encoding="utf-8") as f:
+            for k in range(n_bars):
+                h, m = divmod(9 * 60 + 30 + 5 * k, 60)
+                price += rng.gauss(0, 0.3)
+                rev = rng.choice((1, -1)) if k > 2 and rng.random() < 0.12 else 0
+                bar = {"time": f"2026-02-22 {h:02d}:{m:02d}:00 EST", "bar_index": k, "event": "bar", "open": price,
+                       "close": price + rng.gauss(0, 0.2), "high": price + rng.random(), "low": price - rng.random(),
+                       "volume": rng.randint(1000, 90000), "revDir": rev, "REV_avwap": price + rng.gauss(0, 0.5)}
+                f.write(json.dumps(bar) + "\n")
+
+
+def _io() -> tuple[int, int]:
+    try:
+        fields = dict(line.split(": ") for line in Path("/proc/self/io").read_text().splitlines())
+    except OSError:
+        return 0, 0
+    return int(fields["rchar"]), int(fields["wchar"])
+
+
+def two_step(alerts: list[Path], out: Path) -> None:
+    raw, classified = out / "raw_vectors", out / "classified"
+    classified.mkdir()
+    for path in alerts:
+        run_file(path, raw, path.stem)
+    for path in sorted(raw.glob("*.jsonl")):
+        classify_raw_file(path, classified)
+
+
+def fused(alerts: list[Path], out: Path, raw_mode: str) -> None:
+    classified = out / "classified"
+    classified.mkdir()
+    raw = out / "raw_vectors" if raw_mode != "skip" else None
+    writer = ThreadPoolExecutor(max_workers=1) if raw_mode == "async" else None
+    try:
+        for path in alerts:
+            split_classify_file(path, classified, raw, writer)
+    finally:
+        if writer is not None:
+            writer.shutdown(wait=True)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--files", type=int, default=40, help="Alerts files (units).")
+    p.add_argument("--bars", type=int, default=78, help="Bars per alerts file (78 = a 5-min RTH day).")
+    args = p.parse_args()
+
+    configs = [
+        ("two-step", lambda a, o: two_step(a, o)),
+        ("fused, raw sync", lambda a, o: fused(a, o, "sync")),
+        ("fused, raw async", lambda a, o: fused(a, o, "async")),
+        ("fused, raw skip", lambda a, o: fused(a, o, "skip")),
+    ]
+    with tempfile.TemporaryDirectory() as d:
+        alerts_dir = Path(d) / "alerts"
+        alerts_dir.mkdir()
+        write_alerts(alerts_dir, args.files, args.bars)
+        alerts = sorted(alerts_dir.glob("*.json"))
+        print(f"{args.files} alerts files x {args.bars} bars")
+        reference = None
+        for i, (label, run) in enumerate(configs):
+            out = Path(d) / f"out_{i}"
+            out.mkdir()
+            r0, w0 = _io()
+            c0, t0 = time.process_time(), time.perf_counter()
+            run(alerts, out)
+            wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+            r1, w1 = _io()
+            result = {p.name: p.read_bytes() for p in (out / "classified").glob("*.jsonl")}
+            if reference is None:
+                reference = result
+            same = "identical" if result == reference else "DIFFERS"
+            print(
+                f"{label:18s} wall {wall:6.2f}s  cpu {cpu:6.2f}s  read {(r1 - r0) / 1e6:7.2f} MB"
+                f"  written {(w1 - w0) / 1e6:7.2f} MB  classified {same}"
+            )
+            shutil.rmtree(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark alert timestamp parsing: common.timeparse vs the per-bar parsers it replaced.
+
+Parses N synthetic "YYYY-MM-DD HH:MM:SS EST" strings (distinct minute bars over several days) with:
+regex + datetime per string (the old splitter / virtual_trades parser), pd.Timestamp per string (the old
+vector_calc series parser), common.timeparse.parse_time (memoized: all misses, then 4 lookups per string) and the vectorized
+epoch_seconds / to_datetime64. Reports strings/sec for each.
+Usage: python3 scripts/bench_timeparse.py [--n 200000] [--repeat 3]
+"""
+import argparse
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from common.timeparse import _MEMO, MEMO_SIZE, epoch_seconds, parse_time, to_datetime64  # noqa: E402
+
+LEGACY_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})\s+(\d{2}):(\d{2}):(\d{2})")
+
+
+def legacy_regex(strings: list[str]) -> list:
+    out = []
+    for s in strings:
+        m = LEGACY_RE.match(s.strip())
+        out.append(datetime(*map(int, m.groups())) if m else None)
+    return out
+
+
+def legacy_pandas(strings: list[str]) -> pd.Series:
+    return pd.Series(strings).map(lambda s: pd.Timestamp(s.strip()[:19]))
+
+
+def memo_cold(strings: list[str]) -> list:
+    _MEMO.clear()
+    return [parse_time(s) for s in strings]
+
+
+def memo_warm(strings: list[str]) -> list:
+    """Each string parsed 4 times in a row, as a bar's time is by the splitter (sort, RTH, name, checkpoint)."""
+    _MEMO.clear()
+    return [parse_time(s) for s in strings[:MEMO_SIZE] for _ in range(4)]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--n", type=int, default=200_000, help="Strings to parse.")
+    p.add_argument("--repeat", type=int, default=3, help="Best of this many runs per parser.")
+    args = p.parse_args()
+
+    t0 = datetime(2026, 1, 5, 4, 0)
+    strings = [(t0 + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S EST") for i in range(args.n)]
+    arr = np.array(strings, dtype=object)
+    expected = to_datetime64(arr)
+    assert (np.array([np.datetime64(d, "s") for d in legacy_regex(strings[:1000])]) == expected[:1000]).all()
+
+    n_warm = 4 * min(args.n, MEMO_SIZE)
+    parsers = [
+        ("regex + datetime (old splitter/trades)", lambda: legacy_regex(strings), args.n),
+        ("pd.Timestamp per string (old vector_calc)", lambda: legacy_pandas(strings), args.n),
+        ("parse_time, memo cold", lambda: memo_cold(strings), args.n),
+        ("parse_time, 4 lookups per string", lambda: memo_warm(strings), n_warm),
+        ("epoch_seconds (vectorized)", lambda: epoch_seconds(arr), args.n),
+        ("to_datetime64 (vectorized)", lambda: to_datetime64(arr), args.n),
+    ]
+    print(f"{args.n} strings, best of {args.repeat}")
+    for label, run, n in parsers:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        print(f"{label:42s} {best * 1000:9.1f} ms  {n / best / 1e6:8.2f} M strings/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""CLI: write a synthetic alerts dataset (N tickers x D days x tfs) for tests and benchmarks.
+
+Usage:
+  python -m synthetic_market --alerts-dir DIR [--tickers 10] [--days 2] [--tfs 1,5,15] [--seed 0]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from .generator import MarketSpec, generate
+
+
+def main() -> None:
+    d = MarketSpec()
+    p = argparse.ArgumentParser(description="Generate synthetic {ticker}_{yymmdd}_{tf}.json alerts files.")
+    p.add_argument("--alerts-dir", required=True, help="Output directory (created if missing).")
+    p.add_argument("--tickers", type=int, default=d.tickers, help=f"Number of tickers (default {d.tickers}).")
+    p.add_argument("--days", type=int, default=d.days, help=f"Number of trading days (default {d.days}).")
+    p.add_argument("--tfs", default=",".join(map(str, d.tfs)), help="Comma-separated timeframes in minutes.")
+    p.add_argument("--start", default=d.start, metavar="YYMMDD", help="First trading day (weekends are skipped).")
+    p.add_argument("--seed", type=int, default=d.seed)
+    p.add_argument("--edge-density", type=float, default=d.edge_density, help="Regime flips per hour of the 1-min path.")
+    p.add_argument("--dup-rate", type=float, default=d.dup_rate, help="Fraction of lines written twice.")
+    p.add_argument("--disorder-rate", type=float, default=d.disorder_rate, help="Fraction of lines moved out of order.")
+    p.add_argument("--extended-min", type=int, default=d.extended_min, help="Pre/post-market minutes around RTH.")
+    args = p.parse_args()
+
+    try:
+        tfs = tuple(sorted({int(t) for t in args.tfs.split(",") if t.strip()}))
+    except ValueError:
+        p.error(f"--tfs must be comma-separated minutes: {args.tfs!r}")
+    if not tfs or min(tfs) < 1 or args.tickers < 1 or args.days < 1:
+        p.error("--tickers, --days and every --tfs value must be >= 1")
+    spec = MarketSpec(
+        tickers=args.tickers, days=args.days, tfs=tfs, start=args.start, seed=args.seed,
+        edge_density=args.edge_density, extended_min=args.extended_min,
+        dup_rate=args.dup_rate, disorder_rate=args.disorder_rate,
+    )
+    t0 = time.perf_counter()
+    stats = generate(spec, Path(args.alerts_dir))
+    print(f"Wrote {stats['files']} files, {stats['lines']} lines, {stats['bytes'] / 1e6:.1f} MB "
+          f"to {args.alerts_dir} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
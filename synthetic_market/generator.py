@@ -0,0 +1,214 @@
+"""Synthetic alerts: N tickers x D trading days x a set of timeframes, as {ticker}_{yymmdd}_{tf}.json files.
+
+Per (ticker, day) one 1-minute path is simulated and every timeframe is aggregated from it, so the tfs of a
+unit agree (a 15-min bar is three 5-min bars). The path is a regime-switching random walk: the regime
+direction flips with probability edge_density / 60 per minute and the log return drifts with it, so
+vectors mostly move in their revDir direction (like the real feed, some do not). A tf bar whose close is
+in another regime than the previous bar's close is a reversal edge (revDir = the new direction), so higher
+tfs see fewer, longer vectors and their edges line up with lower-tf edges.
+
+Each bar carries the fields the pipeline reads: OHLC, volume, hlc3/ohlc4, revDir, REV_avwap (VWAP anchored
+at the last edge), TRADE_avwap (anchored one edge earlier), htfVwap (session VWAP), atrNow/atrBase/atrRatio
+(EMA 14 / 50 of the true range), shock, trend, regime and SMA-cross scores (0-100). Lines are then
+dirtied like the producer's output: exact duplicate lines (dup_rate) and lines moved a few places
+later (disorder_rate).
+
+Each (ticker, day) is seeded from (seed, ticker index, day index), so a larger dataset contains the
+smaller one's files byte for byte (scaling runs grow the data, they do not reshuffle it).
+"""
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+SESSION_OPEN_MIN = 9 * 60 + 30
+SESSION_CLOSE_MIN = 16 * 60
+
+
+@dataclass
+class MarketSpec:
+    tickers: int = 10
+    days: int = 2
+    tfs: tuple[int, ...] = (1, 5, 15)
+    start: str = "260105"  # YYMMDD of the first trading day (weekends are skipped)
+    seed: int = 0
+    edge_density: float = 1.5  # regime flips per hour of the 1-minute path
+    extended_min: int = 30  # minutes of pre- and post-market bars around 09:30-16:00
+    dup_rate: float = 0.01
+    disorder_rate: float = 0.01
+    zone: str = "EST"
+    ticker_names: list[str] = field(default_factory=list)
+
+    def names(self) -> list[str]:
+        return self.ticker_names[: self.tickers] if self.ticker_names else [ticker_name(i) for i in range(self.tickers)]
+
+    def trading_days(self) -> list[date]:
+        d = datetime.strptime(self.start, "%y%m%d").date()
+        out = []
+        while len(out) < self.days:
+            if d.weekday() < 5:
+                out.append(d)
+            d += timedelta(days=1)
+        return out
+
+
+def ticker_name(i: int) -> str:
+    """Letters only (virtual_trades requires [A-Z]+): SA, SB, ..., SZ, SBA, ..."""
+    letters = ""
+    while True:
+        i, r = divmod(i, 26)
+        letters = chr(65 + r) + letters
+        if i == 0:
+            return "S" + letters
+
+
+def _ema(x: np.ndarray, span: int) -> np.ndarray:
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(x)
+    acc = x[0]
+    for i, v in enumerate(x):
+        acc = alpha * v + (1 - alpha) * acc
+        out[i] = acc
+    return out
+
+
+def _minute_path(rng: np.random.Generator, n: int, spec: MarketSpec, price0: float, sigma: float):
+    """(open, close, high, low, volume, regime) per minute."""
+    flips = rng.random(n) < spec.edge_density / 60.0
+    regime = np.where(np.cumsum(flips) % 2 == 0, 1, -1) * (1 if rng.random() < 0.5 else -1)
+    drift = regime * sigma * rng.uniform(0.15, 0.45)
+    ret = drift + sigma * rng.standard_normal(n)
+    close = price0 * np.exp(np.cumsum(ret))
+    wick = np.abs(rng.standard_normal((2, n))) * sigma * close * 0.6
+    open_ = np.concatenate(([price0], close[:-1]))
+    high = np.maximum(open_, close) + wick[0]
+    low = np.minimum(open_, close) - wick[1]
+    minute = np.arange(n)
+    u_shape = 1.0 + 2.0 * (np.abs(minute - n / 2) / (n / 2)) ** 3
+    volume = np.maximum(1, rng.lognormal(7.0, 0.6, n) * u_shape).astype(np.int64)
+    return open_, close, high, low, volume, regime
+
+
+def _aggregate(tf: int, open_, close, high, low, volume, regime):
+    """tf-minute bars (the last partial bar is kept)."""
+    n = len(close)
+    starts = np.arange(0, n, tf)
+    ends = np.minimum(starts + tf, n) - 1
+    return (
+        starts,
+        open_[starts],
+        close[ends],
+        np.maximum.reduceat(high, starts),
+        np.minimum.reduceat(low, starts),
+        np.add.reduceat(volume, starts),
+        regime[ends],
+    )
+
+
+def _unit_bars(spec: MarketSpec, ticker_ix: int, day_ix: int, day: date, tfs) -> dict[int, list[dict]]:
+    rng = np.random.default_rng([spec.seed, ticker_ix, day_ix])
+    first = SESSION_OPEN_MIN - spec.extended_min
+    n = SESSION_CLOSE_MIN + spec.extended_min - first
+    price0 = float(rng.uniform(15, 400))
+    sigma = float(rng.uniform(0.0006, 0.003))
+    open_, close, high, low, volume, regime = _minute_path(rng, n, spec, price0, sigma)
+    hlc3 = (high + low + close) / 3
+    session_vwap = np.cumsum(hlc3 * volume) / np.cumsum(volume)
+    t0 = datetime(day.year, day.month, day.day) + timedelta(minutes=first)
+    out = {}
+    for tf in tfs:
+        starts, o, c, h, lo, v, reg = _aggregate(tf, open_, close, high, low, volume, regime)
+        m = len(c)
+        typ = (h + lo + c) / 3
+        prev_c = np.concatenate(([o[0]], c[:-1]))
+        tr = np.maximum(h - lo, np.maximum(np.abs(h - prev_c), np.abs(lo - prev_c)))
+        atr_now, atr_base = _ema(tr, 14), _ema(tr, 50)
+        ret = np.diff(np.log(c), prepend=math.log(o[0]))
+        shock = np.minimum(100.0, 50.0 * np.abs(c - prev_c) / np.maximum(atr_now, 1e-9))
+        shock_tot = _ema(shock, 5)
+        sma_fast, sma_slow = _ema(c, 9), _ema(c, 21)
+        edge = np.concatenate(([False], reg[1:] != reg[:-1]))
+        bars = []
+        anchor = prev_anchor = 0  # bar index the current / previous VWAP anchor starts at
+        pv = vv = ppv = pvv = 0.0
+        for k in range(m):
+            if edge[k]:
+                prev_anchor, ppv, pvv = anchor, pv, vv
+                anchor, pv, vv = k, 0.0, 0.0
+            pv += typ[k] * v[k]
+            vv += v[k]
+            ppv += typ[k] * v[k]
+            pvv += v[k]
+            w = ret[max(0, k - 9) : k + 1]
+            eff = abs(w.sum()) / max(np.abs(w).sum(), 1e-12)
+            trend_dir = 1 if w.sum() >= 0 else -1
+            t_trend = 100.0 * eff
+            gap = (sma_fast[k] - sma_slow[k]) / max(atr_now[k], 1e-9)
+            bars.append({
+                "time": (t0 + timedelta(minutes=int(starts[k]))).strftime("%Y-%m-%d %H:%M:%S ") + spec.zone,
+                "bar_index": k,
+                "event": "bar",
+                "open": round(float(o[k]), 4),
+                "high": round(float(h[k]), 4),
+                "low": round(float(lo[k]), 4),
+                "close": round(float(c[k]), 4),
+                "volume": int(v[k]),
+                "hlc3": round(float(typ[k]), 4),
+                "ohlc4": round(float((o[k] + h[k] + lo[k] + c[k]) / 4), 4),
+                "revDir": int(reg[k]) if edge[k] else 0,
+                "REV_avwap": round(pv / vv, 4),
+                "TRADE_avwap": round(ppv / pvv, 4) if prev_anchor != anchor else round(pv / vv, 4),
+                "htfVwap": round(float(session_vwap[min(starts[k] + tf, n) - 1]), 4),
+                "atrNow": round(float(atr_now[k]), 4),
+                "atrBase": round(float(atr_base[k]), 4),
+                "atrRatio": round(float(atr_now[k] / max(atr_base[k], 1e-9)), 4),
+                "shockScore": round(float(shock[k]), 2),
+                "shockDir": 1 if c[k] >= prev_c[k] else -1,
+                "tShockScoreTot": round(float(shock_tot[k]), 2),
+                "tShockDirTot": trend_dir,
+                "tTrendAbs": round(t_trend, 2),
+                "trendDir": trend_dir,
+                "inTrendScore": round(t_trend if trend_dir == reg[k] else 0.0, 2),
+                "tRegimeAbs": round(float(min(100.0, 25.0 * abs(c[k] - session_vwap[starts[k]]) / max(atr_now[k], 1e-9))), 2),
+                "smaCrossScoreInd": round(float(min(100.0, 40.0 * abs(gap))), 2),
+                "smaCrossDirInd": 1 if gap >= 0 else -1,
+            })
+        out[tf] = bars
+    return out
+
+
+def _dirty_lines(rng: np.random.Generator, bars: list[dict], spec: MarketSpec) -> list[str]:
+    lines = []
+    for b in bars:
+        lines.append(json.dumps(b))
+        if rng.random() < spec.dup_rate:
+            lines.append(lines[-1])
+    for i in range(len(lines) - 1):
+        if rng.random() < spec.disorder_rate:
+            j = min(len(lines) - 1, i + int(rng.integers(1, 4)))
+            lines.insert(j, lines.pop(i))
+    return lines
+
+
+def generate(spec: MarketSpec, alerts_dir: Path) -> dict:
+    """Write the alerts files into alerts_dir. Returns {files, lines, bytes}."""
+    alerts_dir = Path(alerts_dir)
+    alerts_dir.mkdir(parents=True, exist_ok=True)
+    stats = {"files": 0, "lines": 0, "bytes": 0}
+    for ti, ticker in enumerate(spec.names()):
+        for di, day in enumerate(spec.trading_days()):
+            by_tf = _unit_bars(spec, ti, di, day, spec.tfs)
+            rng = np.random.default_rng([spec.seed, ti, di, 1])
+            for tf, bars in by_tf.items():
+                text = "\n".join(_dirty_lines(rng, bars, spec)) + "\n"
+                path = alerts_dir / f"{ticker}_{day.strftime('%y%m%d')}_{tf}.json"
+                path.write_text(text, encoding="utf-8")
+                stats["files"] += 1
+                stats["lines"] += text.count("\n")
+                stats["bytes"] += len(text.encode("utf-8"))
+    return stats
@@ -0,0 +1,81 @@
+"""Tests for artifact_catalog: stem parsing, registration, queries and the glob fallback."""
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from artifact_catalog import CATALOG_NAME, ArtifactCatalog, find_artifacts, parse_stem, register_outputs
+
+
+def _classified(d: Path, stem: str, tier: str, n: int = 2) -> Path:
+    p = d / f"{stem}.jsonl"
+    p.write_text("".join(json.dumps({"closing_bar_index": k, "tier": tier}) + "\n" for k in range(n)))
+    return p
+
+
+class TestParseStem(unittest.TestCase):
+    def test_forms(self):
+        self.assertEqual(parse_stem("SPY_260222_5_0935_1022")["tf"], "5")
+        self.assertEqual(parse_stem("BOIL_260223_1450_1510")["tf"], "D")
+        self.assertEqual(parse_stem("SPY_260222_5")["start_hhmm"], None)
+        self.assertIsNone(parse_stem("notes"))
+        self.assertIsNone(parse_stem("SPY_x_5"))
+
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.cdir = self.base / "classified"
+        self.cdir.mkdir()
+        self.paths = [
+            _classified(self.cdir, "SPY_260222_5_0930_1000", "elite", n=3),
+            _classified(self.cdir, "SPY_260223_5_0930_1000", "low_edge"),
+            _classified(self.cdir, "QQQ_260301_15_0930_1000", "elite"),
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _names(self, paths):
+        return [p.stem for p in paths]
+
+    def test_register_and_query(self):
+        with ArtifactCatalog(self.base / CATALOG_NAME) as cat:
+            self.assertEqual(cat.register("classified", self.paths, stage="vector_calc", version="v1"), 3)
+            row = cat.query("classified", ticker="SPY", date="260222")[0]
+            self.assertEqual((row["bars"], row["tier"], row["stage"], row["tf"]), (3, "elite", "vector_calc", "5"))
+            self.assertEqual(len(cat.query("classified", date_from="260223", date_to="260301")), 2)
+            self.assertEqual(len(cat.query("classified", tier="elite", tf="15")), 1)
+
+    def test_fallback_until_complete(self):
+        register_outputs("classified", self.cdir, self.paths[:1], stage="vector_calc")
+        # Not marked complete: glob answers, so unregistered files are still found.
+        self.assertEqual(len(find_artifacts("classified", self.cdir)), 3)
+        self.assertEqual(self._names(find_artifacts("classified", self.cdir, tier="elite", ticker="QQQ")), ["QQQ_260301_15_0930_1000"])
+        register_outputs("classified", self.cdir, self.paths[:2], stage="vector_calc", full=True)
+        self.assertEqual(
+            self._names(find_artifacts("classified", self.cdir)), ["SPY_260222_5_0930_1000", "SPY_260223_5_0930_1000"]
+        )
+        self.paths[0].unlink()
+        self.assertEqual(self._names(find_artifacts("classified", self.cdir)), ["SPY_260223_5_0930_1000"])
+
+    def test_date_run_replaces_that_date(self):
+        register_outputs("classified", self.cdir, self.paths, stage="s", full=True)
+        register_outputs("classified", self.cdir, [], stage="s", date="260222")
+        self.assertEqual(len(find_artifacts("classified", self.cdir, date="260222")), 0)
+        self.assertEqual(len(find_artifacts("classified", self.cdir)), 2)
+
+    def test_rebuild(self):
+        with ArtifactCatalog(self.base / CATALOG_NAME) as cat:
+            counts = cat.rebuild({"classified": self.cdir, "raw": self.base / "raw_vectors"})
+            self.assertEqual(counts, {"classified": 3, "raw": 0})
+            self.assertTrue(cat.is_complete("classified", self.cdir))
+            self.assertFalse(cat.is_complete("raw", self.base / "raw_vectors"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Tests for common.atomic_output: staged, diff-aware replacement of an output directory."""
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.atomic_output import StagedOutput
+
+
+class TestStagedOutput(unittest.TestCase):
+    def test_commit_counts_and_keeps_unchanged_files(self):
+        with tempfile.TemporaryDirectory() as d:
+            target = Path(d) / "classified"
+            target.mkdir()
+            for name, text in (("a_260222.jsonl", "same\n"), ("b_260222.jsonl", "old\n"), ("c_260222.jsonl", "gone\n"),
+                               ("d_260223.jsonl", "other date\n")):
+                (target / name).write_text(text)
+                os.utime(target / name, ns=(10**18, 10**18))
+            before = (target / "a_260222.jsonl").stat()
+            with StagedOutput(target) as out:
+                (out.staging / "a_260222.jsonl").write_text("same\n")
+                (out.staging / "b_260222.jsonl").write_text("new\n")
+                (out.staging / "e_260222.jsonl").write_text("added\n")
+                stats = out.commit(scope=lambda name: "_260222" in name)
+            self.assertEqual(
+                (stats.added, stats.changed, stats.unchanged, stats.removed),
+                (["e_260222.jsonl"], ["b_260222.jsonl"], ["a_260222.jsonl"], ["c_260222.jsonl"]),
+            )
+            after = (target / "a_260222.jsonl").stat()
+            self.assertEqual((after.st_ino, after.st_mtime_ns), (before.st_ino, before.st_mtime_ns))
+            self.assertEqual((target / "b_260222.jsonl").read_text(), "new\n")
+            self.assertTrue((target / "d_260223.jsonl").is_file())  # out of scope
+            sub = stats.select(lambda name: name.startswith(("a", "e")))
+            self.assertEqual(sub.summary(), "1 added, 0 changed, 1 unchanged, 0 removed")
+            self.assertEqual(sorted(p.name for p in Path(d).iterdir()), ["classified"])  # staging dir removed
+
+    def test_error_discards_staging(self):
+        with tempfile.TemporaryDirectory() as d:
+            target = Path(d) / "raw_vectors"
+            target.mkdir()
+            (target / "x.jsonl").write_text("keep\n")
+            with self.assertRaises(RuntimeError):
+                with StagedOutput(target) as out:
+                    (out.staging / "y.jsonl").write_text("half\n")
+                    raise RuntimeError("boom")
+            self.assertEqual(sorted(p.name for p in Path(d).iterdir()), ["raw_vectors"])
+            self.assertEqual([p.name for p in target.iterdir()], ["x.jsonl"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Tests for bin/check_raw_classified_match.py: line counting and --deep checks."""
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+_spec = importlib.util.spec_from_file_location("check_raw_classified_match", ROOT / "bin" / "check_raw_classified_match.py")
+check = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check)
+
+STEM = "SPY_260222_5_0930_0940"
+
+
+def _write(d: Path, bars: int, records: list, sep: str = " ") -> tuple[Path, Path]:
+    raw = d / "raw.jsonl"
+    raw.write_text("".join(
+        json.dumps({"time": f"2026-02-22{sep}09:{30 + 5 * i:02d}:00 EST", "close": 100 + i}) + "\n" for i in range(bars)
+    ))
+    classified = d / "classified.jsonl"
+    classified.write_text("".join(json.dumps(r) + "\n" for r in records))
+    return raw, classified
+
+
+def _record(k: int, **over) -> dict:
+    rec = {"closing_bar_index": k, "segment_id": STEM, "start_time": "2026-02-22 09:30:00 EST", "duration_min": 5.0 * k}
+    rec.update(over)
+    return rec
+
+
+class TestCountLines(unittest.TestCase):
+    def test_trailing_newline_optional(self):
+        with tempfile.TemporaryDirectory() as d:
+            p = Path(d) / "a.jsonl"
+            p.write_bytes(b'{"a":1}\n{"a":2}\n')
+            self.assertEqual(check.count_lines(p), 2)
+            p.write_bytes(b'{"a":1}\n{"a":2}')
+            self.assertEqual(check.count_lines(p), 2)
+            p.write_bytes(b"")
+            self.assertEqual(check.count_lines(p), 0)
+
+    def test_missing_file(self):
+        self.assertEqual(check.count_lines(Path("/nonexistent/x.jsonl")), -1)
+
+    def test_count_dir_uses_cache(self):
+        with tempfile.TemporaryDirectory() as d:
+            p = Path(d) / "a.jsonl"
+            p.write_text("1\n2\n3\n")
+            cache = {}
+            with check.ThreadPoolExecutor(2) as pool:
+                counts, hits = check.count_dir(Path(d), cache, pool)
+                self.assertEqual((counts, hits), ({"a": 3}, 0))
+                counts, hits = check.count_dir(Path(d), cache, pool)
+                self.assertEqual((counts, hits), ({"a": 3}, 1))
+
+
+class TestDeepCheck(unittest.TestCase):
+    def test_consistent(self):
+        with tempfile.TemporaryDirectory() as d:
+            raw, classified = _write(Path(d), 3, [_record(k) for k in range(3)])
+            self.assertEqual(check.deep_check(STEM, raw, classified), [])
+
+    def test_iso_bar_times(self):
+        with tempfile.TemporaryDirectory() as d:
+            records = [_record(k, start_time="2026-02-22T09:30:00 EST") for k in range(3)]
+            raw, classified = _write(Path(d), 3, records, sep="T")
+            self.assertEqual(check.deep_check(STEM, raw, classified), [])
+            records[1]["duration_min"] = 1.0
+            raw, classified = _write(Path(d), 3, records, sep="T")
+            self.assertEqual(len(check.deep_check(STEM, raw, classified)), 1)
+
+    def test_detects_gap_wrong_segment_and_duration(self):
+        with tempfile.TemporaryDirectory() as d:
+            records = [_record(0), _record(2, segment_id="OTHER"), _record(2, duration_min=1.0)]
+            raw, classified = _write(Path(d), 3, records)
+            issues = check.deep_check(STEM, raw, classified)
+            self.assertTrue(any("closing_bar_index 2 != 1" in s for s in issues))
+            self.assertTrue(any("segment_id" in s for s in issues))
+            self.assertTrue(any("duration_min 1.0" in s for s in issues))
+
+    def test_record_count_vs_bars(self):
+        with tempfile.TemporaryDirectory() as d:
+            raw, classified = _write(Path(d), 4, [_record(k) for k in range(3)])
+            self.assertEqual(check.deep_check(STEM, raw, classified), ["3 classified records vs 4 raw bars"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+"""Tests for chroma_ingest helpers (no chromadb needed) and, when chromadb is installed, incremental ingest."""
+import gzip
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chroma_ingest import (
+    EMBED_FIELDS,
+    MIN_BATCH_SIZE,
+    FileBatch,
+    IngestOptions,
+    UpsertWriter,
+    _expand_id_ranges,
+    _id_ranges,
+    _load_ledger,
+    _read_file_records,
+    _save_ledger,
+)
+
+
+class TestIdRanges(unittest.TestCase):
+    def test_roundtrip(self):
+        ids = [f"SPY_260222_5_0930_0945_{k}" for k in range(4)] + ["QQQ_260222_5_0930_1000_0", "QQQ_260222_5_0930_1000_2"]
+        ranges = _id_ranges(ids)
+        self.assertEqual(ranges[0], ["SPY_260222_5_0930_0945", 0, 3])
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(_expand_id_ranges(ranges), ids)
+
+    def test_shrunk_segment_leaves_stale_ids(self):
+        old = _id_ranges([f"S_{k}" for k in range(5)])
+        new = [f"S_{k}" for k in range(3)]
+        self.assertEqual(sorted(set(_expand_id_ranges(old)) - set(new)), ["S_3", "S_4"])
+
+
+class TestLedger(unittest.TestCase):
+    def test_missing_or_bad_ledger_is_empty(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "ledger.json"
+            self.assertEqual(_load_ledger(path)["files"], {})
+            path.write_text("{not json")
+            self.assertEqual(_load_ledger(path)["files"], {})
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "ledger.json"
+            ledger = _load_ledger(path)
+            ledger["files"]["A.jsonl"] = {"mtime_ns": 1, "size": 2, "sha1": "x", "id_ranges": [["A", 0, 1]]}
+            _save_ledger(path, ledger)
+            self.assertEqual(_load_ledger(path), ledger)
+
+    def test_version_1_ledger_is_keyed_by_stem(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "ledger.json"
+            path.write_text(json.dumps({"version": 1, "files": {
+                "A.jsonl": {"mtime_ns": 1, "size": 2, "sha1": "x", "id_ranges": [["A", 0, 1]]},
+                "A.jsonl.gz": {"mtime_ns": 3, "size": 4, "sha1": "y", "id_ranges": [["A", 0, 3]]},
+                "B.jsonl": {"mtime_ns": 1, "size": 2, "sha1": "z", "id_ranges": [["B", 0, 0]]},
+            }}))
+            files = _load_ledger(path)["files"]
+            self.assertEqual(sorted(files), ["A", "B"])
+            self.assertEqual(files["B"]["file"], "B.jsonl")
+            self.assertEqual(_expand_id_ranges(files["A"]["id_ranges"]), [f"A_{k}" for k in range(4)])
+            self.assertIsNone(files["A"]["sha1"])
+
+
+class TestReadFileRecords(unittest.TestCase):
+    def test_ids_embeddings_metadata(self):
+        with tempfile.TemporaryDirectory() as d:
+            fp = Path(d) / "SPY_260222_5_0930_0945.jsonl"
+            recs = [{"segment_id": fp.stem, "closing_bar_index": k, "delta_pct": 1.0, "tier": "elite"} for k in range(2)]
+            fp.write_text("".join(json.dumps(r) + "\n" for r in recs) + "not json\n")
+            ids, embeddings, metadatas, offsets = _read_file_records(fp)
+            self.assertEqual(ids, [f"{fp.stem}_0", f"{fp.stem}_1"])
+            self.assertEqual(len(embeddings[0]), len(EMBED_FIELDS))
+            self.assertNotIn("delta_pct", metadatas[0])
+            self.assertEqual(metadatas[0]["tier"], "elite")
+            raw = fp.read_bytes()
+            off, length = offsets[1]
+            self.assertEqual(json.loads(raw[off : off + length]), recs[1])
+
+    def test_metadata_fields(self):
+        with tempfile.TemporaryDirectory() as d:
+            fp = Path(d) / "S.jsonl"
+            fp.write_text(json.dumps({"segment_id": "S", "closing_bar_index": 0, "tier": "elite", "next_tier": "x"}) + "\n")
+            _, _, pruned, _ = _read_file_records(fp)
+            self.assertEqual(pruned[0], {"segment_id": "S", "closing_bar_index": 0, "tier": "elite"})
+            _, _, full, _ = _read_file_records(fp, IngestOptions(metadata_fields=None))
+            self.assertEqual(full[0]["next_tier"], "x")
+
+
+class TestGranularity(unittest.TestCase):
+    def test_select(self):
+        self.assertEqual(IngestOptions("all").select(3), [0, 1, 2])
+        self.assertEqual(IngestOptions("last").select(7), [6])
+        self.assertEqual(IngestOptions("every-n", every_n=3).select(8), [0, 3, 6, 7])
+        self.assertEqual(IngestOptions("milestones", milestones=(0.25, 0.5, 1.0)).select(8), [1, 3, 7])
+        self.assertEqual(IngestOptions("milestones").select(1), [0])
+        self.assertEqual(IngestOptions("last").select(0), [])
+
+    def test_read_with_granularity_and_collapse(self):
+        with tempfile.TemporaryDirectory() as d:
+            fp = Path(d) / "S.jsonl"
+            deltas = [0.0, 0.01, 0.02, 5.0, 5.01, 5.02]
+            fp.write_text("".join(
+                json.dumps({"segment_id": "S", "closing_bar_index": k, "delta_pct": v}) + "\n" for k, v in enumerate(deltas)
+            ))
+            ids = _read_file_records(fp, IngestOptions("every-n", every_n=2))[0]
+            self.assertEqual(ids, ["S_0", "S_2", "S_4", "S_5"])
+            ids = _read_file_records(fp, IngestOptions(collapse_distance=1.0))[0]
+            self.assertEqual(ids, ["S_0", "S_3", "S_5"])
+
+    def test_signature_changes_with_options(self):
+        self.assertNotEqual(IngestOptions().signature(), IngestOptions("last").signature())
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.upserts = []
+        self.deleted = []
+
+    def upsert(self, ids, embeddings, metadatas):
+        assert len(ids) == len(embeddings) == len(metadatas)
+        self.upserts.append(list(ids))
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+
+
+def _batch(name, n):
+    return FileBatch(name, [f"{name}_{k}" for k in range(n)], [[0.0]] * n, [{}] * n)
+
+
+class TestUpsertWriter(unittest.TestCase):
+    def test_threaded_fixed_batches_and_done(self):
+        coll = _FakeCollection()
+        w = UpsertWriter(coll, batch_size=4, threaded=True)
+        w.put(_batch("A", 3))
+        w.put(_batch("B", 3))
+        w.put(FileBatch("gone", stale=["gone_0", "gone_1"]))
+        w.close()
+        self.assertEqual([len(u) for u in coll.upserts], [4, 2])
+        self.assertEqual(w.upserted, 6)
+        self.assertEqual(coll.deleted, ["gone_0", "gone_1"])
+        self.assertEqual(w.done, ["A", "B", "gone"])
+
+    def test_adaptive_stays_in_bounds(self):
+        coll = _FakeCollection()
+        w = UpsertWriter(coll, batch_size=0, threaded=False)
+        for i in range(5):
+            w.put(_batch(f"F{i}", 700))
+        w.close()
+        self.assertEqual(w.upserted, 3500)
+        self.assertGreaterEqual(w.batch_size, MIN_BATCH_SIZE)
+        self.assertEqual(len(w.done), 5)
+
+    def test_writer_error_surfaces(self):
+        class Broken(_FakeCollection):
+            def upsert(self, ids, embeddings, metadatas):
+                raise ValueError("boom")
+
+        w = UpsertWriter(Broken(), batch_size=1, threaded=True)
+        with self.assertRaises(RuntimeError):
+            for i in range(50):
+                w.put(_batch(f"F{i}", 1))
+            w.close()
+        self.assertEqual(w.done, [])
+
+
+@unittest.skipUnless(importlib.util.find_spec("chromadb"), "chromadb not installed")
+class TestIncrementalIngest(unittest.TestCase):
+    def _ingest(self, classified: Path, chroma: Path) -> int:
+        from unittest import mock
+        import chromadb
+        import chroma_ingest
+        # --batch-size 1: every upsert reaches the collection before the deletes queued after it.
+        argv = ["chroma_ingest.py", "--classified-dir", str(classified), "--chroma-dir", str(chroma),
+                "--workers", "0", "--batch-size", "1"]
+        with mock.patch.object(sys, "argv", argv), mock.patch("builtins.print"):
+            chroma_ingest.main()
+        return chromadb.PersistentClient(path=str(chroma)).get_collection(chroma_ingest.COLLECTION_NAME).count()
+
+    def test_codec_switch_keeps_records(self):
+        with tempfile.TemporaryDirectory() as d:
+            classified, chroma = Path(d) / "classified", Path(d) / "chroma"
+            classified.mkdir()
+            body = "".join(
+                json.dumps({"segment_id": f"SPY_260222_5_0930_{m}", "closing_bar_index": k, "delta_pct": 0.1 * k, "tier": "elite"}) + "\n"
+                for m in ("0945", "1000") for k in range(3)
+            )
+            for m in ("0945", "1000"):
+                lines = [line for line in body.splitlines(keepends=True) if f"_{m}\"" in line]
+                (classified / f"SPY_260222_5_0930_{m}.jsonl").write_text("".join(lines))
+            self.assertEqual(self._ingest(classified, chroma), 6)
+            # Re-written with another codec: same stems, same ids.
+            for p in sorted(classified.glob("*.jsonl")):
+                with gzip.open(p.with_name(p.name + ".gz"), "wt") as f:
+                    f.write(p.read_text())
+                p.unlink()
+            self.assertEqual(self._ingest(classified, chroma), 6)
+            (classified / "SPY_260222_5_0930_1000.jsonl.gz").unlink()
+            self.assertEqual(self._ingest(classified, chroma), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Tests for common.compressed and the --codec storage of the splitter / vector_calc outputs."""
+import gzip
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from common.compressed import (
+    codec_available,
+    data_file,
+    data_files,
+    data_stem,
+    open_bytes,
+    open_text,
+    read_bytes,
+    with_codec,
+)
+
+
+class TestCompressedIO(unittest.TestCase):
+    def test_round_trip_and_names(self):
+        text = "".join(json.dumps({"k": i, "s": "é"}) + "\n" for i in range(5000))
+        with tempfile.TemporaryDirectory() as d:
+            for codec in ("none", "gzip", "zstd"):
+                if not codec_available(codec):
+                    continue
+                p = Path(d) / with_codec("SPY_260222_5_0930_0940.jsonl", codec)
+                with open_text(p, "w") as f:
+                    f.write(text)
+                first = p.read_bytes()
+                with open_text(p, "w") as f:
+                    f.write(text)
+                self.assertEqual(p.read_bytes(), first, codec)  # reproducible bytes
+                with open_text(p) as f:
+                    self.assertEqual(f.read(), text, codec)
+                self.assertEqual(read_bytes(p), text.encode("utf-8"))
+                with open_bytes(p) as f:
+                    f.seek(100)
+                    self.assertEqual(f.read(10), text.encode("utf-8")[100:110])
+                self.assertEqual(data_stem(p), "SPY_260222_5_0930_0940")
+            gz = Path(d) / "SPY_260222_5_0930_0940.jsonl.gz"
+            self.assertEqual(gzip.decompress(gz.read_bytes()).decode("utf-8"), text)
+            self.assertLess(gz.stat().st_size, len(text) // 3)
+            (Path(d) / "x.idx").write_bytes(b"")
+            self.assertEqual([p.name for p in data_files(Path(d), "*.jsonl")][:2],
+                             ["SPY_260222_5_0930_0940.jsonl", "SPY_260222_5_0930_0940.jsonl.gz"])
+            self.assertEqual(data_file(Path(d), "SPY_260222_5_0930_0940.jsonl").name, "SPY_260222_5_0930_0940.jsonl")
+            self.assertIsNone(data_file(Path(d), "QQQ_260222_5_0930_0940.jsonl"))
+
+
+def _alerts(n: int = 40) -> str:
+    lines = []
+    for i in range(n):
+        rev = 1 if i % 10 == 0 else (-1 if i % 10 == 5 else 0)
+        lines.append(json.dumps({
+            "time": f"2026-02-22 {9 + (30 + i) // 60:02d}:{(30 + i) % 60:02d}:00 EST", "bar_index": i, "event": "bar",
+            "close": 100 + (i % 7), "revDir": rev, "REV_avwap": 100 + i * 0.1, "htfVwap": 101.0, "atrRatio": 1.0,
+        }) + "\n")
+    return "".join(lines)
+
+
+class TestCompressedPipeline(unittest.TestCase):
+    def _run(self, base: Path, codec: str) -> None:
+        for mod, arg in (("daily_alerts_splitter", ["--alerts-dir", str(base / "Alerts"), "--full"]),
+                         ("vector_calc", ["--raw-dir", str(base / "raw_vectors")])):
+            subprocess.run([sys.executable, "-m", mod, *arg, "--codec", codec], cwd=ROOT, check=True, capture_output=True)
+
+    def test_gzip_outputs_match_plain(self):
+        with tempfile.TemporaryDirectory() as d:
+            plain, gz = Path(d) / "plain", Path(d) / "gz"
+            for base, name in ((plain, "SPY_260222_5.json"), (gz, "SPY_260222_5.json.gz")):
+                (base / "Alerts").mkdir(parents=True)
+                with open_text(base / "Alerts" / name, "w") as f:
+                    f.write(_alerts())
+            self._run(plain, "none")
+            self._run(gz, "gzip")
+            for sub in ("raw_vectors", "classified"):
+                want = {p.name: p.read_bytes() for p in data_files(plain / sub, "*.jsonl")}
+                got = {data_stem(p) + ".jsonl": read_bytes(p) for p in data_files(gz / sub, "*.jsonl")}
+                self.assertTrue(want)
+                self.assertEqual(got, want, sub)
+                self.assertTrue(all(p.name.endswith(".jsonl.gz") for p in data_files(gz / sub, "*.jsonl")))
+            self.assertEqual(list((gz / "classified").glob("*.idx")), [])
+            self.assertEqual(
+                sorted(p.name for p in (plain / "plot_summaries").iterdir()),
+                sorted(p.name for p in (gz / "plot_summaries").iterdir()),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+"""Tests for live_tail: follow-mode records and trades equal the batch pipeline's."""
+import json
+import random
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from daily_alerts_splitter.splitter import run_file
+from live_tail import FileTail, UnitSession, follow
+from live_tail.session import BarColumns
+from vector_calc.__main__ import classify_raw_file
+from virtual_trades.finder import RunningBestTrade, find_trades_for_segment
+
+UNIT = "SPY_260222_5"
+
+
+def _bars(n: int = 90, seed: int = 3) -> list[dict]:
+    """5-min bars from 09:30 with alternating revDir edges, the last ones after 16:00."""
+    rng = random.Random(seed)
+    bars, p = [], 100.0
+    for i in range(n):
+        h, m = divmod(9 * 60 + 30 + 5 * i, 60)
+        p = max(50.0, p * (1 + rng.uniform(-0.03, 0.03)))
+        rev = rng.choice((1, -1)) if i % 7 == 3 else 0
+        bars.append({"time": f"2026-02-22 {h:02d}:{m:02d}:00 EST", "bar_index": i, "event": "bar", "open": p,
+                     "close": p, "high": p + 1, "low": p - 1, "volume": 1000 + i, "revDir": rev})
+    return bars
+
+
+def _jsonl(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+class TestRunningBestTrade(unittest.TestCase):
+    def test_matches_batch_on_every_prefix(self):
+        for seed in range(5):
+            bars = _bars(60, seed)
+            rb = RunningBestTrade("v", "SPY", "260222", "5")
+            for k, bar in enumerate(bars):
+                rb.add(bar)
+                self.assertEqual(rb.best, find_trades_for_segment(bars[: k + 1], None, "v", "SPY", "260222", "5"))
+
+    def test_missing_close_invalidates(self):
+        bars = _bars(30)
+        rb = RunningBestTrade("v", "SPY", "260222", "5")
+        for bar in bars:
+            rb.add(bar)
+        rb.add({"time": "2026-02-22 12:00:00 EST"})
+        self.assertIsNone(rb.best)
+
+
+class TestBarColumns(unittest.TestCase):
+    def test_frame_equals_frame_from_dicts(self):
+        import pandas as pd
+        bars = _bars(150)
+        for i, b in enumerate(bars):
+            if i % 11 == 5:
+                del b["volume"]  # missing key: ints become floats with NaN
+            if i % 13 == 7:
+                b["high"] = None
+            if i == 70:
+                b["revDir"] = 0.5  # int column turns float
+            if i >= 40:
+                b["late"] = i  # column that appears after the first rows
+        cols = BarColumns()
+        for k, b in enumerate(bars):
+            cols.append(b)
+            pd.testing.assert_frame_equal(cols.frame(), pd.DataFrame(bars[: k + 1]))
+        self.assertEqual(cols.frame()["volume"].dtype, float)
+
+    def test_unsupported_columns_fall_back(self):
+        for extra in ({"flag": True}, {"tag": None}, {"meta": {"a": 1}}):
+            cols = BarColumns()
+            for b in _bars(5):
+                cols.append(dict(b, **extra))
+            self.assertIsNone(cols.frame(), extra)
+        cols = BarColumns()
+        for i, b in enumerate(_bars(5)):
+            cols.append(b if i != 3 else {k: v for k, v in b.items() if k != "event"})  # string column with a gap
+        self.assertIsNone(cols.frame())
+
+
+class TestUnitSession(unittest.TestCase):
+    def _check_against_batch(self, bars: list[dict]) -> UnitSession:
+        with tempfile.TemporaryDirectory() as td:
+            td = Path(td)
+            alerts = td / f"{UNIT}.json"
+            alerts.write_text("".join(json.dumps(b) + "\n" for b in bars), encoding="utf-8")
+            raw, cls = td / "raw", td / "cls"
+            cls.mkdir()
+            stems = [p.stem for p in run_file(alerts, raw, UNIT)]
+            for stem in stems:
+                classify_raw_file(raw / f"{stem}.jsonl", cls)
+
+            session = UnitSession(UNIT, td / "live")
+            for b in bars:
+                session.add_bar(b)
+                session.add_bar(b)  # duplicate (bar_index, event) is dropped
+                session.flush()
+            segments = _jsonl(td / "live" / "segments" / f"{UNIT}.jsonl")
+            live = _jsonl(td / "live" / "classified" / f"{UNIT}.jsonl")
+
+            self.assertEqual([s["stem"] for s in segments], stems[:-1])
+            batch = []
+            for stem in stems:
+                batch.extend(_jsonl(cls / f"{stem}.jsonl"))
+            live_ids = {s["segment_id"]: s["stem"] for s in segments}
+            live_ids[session.segment.segment_id] = stems[-1]
+            self.assertEqual(len(live), len(batch))
+            for a, b in zip(live, batch):
+                self.assertEqual(dict(a, segment_id=live_ids[a["segment_id"]]), b)
+            for s in segments:
+                seg_bars = _jsonl(raw / f"{s['stem']}.jsonl")
+                self.assertEqual(s["trade"], find_trades_for_segment(seg_bars, None, s["stem"], "SPY", "260222", "5"))
+            self.assertTrue(any(s["trade"] for s in segments))
+            return session
+
+    def test_records_and_trades_match_batch(self):
+        self._check_against_batch(_bars())
+
+    def test_bars_after_close_held_until_closing_edge(self):
+        bars = _bars()
+        for b in bars[72:]:
+            b["revDir"] = 0
+        # No closing edge: batch ends the last segment at 16:00, so the bars after it are never emitted.
+        session = self._check_against_batch(bars)
+        self.assertEqual(len(session.segment.pending), len(bars) - 79)
+        # A closing edge at 16:35 puts them back into the segment.
+        bars[85]["revDir"] = -session.segment.start_dir
+        session = self._check_against_batch(bars)
+        self.assertEqual(session.segment.pending, [])
+
+
+class TestFileTail(unittest.TestCase):
+    def test_partial_line_and_truncation(self):
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "a.json"
+            p.write_bytes(b'{"a": 1}\n{"a"')
+            tail = FileTail(p)
+            self.assertEqual(tail.read()[0], [b'{"a": 1}'])
+            with p.open("ab") as f:
+                f.write(b': 2}\n')
+            self.assertEqual(tail.read()[0], [b'{"a": 2}'])
+            p.write_bytes(b'{"b": 1}\n')
+            lines, truncated, _ = tail.read()
+            self.assertTrue(truncated)
+            self.assertEqual(lines, [b'{"b": 1}'])
+
+
+class TestFollow(unittest.TestCase):
+    def test_appended_lines_become_records(self):
+        bars = _bars(40)
+        with tempfile.TemporaryDirectory() as td:
+            alerts_dir = Path(td) / "Alerts"
+            alerts_dir.mkdir()
+            path = alerts_dir / f"{UNIT}.json"
+            path.write_text("".join(json.dumps(b) + "\n" for b in bars[:20]), encoding="utf-8")
+
+            def append():
+                time.sleep(0.3)
+                for b in bars[20:]:
+                    with path.open("a", encoding="utf-8") as f:
+                        f.write(json.dumps(b) + "\n")
+                    time.sleep(0.01)
+
+            writer = threading.Thread(target=append)
+            writer.start()
+            stats = follow(alerts_dir, Path(td) / "live", interval=0.005, stats_every=0, idle_exit=1.0)
+            writer.join()
+
+            session = UnitSession(UNIT, Path(td) / "expected")  # same bars fed in one go
+            for b in bars:
+                session.add_bar(b)
+            session.flush()
+            got = (Path(td) / "live" / "classified" / f"{UNIT}.jsonl").read_text()
+            self.assertEqual(got, (Path(td) / "expected" / "classified" / f"{UNIT}.jsonl").read_text())
+            self.assertEqual(stats.records, stats.replayed + stats.e2e.total)
+            self.assertGreater(stats.e2e.total, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
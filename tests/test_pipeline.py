@@ -0,0 +1,173 @@
+"""Tests for pipeline: graph shape, staleness, incremental runs and the resumable backfill."""
+import dataclasses
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline import Fingerprinter, Layout, build_graph, load_state, plan, run
+from pipeline.backfill import Journal, backfill, partitions
+from pipeline.stages import STAGE_FUNCS, alerts_units, unit_files
+
+STAGES = ("split", "classify", "trades")
+
+
+def _write_alerts(path: Path, n: int = 24, shift: float = 0.0) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(n):
+            h, m = divmod(9 * 60 + 30 + 5 * i, 60)
+            rev = (1 if (i // 8) % 2 else -1) if i and i % 8 == 0 else 0
+            p = 100 + shift + (i % 8) * (1 if (i // 8) % 2 else -1)
+            bar = {"time": f"2026-02-22 {h:02d}:{m:02d}:00 EST", "open": p, "close": p, "high": p + 1, "low": p - 1,
+                   "volume": 1000 + i, "revDir": rev}
+            f.write(json.dumps(bar) + "\n")
+
+
+class TestBuildGraph(unittest.TestCase):
+    def test_nodes_and_deps(self):
+        nodes = {n.id: n for n in build_graph(["SPY_260222_5", "QQQ_260222_5", "SPY_260223_5"])}
+        self.assertEqual(nodes["classify:SPY_260222_5"].deps, ["split:SPY_260222_5"])
+        self.assertEqual(nodes["trades:SPY_260222_5"].deps, ["split:SPY_260222_5"])
+        self.assertEqual(sorted(nodes["chroma:260222"].deps), ["classify:QQQ_260222_5", "classify:SPY_260222_5"])
+        self.assertEqual(nodes["chroma:260223"].deps, ["classify:SPY_260223_5"])
+
+    def test_unselected_stage_deps_dropped(self):
+        nodes = build_graph(["SPY_260222_5"], ("classify",))
+        self.assertEqual([(n.id, n.deps) for n in nodes], [("classify:SPY_260222_5", [])])
+
+
+class TestIncrementalRun(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        alerts = Path(self.tmp.name) / "Alerts"
+        alerts.mkdir()
+        _write_alerts(alerts / "SPY_260222_5.json")
+        _write_alerts(alerts / "QQQ_260222_5.json", shift=50)
+        self.layout = Layout.from_alerts_dir(alerts)
+        self.state = load_state(Path(self.tmp.name) / "state.json")
+        self.nodes = build_graph(["QQQ_260222_5", "SPY_260222_5"], STAGES)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, **kw):
+        fp = Fingerprinter(self.layout, self.state["files"])
+        return {r.node.id: r.status for r in run(self.nodes, self.layout, fp, self.state, **kw)}
+
+    def test_first_run_builds_everything_second_skips(self):
+        self.assertEqual(set(self._run().values()), {"ran"})
+        raw = unit_files(self.layout.raw_dir, "SPY_260222_5")
+        self.assertGreater(len(raw), 1)
+        self.assertEqual([p.name for p in unit_files(self.layout.classified_dir, "SPY_260222_5")], [p.name for p in raw])
+        self.assertTrue((self.layout.trades_dir / "SPY_260222_5.jsonl").is_file())
+        self.assertEqual(set(self._run().values()), {"skipped"})
+
+    def test_changed_alerts_rebuild_only_that_unit(self):
+        self._run()
+        _write_alerts(self.layout.alerts_dir / "SPY_260222_5.json", n=20)
+        fp = Fingerprinter(self.layout, self.state["files"])
+        stale = {n.id for n, reason in plan(self.nodes, fp, self.state) if reason}
+        self.assertEqual(stale, {"split:SPY_260222_5", "classify:SPY_260222_5", "trades:SPY_260222_5"})
+        statuses = self._run()
+        self.assertEqual(statuses["split:SPY_260222_5"], "ran")
+        self.assertEqual(statuses["split:QQQ_260222_5"], "skipped")
+        self.assertEqual(statuses["classify:QQQ_260222_5"], "skipped")
+
+    def test_missing_output_is_stale(self):
+        self._run()
+        unit_files(self.layout.classified_dir, "QQQ_260222_5")[0].unlink()
+        statuses = self._run()
+        self.assertEqual(statuses["classify:QQQ_260222_5"], "ran")
+        self.assertEqual(statuses["split:QQQ_260222_5"], "skipped")
+
+    def test_parallel_matches_serial(self):
+        self._run(jobs=2)
+        self.assertEqual(set(self._run().values()), {"skipped"})
+
+    def test_compressed_tree(self):
+        for f in list(self.layout.alerts_dir.iterdir()):
+            (f.parent / (f.name + ".gz")).write_bytes(gzip.compress(f.read_bytes()))
+            f.unlink()
+        self.assertEqual([u for u, _f in alerts_units(self.layout.alerts_dir)], ["QQQ_260222_5", "SPY_260222_5"])
+        self.layout = dataclasses.replace(self.layout, codec="gzip")
+        self.assertEqual(set(self._run().values()), {"ran"})
+        raw = unit_files(self.layout.raw_dir, "SPY_260222_5")
+        self.assertGreater(len(raw), 1)
+        self.assertTrue(all(p.name.endswith(".jsonl.gz") for p in raw))
+        classified = unit_files(self.layout.classified_dir, "SPY_260222_5")
+        self.assertEqual([p.name for p in classified], [p.name for p in raw])
+        self.assertFalse(list(self.layout.classified_dir.glob("*.idx")))
+        self.assertTrue((self.layout.trades_dir / "SPY_260222_5.jsonl").is_file())
+        self.assertEqual(set(self._run().values()), {"skipped"})
+
+    def test_codec_change_rewrites_classified(self):
+        self._run()
+        self.layout = dataclasses.replace(self.layout, codec="gzip")
+        statuses = self._run()
+        self.assertEqual(statuses["classify:SPY_260222_5"], "ran")
+        names = sorted(p.name for p in self.layout.classified_dir.iterdir() if p.is_file())
+        self.assertTrue(names and all(n.endswith(".jsonl.gz") for n in names), names)
+
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        alerts = Path(self.tmp.name) / "Alerts"
+        alerts.mkdir()
+        for date in ("260222", "260223"):
+            _write_alerts(alerts / f"SPY_{date}_5.json")
+            _write_alerts(alerts / f"SPY_{date}_15.json", n=12)
+            _write_alerts(alerts / f"QQQ_{date}_5.json", shift=50)
+        self.layout = Layout.from_alerts_dir(alerts)
+        self.journal = Journal(Path(self.tmp.name) / "journal.jsonl")
+        self.parts = partitions(alerts, STAGES)
+        self.calls = []
+        split = STAGE_FUNCS["split"]
+
+        def flaky_split(unit, layout):
+            self.calls.append(unit)
+            if unit.startswith("QQQ_260223") and self.fail_qqq:
+                raise OSError("nas timeout")
+            return split(unit, layout)
+
+        self.fail_qqq = False
+        patcher = mock.patch.dict(STAGE_FUNCS, {"split": flaky_split})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _backfill(self, **kw):
+        return backfill(self.parts, STAGES, self.layout, self.journal, log=lambda line: None, **kw)
+
+    def test_partitions(self):
+        self.assertEqual([p.id for p in self.parts], ["260222/QQQ", "260222/SPY", "260223/QQQ", "260223/SPY"])
+        self.assertEqual(self.parts[1].units, ["SPY_260222_15", "SPY_260222_5"])
+
+    def test_resume_skips_done_and_retries_failed(self):
+        self.fail_qqq = True
+        counts = self._backfill(max_attempts=2)
+        self.assertEqual(counts, {"done": 3, "skipped": 0, "failed": 2, "gave_up": 1})
+        self.assertTrue(unit_files(self.layout.classified_dir, "SPY_260223_5"))
+        with self.journal.path.open("a") as f:
+            f.write('{"partition": "260223/SP')  # torn line from a killed run
+        self.calls.clear()
+        self.assertEqual(self._backfill(max_attempts=2)["gave_up"], 1)
+        self.assertEqual(self.calls, [])  # done partitions skipped, the failed one is over its cap
+        self.fail_qqq = False
+        counts = self._backfill(max_attempts=3)
+        self.assertEqual(counts, {"done": 1, "skipped": 3, "failed": 0, "gave_up": 0})
+        self.assertEqual(self.calls, ["QQQ_260223_5"])
+        entries = self.journal.load()
+        self.assertEqual([e["status"] for e in entries if e["partition"] == "260223/QQQ"], ["failed", "failed", "done"])
+        self.assertEqual(entries[-1]["attempt"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
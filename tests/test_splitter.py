@@ -1,5 +1,8 @@
 """Tests for daily_alerts_splitter.splitter."""
 import io
+import json
+import random
+import shutil
 import tempfile
 import unittest
 from pathlib import Path
@@ -20,6 +23,7 @@ from daily_alerts_splitter.splitter import (
     load_bars,
     run_file,
 )
+from daily_alerts_splitter.incremental import checkpoint_path, split_incremental
 
 
 class TestParseTime(unittest.TestCase):
@@ -177,5 +181,165 @@ class TestLoadBarsAndRunFile(unittest.TestCase):
             self.assertEqual(content0.count("\n"), 3)
 
 
+def _alert_lines(n: int, seed: int) -> list[str]:
+    """Alert lines from 09:00 in 5-min steps (some after 16:00), random edges, a few duplicated lines."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        h, m = divmod(9 * 60 + 5 * i, 60)
+        rev = rng.choice((1, -1)) if i > 3 and rng.random() < 0.2 else 0
+        bar = {"time": f"2026-02-22 {h:02d}:{m:02d}:00 EST", "bar_index": i, "event": "bar", "close": 100 + rng.random(), "revDir": rev}
+        lines.append(json.dumps(bar) + "\n")
+        if rng.random() < 0.1:
+            lines.append(lines[-1])
+    return lines
+
+
+class TestSplitIncremental(unittest.TestCase):
+    UNIT = "SPY_260222_5"
+
+    def _dirs(self, d: str) -> tuple[Path, Path, Path]:
+        return Path(d) / f"{self.UNIT}.json", Path(d) / "raw_vectors", Path(d) / "split_checkpoints"
+
+    def _batch(self, alerts: Path, d: str) -> dict[str, str]:
+        out = Path(d) / "batch"
+        shutil.rmtree(out, ignore_errors=True)
+        return {p.name: p.read_text() for p in run_file(alerts, out, self.UNIT)}
+
+    def _raw(self, raw: Path) -> dict[str, str]:
+        return {p.name: p.read_text() for p in raw.glob("*.jsonl")}
+
+    def test_appends_match_full_split(self):
+        for seed in range(6):
+            lines = _alert_lines(110, seed)
+            data = "".join(lines).encode()
+            cuts = sorted(random.Random(seed).sample(range(1, len(data)), 8))
+            with tempfile.TemporaryDirectory() as d:
+                alerts, raw, ck = self._dirs(d)
+                prev = 0
+                for cut in cuts + [len(data)]:
+                    with alerts.open("ab") as f:
+                        f.write(data[prev:cut])
+                    prev = cut
+                    res = split_incremental(alerts, raw, self.UNIT, ck)
+                    complete = alerts.read_bytes()[: alerts.read_bytes().rfind(b"\n") + 1]
+                    (Path(d) / "complete.json").write_bytes(complete)
+                    self.assertEqual(self._raw(raw), self._batch(Path(d) / "complete.json", d), f"seed {seed} cut {cut}")
+                    self.assertEqual(sorted(res.files), sorted(self._raw(raw)))
+                self.assertEqual(res.mode, "append")
+
+    def test_closed_segments_not_rewritten(self):
+        lines = _alert_lines(110, 1)
+        with tempfile.TemporaryDirectory() as d:
+            alerts, raw, ck = self._dirs(d)
+            alerts.write_text("".join(lines[:60]))
+            first = split_incremental(alerts, raw, self.UNIT, ck)
+            self.assertEqual(first.mode, "full")
+            closed = json.loads(checkpoint_path(ck, self.UNIT).read_text())["closed_files"]
+            self.assertTrue(closed)
+            mtimes = {name: (raw / name).stat().st_mtime_ns for name in closed}
+            with alerts.open("a") as f:
+                f.write("".join(lines[60:]))
+            res = split_incremental(alerts, raw, self.UNIT, ck)
+            self.assertEqual(res.mode, "append")
+            self.assertFalse({p.name for p in res.written} & set(closed))
+            self.assertEqual({name: (raw / name).stat().st_mtime_ns for name in closed}, mtimes)
+            self.assertEqual(split_incremental(alerts, raw, self.UNIT, ck).mode, "unchanged")
+
+    def test_rewrite_truncation_and_out_of_order_resplit(self):
+        lines = _alert_lines(80, 2)
+        with tempfile.TemporaryDirectory() as d:
+            alerts, raw, ck = self._dirs(d)
+            alerts.write_text("".join(lines))
+            split_incremental(alerts, raw, self.UNIT, ck)
+            # Rewritten head, same size or larger.
+            alerts.write_text("".join(lines).replace('"close": 1', '"close": 2', 1))
+            self.assertEqual(split_incremental(alerts, raw, self.UNIT, ck).mode, "full")
+            # Truncated.
+            alerts.write_text("".join(lines[:30]))
+            self.assertEqual(split_incremental(alerts, raw, self.UNIT, ck).mode, "full")
+            self.assertEqual(self._raw(raw), self._batch(alerts, d))
+            # A late bar that sorts before bars already split.
+            with alerts.open("a") as f:
+                f.write(json.dumps({"time": "2026-02-22 09:02:00 EST", "bar_index": 1000, "revDir": -1}) + "\n")
+            self.assertEqual(split_incremental(alerts, raw, self.UNIT, ck).mode, "full")
+            self.assertEqual(self._raw(raw), self._batch(alerts, d))
+            # A deleted raw file.
+            next(raw.glob("*.jsonl")).unlink()
+            self.assertEqual(split_incremental(alerts, raw, self.UNIT, ck).mode, "full")
+            self.assertEqual(self._raw(raw), self._batch(alerts, d))
+
+    def test_full_commits_checkpoints_after_raw_files(self):
+        from unittest import mock
+        from common.atomic_output import StagedOutput
+        from daily_alerts_splitter.__main__ import main
+        lines = _alert_lines(80, 4)
+        with tempfile.TemporaryDirectory() as d:
+            alerts, raw, ck = self._dirs(d)
+            (Path(d) / "Alerts").mkdir()
+            alerts = Path(d) / "Alerts" / alerts.name
+            alerts.write_text("".join(lines[:40]))
+            argv = ["daily_alerts_splitter", "--alerts-dir", str(alerts.parent), "--full"]
+            with mock.patch.object(sys, "argv", argv), mock.patch("builtins.print"):
+                main()
+            self.assertTrue(checkpoint_path(ck, self.UNIT).is_file())
+            before = self._raw(raw)
+            # Killed between the raw commit and the end of the run: no checkpoint may describe the new split.
+            alerts.write_text("".join(lines))
+            commit = StagedOutput.commit
+
+            def fail_raw(self, scope=None):
+                if self.target.name == "raw_vectors":
+                    raise KeyboardInterrupt
+                return commit(self, scope)
+
+            with mock.patch.object(sys, "argv", argv), mock.patch("builtins.print"), \
+                    mock.patch.object(StagedOutput, "commit", fail_raw), self.assertRaises(KeyboardInterrupt):
+                main()
+            self.assertFalse(checkpoint_path(ck, self.UNIT).exists())
+            self.assertEqual(self._raw(raw), before)
+            self.assertEqual([p.name for p in Path(d).iterdir() if p.name.startswith(".")], [])
+            self.assertEqual(split_incremental(alerts, raw, self.UNIT, ck).mode, "full")
+            self.assertEqual(self._raw(raw), self._batch(alerts, d))
+
+
+def _falling_avwap_lines(n: int, seed: int) -> str:
+    """_alert_lines with a falling REV_avwap, so every up segment fails the sanity check."""
+    bars = [json.loads(line) for line in _alert_lines(n, seed)]
+    return "".join(json.dumps(dict(b, REV_avwap=200.0 - b["bar_index"])) + "\n" for b in bars)
+
+
+class TestParallelSplit(unittest.TestCase):
+    def _run(self, alerts: Path, *extra: str):
+        import subprocess
+        cmd = [sys.executable, "-m", "daily_alerts_splitter", "--alerts-dir", str(alerts), "--full", *extra]
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent, check=True)
+        raw = alerts.parent / "raw_vectors"
+        return proc.stdout.replace(str(raw), "RAW"), proc.stderr, {p.name: p.read_text() for p in raw.glob("*.jsonl")}
+
+    def test_jobs_output_matches_sequential(self):
+        with tempfile.TemporaryDirectory() as d:
+            for name in ("serial", "parallel"):
+                alerts = Path(d) / name / "Alerts"
+                alerts.mkdir(parents=True)
+                for k in range(5):
+                    (alerts / f"T{k}_260222_5.json").write_text(_falling_avwap_lines(30 + 15 * k, seed=k))
+            serial = self._run(Path(d) / "serial" / "Alerts")
+            parallel = self._run(Path(d) / "parallel" / "Alerts", "--jobs", "3")
+            self.assertEqual(parallel, serial)
+            self.assertIn("[sanity]", serial[1])
+
+    def test_log_err_collects_sanity_messages(self):
+        with tempfile.TemporaryDirectory() as d:
+            alerts = Path(d) / "SPY_260222_5.json"
+            alerts.write_text(_falling_avwap_lines(60, seed=3))
+            msgs, err = [], io.StringIO()
+            from contextlib import redirect_stderr
+            with redirect_stderr(err):
+                run_file(alerts, Path(d) / "raw", alerts.stem, log_err=msgs.append)
+            self.assertTrue(msgs)
+            self.assertEqual(err.getvalue(), "")
+
+
 if __name__ == "__main__":
     unittest.main()
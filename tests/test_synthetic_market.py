@@ -0,0 +1,50 @@
+"""Tests for synthetic_market (the dataset generator of scripts/bench_pipeline.py)."""
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from daily_alerts_splitter.splitter import load_bars, run_file
+from synthetic_market import MarketSpec, generate
+
+
+class TestSyntheticMarket(unittest.TestCase):
+    def test_deterministic_and_prefix_stable(self):
+        with tempfile.TemporaryDirectory() as d:
+            small, large = Path(d) / "small", Path(d) / "large"
+            generate(MarketSpec(tickers=2, days=1, tfs=(1, 5), seed=3), small)
+            stats = generate(MarketSpec(tickers=3, days=2, tfs=(1, 5), seed=3), large)
+            self.assertEqual(stats["files"], 12)
+            self.assertEqual(sorted(p.name for p in small.iterdir()),
+                             ["SA_260105_1.json", "SA_260105_5.json", "SB_260105_1.json", "SB_260105_5.json"])
+            for p in small.iterdir():
+                self.assertEqual(p.read_bytes(), (large / p.name).read_bytes(), p.name)
+            self.assertTrue((large / "SC_260106_5.json").is_file())  # 260105 is a Monday: next day is 260106
+
+    def test_dirty_lines_and_nested_edges(self):
+        spec = MarketSpec(tickers=1, days=1, tfs=(1, 5), dup_rate=0.05, disorder_rate=0.05, seed=1)
+        with tempfile.TemporaryDirectory() as d:
+            generate(spec, Path(d) / "Alerts")
+            one = [json.loads(line) for line in (Path(d) / "Alerts" / "SA_260105_1.json").read_text().splitlines()]
+            idx = [b["bar_index"] for b in one]
+            self.assertLess(len(set(idx)), len(idx))  # duplicates
+            self.assertNotEqual(idx, sorted(idx))  # out of order
+            bars = {b["bar_index"]: b for b in one}
+            for key in ("REV_avwap", "htfVwap", "atrRatio", "tShockScoreTot", "tTrendAbs", "inTrendScore"):
+                self.assertIn(key, bars[0])
+            five = load_bars(Path(d) / "Alerts" / "SA_260105_5.json")
+            self.assertEqual([b["bar_index"] for b in five], list(range(len(five))))  # splitter dedups and sorts
+            # a 5-min edge is a regime change between 1-min closes inside that 5-min bar
+            for b in five:
+                if b.get("revDir"):
+                    k = b["bar_index"] * 5
+                    self.assertTrue(any(bars[j]["revDir"] for j in range(k, k + 5) if j in bars))
+            written = run_file(Path(d) / "Alerts" / "SA_260105_5.json", Path(d) / "raw_vectors", "SA_260105_5", lambda msg: None)
+            self.assertGreater(len(written), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Tests for common.timeparse: vectorized fixed-width parsing and its scalar fallback."""
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.timeparse import INVALID, epoch_seconds, minute_of_day, parse_time, to_datetime64
+
+
+def _secs(dt: datetime) -> int:
+    return int((dt - datetime(1970, 1, 1)).total_seconds())
+
+
+class TestTimeParse(unittest.TestCase):
+    VALUES = [
+        "2026-02-24 09:30:00 EST",
+        "2024-02-29 16:00:59 UTC",  # leap day
+        "2025-02-29 10:00:00 EST",  # not a leap year
+        "2026-13-01 10:00:00 EST",
+        " 2026-02-24 09:35:00 EST",  # leading space: scalar fallback
+        "2026-02-24  09:40:00",  # two spaces: scalar fallback
+        "2026-02-24T09:42:00",  # ISO separator
+        "2026-02-24 T09:43:00",  # space and T: not a time
+        "2026-02-24 09:45:00 ÉST",  # non-ASCII after the fixed fields
+        "2026-02-24 09:50",
+        "",
+        None,
+        float("nan"),
+        12345,
+    ]
+
+    def test_scalar(self):
+        self.assertEqual(parse_time("2026-02-24 09:30:00 EST"), datetime(2026, 2, 24, 9, 30))
+        self.assertEqual(parse_time(" 2026-02-24\t09:35:00"), datetime(2026, 2, 24, 9, 35))
+        self.assertEqual(parse_time("2026-02-24T09:30:00Z"), datetime(2026, 2, 24, 9, 30))
+        for bad in ("2025-02-29 10:00:00", "2026-02-24 09:50", "", None, 1.5, ["x"]):
+            self.assertIsNone(parse_time(bad))
+
+    def test_vectorized_matches_scalar(self):
+        expected = [INVALID if parse_time(v) is None else _secs(parse_time(v)) for v in self.VALUES]
+        self.assertEqual(epoch_seconds(np.array(self.VALUES, dtype=object)).tolist(), expected)
+        strs = [v for v in self.VALUES if isinstance(v, str)]
+        self.assertEqual(epoch_seconds(np.array(strs)).tolist(), [e for v, e in zip(self.VALUES, expected) if isinstance(v, str)])
+        self.assertEqual(expected[:2], [_secs(datetime(2026, 2, 24, 9, 30)), _secs(datetime(2024, 2, 29, 16, 0, 59))])
+        self.assertEqual(expected[2:4], [INVALID, INVALID])
+        self.assertEqual(expected[6:8], [_secs(datetime(2026, 2, 24, 9, 42)), INVALID])
+
+    def test_minute_of_day_and_datetime64(self):
+        self.assertEqual(minute_of_day(["2026-02-24 09:30:00 EST", "2026-02-24 16:00:00", "x"]).tolist(), [570, 960, -1])
+        out = to_datetime64(["2026-02-24 09:30:00 EST", None])
+        self.assertEqual(out[0], np.datetime64("2026-02-24T09:30:00"))
+        self.assertTrue(np.isnat(out[1]))
+        self.assertEqual(len(epoch_seconds([])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Tests for training_export: trade join, labels, sharding."""
+import json
+import math
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from training_export.exporter import (
+    FEATURE_FIELDS,
+    LABEL_FIELDS,
+    TIER_CODES,
+    export_training_set,
+    label_row,
+    load_trade_index,
+)
+
+
+def _rec(seg, k, **kw):
+    rec = {"segment_id": seg, "closing_bar_index": k, "bars": k + 1, "delta_pct": 0.5 * k, "tier": "elite"}
+    rec.update(kw)
+    return rec
+
+
+class TestLabelRow(unittest.TestCase):
+    def test_no_trade(self):
+        row = label_row(_rec("S", 0), None)
+        self.assertEqual(row[:3], [0.0, 0.0, 0.0])
+        self.assertTrue(all(math.isnan(v) for v in row[3:]))
+
+    def test_trade_window(self):
+        trade = {"side": "short", "pnl": 20.5, "bar_start": 1, "bar_end": 2}
+        self.assertEqual(label_row(_rec("S", 0), trade)[:3], [-1.0, 20.5, 0.0])
+        self.assertEqual(label_row(_rec("S", 2), trade)[:3], [-1.0, 20.5, 1.0])
+
+    def test_next_tier_encoded(self):
+        row = label_row(_rec("S", 0, next_tier="tradable"), None)
+        self.assertEqual(row[LABEL_FIELDS.index("next_tier")], TIER_CODES["tradable"])
+
+    def test_window_follows_bar_times_of_unsorted_raw(self):
+        import random
+        from vector_calc.__main__ import classify_raw_file
+        from virtual_trades.finder import find_trades_for_segment
+        closes = [100.0, 99.0, 90.0, 95.0, 100.0, 99.0, 98.0, 97.0]
+        bars = [{"time": f"2026-02-22 {9 + (30 + 5 * i) // 60:02d}:{(30 + 5 * i) % 60:02d}:00 EST", "bar_index": i,
+                 "open": c, "close": c, "high": c + 0.5, "low": c - 0.5, "volume": 1000, "revDir": 0, "REV_avwap": c}
+                for i, c in enumerate(closes)]
+        random.Random(7).shuffle(bars)
+        stem = "SPY_260222_5_0930_1005"
+        trade = find_trades_for_segment(bars, None, stem, "SPY", "260222", "5")
+        self.assertEqual((trade["side"], trade["bar_start"], trade["bar_end"]), ("long", 2, 4))
+        with tempfile.TemporaryDirectory() as d:
+            raw = Path(d) / f"{stem}.jsonl"
+            raw.write_text("".join(json.dumps(b) + "\n" for b in bars))
+            classify_raw_file(raw, Path(d))
+            recs = [json.loads(line) for line in (Path(d) / f"{stem}.jsonl").read_text().splitlines()]
+        in_window = [rec["closing_bar_index"] for rec in recs if label_row(rec, trade)[2] == 1.0]
+        self.assertEqual(in_window, [2, 3, 4])
+        # An old trade row from raw file order is still placed by its times.
+        old = dict(trade, bar_start=0, bar_end=7)
+        self.assertEqual([rec["closing_bar_index"] for rec in recs if label_row(rec, old)[2] == 1.0], [2, 3, 4])
+
+
+class TestExport(unittest.TestCase):
+    def test_shards_and_schema(self):
+        with tempfile.TemporaryDirectory() as d:
+            d = Path(d)
+            classified = d / "classified"
+            trades = d / "virtual_trades"
+            classified.mkdir()
+            trades.mkdir()
+            seg_a, seg_b = "SPY_260222_5_0930_0945", "SPY_260222_5_0945_1000"
+            (classified / f"{seg_a}.jsonl").write_text("".join(json.dumps(_rec(seg_a, k)) + "\n" for k in range(3)))
+            (classified / f"{seg_b}.jsonl").write_text("".join(json.dumps(_rec(seg_b, k)) + "\n" for k in range(2)))
+            (trades / "SPY_260222_5.jsonl").write_text(
+                json.dumps({"vector_id": seg_a, "side": "long", "pnl": 19.0, "bar_start": 1, "bar_end": 2}) + "\n"
+            )
+            index = load_trade_index(trades)
+            out = d / "training_set"
+            schema = export_training_set(sorted(classified.glob("*.jsonl")), index, out, shard_rows=2)
+            self.assertEqual(schema["rows"], 5)
+            self.assertEqual(schema["rows_with_trade"], 3)
+            self.assertEqual([s["rows"] for s in schema["shards"]], [2, 2, 1])
+            feats = np.concatenate([np.load(out / s["features"]) for s in schema["shards"]])
+            labels = np.concatenate([np.load(out / s["labels"]) for s in schema["shards"]])
+            ids = np.concatenate([np.load(out / s["ids"]) for s in schema["shards"]])
+            self.assertEqual(feats.dtype, np.float32)
+            self.assertEqual(feats.shape, (5, len(FEATURE_FIELDS)))
+            self.assertEqual(list(ids[:3]), [f"{seg_a}_0", f"{seg_a}_1", f"{seg_a}_2"])
+            self.assertEqual(list(labels[:, LABEL_FIELDS.index("in_trade_window")]), [0, 1, 1, 0, 0])
+            self.assertEqual(list(labels[:, LABEL_FIELDS.index("trade_side")]), [1, 1, 1, 0, 0])
+            self.assertEqual(json.loads((out / "schema.json").read_text())["features"], list(FEATURE_FIELDS))
+
+    def test_compressed_classified_files(self):
+        import gzip
+        from training_export.exporter import iter_classified_records
+        with tempfile.TemporaryDirectory() as d:
+            fp = Path(d) / "SPY_260222_5_0930_0945.jsonl.gz"
+            with gzip.open(fp, "wt", encoding="utf-8") as f:
+                f.write("".join(json.dumps(_rec("S", k)) + "\n" for k in range(3)))
+            self.assertEqual([r["closing_bar_index"] for r in iter_classified_records([fp])], [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,6 +15,8 @@ from vector_calc.calc import (
     parse_raw_filename,
 )
 from vector_calc.__main__ import round_floats
+from vector_calc.plot_summary import downsample_series, write_plot_summaries
+from vector_calc.record_index import RecordIndex, write_record_index
 
 
 class TestRoundFloats(unittest.TestCase):
@@ -95,3 +97,355 @@ class TestBuildVectorKeys(unittest.TestCase):
             path_keys = build_vector_keys(sorted(raw.glob("*.json")))
             ordinals = [vkey.ordinal for _p, vkey in path_keys]
             assert ordinals == [1, 2, 3]
+
+
+class TestPlotSummary(unittest.TestCase):
+    def test_downsample_keeps_run_ends(self):
+        pts = [{"min": m, "value": v} for m, v in enumerate([1, 1, 1, 2, 2, 3])]
+        self.assertEqual([p["min"] for p in downsample_series(pts)], [0, 2, 3, 4, 5])
+
+    def test_segments_and_series(self):
+        import json
+        with tempfile.TemporaryDirectory() as d:
+            raw, classified = Path(d) / "raw_vectors", Path(d) / "classified"
+            raw.mkdir()
+            classified.mkdir()
+            for stem, t0, n, rev in (("SPY_260222_5_0930_0940", 30, 3, 100.0), ("SPY_260222_5_0940_0950", 40, 2, None)):
+                bars = [{"time": f"2026-02-22 09:{t0 + 5 * i:02d}:00 EST", "REV_avwap": rev} for i in range(n)]
+                (raw / f"{stem}.jsonl").write_text("".join(json.dumps(b) + "\n" for b in bars))
+                recs = [{"segment_id": stem, "start_time": bars[0]["time"], "duration_min": 5.0 * k,
+                         "p0_close": 1.0, "p1_close": 2.0, "tier": "elite"} for k in range(n)]
+                (classified / f"{stem}.jsonl").write_text("".join(json.dumps(r) + "\n" for r in recs))
+            # Record count differs from raw bar count -> skipped, like the UI scan.
+            (classified / "SPY_260222_5_0950_1000.jsonl").write_text('{"segment_id": "x"}\n')
+            (raw / "SPY_260222_5_0950_1000.jsonl").write_text("{}\n{}\n")
+            self.assertEqual(write_plot_summaries(classified, raw), 1)
+            out = json.loads((Path(d) / "plot_summaries" / "SPY_260222_5.json").read_text())
+            self.assertEqual(out["sources"], ["SPY_260222_5_0930_0940.jsonl", "SPY_260222_5_0940_0950.jsonl"])
+            self.assertEqual(out["files"], out["sources"] + ["SPY_260222_5_0950_1000.jsonl"])  # the group's file set
+            self.assertEqual([(s["start_hm"], s["end_hm"]) for s in out["segments"]], [("09:30", "09:40"), ("09:40", "09:45")])
+            # REV_avwap forward-filled into the second segment, then the constant run collapsed to its ends.
+            self.assertEqual(out["rev_avwap_series"], [{"min": 570, "value": 100.0}, {"min": 585, "value": 100.0}])
+
+
+class TestRecordIndex(unittest.TestCase):
+    def _write(self, d: Path, n: int, trailing_newline: bool = True) -> Path:
+        import json
+        p = d / "SPY_260222_5_0930_1000.jsonl"
+        body = "\n".join(json.dumps({"closing_bar_index": k, "v": float("nan") if k == 1 else k}) for k in range(n))
+        p.write_text(body + ("\n" if trailing_newline else ""))
+        return p
+
+    def test_sidecar_random_access(self):
+        with tempfile.TemporaryDirectory() as d:
+            p = self._write(Path(d), 5)
+            idx = write_record_index(p)
+            self.assertEqual(idx.stat().st_size, 8 + 6 * 8)
+            with RecordIndex(p) as ix:
+                self.assertEqual(len(ix), 5)
+                self.assertEqual(ix.record(3)["closing_bar_index"], 3)
+                self.assertTrue(math.isnan(ix.record(1)["v"]))
+                self.assertEqual(ix.last()["closing_bar_index"], 4)
+                self.assertEqual([r["closing_bar_index"] for r in ix.slice(2, 4)], [2, 3])
+                self.assertEqual([r["closing_bar_index"] for r in ix.slice(-2)], [3, 4])
+                with self.assertRaises(IndexError):
+                    ix.record(5)
+
+    def test_stale_or_missing_sidecar_falls_back(self):
+        with tempfile.TemporaryDirectory() as d:
+            p = self._write(Path(d), 3, trailing_newline=False)
+            with RecordIndex(p) as ix:
+                self.assertEqual(ix.last()["closing_bar_index"], 2)
+            write_record_index(p)
+            p = self._write(Path(d), 4)  # rewritten after the sidecar
+            with RecordIndex(p) as ix:
+                self.assertEqual(len(ix), 4)
+                self.assertEqual(ix.last()["closing_bar_index"], 3)
+
+    def test_empty_file(self):
+        with tempfile.TemporaryDirectory() as d:
+            p = Path(d) / "x.jsonl"
+            p.write_text("")
+            write_record_index(p)
+            with RecordIndex(p) as ix:
+                self.assertEqual(len(ix), 0)
+                self.assertIsNone(ix.last())
+
+
+def _write_alerts(path: Path, n: int, seed: int) -> None:
+    """Alerts bars from 09:30 in 5-min steps with random prices (full-precision floats) and edges."""
+    import json
+    import random
+    rng = random.Random(seed)
+    price = 100.0
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            h, m = divmod(9 * 60 + 30 + 5 * i, 60)
+            price += rng.gauss(0, 0.5)
+            rev = rng.choice((1, -1)) if i > 2 and rng.random() < 0.2 else 0
+            bar = {"time": f"2026-02-22 {h:02d}:{m:02d}:00 EST", "bar_index": i, "open": price, "close": price + rng.random(),
+                   "high": price + 1 + rng.random(), "low": price - 1 - rng.random(), "volume": rng.randint(100, 5000),
+                   "revDir": rev, "REV_avwap": price + rng.gauss(0, 0.3)}
+            f.write(json.dumps(bar) + "\n")
+
+
+class TestFusedSplitClassify(unittest.TestCase):
+    def test_byte_identical_to_two_step(self):
+        from daily_alerts_splitter.splitter import run_file
+        from vector_calc.__main__ import _add_next_vector_fields, classify_raw_file
+        from vector_calc.fused import split_classify_file
+        with tempfile.TemporaryDirectory() as d:
+            alerts = Path(d) / "alerts"
+            alerts.mkdir()
+            for k, unit in enumerate(("SPY_260222_5", "QQQ_260222_5")):
+                _write_alerts(alerts / f"{unit}.json", 90, seed=k)
+            raw, two_step, fused, fused_raw = (Path(d) / n for n in ("raw", "two_step", "fused", "fused_raw"))
+            two_step.mkdir()
+            fused.mkdir()
+            for path in sorted(alerts.glob("*.json")):
+                for r in run_file(path, raw, path.stem):
+                    classify_raw_file(r, two_step)
+                split_classify_file(path, fused, fused_raw)
+            _add_next_vector_fields(two_step)
+            _add_next_vector_fields(fused)
+            expected = {p.name: p.read_bytes() for p in two_step.glob("*.jsonl")}
+            self.assertGreater(len(expected), 4)
+            self.assertEqual({p.name: p.read_bytes() for p in fused.glob("*.jsonl")}, expected)
+            self.assertEqual(
+                {p.name: p.read_bytes() for p in fused_raw.glob("*.jsonl")},
+                {p.name: p.read_bytes() for p in raw.glob("*.jsonl")},
+            )
+
+
+class TestFeatureRegistry(unittest.TestCase):
+    def test_closure(self):
+        from vector_calc.features import PRESETS, resolve
+        plan = resolve("embed")
+        self.assertEqual([g.name for g in plan.groups], ["geometry", "atr", "shock", "trend", "in_trend", "rev_avwap"])
+        self.assertFalse(plan.scoring)
+        self.assertTrue(set(PRESETS["embed"]) <= set(plan.outputs))
+        plan = resolve("tier,htfVwap_cross_count")
+        self.assertTrue(plan.scoring)
+        self.assertIn("htf_vwap", [g.name for g in plan.groups])
+        self.assertNotIn("volume", [g.name for g in plan.groups])
+        self.assertEqual(resolve("geometry,volume,scoring,regime,sma,htf_vwap"), resolve("all"))
+        self.assertTrue(resolve("all").is_full)
+        self.assertFalse(resolve("embed").is_full)
+        with self.assertRaises(ValueError):
+            resolve("delta_pct,no_such_field")
+        from chroma_ingest import EMBED_FIELDS
+        self.assertEqual(list(PRESETS["embed"]), EMBED_FIELDS)
+
+    def test_subset_needs_own_classified_dir(self):
+        import contextlib
+        import io
+        from unittest import mock
+        from vector_calc import fused
+        from vector_calc.__main__ import main
+        with tempfile.TemporaryDirectory() as d:
+            for sub in ("raw_vectors", "Alerts"):
+                (Path(d) / sub).mkdir()
+            default = str(Path(d) / "raw_vectors" / ".." / "classified")
+            entries = ((main, ["--raw-dir", str(Path(d) / "raw_vectors")]), (fused.main, ["--alerts-dir", str(Path(d) / "Alerts")]))
+            for entry, args in entries:
+                for extra in ([], ["--classified-dir", default]):
+                    argv = ["vector_calc", *args, "--features", "embed", *extra]
+                    with mock.patch.object(sys, "argv", argv), contextlib.redirect_stderr(io.StringIO()):
+                        with self.assertRaises(SystemExit):
+                            entry()
+            self.assertFalse((Path(d) / "classified").exists())
+            argv = ["vector_calc", "--raw-dir", str(Path(d) / "raw_vectors"), "--features", "embed",
+                    "--classified-dir", str(Path(d) / "embed")]
+            with mock.patch.object(sys, "argv", argv), mock.patch("builtins.print"):
+                main()
+
+    def test_subset_records_match_full(self):
+        import pandas as pd
+        from vector_calc.calc import add_scoring_to_records, compute_records_for_segment
+        from vector_calc.features import resolve
+        with tempfile.TemporaryDirectory() as d:
+            _write_alerts(Path(d) / "a.json", 30, seed=3)
+            df = load_segment(Path(d) / "a.json")
+        full = compute_records_for_segment(df, "SPY", "5", "260222", "SPY_260222_5_0930_1200")
+        add_scoring_to_records(full)
+        for spec in ("embed", "tier", "volume"):
+            plan = resolve(spec)
+            sub = compute_records_for_segment(df, "SPY", "5", "260222", "SPY_260222_5_0930_1200", plan)
+            if plan.scoring:
+                add_scoring_to_records(sub)
+            self.assertEqual(list(sub[0]), list(plan.outputs))
+            want = [{k: r[k] for k in plan.outputs} for r in full]
+            self.assertTrue(pd.DataFrame(sub).equals(pd.DataFrame(want)), spec)
+
+
+class TestOverlapped(unittest.TestCase):
+    def test_order_backpressure_and_errors(self):
+        import time
+        from vector_calc.overlap import PipelineMetrics, overlapped
+
+        for depth in (0, 1, 3):
+            written = []
+
+            def read(i):
+                time.sleep(0.001 * (i % 3))
+                return i * 10
+
+            m = PipelineMetrics()
+            got = list(overlapped(range(20), read, lambda i, x: (x + 1, x if i % 2 else None), written.append, depth, m))
+            self.assertEqual(got, [i * 10 + 1 for i in range(20)])
+            self.assertEqual(written, [i * 10 for i in range(1, 20, 2)])
+            self.assertEqual((m.read.items, m.compute.items, m.write.items), (20, 20, 10))
+            self.assertLessEqual(m.read.depth_max, depth)
+
+            def bad_read(i):
+                if i == 5:
+                    raise OSError("nas gone")
+                return i
+
+            with self.assertRaisesRegex(OSError, "nas gone"):
+                list(overlapped(range(20), bad_read, lambda i, x: (x, x), lambda job: None, depth))
+
+            def bad_write(job):
+                raise ValueError("disk full")
+
+            with self.assertRaisesRegex(ValueError, "disk full"):
+                list(overlapped(range(20), lambda i: i, lambda i, x: (x, x), bad_write, depth))
+
+    def test_modes_write_same_files(self):
+        from daily_alerts_splitter.splitter import run_file
+        from synthetic_market import MarketSpec, generate
+        from vector_calc.__main__ import classify_paths
+        with tempfile.TemporaryDirectory() as d:
+            generate(MarketSpec(tickers=2, days=1, tfs=(5,)), Path(d) / "alerts")
+            raw = Path(d) / "raw"
+            for path in sorted((Path(d) / "alerts").glob("*.json")):
+                run_file(path, raw, path.stem, lambda msg: None)
+            paths = sorted(raw.glob("*.jsonl"))
+            outputs = []
+            for jobs, depth in ((1, 0), (1, 2), (2, 2)):
+                out = Path(d) / f"out_{jobs}_{depth}"
+                out.mkdir()
+                counts = list(classify_paths(paths, out, jobs=jobs, depth=depth))
+                self.assertEqual([p for p, _n in counts], paths)
+                outputs.append({p.name: p.read_bytes() for p in out.glob("*.jsonl")})
+            self.assertGreater(len(outputs[0]), 4)
+            self.assertEqual(outputs[1], outputs[0])
+            self.assertEqual(outputs[2], outputs[0])
+
+
+class TestCrossTf(unittest.TestCase):
+    def test_segment_index(self):
+        from datetime import datetime
+        from vector_calc.cross_tf import SegmentIndex, Span
+
+        def span(tf, a, b, d=1):
+            t = lambda hhmm: datetime(2026, 2, 22, int(hhmm[:2]), int(hhmm[2:]))
+            return Span(f"SPY_260222_{tf}_{a}_{b}", tf, t(a), t(b), d)
+
+        idx = SegmentIndex([span("15", "1000", "1100", -1), span("5", "0930", "1000"), span("15", "0930", "1000"),
+                            span("5", "1000", "1035"), span("60", "0930", "1200")])
+        self.assertEqual(idx.tfs, ["5", "15", "60"])
+        at = lambda h, m: datetime(2026, 2, 22, h, m)
+        self.assertEqual(idx.containing("15", at(9, 45)).stem, "SPY_260222_15_0930_1000")
+        self.assertEqual(idx.containing("15", at(10, 0)).stem, "SPY_260222_15_1000_1100")  # boundary bar: the later one
+        self.assertEqual(idx.containing("15", at(11, 0)).stem, "SPY_260222_15_1000_1100")  # last bar of the last one
+        self.assertIsNone(idx.containing("15", at(11, 15)))
+        self.assertIsNone(idx.containing("15", at(9, 0)))
+        self.assertEqual(idx.parent("5", at(10, 20)).direction, -1)
+        self.assertEqual(idx.parent("15", at(10, 20)).tf, "60")
+        self.assertIsNone(idx.parent("60", at(10, 20)))
+
+    def test_parent_fields_use_no_later_parent_bar(self):
+        import json
+        from datetime import datetime, timedelta
+        from daily_alerts_splitter.splitter import run_file
+        from synthetic_market import MarketSpec, generate
+        from vector_calc.__main__ import classify_raw_file
+        from vector_calc.cross_tf import CROSS_TF_FIELDS, add_cross_tf_fields
+        with tempfile.TemporaryDirectory() as d:
+            generate(MarketSpec(tickers=1, days=1, tfs=(5, 15)), Path(d) / "alerts")
+            raw, out = Path(d) / "raw", Path(d) / "classified"
+            out.mkdir()
+            for path in sorted((Path(d) / "alerts").glob("*.json")):
+                for r in run_file(path, raw, path.stem, lambda msg: None):
+                    classify_raw_file(r, out)
+            before = {p.name: [json.loads(line) for line in p.read_text().splitlines()] for p in out.glob("*.jsonl")}
+            self.assertEqual(add_cross_tf_fields(out, raw), len(before))
+            after = {p.name: [json.loads(line) for line in p.read_text().splitlines()] for p in out.glob("*.jsonl")}
+            parse = lambda s: datetime.strptime(s[:16], "%Y-%m-%d %H:%M")
+            checked = 0
+            for name, recs in after.items():
+                for old, rec in zip(before[name], recs):
+                    self.assertEqual({k: v for k, v in rec.items() if k not in CROSS_TF_FIELDS}, old)
+                    if rec["tf"] == "15":
+                        self.assertIsNone(rec["parent_segment_id"])
+                    if rec["parent_segment_id"] is None:  # largest tf, or before the first / after the last parent
+                        continue
+                    t = parse(rec["start_time"]) + timedelta(minutes=rec["duration_min"])
+                    parent = before[rec["parent_segment_id"] + ".jsonl"]
+                    p0 = parse(parent[0]["start_time"])
+                    self.assertTrue(p0 <= t <= p0 + timedelta(minutes=parent[-1]["duration_min"]))
+                    k = int((t + timedelta(minutes=5) - p0) / timedelta(minutes=15)) - 1  # last parent bar closed
+                    want = parent[min(k, len(parent) - 1)]["tier"] if k >= 0 else None
+                    self.assertEqual(rec["parent_tier"], want)
+                    checked += 1
+            self.assertGreater(checked, 50)
+
+
+class TestZoneMaps(unittest.TestCase):
+    def _write(self, d: Path, name: str, recs: list) -> Path:
+        import json
+        p = d / name
+        p.write_text("".join(json.dumps(r) + "\n" for r in recs))
+        return p
+
+    def _tree(self, d: Path) -> Path:
+        out = d / "classified"
+        out.mkdir()
+        self._write(out, "SPY_260105_5_0930_1000.jsonl", [{"efficiency": 0.2, "tier": "low_edge"}, {"efficiency": float("nan"), "tier": "low_edge"}])
+        self._write(out, "SPY_260105_5_1000_1030.jsonl", [{"efficiency": 0.9, "tier": "elite"}, {"efficiency": 0.4, "tier": "tradable"}])
+        self._write(out, "QQQ_260106_5_0930_1000.jsonl", [{"efficiency": 0.3, "tier": "low_edge", "flag": True}])
+        return out
+
+    def test_summaries(self):
+        from vector_calc.zone_maps import load_day, write_zone_maps
+        with tempfile.TemporaryDirectory() as d:
+            out = self._tree(Path(d))
+            self.assertEqual(write_zone_maps(out, Path(d) / "zone_maps", {"260105", "260106", "260107"}), 2)
+            day = load_day(Path(d) / "zone_maps", "260105")
+            self.assertEqual(day["day"], {"records": 4, "fields": {"efficiency": [0.2, 0.9]}, "tiers": {"low_edge": 2, "elite": 1, "tradable": 1}})
+            self.assertEqual(day["files"]["SPY_260105_5_0930_1000.jsonl"]["fields"], {"efficiency": [0.2, 0.2]})  # NaN left out
+            self.assertNotIn("flag", load_day(Path(d) / "zone_maps", "260106")["day"]["fields"])  # bools are not numbers
+            self.assertIsNone(load_day(Path(d) / "zone_maps", "260107"))
+
+    def test_query_prunes_without_changing_results(self):
+        import os
+        from vector_calc.query import ScanStats, parse_predicate, scan, select_files
+        from vector_calc.zone_maps import write_zone_maps
+        with tempfile.TemporaryDirectory() as d:
+            out, zones = self._tree(Path(d)), Path(d) / "zone_maps"
+            write_zone_maps(out, zones, {"260105", "260106"})
+            paths = sorted(out.glob("*.jsonl"))
+
+            def run(wheres, zone_dir=zones):
+                stats = ScanStats()
+                preds = [parse_predicate(w) for w in wheres]
+                recs = list(scan(select_files(paths, zone_dir, preds, stats), preds, stats))
+                return recs, stats
+
+            for wheres in (["efficiency>0.5"], ["tier==low_edge"], ["tier!=low_edge"], ["efficiency<=0.3", "tier=low_edge"], ["efficiency==0.4"]):
+                self.assertEqual(run(wheres)[0], run(wheres, Path(d) / "none")[0], wheres)
+            recs, stats = run(["efficiency>0.5"])
+            self.assertEqual([r["tier"] for r in recs], ["elite"])
+            self.assertEqual((stats.candidates, stats.skipped_day, stats.skipped_file, stats.scanned), (3, 1, 1, 1))
+            self.assertEqual(run(["tier==elite"])[1].scanned, 1)
+            self.assertEqual(run(["missing>0"])[1].scanned, 0)
+            with self.assertRaises(ValueError):
+                parse_predicate("tier>elite")
+
+            # A file changed after its map was written is scanned, and a match there is found.
+            p = self._write(out, "QQQ_260106_5_0930_1000.jsonl", [{"efficiency": 0.95, "tier": "elite"}])
+            os.utime(p, ns=(p.stat().st_atime_ns, p.stat().st_mtime_ns + 10**9))
+            recs, stats = run(["efficiency>0.5"])
+            self.assertEqual(len(recs), 2)
+            self.assertEqual((stats.skipped_day, stats.scanned_unindexed), (0, 1))
@@ -0,0 +1,176 @@
+"""Tests for vector_index.numpy_index: exact top-k, filters, batch queries, on-disk layout."""
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from vector_index.numpy_index import NumpyIndex, NumpyIndexBuilder
+from vector_index.record_store import RecordStore
+from vector_index.service import LatencyHistogram, LRUCache, NumpyBackend, QueryService, make_server
+
+FIELDS = ["a", "b", "c"]
+
+
+def _build(d: Path, n: int = 200, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    emb = rng.normal(size=(n, len(FIELDS))).astype(np.float32)
+    builder = NumpyIndexBuilder(FIELDS)
+    metas = [
+        {"ticker": ["SPY", "QQQ"][i % 2], "tf": "5", "tier": ["elite", "tradable"][i % 3 == 0],
+         "date": f"2602{10 + i % 5}", "closing_bar_index": i}
+        for i in range(n)
+    ]
+    builder.add([f"S_{i}" for i in range(n)], emb.tolist(), metas)
+    builder.save(d)
+    return emb
+
+
+class TestNumpyIndex(unittest.TestCase):
+    def test_exact_top_k_matches_brute_force(self):
+        with tempfile.TemporaryDirectory() as d:
+            emb = _build(Path(d))
+            index = NumpyIndex(Path(d))
+            self.assertEqual(len(index), 200)
+            q = emb[:7] + 0.01
+            rows, dists = index.search(q, k=5)
+            self.assertEqual(rows.shape, (7, 5))
+            for i in range(7):
+                brute = np.argsort(((emb - q[i]) ** 2).sum(axis=1), kind="stable")[:5]
+                self.assertEqual(rows[i].tolist(), brute.tolist())
+                self.assertTrue(np.all(np.diff(dists[i]) >= 0))
+            self.assertEqual(index.ids[rows[0, 0]], "S_0")
+
+    def test_single_query_and_k_larger_than_candidates(self):
+        with tempfile.TemporaryDirectory() as d:
+            emb = _build(Path(d), n=4)
+            rows, _ = NumpyIndex(Path(d)).search(emb[1], k=10)
+            self.assertEqual(rows.shape, (1, 4))
+            self.assertEqual(rows[0, 0], 1)
+
+    def test_filters(self):
+        with tempfile.TemporaryDirectory() as d:
+            emb = _build(Path(d))
+            index = NumpyIndex(Path(d))
+            rows, _ = index.search(emb[:3], k=10, ticker="QQQ", date_from="260211", date_to="260212")
+            for r in rows.ravel():
+                md = index.metadata(int(r))
+                self.assertEqual(md["ticker"], "QQQ")
+                self.assertIn(md["date"], (260211, 260212))
+            rows, _ = index.search(emb[0], k=3, tier=["elite"], ticker="NOPE")
+            self.assertEqual(rows.shape, (1, 0))
+
+    def test_add_existing_keeps_rows(self):
+        with tempfile.TemporaryDirectory() as d:
+            _build(Path(d) / "a")
+            old = NumpyIndex(Path(d) / "a")
+            builder = NumpyIndexBuilder(FIELDS)
+            builder.add_existing(old, keep=old.meta["date"] != 260210)
+            builder.save(Path(d) / "b")
+            new = NumpyIndex(Path(d) / "b")
+            self.assertEqual(len(new), 160)
+            self.assertEqual(new.metadata(0)["ticker"], old.metadata(1)["ticker"])
+
+
+class TestQueryService(unittest.TestCase):
+    def test_cache_and_batch(self):
+        with tempfile.TemporaryDirectory() as d:
+            emb = _build(Path(d))
+            service = QueryService(NumpyBackend(NumpyIndex(Path(d))), cache_size=8)
+            first = service.query({"vector": emb[3].tolist(), "k": 4})
+            self.assertEqual(first["cached"], [False])
+            self.assertEqual(first["results"][0][0]["id"], "S_3")
+            batch = service.query({"vectors": [emb[3].tolist(), emb[4].tolist()], "k": 4})
+            self.assertEqual(batch["cached"], [True, False])
+            self.assertEqual(batch["results"][1][0]["id"], "S_4")
+            filtered = service.query({"vector": emb[3].tolist(), "k": 4, "filters": {"ticker": "SPY"}})
+            self.assertEqual(filtered["cached"], [False])
+            self.assertTrue(all(r["ticker"] == "SPY" for r in filtered["results"][0]))
+            stats = service.stats()
+            self.assertEqual(stats["cache"]["hits"], 1)
+            self.assertEqual(stats["latency"]["single"]["count"], 2)
+            self.assertEqual(stats["latency"]["batch"]["count"], 1)
+
+    def test_bad_requests(self):
+        with tempfile.TemporaryDirectory() as d:
+            _build(Path(d), n=5)
+            service = QueryService(NumpyBackend(NumpyIndex(Path(d))))
+            with self.assertRaises(ValueError):
+                service.query({"vector": [1.0]})
+            with self.assertRaises(ValueError):
+                service.query({"vector": [0.0, 0.0, 0.0], "filters": {"colour": "red"}})
+            with self.assertRaises(ValueError):
+                service.query({"vector": [0.0, 0.0, 0.0], "k": 0})
+
+    def test_http_roundtrip(self):
+        import json
+        import threading
+        import urllib.request
+
+        with tempfile.TemporaryDirectory() as d:
+            emb = _build(Path(d), n=20)
+            server = make_server(QueryService(NumpyBackend(NumpyIndex(Path(d)))), port=0)
+            t = threading.Thread(target=server.serve_forever, daemon=True)
+            t.start()
+            try:
+                url = f"http://127.0.0.1:{server.server_address[1]}"
+                req = urllib.request.Request(
+                    url + "/query", data=json.dumps({"vector": emb[2].tolist(), "k": 2}).encode(), method="POST"
+                )
+                body = json.loads(urllib.request.urlopen(req).read())
+                self.assertEqual(body["results"][0][0]["id"], "S_2")
+                stats = json.loads(urllib.request.urlopen(url + "/stats").read())
+                self.assertEqual(stats["rows"], 20)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+class TestRecordStore(unittest.TestCase):
+    def test_hydrate_by_offset(self):
+        import json
+
+        with tempfile.TemporaryDirectory() as d:
+            d = Path(d)
+            recs = [{"segment_id": "S", "closing_bar_index": k, "x": k * 2} for k in range(3)]
+            lines = [json.dumps(r) for r in recs]
+            (d / "S.jsonl").write_text("\n".join(lines) + "\n")
+            offsets, pos = [], 0
+            for line in lines:
+                offsets.append((pos, len(line)))
+                pos += len(line) + 1
+            store = RecordStore(d / "records.sqlite", d)
+            store.replace_file("S.jsonl", ["S_0", "S_1", "S_2"], offsets)
+            self.assertEqual(store.hydrate(["S_2", "missing", "S_0"]), [recs[2], None, recs[0]])
+            # File rewritten with different content: stale offsets are rejected, not misread.
+            (d / "S.jsonl").write_text(json.dumps({"segment_id": "T", "closing_bar_index": 0}) + "\n")
+            self.assertEqual(store.hydrate(["S_0"]), [None])
+            store.drop_file("S.jsonl")
+            self.assertEqual(store.locate(["S_1"]), {})
+            store.close()
+
+
+class TestLatencyAndCache(unittest.TestCase):
+    def test_histogram_percentiles(self):
+        h = LatencyHistogram(bounds=(1.0, 10.0, float("inf")))
+        for ms in (0.5, 0.7, 5.0, 50.0):
+            h.observe(ms)
+        self.assertEqual(h.counts, [2, 1, 1])
+        self.assertEqual(h.percentile(50), 1.0)
+        self.assertEqual(h.percentile(99), 50.0)
+
+    def test_lru_eviction(self):
+        c = LRUCache(2)
+        c.put("a", 1)
+        c.put("b", 2)
+        c.get("a")
+        c.put("c", 3)
+        self.assertIsNone(c.get("b"))
+        self.assertEqual(c.get("a"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1 @@
+from .exporter import export_training_set
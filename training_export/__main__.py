@@ -0,0 +1,55 @@
+"""CLI: join classified records with virtual trades and write sharded .npy training data.
+
+Usage:
+  python -m training_export [--classified-dir DIR] [--trades-dir DIR] [--out-dir DIR] [--date YYMMDD]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+
+from artifact_catalog import find_artifacts
+
+from .exporter import DEFAULT_SHARD_ROWS, SCHEMA_NAME, export_training_set, load_trade_index
+
+
+def main() -> None:
+    data_base = os.environ.get("DATA_BASE") or os.environ.get("FIN_DATA") or os.path.expanduser("~/Fin/Data")
+
+    parser = argparse.ArgumentParser(description="Export classified records + virtual-trade labels as .npy shards.")
+    parser.add_argument("--classified-dir", default=os.path.join(data_base, "classified"), help="Classified directory")
+    parser.add_argument("--trades-dir", default="", help="Virtual trades directory (default: sibling 'virtual_trades').")
+    parser.add_argument("--out-dir", default="", help="Output directory (default: sibling 'training_set').")
+    parser.add_argument("--date", default=None, metavar="YYMMDD", help="Only export this date")
+    parser.add_argument(
+        "--shard-rows",
+        type=int,
+        default=DEFAULT_SHARD_ROWS,
+        help=f"Rows per shard; bounds memory use (default {DEFAULT_SHARD_ROWS}).",
+    )
+    args = parser.parse_args()
+
+    classified_dir = Path(args.classified_dir)
+    if not classified_dir.is_dir():
+        parser.error(f"classified-dir not found: {classified_dir}")
+    trades_dir = Path(args.trades_dir) if args.trades_dir else classified_dir.parent / "virtual_trades"
+    out_dir = Path(args.out_dir) if args.out_dir else classified_dir.parent / "training_set"
+    if args.shard_rows < 1:
+        parser.error("--shard-rows must be >= 1")
+
+    paths = find_artifacts("classified", classified_dir, date=args.date or None)
+    if not paths:
+        print(f"No classified files in {classified_dir}")
+        return
+
+    trade_index = load_trade_index(trades_dir, args.date)
+    schema = export_training_set(paths, trade_index, out_dir, shard_rows=args.shard_rows)
+    print(
+        f"Exported {schema['rows']} rows ({schema['rows_with_trade']} in segments with a trade) "
+        f"in {len(schema['shards'])} shards to {out_dir} ({SCHEMA_NAME})"
+    )
+
+
+if __name__ == "__main__":
+    main()
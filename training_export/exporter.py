@@ -0,0 +1,231 @@
+"""Join classified records with virtual trades into sharded float32 .npy training matrices."""
+from __future__ import annotations
+
+import json
+import math
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from common.compressed import open_text
+from common.timeparse import parse_time
+
+# Numeric per-record features (identity strings and tier are handled separately).
+FEATURE_FIELDS = (
+    "closing_bar_index",
+    "duration_min",
+    "bars",
+    "p0_close",
+    "p1_close",
+    "delta_pct",
+    "slope_pctPerMin",
+    "range_pct",
+    "efficiency",
+    "dollarVol_sum",
+    "vol_slope",
+    "vol_peak_ratio",
+    "atrRatio_peak",
+    "atrRatio_q50",
+    "tShockScoreTot_peak",
+    "tShockScoreTot_density",
+    "tShock_time_to_peak",
+    "tTrendAbs_area",
+    "tTrendAbs_active_frac",
+    "inTrendScore_area",
+    "tRegimeAbs_active_frac",
+    "smaCrossScoreInd_active_frac",
+    "rev_avwap_side_frac",
+    "rev_avwap_cross_count",
+    "rev_avwap_dist_abs_mean_pct",
+    "htfVwap_side_frac",
+    "htfVwap_cross_count",
+    "profit_score",
+    "entry_score",
+    "maintain_score",
+    "tradeability_score",
+    "tier",
+)
+
+NEXT_FIELDS = (
+    "next_profit_score",
+    "next_entry_score",
+    "next_maintain_score",
+    "next_tradeability_score",
+    "next_delta_pct",
+    "next_tier",
+)
+
+# trade_side: 1 long, -1 short, 0 no trade in segment. trade_pnl: 0.0 when no trade.
+# in_trade_window: 1 if the record's bar (start_time + duration_min) lies between the entry and exit bar times of
+# the segment's best trade; records or trades without times fall back to bar_start <= closing_bar_index <= bar_end.
+LABEL_FIELDS = ("trade_side", "trade_pnl", "in_trade_window") + NEXT_FIELDS
+
+TIER_CODES = {
+    "non_tradable": 0,
+    "low_edge": 1,
+    "difficult": 2,
+    "tradable": 3,
+    "high_quality": 4,
+    "elite": 5,
+}
+
+SIDE_CODES = {"long": 1, "short": -1}
+
+SCHEMA_NAME = "schema.json"
+DEFAULT_SHARD_ROWS = 1_000_000
+
+
+def _to_float(v) -> float:
+    """Numeric value or tier name -> float; anything else -> NaN."""
+    if isinstance(v, bool):
+        return float(v)
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str) and v in TIER_CODES:
+        return float(TIER_CODES[v])
+    return math.nan
+
+
+def _matches_date(stem: str, date_filter: str | None) -> bool:
+    return not date_filter or f"_{date_filter}_" in stem or stem.endswith(f"_{date_filter}")
+
+
+def load_trade_index(trades_dir: Path, date_filter: str | None = None) -> dict[str, dict]:
+    """Hash index of virtual trades keyed by vector_id (= classified segment_id)."""
+    index: dict[str, dict] = {}
+    if not trades_dir.is_dir():
+        return index
+    for fp in sorted(trades_dir.glob("*.jsonl")):
+        if not _matches_date(fp.stem, date_filter):
+            continue
+        with open(fp, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    trade = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                vid = trade.get("vector_id")
+                if vid:
+                    index[vid] = trade
+    return index
+
+
+def iter_classified_records(paths: Iterable[Path]) -> Iterator[dict]:
+    """Stream records from classified JSONL files (any codec, common.compressed), one line at a time."""
+    for fp in paths:
+        with open_text(fp) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def _in_trade_window(rec: dict, trade: dict) -> bool:
+    t, entry = parse_time(rec.get("start_time")), parse_time(trade.get("entry_time"))
+    try:
+        if t is not None and entry is not None:
+            t += timedelta(minutes=float(rec["duration_min"]))
+            return entry <= t <= entry + timedelta(minutes=float(trade["duration_minutes"]))
+    except (KeyError, TypeError, ValueError):
+        pass
+    k = rec.get("closing_bar_index")
+    start, end = trade.get("bar_start"), trade.get("bar_end")
+    return isinstance(k, int) and start is not None and end is not None and start <= k <= end
+
+
+def label_row(rec: dict, trade: dict | None) -> list[float]:
+    """Label values for one record, in LABEL_FIELDS order."""
+    if trade is None:
+        side, pnl, in_window = 0.0, 0.0, 0.0
+    else:
+        side = float(SIDE_CODES.get(trade.get("side"), 0))
+        pnl = _to_float(trade.get("pnl"))
+        in_window = 1.0 if _in_trade_window(rec, trade) else 0.0
+    return [side, pnl, in_window] + [_to_float(rec.get(k)) for k in NEXT_FIELDS]
+
+
+class ShardWriter:
+    """Fixed-size float32 buffers flushed to features_/labels_/ids_NNNNN.npy as they fill."""
+
+    def __init__(self, out_dir: Path, shard_rows: int = DEFAULT_SHARD_ROWS) -> None:
+        self.out_dir = out_dir
+        self.shard_rows = shard_rows
+        self._features = np.empty((shard_rows, len(FEATURE_FIELDS)), dtype=np.float32)
+        self._labels = np.empty((shard_rows, len(LABEL_FIELDS)), dtype=np.float32)
+        self._ids: list[str] = []
+        self._n = 0
+        self.shards: list[dict] = []
+
+    def append(self, features: list[float], labels: list[float], doc_id: str) -> None:
+        self._features[self._n] = features
+        self._labels[self._n] = labels
+        self._ids.append(doc_id)
+        self._n += 1
+        if self._n >= self.shard_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._n == 0:
+            return
+        i = len(self.shards)
+        names = {kind: f"{kind}_{i:05d}.npy" for kind in ("features", "labels", "ids")}
+        np.save(self.out_dir / names["features"], self._features[: self._n])
+        np.save(self.out_dir / names["labels"], self._labels[: self._n])
+        np.save(self.out_dir / names["ids"], np.array(self._ids, dtype=np.str_))
+        self.shards.append({**names, "rows": self._n})
+        self._ids = []
+        self._n = 0
+
+    @property
+    def rows(self) -> int:
+        return sum(s["rows"] for s in self.shards) + self._n
+
+
+def export_training_set(
+    classified_paths: Iterable[Path],
+    trade_index: dict[str, dict],
+    out_dir: Path,
+    shard_rows: int = DEFAULT_SHARD_ROWS,
+) -> dict:
+    """Stream records, join each with its segment's trade, write shards + schema. Returns the schema."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for f in out_dir.glob("*_[0-9][0-9][0-9][0-9][0-9].npy"):
+        f.unlink()
+    writer = ShardWriter(out_dir, shard_rows)
+    joined = 0
+    for rec in iter_classified_records(classified_paths):
+        seg_id = rec.get("segment_id")
+        closing_ix = rec.get("closing_bar_index")
+        if seg_id is None or closing_ix is None:
+            continue
+        trade = trade_index.get(seg_id)
+        if trade is not None:
+            joined += 1
+        writer.append(
+            [_to_float(rec.get(k)) for k in FEATURE_FIELDS],
+            label_row(rec, trade),
+            f"{seg_id}_{closing_ix}",
+        )
+    writer.flush()
+    schema = {
+        "version": 1,
+        "dtype": "float32",
+        "features": list(FEATURE_FIELDS),
+        "labels": list(LABEL_FIELDS),
+        "tier_codes": TIER_CODES,
+        "side_codes": SIDE_CODES,
+        "rows": writer.rows,
+        "rows_with_trade": joined,
+        "shards": writer.shards,
+    }
+    (out_dir / SCHEMA_NAME).write_text(json.dumps(schema, indent=2) + "\n", encoding="utf-8")
+    return schema
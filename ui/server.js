@@ -450,7 +450,77 @@ function isFullVectorStem(stem) {
   return stem.split("_").length === 3;
 }
 
+// Precomputed per-(asset, date, tf) plot payloads written by vector_calc (vector_calc/plot_summary.py).
+const plotSummariesDir = process.env.PLOT_SUMMARIES_DIR
+  ? resolveDir(process.env.PLOT_SUMMARIES_DIR)
+  : path.join(path.dirname(classifiedDir), "plot_summaries");
+const PLOT_SUMMARY_VERSION = 2;
+const CLASSIFIED_EXT_RE = /\.jsonl(\.gz|\.zst)?$/;
+
+/** Classified segment files of one (asset, date, tf) in classifiedDir, sorted (any codec, no .idx). */
+function classifiedGroupFiles(asset, date, tf) {
+  const prefix = asset + "_" + date + "_" + tf + "_";
+  return fs
+    .readdirSync(classifiedDir)
+    .filter((f) => f.startsWith(prefix) && CLASSIFIED_EXT_RE.test(f) && isSegmentStem(f.replace(CLASSIFIED_EXT_RE, "")))
+    .sort();
+}
+
+/**
+ * Read plot_summaries/{asset}_{date}_{tf}.json if it is current: every classified file it lists still
+ * exists and is not newer than the summary (one stat per segment, no reads), and the group has the same
+ * files as when it was written. The listing is only compared when classified/ itself changed (its mtime
+ * moves on every add, remove or rename) after the summary. Otherwise null.
+ */
+function readPlotSummary(asset, date, tf) {
+  const fp = path.join(plotSummariesDir, asset + "_" + date + "_" + tf + ".json");
+  let summary;
+  let summaryMtime;
+  try {
+    summaryMtime = fs.statSync(fp).mtimeMs;
+    summary = JSON.parse(fs.readFileSync(fp, "utf8"));
+  } catch {
+    return null;
+  }
+  if (!summary || summary.version !== PLOT_SUMMARY_VERSION || !Array.isArray(summary.sources) || !Array.isArray(summary.files)) {
+    return null;
+  }
+  for (const name of summary.sources) {
+    try {
+      if (fs.statSync(path.join(classifiedDir, name)).mtimeMs > summaryMtime) return null;
+    } catch {
+      return null;
+    }
+  }
+  try {
+    if (fs.statSync(classifiedDir).mtimeMs > summaryMtime) {
+      const files = classifiedGroupFiles(asset, date, tf);
+      if (files.length !== summary.files.length || files.some((f, i) => f !== summary.files[i])) return null;
+    }
+  } catch {
+    return null;
+  }
+  return summary;
+}
+
 function getPlotVectors(asset, date, tf) {
+  if (asset && date && tf) {
+    const summary = readPlotSummary(asset, date, tf);
+    if (summary) {
+      return {
+        segments: summary.segments,
+        barsInDay: Math.floor(SESSION_LEN_MIN / tfToMinutes(tf)),
+        sessionStartMin: SESSION_START_MIN,
+        sessionEndMin: SESSION_END_MIN,
+        rev_avwap_series: summary.rev_avwap_series,
+        htf_vwap_series: summary.htf_vwap_series,
+        atrnow_upper_series: [],
+        atrnow_lower_series: [],
+        trades: getTradesForPlot(asset, date, tf),
+        trade_avwap_segments: [],
+      };
+    }
+  }
   const segments = [];
   const matchedRawPaths = [];
   if (!asset || !date || !tf) return { segments, barsInDay: 0, sessionStartMin: SESSION_START_MIN, sessionEndMin: SESSION_END_MIN };
@@ -477,7 +547,8 @@ function getPlotVectors(asset, date, tf) {
     const stem = f.replace(/\.jsonl$/, "");
     const rawMatch = findRawFileByStem(stem);
     if (!rawMatch || rawMatch.lineCount !== lines.length) continue;
-    const lastRec = JSON.parse(lines[lines.length - 1]);
+    const lastRec = parseJsonlLine(lines[lines.length - 1]);
+    if (!lastRec) continue;
     const startTime = lastRec.start_time;
     const durationMin = lastRec.duration_min;
     const p0 = lastRec.p0_close;
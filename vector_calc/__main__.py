@@ -5,8 +5,13 @@ from __future__ import annotations
 import argparse
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+from artifact_catalog import code_version, find_artifacts, register_outputs
+from common.atomic_output import OutputStats, StagedOutput
+from common.compressed import CODEC_NAMES, codec_available, codec_of, data_files, data_stem, open_text, read_text, with_codec
 
 # Attributes to drop from each vector record before writing
 VEC_DROP_ATTRS = frozenset({
@@ -26,11 +31,21 @@ from .calc import (
     load_segment,
     parse_raw_filename,
 )
+from .cross_tf import add_cross_tf_fields
+from .features import FeaturePlan, format_catalog, resolve
+from .overlap import DEFAULT_DEPTH, PipelineMetrics, overlapped
+from .plot_summary import PLOT_SUMMARY_DIRNAME, summary_is_current_version, write_plot_summaries
+from .record_index import INDEX_SUFFIX, write_record_index
+from .zone_maps import ZONE_MAP_DIRNAME, refresh_zone_maps
+
 
+def _add_next_vector_fields(classified_dir: Path, paths: list[Path] | None = None) -> None:
+    """For each classified file, add next_* from the last record of the next vector (same ticker, date, tf).
 
-def _add_next_vector_fields(classified_dir: Path) -> None:
-    """For each classified file, add next_* from the last record of the next vector (same ticker, date, tf)."""
-    paths = list(classified_dir.glob("*.jsonl"))
+    paths limits the pass to those files (they must cover whole (ticker, date, tf) groups). Files are rewritten
+    in the codec they are stored with.
+    """
+    paths = data_files(classified_dir, "*.jsonl") if paths is None else list(paths)
     if not paths:
         return
     # Group by (ticker, date, tf), sort by start_hhmm
@@ -50,19 +65,20 @@ def _add_next_vector_fields(classified_dir: Path) -> None:
             if next_path is None:
                 continue
             # Last record of next file
-            lines = next_path.read_text(encoding="utf-8").strip().splitlines()
+            lines = read_text(next_path).strip().splitlines()
             if not lines:
                 continue
             last_rec = json.loads(lines[-1])
             next_vals = {f"next_{k}": last_rec.get(k) for k in NEXT_SOURCE_ATTRS}
             # Load current file, add next_* to every record, write back
-            lines_cur = path.read_text(encoding="utf-8").strip().splitlines()
+            lines_cur = read_text(path).strip().splitlines()
             out_lines = []
             for line in lines_cur:
                 rec = json.loads(line)
                 rec.update(next_vals)
                 out_lines.append(json.dumps(rec, ensure_ascii=False))
-            path.write_text("\n".join(out_lines) + "\n", encoding="utf-8")
+            with open_text(path, "w") as f:
+                f.write("\n".join(out_lines) + "\n")
 
 
 def round_floats(obj: Any, ndigits: int = 3) -> Any:
@@ -76,6 +92,159 @@ def round_floats(obj: Any, ndigits: int = 3) -> Any:
     return obj
 
 
+def record_line(rec: dict) -> str:
+    """One classified JSONL line for a scored record: floats rounded to 3 digits, VEC_DROP_ATTRS removed."""
+    rec = round_floats(rec, ndigits=3)
+    for k in VEC_DROP_ATTRS:
+        rec.pop(k, None)
+    return json.dumps(rec, ensure_ascii=False) + "\n"
+
+
+def segment_lines(df, segment_id: str, plan: FeaturePlan | None = None) -> list[str]:
+    """Classified JSONL lines (scored, see record_line) for one segment frame.
+
+    [] if segment_id is not TICKER_YYMMDD_TF_START_END or there are no bars. plan: feature groups to compute
+    (vector_calc.features; default all, scored).
+    """
+    try:
+        ticker, date, tf, _start, _end = parse_raw_filename(Path(f"{segment_id}.jsonl"))
+    except ValueError:
+        return []
+    records = compute_records_for_segment(df, ticker, tf, date, segment_id, plan)
+    if not records:
+        return []
+    if plan is None or plan.scoring:
+        add_scoring_to_records(records)
+    return [record_line(rec) for rec in records]
+
+
+def write_lines(path: Path, lines: list[str]) -> None:
+    with open_text(path, "w") as f:
+        f.writelines(lines)
+
+
+def classify_segment(
+    df, segment_id: str, classified_dir: Path, codec: str = "none", plan: FeaturePlan | None = None
+) -> int:
+    """Compute records for one segment frame and write classified/{segment_id}.jsonl. Returns records written.
+
+    0 means nothing was written (segment_id not TICKER_YYMMDD_TF_START_END, or no bars). codec: storage codec
+    of the file written (common.compressed; e.g. "gzip" writes {segment_id}.jsonl.gz). plan: feature groups
+    to compute (vector_calc.features; default all, scored).
+    """
+    lines = segment_lines(df, segment_id, plan)
+    if lines:
+        write_lines(classified_dir / with_codec(f"{segment_id}.jsonl", codec), lines)
+    return len(lines)
+
+
+def _read_raw(path: Path):
+    """Segment frame of a raw file, or None if its name is not a segment stem."""
+    try:
+        parse_raw_filename(path)
+    except ValueError:
+        return None
+    return load_segment(path)
+
+
+def classify_raw_file(path: Path, classified_dir: Path, codec: str = "none", plan: FeaturePlan | None = None) -> int:
+    """Compute records for one raw_vectors file (any codec) and write classified/{stem}.jsonl. Returns records written."""
+    df = _read_raw(path)
+    return 0 if df is None else classify_segment(df, data_stem(path), classified_dir, codec, plan)
+
+
+def classify_paths(
+    paths: list[Path],
+    classified_dir: Path,
+    codec: str = "none",
+    plan: FeaturePlan | None = None,
+    jobs: int = 1,
+    depth: int = DEFAULT_DEPTH,
+    metrics: PipelineMetrics | None = None,
+) -> Iterator[tuple[Path, int]]:
+    """classify_raw_file for every path, yielding (path, records written) in input order.
+
+    jobs > 1: files are classified in a process pool, largest first. jobs == 1: reading, computing and
+    writing overlap on threads with `depth`-entry queues (vector_calc.overlap; depth 0 = serial), and
+    metrics gets the per-stage busy / starved / blocked times and queue depths.
+    """
+    if jobs > 1 and len(paths) > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        try:
+            by_size = sorted(paths, key=lambda p: p.stat().st_size, reverse=True)
+            futures = {p: pool.submit(classify_raw_file, p, classified_dir, codec, plan) for p in by_size}
+            for path in paths:
+                yield path, futures[path].result()
+        finally:
+            pool.shutdown(cancel_futures=True)
+        return
+
+    def compute(path: Path, df):
+        lines = [] if df is None else segment_lines(df, data_stem(path), plan)
+        if not lines:
+            return (path, 0), None
+        return (path, len(lines)), (classified_dir / with_codec(f"{data_stem(path)}.jsonl", codec), lines)
+
+    yield from overlapped(paths, _read_raw, compute, lambda job: write_lines(*job), depth, metrics)
+
+
+def _in_date(stem: str, date: str | None) -> bool:
+    return not date or f"_{date}_" in stem or stem.endswith(f"_{date}")
+
+
+def commit_classified(
+    out: StagedOutput, staged: list[Path], date_filter: str | None, cross_tf_raw_dir: Path | None = None
+) -> OutputStats:
+    """next_* pass and .idx sidecars on the staged files, then replace only the classified files that changed.
+
+    staged must cover whole (ticker, date, tf) groups. Files of the target not produced by this run are
+    removed (with date_filter: only files of that date). Compressed files get no sidecar (RecordIndex
+    computes their offsets after decompressing). cross_tf_raw_dir: also add the parent_* fields
+    (vector_calc.cross_tf), with segment indexes built from that raw dir.
+    """
+    _add_next_vector_fields(out.staging)
+    if cross_tf_raw_dir is not None:
+        add_cross_tf_fields(out.staging, cross_tf_raw_dir)
+    for p in staged:
+        if codec_of(p) == "none":
+            write_record_index(p)
+    return out.commit(None if not date_filter else lambda name: _in_date(data_stem(name), date_filter))
+
+
+def classified_summary(stats: OutputStats) -> str:
+    """Added/changed/unchanged/removed counts of the classified files; .idx sidecars only as a rewrite count."""
+    idx = stats.select(lambda name: name.endswith(INDEX_SUFFIX))
+    text = stats.select(lambda name: not name.endswith(INDEX_SUFFIX)).summary()
+    return f"{text}, {len(idx.added) + len(idx.changed)} .idx rewritten"
+
+
+def refresh_plot_summaries(classified_dir: Path, raw_dir: Path, plot_dir: Path, stats: OutputStats, full: bool) -> int:
+    """Rewrite the plot summaries of groups whose classified files were added, changed or removed.
+
+    Summaries of untouched groups keep their mtime (still newer than their files). full: also write missing
+    or older-version summaries and drop those of groups that no longer exist.
+    """
+    groups = set()
+    for name in stats.added + stats.changed + stats.removed:
+        try:
+            groups.add(parse_raw_filename(Path(name))[:3])
+        except ValueError:
+            continue
+    if full:
+        present = set()
+        for p in data_files(classified_dir, "*.jsonl"):
+            try:
+                present.add(parse_raw_filename(p)[:3])
+            except ValueError:
+                continue
+        groups |= {g for g in present if not summary_is_current_version(plot_dir / f"{'_'.join(g)}.json")}
+        if plot_dir.is_dir():
+            for f in plot_dir.iterdir():
+                if f.is_file() and tuple(f.stem.split("_")) not in present:
+                    f.unlink()
+    return write_plot_summaries(classified_dir, raw_dir, plot_dir, groups)
+
+
 def main() -> None:
     p = argparse.ArgumentParser(description="Compute vector features from raw_vectors (one record per closing bar, scoring).")
     p.add_argument(
@@ -91,9 +260,54 @@ def main() -> None:
     p.add_argument(
         "--date",
         default="",
-        help="Process only this YYMMDD; if set, do not clear classified, only overwrite matching files.",
+        help="Process only this YYMMDD; only that date's classified files are replaced or removed.",
+    )
+    p.add_argument(
+        "--codec",
+        default="none",
+        choices=CODEC_NAMES,
+        help="Storage codec of the classified files written (.jsonl, .jsonl.gz, .jsonl.zst); raw files of any codec are read.",
+    )
+    p.add_argument(
+        "--features",
+        default="all",
+        help="Comma-separated output fields, groups or presets (e.g. embed,tier); only their dependency closure is"
+        " computed. Records then hold only those groups, so a subset needs a --classified-dir other than the default"
+        " (catalog, zone maps and plot summaries are left alone). Default: all.",
+    )
+    p.add_argument(
+        "--cross-tf",
+        action="store_true",
+        help="Add parent_* fields: the next larger tf segment of the same ticker/date containing each bar (its"
+        " direction, elapsed fraction, tier and delta_pct so far). See vector_calc/cross_tf.py.",
+    )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes: files are classified in parallel, largest first. 1 (default): one process with"
+        " reading, computing and writing overlapped on threads (see --prefetch).",
+    )
+    p.add_argument(
+        "--prefetch",
+        type=int,
+        default=DEFAULT_DEPTH,
+        help=f"With --jobs 1: raw files decoded ahead of compute and outputs queued for the writer (default {DEFAULT_DEPTH});"
+        " 0 = read, compute and write each file in turn.",
     )
+    p.add_argument("--list-features", action="store_true", help="Print the feature groups (outputs, inputs, dependencies) and exit.")
     args = p.parse_args()
+    if args.list_features:
+        print(format_catalog())
+        return
+    if not codec_available(args.codec):
+        p.error(f"--codec {args.codec}: codec not available (zstd needs the zstandard package)")
+    if args.jobs < 1 or args.prefetch < 0:
+        p.error("--jobs must be >= 1 and --prefetch >= 0")
+    try:
+        plan = resolve(args.features)
+    except ValueError as e:
+        p.error(f"--features: {e}")
 
     if not args.raw_dir:
         p.error("Set --raw-dir or RAW_VECTORS_DIR")
@@ -101,47 +315,53 @@ def main() -> None:
     if not raw_dir.is_dir():
         p.error(f"raw_dir not found: {raw_dir}")
 
-    classified_dir = Path(args.classified_dir) if args.classified_dir else raw_dir.parent / "classified"
-    classified_dir.mkdir(parents=True, exist_ok=True)
+    default_classified = raw_dir.parent / "classified"
+    classified_dir = Path(args.classified_dir) if args.classified_dir else default_classified
+    if not plan.is_full and classified_dir.resolve() == default_classified.resolve():
+        p.error("--features subset writes partial records: give a --classified-dir other than the default classified dir")
     date_filter = args.date.strip() if args.date else None
-    if not date_filter:
-        for f in classified_dir.iterdir():
-            if f.is_file():
-                f.unlink()
-
-    raw_paths = sorted(raw_dir.glob("*.jsonl"))
-    if date_filter:
-        raw_paths = [p for p in raw_paths if f"_{date_filter}_" in p.stem or p.stem.endswith(f"_{date_filter}")]
+    plot_dir = classified_dir.parent / PLOT_SUMMARY_DIRNAME
+
+    raw_paths = find_artifacts("raw", raw_dir, date=date_filter)
     if not raw_paths:
         print(f"No raw vector files in {raw_dir}")
-        return
 
+    # Records are built in a staging dir and only files whose bytes changed replace classified/ (see common.atomic_output).
     total = 0
-    for path in raw_paths:
-        try:
-            ticker, date, tf, _start, _end = parse_raw_filename(path)
-        except ValueError:
-            continue
-        segment_id = path.stem
-        df = load_segment(path)
-        records = compute_records_for_segment(df, ticker, tf, date, segment_id)
-        if not records:
-            continue
-        add_scoring_to_records(records)
-        out_path = classified_dir / f"{segment_id}.jsonl"
-        with out_path.open("w", encoding="utf-8") as f:
-            for rec in records:
-                rec = round_floats(rec, ndigits=3)
-                for k in VEC_DROP_ATTRS:
-                    rec.pop(k, None)
-                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-        total += len(records)
-        print(f"{path.name} -> {out_path.name} ({len(records)} records)")
-
-    # Post-pass: add next_* from last bar of following vector (same ticker, date, tf)
-    _add_next_vector_fields(classified_dir)
-
-    print(f"Wrote {total} classified records into {classified_dir}")
+    staged = []
+    metrics = PipelineMetrics()
+    with StagedOutput(classified_dir) as out:
+        for path, n in classify_paths(raw_paths, out.staging, args.codec, plan, args.jobs, args.prefetch, metrics):
+            if not n:
+                continue
+            total += n
+            name = with_codec(f"{data_stem(path)}.jsonl", args.codec)
+            staged.append(out.staging / name)
+            print(f"{path.name} -> {name} ({n} records)")
+        # next_* from last bar of following vector (same ticker, date, tf), then the byte-offset sidecars.
+        stats = commit_classified(out, staged, date_filter, raw_dir if args.cross_tf else None)
+    written = [classified_dir / p.name for p in staged]
+
+    if not plan.is_full:
+        # Partial records: the catalog, zone maps and plot summaries (siblings of classified/) stay those of full runs.
+        print(f"Wrote {total} classified records into {classified_dir}: files {classified_summary(stats)} (--features subset:"
+              " catalog, zone maps and plot summaries not updated)")
+    else:
+        # --date only replaces that date's files, so rows of that date are replaced, not dropped.
+        register_outputs(
+            "classified", classified_dir, written, stage="vector_calc", version=code_version("vector_calc"), full=not date_filter
+        )
+
+        n_zones = refresh_zone_maps(classified_dir, classified_dir.parent / ZONE_MAP_DIRNAME, stats, full=not date_filter)
+        # Plot summaries last, so they are newer than every classified file they list (the UI checks that).
+        n_plots = refresh_plot_summaries(classified_dir, raw_dir, plot_dir, stats, full=not date_filter)
+
+        print(
+            f"Wrote {total} classified records into {classified_dir}: files {classified_summary(stats)}"
+            f" ({n_plots} plot summaries in {plot_dir}, {n_zones} zone maps)"
+        )
+    if args.jobs == 1:
+        print(f"Stages ({metrics.summary()})")
 
 
 if __name__ == "__main__":
@@ -2,15 +2,20 @@
 
 from __future__ import annotations
 
+import json
 import math
 from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
 from typing import Iterable, List, Tuple
 
 import numpy as np
 import pandas as pd
 
+from common.compressed import data_stem, open_text
+from common.timeparse import parse_time, to_datetime64
+
+from .features import Feature, FeaturePlan, feature, full_plan, register_feature
+
 # Thresholds for active_frac / density metrics
 T_TREND = 50.0
 T_REGIME = 50.0
@@ -31,37 +36,47 @@ class VectorKey:
         return f"{self.ticker.lower()}_{self.tf}_{self.date}_{self.ordinal}"
 
 
-def _parse_time(s: str) -> datetime | None:
-    try:
-        return datetime.strptime(s[:19], "%Y-%m-%d %H:%M:%S")
-    except Exception:
-        return None
+def _parse_time_series(series: pd.Series) -> pd.Series:
+    """Parse time strings (e.g. '2026-02-24 09:30:00 EST', first 19 chars) in one vectorized pass; NaT if unparseable."""
+    return pd.Series(to_datetime64(series.to_numpy()), index=series.index)
 
 
-def _parse_time_series(series: pd.Series) -> pd.Series:
-    """Parse time strings (e.g. '2026-02-24 09:30:00 EST') using first 19 chars -> %Y-%m-%d %H:%M:%S."""
-    def parse(s):
-        if pd.isna(s) or not isinstance(s, str):
-            return pd.NaT
-        s = s.strip()[:19]
-        try:
-            return pd.Timestamp(s)
-        except Exception:
-            return pd.NaT
-    return series.map(parse)
+def _duration_min(df: pd.DataFrame) -> float:
+    """Minutes from the first to the last bar's time; NaN if either is missing or unparseable.
 
+    Only the two end times are parsed (record k of a segment would otherwise re-parse all k + 1 times).
+    """
+    if df.empty or "time" not in df.columns:
+        return math.nan
+    times = df["time"].to_numpy()
+    t0, t1 = parse_time(times[0]), parse_time(times[-1])
+    if t0 is None or t1 is None:
+        return math.nan
+    return (t1 - t0).total_seconds() / 60
 
-def load_segment(path: Path) -> pd.DataFrame:
-    """Load one raw_vectors JSONL file into a DataFrame sorted by time."""
-    if not path.is_file():
-        return pd.DataFrame()
-    df = pd.read_json(path, lines=True)
+
+def _sort_by_time(df: pd.DataFrame) -> pd.DataFrame:
     if "time" in df.columns:
         dt = _parse_time_series(df["time"])
         df = df.assign(_dt=dt).sort_values("_dt").drop(columns=["_dt"])
     return df.reset_index(drop=True)
 
 
+def load_segment(path: Path) -> pd.DataFrame:
+    """Load one raw_vectors JSONL file (plain, .gz or .zst) into a DataFrame sorted by time."""
+    if not path.is_file():
+        return pd.DataFrame()
+    with open_text(path) as f:
+        return segment_frame([json.loads(line) for line in f if line.strip()])
+
+
+def segment_frame(bars: list[dict]) -> pd.DataFrame:
+    """DataFrame of one segment's bar dicts sorted by time; load_segment builds its frame from the parsed lines the same way."""
+    if not bars:
+        return pd.DataFrame()
+    return _sort_by_time(pd.DataFrame(bars))
+
+
 def _safe_series(df: pd.DataFrame, name: str) -> pd.Series:
     return df[name].astype(float) if name in df.columns else pd.Series(dtype=float)
 
@@ -71,13 +86,7 @@ def _identity_features(df: pd.DataFrame, vkey: VectorKey) -> dict:
     if n == 0:
         return {}
     start_time = str(df["time"].iloc[0]) if "time" in df.columns else ""
-    dt = _parse_time_series(df["time"]) if "time" in df.columns else pd.Series(dtype=object)
-    if len(dt) and not dt.isna().all():
-        t0 = dt.iloc[0]
-        t1 = dt.iloc[-1]
-        duration_min = (t1 - t0).total_seconds() / 60 if pd.notna(t0) and pd.notna(t1) else math.nan
-    else:
-        duration_min = math.nan
+    duration_min = _duration_min(df)
     return {
         "vector_id": vkey.vector_id,
         "ticker": vkey.ticker,
@@ -103,13 +112,7 @@ def _identity_prefix(
     if n == 0:
         return {}
     start_time = str(df["time"].iloc[0]) if "time" in df.columns else ""
-    dt = _parse_time_series(df["time"]) if "time" in df.columns else pd.Series(dtype=object)
-    if len(dt) and not dt.isna().all():
-        t0 = dt.iloc[0]
-        t1 = dt.iloc[-1]
-        duration_min = (t1 - t0).total_seconds() / 60 if pd.notna(t0) and pd.notna(t1) else math.nan
-    else:
-        duration_min = math.nan
+    duration_min = _duration_min(df)
     return {
         "closing_bar_index": closing_bar_index,
         "segment_id": segment_id,
@@ -122,7 +125,13 @@ def _identity_prefix(
     }
 
 
+@feature(
+    "geometry",
+    ("p0_close", "p1_close", "delta_pct", "slope_pctPerMin", "range_pct", "efficiency"),
+    inputs=("close", "high", "low", "time"),
+)
 def _geometry_features(df: pd.DataFrame) -> dict:
+    """First/last close, move, slope per minute, range and efficiency (|move| / range)."""
     if df.empty or "close" not in df.columns:
         return {}
     close = df["close"].astype(float)
@@ -132,11 +141,7 @@ def _geometry_features(df: pd.DataFrame) -> dict:
     p1 = float(close.iloc[-1])
     delta_d = p1 - p0
     delta_pct = (delta_d / p0 * 100.0) if p0 != 0 else math.nan
-    dt = _parse_time_series(df["time"]) if "time" in df.columns else pd.Series(dtype=object)
-    if len(dt) and not dt.isna().all():
-        duration_min = (dt.iloc[-1] - dt.iloc[0]).total_seconds() / 60
-    else:
-        duration_min = math.nan
+    duration_min = _duration_min(df)
     slope_pct_per_min = delta_pct / duration_min if duration_min and duration_min != 0 else math.nan
     hi = float(high.max())
     lo = float(low.min())
@@ -153,7 +158,9 @@ def _geometry_features(df: pd.DataFrame) -> dict:
     }
 
 
+@feature("volume", ("dollarVol_sum", "vol_slope", "vol_peak_ratio"), inputs=("volume", "close"))
 def _volume_features(df: pd.DataFrame) -> dict:
+    """Dollar volume, volume trend (regression slope) and peak / median volume."""
     if df.empty:
         return {}
     vol = _safe_series(df, "volume")
@@ -187,7 +194,9 @@ def _volume_features(df: pd.DataFrame) -> dict:
     }
 
 
+@feature("atr", ("atrRatio_peak", "atrRatio_q50"), inputs=("atrRatio",))
 def _atr_features(df: pd.DataFrame) -> dict:
+    """Peak and median atrRatio."""
     atr = _safe_series(df, "atrRatio")
     if atr.empty:
         return {"atrRatio_peak": math.nan, "atrRatio_q50": math.nan}
@@ -200,23 +209,12 @@ def _atr_features(df: pd.DataFrame) -> dict:
     }
 
 
-def _active_frac_run_max(arr: np.ndarray, threshold: float) -> Tuple[float, int]:
-    """Return active_frac and run_max for arr >= threshold."""
+def _active_frac(arr: np.ndarray, threshold: float) -> float:
+    """Fraction of arr >= threshold (NaN counts as inactive); 0.0 for an empty array."""
     if arr.size == 0:
-        return 0.0, 0
+        return 0.0
     mask = np.where(np.isfinite(arr), arr >= threshold, False)
-    n = mask.size
-    active_frac = float(mask.sum() / n) if n > 0 else 0.0
-    run_max = 0
-    current = 0
-    for v in mask:
-        if v:
-            current += 1
-            if current > run_max:
-                run_max = current
-        else:
-            current = 0
-    return active_frac, run_max
+    return float(mask.sum() / mask.size)
 
 
 def _time_to_peak(arr: np.ndarray) -> float:
@@ -228,41 +226,53 @@ def _time_to_peak(arr: np.ndarray) -> float:
     return float(idx / (n - 1)) if n > 1 else 0.0
 
 
-def _trend_shock_regime_features(df: pd.DataFrame) -> dict:
-    out: dict = {}
-    # Shock: tShockScoreTot
-    shock = _safe_series(df, "tShockScoreTot")
-    s_arr = shock.to_numpy(dtype=float)
-    if s_arr.size:
-        out["tShockScoreTot_peak"] = float(np.nanmax(s_arr))
-        density, _ = _active_frac_run_max(s_arr, SHOCK_T)
-        out["tShockScoreTot_density"] = density
-        out["tShock_time_to_peak"] = _time_to_peak(s_arr)
-    else:
-        out["tShockScoreTot_peak"] = math.nan
-        out["tShockScoreTot_density"] = 0.0
-        out["tShock_time_to_peak"] = math.nan
-    # Trend persistence: tTrendAbs, inTrendScore
-    tTrendAbs = _safe_series(df, "tTrendAbs")
-    ta_arr = tTrendAbs.to_numpy(dtype=float)
-    out["tTrendAbs_area"] = float(np.nansum(ta_arr)) if ta_arr.size else 0.0
-    active_frac_trend, _ = _active_frac_run_max(ta_arr, T_TREND) if ta_arr.size else (0.0, 0)
-    out["tTrendAbs_active_frac"] = active_frac_trend
-    inTrendScore = _safe_series(df, "inTrendScore")
-    it_arr = inTrendScore.to_numpy(dtype=float)
-    out["inTrendScore_area"] = float(np.nansum(it_arr)) if it_arr.size else 0.0
-    # Regime and SMA
-    tRegimeAbs = _safe_series(df, "tRegimeAbs")
-    tr_arr = tRegimeAbs.to_numpy(dtype=float)
-    active_frac_regime, _ = _active_frac_run_max(tr_arr, T_REGIME) if tr_arr.size else (0.0, 0)
-    out["tRegimeAbs_active_frac"] = active_frac_regime
-    smaScore = _safe_series(df, "smaCrossScoreInd")
-    sma_arr = smaScore.to_numpy(dtype=float)
-    active_frac_sma, _ = _active_frac_run_max(sma_arr, T_SMA) if sma_arr.size else (0.0, 0)
-    out["smaCrossScoreInd_active_frac"] = active_frac_sma
-    return out
+@feature("shock", ("tShockScoreTot_peak", "tShockScoreTot_density", "tShock_time_to_peak"), inputs=("tShockScoreTot",))
+def _shock_features(df: pd.DataFrame) -> dict:
+    """tShockScoreTot peak, density (fraction >= SHOCK_T) and time to peak."""
+    s_arr = _safe_series(df, "tShockScoreTot").to_numpy(dtype=float)
+    if not s_arr.size:
+        return {"tShockScoreTot_peak": math.nan, "tShockScoreTot_density": 0.0, "tShock_time_to_peak": math.nan}
+    return {
+        "tShockScoreTot_peak": float(np.nanmax(s_arr)),
+        "tShockScoreTot_density": _active_frac(s_arr, SHOCK_T),
+        "tShock_time_to_peak": _time_to_peak(s_arr),
+    }
+
 
+@feature("trend", ("tTrendAbs_area", "tTrendAbs_active_frac"), inputs=("tTrendAbs",))
+def _trend_features(df: pd.DataFrame) -> dict:
+    """Trend persistence: tTrendAbs area and fraction >= T_TREND."""
+    ta_arr = _safe_series(df, "tTrendAbs").to_numpy(dtype=float)
+    return {
+        "tTrendAbs_area": float(np.nansum(ta_arr)) if ta_arr.size else 0.0,
+        "tTrendAbs_active_frac": _active_frac(ta_arr, T_TREND),
+    }
 
+
+@feature("in_trend", ("inTrendScore_area",), inputs=("inTrendScore",))
+def _in_trend_features(df: pd.DataFrame) -> dict:
+    """inTrendScore area."""
+    it_arr = _safe_series(df, "inTrendScore").to_numpy(dtype=float)
+    return {"inTrendScore_area": float(np.nansum(it_arr)) if it_arr.size else 0.0}
+
+
+@feature("regime", ("tRegimeAbs_active_frac",), inputs=("tRegimeAbs",))
+def _regime_features(df: pd.DataFrame) -> dict:
+    """Fraction of bars with tRegimeAbs >= T_REGIME."""
+    return {"tRegimeAbs_active_frac": _active_frac(_safe_series(df, "tRegimeAbs").to_numpy(dtype=float), T_REGIME)}
+
+
+@feature("sma", ("smaCrossScoreInd_active_frac",), inputs=("smaCrossScoreInd",))
+def _sma_features(df: pd.DataFrame) -> dict:
+    """Fraction of bars with smaCrossScoreInd >= T_SMA."""
+    return {"smaCrossScoreInd_active_frac": _active_frac(_safe_series(df, "smaCrossScoreInd").to_numpy(dtype=float), T_SMA)}
+
+
+@feature(
+    "rev_avwap",
+    ("rev_avwap_side_frac", "rev_avwap_cross_count", "rev_avwap_dist_abs_mean_pct"),
+    inputs=("close", "REV_avwap"),
+)
 def _avwap_features(df: pd.DataFrame) -> dict:
     """REV_avwap structure features."""
     close = _safe_series(df, "close")
@@ -298,6 +308,7 @@ def _avwap_features(df: pd.DataFrame) -> dict:
     }
 
 
+@feature("htf_vwap", ("htfVwap_side_frac", "htfVwap_cross_count"), inputs=("close", "htfVwap"))
 def _htf_vwap_features(df: pd.DataFrame) -> dict:
     """Optional HTF VWAP context features."""
     close = _safe_series(df, "close")
@@ -327,19 +338,12 @@ def _htf_vwap_features(df: pd.DataFrame) -> dict:
     }
 
 
-def compute_vector_features(df: pd.DataFrame, vkey: VectorKey) -> dict:
-    """Compute full feature dict for one vector (one raw segment)."""
+def compute_vector_features(df: pd.DataFrame, vkey: VectorKey, plan: FeaturePlan | None = None) -> dict:
+    """Compute the feature dict for one vector (one raw segment); plan: groups to compute (default all)."""
     base = _identity_features(df, vkey)
     if not base:
         return {}
-    features = {}
-    features.update(_geometry_features(df))
-    features.update(_volume_features(df))
-    features.update(_atr_features(df))
-    features.update(_trend_shock_regime_features(df))
-    features.update(_avwap_features(df))
-    features.update(_htf_vwap_features(df))
-    base.update(features)
+    base.update((plan or full_plan()).compute(df))
     return base
 
 
@@ -349,26 +353,41 @@ def compute_records_for_segment(
     tf: str,
     date: str,
     segment_id: str,
+    plan: FeaturePlan | None = None,
 ) -> List[dict]:
-    """One record per closing bar: record k = features on bars [0..k] (expanding window)."""
+    """One record per closing bar: record k = features on bars [0..k] (expanding window).
+
+    plan (vector_calc.features.resolve): only its groups are computed; default all.
+    """
     if df.empty:
         return []
+    plan = plan or full_plan()
     records = []
     for k in range(len(df)):
-        prefix = df.iloc[0 : k + 1]
-        base = _identity_prefix(prefix, k, ticker, tf, date, segment_id)
-        if not base:
-            continue
-        base.update(_geometry_features(prefix))
-        base.update(_volume_features(prefix))
-        base.update(_atr_features(prefix))
-        base.update(_trend_shock_regime_features(prefix))
-        base.update(_avwap_features(prefix))
-        base.update(_htf_vwap_features(prefix))
-        records.append(base)
+        base = compute_record_at(df, k, ticker, tf, date, segment_id, plan)
+        if base:
+            records.append(base)
     return records
 
 
+def compute_record_at(
+    df: pd.DataFrame,
+    k: int,
+    ticker: str,
+    tf: str,
+    date: str,
+    segment_id: str,
+    plan: FeaturePlan | None = None,
+) -> dict:
+    """Unscored record for closing bar k: features on bars [0..k]. Empty dict if there are no bars."""
+    prefix = df.iloc[0 : k + 1]
+    base = _identity_prefix(prefix, k, ticker, tf, date, segment_id)
+    if not base:
+        return {}
+    base.update((plan or full_plan()).compute(prefix))
+    return base
+
+
 def _percentile_rank(values: List[float], x: float) -> float:
     """Percentile rank of x in values (0-100). NaN in x -> 50; NaNs in values excluded."""
     if not values:
@@ -401,56 +420,51 @@ def _profit_score_from_delta(abs_d: float) -> float:
     return min(100.0, (abs_d - PROFIT_MIN_PCT) / (PROFIT_TARGET_PCT - PROFIT_MIN_PCT) * 100.0)
 
 
-def add_scoring_to_records(records: List[dict]) -> None:
-    """Add profit_score, entry_score, maintain_score, tradeability_score, tier (in-place).
+class IncrementalScorer:
+    """Scores records one at a time in closing-bar order (see add_scoring_to_records).
 
-    profit_score: absolute scale against $500 trade unit ($7 min, $25 target).
-    entry/maintain: expanding-window percentile (bar k ranked against [0..k]).
-    tier: from percentile of (tradeability_score * bars_factor):
-      - bars=1 -> factor 0.0 (non_tradable)
-      - bars=2 -> factor ~0.33
-      - bars=3 -> factor ~0.67
-      - bars>=4 -> factor 1.0 (full score)
-    Hard non_tradable guards: bars=1 OR |delta_pct| < 1.4%.
+    Every score of record k depends only on records [0..k], so a live segment can score each new record
+    as it arrives and get the same values as scoring the whole list afterwards.
     """
-    if not records:
-        return
-    slope_vals: List[float] = []
-    trend_frac_vals: List[float] = []
-    trend_area_vals: List[float] = []
-    cross_vals: List[float] = []
-    eff_vals: List[float] = []
-    shock_vals: List[float] = []
-    atr_vals: List[float] = []
-    tradeability_vals: List[float] = []
 
-    for r in records:
+    def __init__(self) -> None:
+        self.slope_vals: List[float] = []
+        self.trend_frac_vals: List[float] = []
+        self.trend_area_vals: List[float] = []
+        self.cross_vals: List[float] = []
+        self.eff_vals: List[float] = []
+        self.shock_vals: List[float] = []
+        self.atr_vals: List[float] = []
+        self.tradeability_vals: List[float] = []
+
+    def add(self, r: dict) -> None:
+        """Add scoring fields to r (in-place) and grow the pools with it."""
         # Profit score: absolute scale against $500 trade unit thresholds.
         d = r.get("delta_pct")
         abs_d = abs(float(d)) if d is not None and isinstance(d, (int, float)) and math.isfinite(d) else math.nan
         r["profit_score"] = _profit_score_from_delta(abs_d)
 
         # Grow pools to include bar k before ranking (self-inclusive, honest).
-        slope_vals.append(abs(r.get("slope_pctPerMin") or 0))
-        trend_frac_vals.append(r.get("tTrendAbs_active_frac"))
-        trend_area_vals.append(r.get("inTrendScore_area"))
-        cross_vals.append(r.get("rev_avwap_cross_count"))
-        eff_vals.append(r.get("efficiency"))
-        shock_vals.append(r.get("tShockScoreTot_density"))
-        atr_vals.append(r.get("atrRatio_q50"))
+        self.slope_vals.append(abs(r.get("slope_pctPerMin") or 0))
+        self.trend_frac_vals.append(r.get("tTrendAbs_active_frac"))
+        self.trend_area_vals.append(r.get("inTrendScore_area"))
+        self.cross_vals.append(r.get("rev_avwap_cross_count"))
+        self.eff_vals.append(r.get("efficiency"))
+        self.shock_vals.append(r.get("tShockScoreTot_density"))
+        self.atr_vals.append(r.get("atrRatio_q50"))
 
         # Entry score: rank within [0..k].
-        p_slope = _percentile_rank(slope_vals, abs(r.get("slope_pctPerMin") or 0))
-        p_trend_frac = _percentile_rank(trend_frac_vals, r.get("tTrendAbs_active_frac"))
-        p_trend_area = _percentile_rank(trend_area_vals, r.get("inTrendScore_area"))
-        p_cross_inv = 100.0 - _percentile_rank(cross_vals, r.get("rev_avwap_cross_count"))
+        p_slope = _percentile_rank(self.slope_vals, abs(r.get("slope_pctPerMin") or 0))
+        p_trend_frac = _percentile_rank(self.trend_frac_vals, r.get("tTrendAbs_active_frac"))
+        p_trend_area = _percentile_rank(self.trend_area_vals, r.get("inTrendScore_area"))
+        p_cross_inv = 100.0 - _percentile_rank(self.cross_vals, r.get("rev_avwap_cross_count"))
         r["entry_score"] = 0.35 * p_slope + 0.25 * p_trend_frac + 0.20 * p_trend_area + 0.20 * p_cross_inv
 
         # Maintain score: rank within [0..k].
-        p_eff = _percentile_rank(eff_vals, r.get("efficiency"))
-        p_shock_inv = 100.0 - _percentile_rank(shock_vals, r.get("tShockScoreTot_density"))
-        p_cross_inv2 = 100.0 - _percentile_rank(cross_vals, r.get("rev_avwap_cross_count"))
-        p_atr = _percentile_rank(atr_vals, r.get("atrRatio_q50"))
+        p_eff = _percentile_rank(self.eff_vals, r.get("efficiency"))
+        p_shock_inv = 100.0 - _percentile_rank(self.shock_vals, r.get("tShockScoreTot_density"))
+        p_cross_inv2 = 100.0 - _percentile_rank(self.cross_vals, r.get("rev_avwap_cross_count"))
+        p_atr = _percentile_rank(self.atr_vals, r.get("atrRatio_q50"))
         stability = 100.0 - 2 * abs(p_atr - 50)
         r["maintain_score"] = 0.35 * p_eff + 0.25 * p_shock_inv + 0.20 * p_cross_inv2 + 0.20 * stability
 
@@ -468,7 +482,7 @@ def add_scoring_to_records(records: List[dict]) -> None:
         bars = r.get("bars", 0)
         if bars <= 1 or (math.isfinite(abs_d) and abs_d < PROFIT_MIN_PCT):
             r["tier"] = "non_tradable"
-            continue
+            return
 
         # bars_factor: 1->0, 2->0.33, 3->0.67, 4+->1.0
         bars_factor = min(1.0, (bars - 1) / 3.0)
@@ -476,8 +490,8 @@ def add_scoring_to_records(records: List[dict]) -> None:
         ts = r.get("tradeability_score")
         if ts is not None and math.isfinite(ts):
             adjusted_ts = ts * bars_factor
-            tradeability_vals.append(adjusted_ts)
-            tier_pct = _percentile_rank(tradeability_vals, adjusted_ts)
+            self.tradeability_vals.append(adjusted_ts)
+            tier_pct = _percentile_rank(self.tradeability_vals, adjusted_ts)
             if tier_pct >= 85:
                 r["tier"] = "elite"
             elif tier_pct >= 70:
@@ -494,12 +508,39 @@ def add_scoring_to_records(records: List[dict]) -> None:
             r["tier"] = "non_tradable"
 
 
+register_feature(Feature(
+    "scoring",
+    ("profit_score", "entry_score", "maintain_score", "tradeability_score", "tier"),
+    inputs=(),
+    depends=("geometry", "atr", "shock", "trend", "in_trend", "rev_avwap"),
+    compute=None,
+    doc="Scores and tier, ranked within the segment's records [0..k] (IncrementalScorer).",
+))
+
+
+def add_scoring_to_records(records: List[dict]) -> None:
+    """Add profit_score, entry_score, maintain_score, tradeability_score, tier (in-place).
+
+    profit_score: absolute scale against $500 trade unit ($7 min, $25 target).
+    entry/maintain: expanding-window percentile (bar k ranked against [0..k]).
+    tier: from percentile of (tradeability_score * bars_factor):
+      - bars=1 -> factor 0.0 (non_tradable)
+      - bars=2 -> factor ~0.33
+      - bars=3 -> factor ~0.67
+      - bars>=4 -> factor 1.0 (full score)
+    Hard non_tradable guards: bars=1 OR |delta_pct| < 1.4%.
+    """
+    scorer = IncrementalScorer()
+    for r in records:
+        scorer.add(r)
+
+
 def parse_raw_filename(path: Path) -> Tuple[str, str, str, str, str]:
     """Parse raw vector filename -> (ticker, date, tf, start_hhmm, end_hhmm).
 
-    Only TICKER_YYMMDD_TF_START_END (5 parts), e.g. SPY_260222_5_0935_1022.
+    Only TICKER_YYMMDD_TF_START_END (5 parts), e.g. SPY_260222_5_0935_1022 (.jsonl, .jsonl.gz, ...).
     """
-    stem = path.stem
+    stem = data_stem(path)
     parts = stem.split("_")
     if len(parts) != 5:
         raise ValueError(f"Raw vector filename must have 5 parts (ticker_date_tf_start_end): {path.name}")
@@ -0,0 +1,211 @@
+"""Cross-timeframe context: the higher-tf segment containing each bar, and what it looked like by then.
+
+Segments of one (ticker, date) exist at several tfs (_5_, _15_, ...). SegmentIndex holds them per tf as
+spans sorted by start, built once from the raw files: the stem (start/end HHMM) plus the first and last
+bar times and the first bar's revDir. Segments of a tf share their boundary bar (the edge bar ends one
+segment and starts the next); a time belongs to the segment that starts at or before it and has not ended,
+the later one at a boundary, so containing(tf, t) is one bisect, O(log n).
+
+add_cross_tf_fields (vector_calc --cross-tf) is a pass over the staged classified files, like next_*:
+for record k of a segment at tf c, the parent is the segment of the next larger tf present that contains
+bar k's time t (start_time + duration_min), and the record gets
+  parent_tf, parent_segment_id, parent_dir  (revDir of the parent's first bar),
+  parent_elapsed_frac  ((t - parent start) / (parent end - parent start), 0..1),
+  parent_tier, parent_delta_pct  (the parent's record for its last bar closed by the time bar k closes;
+                                  null while the parent's first bar is still open).
+parent_tier / parent_delta_pct use no bar after bar k. parent_elapsed_frac uses the parent's final end
+bar, known only once the parent has closed (fine for research, not a live signal). Segments of the
+largest tf, or outside every parent, get nulls.
+"""
+from __future__ import annotations
+
+import json
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from common.compressed import data_file, data_files, data_stem, open_text, read_text
+from common.timeparse import parse_time
+
+from .calc import parse_raw_filename
+
+CROSS_TF_FIELDS = ("parent_tf", "parent_segment_id", "parent_dir", "parent_elapsed_frac", "parent_tier", "parent_delta_pct")
+DAY_MINUTES = 24 * 60
+
+
+def tf_minutes(tf: str) -> int | None:
+    """Bar length of a tf in minutes ("5" -> 5, "D" -> 1440); None if it is not a known tf."""
+    if tf.upper() == "D":
+        return DAY_MINUTES
+    return int(tf) if tf.isdigit() and int(tf) > 0 else None
+
+
+@dataclass(frozen=True)
+class Span:
+    stem: str
+    tf: str
+    start: datetime  # first bar time
+    end: datetime  # last bar time
+    direction: int  # revDir of the first bar (0 if unknown)
+
+
+def span_from_raw(path: Path) -> Span | None:
+    """Span of a raw segment file (any codec); None if the name or its bar times do not parse."""
+    try:
+        _ticker, date, tf, start_hhmm, end_hhmm = parse_raw_filename(path)
+    except ValueError:
+        return None
+    if tf_minutes(tf) is None:
+        return None
+    lines = read_text(path).strip().splitlines()
+    try:
+        first, last = json.loads(lines[0]), json.loads(lines[-1])
+    except (IndexError, json.JSONDecodeError):
+        first = last = {}
+    start, end = parse_time(first.get("time")), parse_time(last.get("time"))
+    if start is None or end is None:  # fall back to the stem's HHMM
+        try:
+            start = datetime.strptime(date + start_hhmm, "%y%m%d%H%M")
+            end = datetime.strptime(date + end_hhmm, "%y%m%d%H%M")
+        except ValueError:
+            return None
+    try:
+        direction = int(first.get("revDir") or 0)
+    except (TypeError, ValueError):
+        direction = 0
+    return Span(data_stem(path), tf, start, max(start, end), direction)
+
+
+class SegmentIndex:
+    """Spans of one (ticker, date), per tf sorted by start; point queries by bisect."""
+
+    def __init__(self, spans):
+        by_tf: dict[str, list[Span]] = {}
+        for s in spans:
+            by_tf.setdefault(s.tf, []).append(s)
+        self._spans = {tf: sorted(ss, key=lambda s: (s.start, s.end)) for tf, ss in by_tf.items()}
+        self._starts = {tf: [s.start for s in ss] for tf, ss in self._spans.items()}
+        self.tfs = sorted(self._spans, key=tf_minutes)
+
+    def __len__(self) -> int:
+        return sum(len(ss) for ss in self._spans.values())
+
+    def containing(self, tf: str, t: datetime) -> Span | None:
+        """The tf segment containing t (at a shared boundary bar: the segment starting there)."""
+        starts = self._starts.get(tf)
+        if not starts:
+            return None
+        i = bisect_right(starts, t) - 1
+        if i < 0:
+            return None
+        span = self._spans[tf][i]
+        return span if t <= span.end else None
+
+    def parent_tf(self, tf: str) -> str | None:
+        """Next larger tf with segments in the index."""
+        m = tf_minutes(tf)
+        return next((x for x in self.tfs if m is not None and tf_minutes(x) > m), None)
+
+    def parent(self, tf: str, t: datetime) -> Span | None:
+        ptf = self.parent_tf(tf)
+        return self.containing(ptf, t) if ptf else None
+
+
+def build_indexes(raw_paths) -> dict[tuple[str, str], SegmentIndex]:
+    """SegmentIndex per (ticker, date) over the given raw files."""
+    spans: dict[tuple[str, str], list[Span]] = {}
+    for p in raw_paths:
+        span = span_from_raw(p)
+        if span is not None:
+            ticker, date = span.stem.split("_")[:2]
+            spans.setdefault((ticker, date), []).append(span)
+    return {key: SegmentIndex(ss) for key, ss in spans.items()}
+
+
+def _record_time(rec: dict) -> datetime | None:
+    t = parse_time(rec.get("start_time"))
+    if t is None:
+        return None
+    try:
+        return t + timedelta(minutes=float(rec.get("duration_min") or 0.0))
+    except (TypeError, ValueError):
+        return None
+
+
+class _ParentRecords:
+    """Close times, tiers and delta_pct of a parent's classified records (loaded once per parent)."""
+
+    def __init__(self, path: Path | None, tf_min: int):
+        self.closes: list[datetime] = []
+        self.values: list[tuple] = []
+        if path is None:
+            return
+        for line in read_text(path).splitlines():
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            t = _record_time(rec)
+            if t is not None:
+                self.closes.append(t + timedelta(minutes=tf_min))
+                self.values.append((rec.get("tier"), rec.get("delta_pct")))
+
+    def at(self, t_close: datetime) -> tuple:
+        """(tier, delta_pct) of the last record closed by t_close, or (None, None)."""
+        j = bisect_right(self.closes, t_close) - 1
+        return self.values[j] if j >= 0 else (None, None)
+
+
+def parent_fields(rec: dict, tf: str, index: SegmentIndex, parents: dict[str, _ParentRecords], classified_dir: Path) -> dict:
+    """The CROSS_TF_FIELDS of one record."""
+    out = dict.fromkeys(CROSS_TF_FIELDS)
+    t = _record_time(rec)
+    parent = index.parent(tf, t) if t is not None else None
+    if parent is None:
+        return out
+    span_min = (parent.end - parent.start).total_seconds() / 60
+    elapsed = (t - parent.start).total_seconds() / 60
+    if parent.stem not in parents:
+        parents[parent.stem] = _ParentRecords(data_file(classified_dir, f"{parent.stem}.jsonl"), tf_minutes(parent.tf))
+    tier, delta = parents[parent.stem].at(t + timedelta(minutes=tf_minutes(tf)))
+    out.update(
+        parent_tf=parent.tf,
+        parent_segment_id=parent.stem,
+        parent_dir=parent.direction,
+        parent_elapsed_frac=round(min(1.0, max(0.0, elapsed / span_min)), 3) if span_min > 0 else 1.0,
+        parent_tier=tier,
+        parent_delta_pct=delta,
+    )
+    return out
+
+
+def add_cross_tf_fields(classified_dir: Path, raw_dir: Path, paths=None) -> int:
+    """Add CROSS_TF_FIELDS to every record of the classified files (default: all in classified_dir).
+
+    The segment index of each (ticker, date) is built from its files in raw_dir, so paths should cover whole
+    (ticker, date) groups. Files are rewritten in the codec they are stored with. Returns files rewritten.
+    """
+    paths = data_files(classified_dir, "*.jsonl") if paths is None else list(paths)
+    groups: dict[tuple[str, str], list[Path]] = {}
+    for p in paths:
+        try:
+            ticker, date, _tf, _s, _e = parse_raw_filename(p)
+        except ValueError:
+            continue
+        groups.setdefault((ticker, date), []).append(p)
+    n = 0
+    for (ticker, date), files in sorted(groups.items()):
+        index = build_indexes(data_files(raw_dir, f"{ticker}_{date}_*.jsonl")).get((ticker, date), SegmentIndex([]))
+        parents: dict[str, _ParentRecords] = {}
+        # A parent read after its own rewrite still has the same tier / delta_pct, so file order does not matter.
+        for path in sorted(files):
+            tf = parse_raw_filename(path)[2]
+            out_lines = []
+            for line in read_text(path).strip().splitlines():
+                rec = json.loads(line)
+                rec.update(parent_fields(rec, tf, index, parents, classified_dir))
+                out_lines.append(json.dumps(rec, ensure_ascii=False))
+            with open_text(path, "w") as f:
+                f.write("\n".join(out_lines) + "\n")
+            n += 1
+    return n
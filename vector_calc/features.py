@@ -0,0 +1,161 @@
+"""Feature registry: which record fields vector_calc computes, from which bar columns, with what dependencies.
+
+Each feature group of a record (geometry, volume, atr, ...) is registered with the @feature decorator in
+vector_calc.calc: its name, the record fields it outputs, the bar columns it reads, the groups it depends on
+and the function computing it on a bar window (the expanding prefix [0..k]). Identity fields
+(closing_bar_index, segment_id, ticker, tf, date, start_time, duration_min, bars) are always written.
+"scoring" has no window function: IncrementalScorer adds its fields across a segment's records, from
+the fields of the groups it depends on.
+
+resolve("delta_pct,embed") -> FeaturePlan with the dependency closure of the requested fields / groups /
+presets; compute_records_for_segment(..., plan=plan) then runs only those groups, in registry order (so
+field order in a record is the same as in a full run). `python -m vector_calc --list-features` prints the
+catalog.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+
+import pandas as pd
+
+IDENTITY_FIELDS = ("closing_bar_index", "segment_id", "ticker", "tf", "date", "start_time", "duration_min", "bars")
+
+# The 10 embedding fields of chroma_ingest (EMBED_FIELDS there); "embed" selects them plus identity.
+PRESETS = {
+    "embed": (
+        "delta_pct",
+        "slope_pctPerMin",
+        "efficiency",
+        "rev_avwap_side_frac",
+        "rev_avwap_cross_count",
+        "rev_avwap_dist_abs_mean_pct",
+        "tShockScoreTot_density",
+        "tTrendAbs_area",
+        "inTrendScore_area",
+        "atrRatio_q50",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Feature:
+    name: str
+    outputs: tuple[str, ...]
+    inputs: tuple[str, ...]
+    depends: tuple[str, ...]
+    compute: Callable[[pd.DataFrame], dict] | None
+    doc: str = ""
+
+
+REGISTRY: dict[str, Feature] = {}
+
+
+def feature(name: str, outputs, inputs=(), depends=()):
+    """Register a window feature group: compute(df) -> {output: value} for the bars in df."""
+
+    def register(fn: Callable[[pd.DataFrame], dict]) -> Callable[[pd.DataFrame], dict]:
+        doc = (fn.__doc__ or "").strip().splitlines()
+        REGISTRY[name] = Feature(name, tuple(outputs), tuple(inputs), tuple(depends), fn, doc[0] if doc else "")
+        return fn
+
+    return register
+
+
+def register_feature(f: Feature) -> None:
+    """Register a group without a window function (e.g. scoring)."""
+    REGISTRY[f.name] = f
+
+
+def registry() -> dict[str, Feature]:
+    """All groups, in compute (= record field) order."""
+    from . import calc  # noqa: F401  (the groups register on import)
+
+    return REGISTRY
+
+
+@dataclass(frozen=True)
+class FeaturePlan:
+    """Groups to compute: window groups in registry order, and whether records are scored."""
+
+    groups: tuple[Feature, ...]
+    scoring: bool
+
+    @property
+    def outputs(self) -> tuple[str, ...]:
+        fields = [f for g in self.groups for f in g.outputs]
+        if self.scoring:
+            fields.extend(registry()["scoring"].outputs)
+        return IDENTITY_FIELDS + tuple(fields)
+
+    @property
+    def is_full(self) -> bool:
+        """True if every group is computed (records are complete, as the shared catalog / maps / summaries expect)."""
+        return self == full_plan()
+
+    def compute(self, df: pd.DataFrame) -> dict:
+        out: dict = {}
+        for g in self.groups:
+            out.update(g.compute(df))
+        return out
+
+
+def resolve(spec: str | None = None) -> FeaturePlan:
+    """Plan for a comma-separated list of output fields, group names and presets ("all" or None: everything).
+
+    Raises ValueError naming unknown entries.
+    """
+    reg = registry()
+    names = [s.strip() for s in (spec or "all").split(",") if s.strip()]
+    if not names or "all" in names:
+        wanted = set(reg)
+    else:
+        by_output = {o: g.name for g in reg.values() for o in g.outputs}
+        wanted = set()
+        unknown = []
+        for n in names:
+            for item in PRESETS.get(n, (n,)):
+                if item in reg:
+                    wanted.add(item)
+                elif item in by_output:
+                    wanted.add(by_output[item])
+                elif item not in IDENTITY_FIELDS:
+                    unknown.append(item)
+        if unknown:
+            raise ValueError(f"unknown features: {', '.join(unknown)} (see --list-features)")
+    todo = list(wanted)
+    while todo:
+        for dep in reg[todo.pop()].depends:
+            if dep not in wanted:
+                wanted.add(dep)
+                todo.append(dep)
+    return FeaturePlan(
+        tuple(g for g in reg.values() if g.name in wanted and g.compute is not None),
+        "scoring" in wanted,
+    )
+
+
+@lru_cache(maxsize=None)
+def full_plan() -> FeaturePlan:
+    """Every group (the default of compute_records_for_segment)."""
+    return resolve()
+
+
+def format_catalog() -> str:
+    """The --list-features text: one block per group (outputs, bar inputs, dependencies)."""
+    lines = [f"identity (always): {', '.join(IDENTITY_FIELDS)}"]
+    for g in registry().values():
+        lines.append(f"{g.name}: {', '.join(g.outputs)}")
+        if g.doc:
+            lines.append(f"    {g.doc}")
+        if g.inputs:
+            lines.append(f"    inputs: {', '.join(g.inputs)}")
+        if g.depends:
+            lines.append(f"    depends: {', '.join(g.depends)}")
+    for name, items in PRESETS.items():
+        lines.append(f"preset {name}: {', '.join(items)}")
+    from .cross_tf import CROSS_TF_FIELDS
+
+    lines.append(f"cross_tf (--cross-tf, pass over a (ticker, date)'s files): {', '.join(CROSS_TF_FIELDS)}")
+    return "\n".join(lines)
@@ -0,0 +1,186 @@
+"""Fused split -> classify: segments from the splitter go to the classifier in memory.
+
+python -m vector_calc.fused does what `daily_alerts_splitter --full` followed by `vector_calc` does, without
+the raw_vectors round trip on the classify side: each segment of segments_from_edges becomes a DataFrame
+straight from its bar dicts (segment_frame, which load_segment also uses for the parsed raw lines) instead of
+being written to raw_vectors and read back.
+The classified output (and next_*, .idx sidecars, catalog rows, plot summaries) is byte-identical to the
+two-step run. The saving is the raw re-read and parse only; feature computation dominates the run time.
+
+raw_vectors is still written for archival, the UI and virtual_trades: by a background thread (--raw async,
+the default), inline (--raw sync), or not at all (--raw skip: raw_vectors is left untouched and no plot
+summaries are written, since they read the avwap series from the raw files). Both outputs are staged and
+only files whose bytes changed are replaced (common.atomic_output). --codec stores both outputs compressed
+(common.compressed); alerts files of any codec are read.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from artifact_catalog import code_version, register_outputs
+from common.atomic_output import StagedOutput
+from common.compressed import CODEC_NAMES, codec_available, data_files, data_stem, with_codec
+from daily_alerts_splitter.incremental import CHECKPOINT_DIRNAME
+from daily_alerts_splitter.splitter import segment_name, split_segments, write_segment
+
+from .__main__ import _in_date, classified_summary, classify_segment, commit_classified, refresh_plot_summaries
+from .calc import segment_frame
+from .features import FeaturePlan, resolve
+from .plot_summary import PLOT_SUMMARY_DIRNAME
+from .zone_maps import ZONE_MAP_DIRNAME, refresh_zone_maps
+
+RAW_MODES = ("async", "sync", "skip")
+
+
+def split_classify_file(
+    alerts_path: Path,
+    classified_dir: Path,
+    raw_dir: Path | None = None,
+    raw_writer: ThreadPoolExecutor | None = None,
+    codec: str = "none",
+    plan: FeaturePlan | None = None,
+) -> tuple[list[Path], list[Future | Path]]:
+    """Split one alerts file and classify each segment in memory.
+
+    raw_dir: also write the raw segment files there (through raw_writer when given, else inline).
+    codec: storage codec of both outputs; plan: feature groups to compute (default all).
+    Returns (classified files written, raw paths or futures of them).
+    """
+    unit = data_stem(alerts_path)
+    if raw_dir is not None:
+        raw_dir.mkdir(parents=True, exist_ok=True)
+    classified = []
+    raw: list[Future | Path] = []
+    for seg in split_segments(alerts_path):
+        if raw_dir is not None:
+            if raw_writer is not None:
+                raw.append(raw_writer.submit(write_segment, seg, raw_dir, unit, None, codec))
+            else:
+                raw.append(write_segment(seg, raw_dir, unit, codec=codec))
+        stem = segment_name(unit, seg)[: -len(".jsonl")]
+        if classify_segment(segment_frame(seg), stem, classified_dir, codec, plan):
+            classified.append(classified_dir / with_codec(f"{stem}.jsonl", codec))
+    return classified, raw
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Split alerts and classify the segments in one pass (no raw_vectors re-read).")
+    p.add_argument("--alerts-dir", default=os.environ.get("ALERTS_DIR", ""), help="Path to alerts folder (or set ALERTS_DIR).")
+    p.add_argument(
+        "--classified-dir",
+        default="",
+        help="Optional explicit output dir (default: 'classified' next to the alerts folder).",
+    )
+    p.add_argument(
+        "--date",
+        default="",
+        help="Process only this YYMMDD: only that date's raw_vectors and classified files are replaced or removed.",
+    )
+    p.add_argument(
+        "--raw",
+        default="async",
+        choices=RAW_MODES,
+        help="raw_vectors for archival: background thread (default), inline, or not written.",
+    )
+    p.add_argument(
+        "--codec",
+        default="none",
+        choices=CODEC_NAMES,
+        help="Storage codec of the raw_vectors and classified files written (.jsonl, .jsonl.gz, .jsonl.zst).",
+    )
+    p.add_argument(
+        "--features",
+        default="all",
+        help="Output fields, groups or presets to compute (see python -m vector_calc --list-features); a subset needs a"
+        " --classified-dir other than the default. Default: all.",
+    )
+    args = p.parse_args()
+    if not codec_available(args.codec):
+        p.error(f"--codec {args.codec}: codec not available (zstd needs the zstandard package)")
+    try:
+        plan = resolve(args.features)
+    except ValueError as e:
+        p.error(f"--features: {e}")
+    if not args.alerts_dir:
+        p.error("Set --alerts-dir or ALERTS_DIR")
+    alerts_dir = Path(args.alerts_dir)
+    if not alerts_dir.is_dir():
+        p.error(f"alerts dir not found: {alerts_dir}")
+    t0 = time.perf_counter()
+    raw_dir = alerts_dir.parent / "raw_vectors"
+    default_classified = alerts_dir.parent / "classified"
+    classified_dir = Path(args.classified_dir) if args.classified_dir else default_classified
+    if not plan.is_full and classified_dir.resolve() == default_classified.resolve():
+        p.error("--features subset writes partial records: give a --classified-dir other than the default classified dir")
+    plot_dir = classified_dir.parent / PLOT_SUMMARY_DIRNAME
+    date_filter = args.date.strip() or None
+    write_raw = args.raw != "skip"
+
+    # Both outputs are staged and only changed files replaced, as in `daily_alerts_splitter --full` and vector_calc.
+    ck_dir = alerts_dir.parent / CHECKPOINT_DIRNAME
+    if write_raw and ck_dir.is_dir():
+        for f in ck_dir.iterdir():
+            if f.is_file() and _in_date(f.stem, date_filter):
+                f.unlink()
+    alert_files = data_files(alerts_dir, "*.json")
+    if date_filter:
+        alert_files = [a for a in alert_files if f"_{date_filter}" in data_stem(a) or data_stem(a).endswith(f"_{date_filter}")]
+    staged: list[Path] = []
+    raw_written: list[Path] = []
+    raw_out = StagedOutput(raw_dir) if write_raw else None
+    try:
+        with StagedOutput(classified_dir) as out:
+            writer = ThreadPoolExecutor(max_workers=1) if args.raw == "async" else None
+            try:
+                for path in alert_files:
+                    classified, raw = split_classify_file(
+                        path, out.staging, raw_out.staging if raw_out is not None else None, writer, args.codec, plan
+                    )
+                    staged.extend(classified)
+                    raw_written.extend(raw)
+                    if classified:
+                        print(f"{path.name} -> {len(classified)} classified files")
+            finally:
+                if writer is not None:
+                    writer.shutdown(wait=True)
+            raw_written = [r.result() if isinstance(r, Future) else r for r in raw_written]
+            stats = commit_classified(out, staged, date_filter)
+        raw_note = "not written"
+        if raw_out is not None:
+            raw_stats = raw_out.commit(lambda name: _in_date(data_stem(name), date_filter))
+            raw_note = raw_stats.summary()
+    finally:
+        if raw_out is not None:
+            raw_out.discard()
+    written = [classified_dir / p.name for p in staged]
+    raw_written = [raw_dir / p.name for p in raw_written]
+
+    if write_raw:
+        register_outputs(
+            "raw",
+            raw_dir,
+            raw_written,
+            stage="daily_alerts_splitter",
+            version=code_version("daily_alerts_splitter"),
+            full=not date_filter,
+            date=date_filter,
+        )
+    n_plots = n_zones = 0
+    if plan.is_full:  # a --features subset leaves the catalog, zone maps and plot summaries to full runs
+        register_outputs(
+            "classified", classified_dir, written, stage="vector_calc", version=code_version("vector_calc"), full=not date_filter
+        )
+        n_zones = refresh_zone_maps(classified_dir, classified_dir.parent / ZONE_MAP_DIRNAME, stats, full=not date_filter)
+        n_plots = refresh_plot_summaries(classified_dir, raw_dir, plot_dir, stats, full=not date_filter) if write_raw else 0
+    print(
+        f"Wrote {len(written)} classified files into {classified_dir} ({classified_summary(stats)}), raw {args.raw}"
+        f" ({raw_note}), {n_plots} plot summaries, {n_zones} zone maps in {time.perf_counter() - t0:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
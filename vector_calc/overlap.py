@@ -0,0 +1,193 @@
+"""Overlapped read / compute / write for a single-process vector_calc run.
+
+overlapped(items, read, compute, write) runs read(item) on a reader thread, compute(item, data) on the
+calling thread and write(job) on a writer thread, connected by bounded queues of `depth` entries: the reader
+decodes up to `depth` files ahead while a file is computed, and computed outputs are flushed while the next
+one is computed. A full queue blocks its producer (backpressure), so memory stays bounded whatever the
+speed of the NAS. Results are yielded in input order. An exception in any stage stops the run and is
+re-raised in the caller.
+
+depth=0 runs the three steps inline, one item at a time (the old serial behaviour), with the same metrics.
+
+PipelineMetrics records per stage: items, busy time, time starved (waiting on an empty input queue) and
+time blocked (waiting on a full output queue), plus the mean / max depth of the queue each stage feeds,
+sampled at every put. A reader that is always blocked means compute is the bottleneck; a compute stage
+that is often starved means I/O is.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator
+
+DEFAULT_DEPTH = 4
+_POLL_SEC = 0.1
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    items: int = 0
+    busy_s: float = 0.0
+    starved_s: float = 0.0
+    blocked_s: float = 0.0
+    depth_sum: int = 0
+    depth_samples: int = 0
+    depth_max: int = 0
+
+    def sample_depth(self, depth: int) -> None:
+        self.depth_sum += depth
+        self.depth_samples += 1
+        self.depth_max = max(self.depth_max, depth)
+
+    def summary(self, capacity: int) -> str:
+        text = f"{self.name} {self.items} busy {self.busy_s:.2f}s starved {self.starved_s:.2f}s blocked {self.blocked_s:.2f}s"
+        if self.depth_samples and capacity:
+            text += f" queue {self.depth_sum / self.depth_samples:.1f}/{capacity} (max {self.depth_max})"
+        return text
+
+
+@dataclass
+class PipelineMetrics:
+    depth: int = DEFAULT_DEPTH
+    wall_s: float = 0.0
+    read: StageMetrics = field(default_factory=lambda: StageMetrics("read"))
+    compute: StageMetrics = field(default_factory=lambda: StageMetrics("compute"))
+    write: StageMetrics = field(default_factory=lambda: StageMetrics("write"))
+
+    def summary(self) -> str:
+        mode = f"overlapped, depth {self.depth}" if self.depth else "serial"
+        stages = "; ".join(s.summary(self.depth if s.name != "write" else 0) for s in (self.read, self.compute, self.write))
+        return f"{mode} in {self.wall_s:.2f}s: {stages}"
+
+
+def _put(q: queue.Queue, item, stage: StageMetrics, stop: threading.Event) -> bool:
+    """Put with backpressure accounting; False if the run was stopped while waiting."""
+    t0 = time.perf_counter()
+    while True:
+        if stop.is_set():
+            return False
+        try:
+            q.put(item, timeout=_POLL_SEC)
+            break
+        except queue.Full:
+            continue
+    stage.blocked_s += time.perf_counter() - t0
+    stage.sample_depth(q.qsize())
+    return True
+
+
+def _get(q: queue.Queue, stage: StageMetrics):
+    t0 = time.perf_counter()
+    item = q.get()
+    stage.starved_s += time.perf_counter() - t0
+    return item
+
+
+def overlapped(
+    items: Iterable,
+    read: Callable[[Any], Any],
+    compute: Callable[[Any, Any], tuple[Any, Any]],
+    write: Callable[[Any], None],
+    depth: int = DEFAULT_DEPTH,
+    metrics: PipelineMetrics | None = None,
+) -> Iterator[Any]:
+    """Yield result for each item in order, where compute(item, read(item)) -> (result, job); write(job) is
+    called for every job that is not None (in order, on the writer thread)."""
+    m = metrics if metrics is not None else PipelineMetrics()
+    m.depth = max(0, depth)
+    t_start = time.perf_counter()
+    if m.depth == 0:
+        try:
+            for item in items:
+                t0 = time.perf_counter()
+                data = read(item)
+                t1 = time.perf_counter()
+                result, job = compute(item, data)
+                t2 = time.perf_counter()
+                if job is not None:
+                    write(job)
+                    m.write.items += 1
+                m.read.busy_s += t1 - t0
+                m.compute.busy_s += t2 - t1
+                m.write.busy_s += time.perf_counter() - t2
+                m.read.items += 1
+                m.compute.items += 1
+                yield result
+        finally:
+            m.wall_s = time.perf_counter() - t_start
+        return
+
+    stop = threading.Event()
+    decoded: queue.Queue = queue.Queue(maxsize=m.depth)
+    outputs: queue.Queue = queue.Queue(maxsize=m.depth)
+    write_error: list[BaseException] = []
+
+    def reader() -> None:
+        try:
+            for item in items:
+                t0 = time.perf_counter()
+                data = read(item)
+                m.read.busy_s += time.perf_counter() - t0
+                m.read.items += 1
+                if not _put(decoded, (item, data), m.read, stop):
+                    return
+            _put(decoded, _DONE, m.read, stop)
+        except BaseException as e:  # re-raised by the consumer
+            _put(decoded, _Failed(e), m.read, stop)
+
+    def writer() -> None:
+        while True:
+            job = _get(outputs, m.write)
+            if job is _DONE:
+                return
+            if write_error:
+                continue  # drain so the producer never blocks on a dead writer
+            try:
+                t0 = time.perf_counter()
+                write(job)
+                m.write.busy_s += time.perf_counter() - t0
+                m.write.items += 1
+            except BaseException as e:
+                write_error.append(e)
+
+    threads = [threading.Thread(target=reader, name="vector_calc-read", daemon=True),
+               threading.Thread(target=writer, name="vector_calc-write", daemon=True)]
+    for t in threads:
+        t.start()
+    finished = False
+    try:
+        while True:
+            got = _get(decoded, m.compute)
+            if got is _DONE:
+                break
+            if isinstance(got, _Failed):
+                raise got.error
+            if write_error:
+                raise write_error[0]
+            item, data = got
+            t0 = time.perf_counter()
+            result, job = compute(item, data)
+            m.compute.busy_s += time.perf_counter() - t0
+            m.compute.items += 1
+            if job is not None:
+                _put(outputs, job, m.compute, stop)
+            yield result
+        finished = True
+    finally:
+        stop.set()
+        # The writer always gets its sentinel (it drains everything before it), so every job put is written.
+        outputs.put(_DONE)
+        threads[1].join()
+        threads[0].join()
+        m.wall_s = time.perf_counter() - t_start
+    if finished and write_error:
+        raise write_error[0]
@@ -0,0 +1,175 @@
+"""Per-(ticker, date, tf) plot summaries for the UI: segment spans from each segment's last record (read
+through the .idx sidecar) plus the avwap series from the raw bars, so /api/plot/vectors is one small
+file read instead of a scan of classified/ and raw_vectors/.
+
+Written to plot_summaries/{ticker}_{date}_{tf}.json (sibling of classified/). Same rules as the server's
+scan (ui/server.js getPlotVectors): only 5-part segment stems whose raw file has as many bars as the
+classified file has records. Series points that a line plot cannot distinguish (interior points of runs
+of equal values) are dropped. Classified and raw files may be stored compressed (common.compressed).
+
+"sources" lists the files plotted, "files" every classified file of the group when the summary was written
+(skipped ones included): the server compares it with the directory, so a file added or removed later by
+any writer makes the summary stale.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+from pathlib import Path
+
+from common.compressed import data_file, data_files, data_stem, read_text
+
+from .record_index import RecordIndex
+
+PLOT_SUMMARY_DIRNAME = "plot_summaries"
+PLOT_SUMMARY_VERSION = 2
+
+START_TIME_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})[\sT](\d{1,2}):(\d{2}):(\d{2})")
+
+
+def _start_min(s) -> int | None:
+    """Minutes from midnight of a 'YYYY-MM-DD HH:MM:SS ...' string (first 19 chars), like the server's parseStartTimeToMin."""
+    if not isinstance(s, str):
+        return None
+    m = START_TIME_RE.match(s.strip()[:19])
+    return int(m.group(4)) * 60 + int(m.group(5)) if m else None
+
+
+def _hm(minutes: float) -> str:
+    mins = minutes % 60
+    mm = f"{int(mins):02d}" if mins == int(mins) else f"{mins:g}"
+    return f"{int(minutes // 60):02d}:{mm}"
+
+
+def _finite(v) -> float | None:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return f if math.isfinite(f) else None
+
+
+def downsample_series(points: list[dict]) -> list[dict]:
+    """Drop interior points of runs of equal value (the polyline through the kept points is unchanged)."""
+    n = len(points)
+    return [
+        pt
+        for i, pt in enumerate(points)
+        if i == 0 or i == n - 1 or pt["value"] != points[i - 1]["value"] or pt["value"] != points[i + 1]["value"]
+    ]
+
+
+def _read_jsonl(path: Path) -> list[dict]:
+    out = []
+    for line in read_text(path).splitlines():
+        if line.strip():
+            try:
+                out.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return out
+
+
+def build_plot_summary(ticker: str, date: str, tf: str, classified_paths: list[Path], raw_dir: Path) -> dict:
+    """Summary dict for one (ticker, date, tf) from its classified segment files and their raw files."""
+    segments = []
+    sources = []
+    rev_series = []
+    htf_series = []
+    last_rev = None
+    for cp in sorted(classified_paths):
+        stem = data_stem(cp)
+        rp = data_file(raw_dir, f"{stem}.jsonl")
+        if rp is None:
+            continue
+        with RecordIndex(cp) as ix:
+            n_records = len(ix)
+            last = ix.last()
+        bars = _read_jsonl(rp)
+        if not n_records or len(bars) != n_records:
+            continue
+        start_min = _start_min(last.get("start_time"))
+        duration = last.get("duration_min")
+        p0, p1 = _finite(last.get("p0_close")), _finite(last.get("p1_close"))
+        if start_min is None or not isinstance(duration, (int, float)) or not math.isfinite(duration) or p0 is None or p1 is None:
+            continue
+        end_min = start_min + duration
+        segments.append({
+            "segment_id": last.get("segment_id") or stem,
+            "start_min": start_min,
+            "end_min": end_min,
+            "start_hm": _hm(start_min),
+            "end_hm": _hm(end_min),
+            "close_first": p0,
+            "close_last": p1,
+            "tier": last.get("tier") if last.get("tier") is not None else "",
+        })
+        sources.append(cp.name)
+        for b in bars:
+            minute = _start_min(b.get("time") or b.get("Time"))
+            if minute is None:
+                continue
+            htf = _finite(b.get("htfVwap"))
+            if htf is not None:
+                htf_series.append({"min": minute, "value": htf})
+            rev = _finite(b.get("REV_avwap"))
+            if rev is not None:
+                last_rev = rev
+            elif last_rev is not None:
+                rev = last_rev
+            if rev is not None:
+                rev_series.append({"min": minute, "value": rev})
+    segments.sort(key=lambda s: s["start_min"])
+    htf_series.sort(key=lambda p: p["min"])
+    rev_series.sort(key=lambda p: p["min"])
+    return {
+        "version": PLOT_SUMMARY_VERSION,
+        "asset": ticker,
+        "date": date,
+        "tf": tf,
+        "sources": sources,
+        "files": sorted(cp.name for cp in classified_paths),
+        "segments": segments,
+        "rev_avwap_series": downsample_series(rev_series),
+        "htf_vwap_series": downsample_series(htf_series),
+    }
+
+
+def summary_is_current_version(path: Path) -> bool:
+    """True if path is a readable plot summary of PLOT_SUMMARY_VERSION (older ones are ignored by the server)."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("version") == PLOT_SUMMARY_VERSION
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def write_plot_summaries(
+    classified_dir: Path,
+    raw_dir: Path,
+    out_dir: Path | None = None,
+    groups: set[tuple[str, str, str]] | None = None,
+) -> int:
+    """Write one summary per (ticker, date, tf) found in classified_dir (or only those in groups). Returns files written.
+
+    Call after the next_* pass so every summary is newer than the classified files it lists.
+    """
+    out_dir = out_dir or classified_dir.parent / PLOT_SUMMARY_DIRNAME
+    by_group: dict[tuple[str, str, str], list[Path]] = {}
+    for p in data_files(classified_dir, "*.jsonl"):
+        parts = data_stem(p).split("_")
+        if len(parts) != 5:
+            continue
+        key = (parts[0], parts[1], parts[2])
+        if groups is None or key in groups:
+            by_group.setdefault(key, []).append(p)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for (ticker, date, tf), paths in by_group.items():
+        summary = build_plot_summary(ticker, date, tf, paths, raw_dir)
+        tmp = out_dir / f"{ticker}_{date}_{tf}.json.tmp"
+        tmp.write_text(json.dumps(summary, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(out_dir / f"{ticker}_{date}_{tf}.json")
+    if groups is not None:
+        for ticker, date, tf in groups - set(by_group):
+            (out_dir / f"{ticker}_{date}_{tf}.json").unlink(missing_ok=True)
+    return len(by_group)
@@ -0,0 +1,213 @@
+"""CLI: query classified records with predicates, pruning files by name and zone maps before reading them.
+
+Usage:
+  python -m vector_calc.query --classified-dir DIR [--ticker TQQQ] [--tf 5] [--date-from 260101] [--date-to 260331]
+                             [--where "tier==elite" --where "efficiency>0.7"] [--fields a,b] [--format jsonl|csv]
+
+Candidate files come from the file names (artifact_catalog.find_artifacts: ticker, tf, date range). Per
+date, the day zone map (vector_calc.zone_maps) drops the whole day when no predicate can match it, then
+each file's entry drops the file; files without a current entry are scanned. Only the remaining files are
+streamed, and records matching every --where are written, projected to --fields. A summary of candidate,
+skipped and scanned files goes to stderr.
+
+--where FIELD OP VALUE with OP one of > >= < <= == != (= is ==). A number VALUE compares numerically, any
+other VALUE as a string (== / != only). Records without a value (or NaN) for FIELD never match.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import operator
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from artifact_catalog import find_artifacts
+from common.compressed import data_stem, open_text
+
+from .zone_maps import ZONE_MAP_DIRNAME, is_current, load_day, stem_date
+
+WHERE_RE = re.compile(r"^\s*([A-Za-z_]\w*)\s*(>=|<=|==|!=|>|<|=)\s*(.*?)\s*$")
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne}
+
+
+@dataclass(frozen=True)
+class Predicate:
+    field: str
+    op: str
+    value: float | str
+
+    @property
+    def numeric(self) -> bool:
+        return isinstance(self.value, float)
+
+    def matches(self, rec: dict) -> bool:
+        v = rec.get(self.field)
+        if v is None or isinstance(v, bool):
+            return False
+        if self.numeric:
+            if not isinstance(v, (int, float)) or (isinstance(v, float) and math.isnan(v)):
+                return False
+            return OPS[self.op](v, self.value)
+        return OPS[self.op](str(v), self.value)
+
+    def may_match(self, zone: dict) -> bool:
+        """False only if no record summarized by zone ({"fields", "tiers"}) can match."""
+        if not self.numeric:
+            if self.field != "tier":
+                return True
+            count = zone["tiers"].get(self.value, 0)
+            return count > 0 if self.op == "==" else sum(zone["tiers"].values()) > count
+        rng = zone["fields"].get(self.field)
+        if rng is None:
+            return False  # no numeric value of the field in the zone
+        lo, hi, v = rng[0], rng[1], self.value
+        return {
+            ">": hi > v, ">=": hi >= v, "<": lo < v, "<=": lo <= v, "==": lo <= v <= hi, "!=": not (lo == hi == v),
+        }[self.op]
+
+
+def parse_predicate(text: str) -> Predicate:
+    """Predicate of "FIELD OP VALUE"; raises ValueError."""
+    m = WHERE_RE.match(text)
+    if not m or not m.group(3):
+        raise ValueError(f"expected FIELD OP VALUE with OP in > >= < <= == !=: {text!r}")
+    field, op, raw = m.groups()
+    op = "==" if op == "=" else op
+    try:
+        value: float | str = float(raw)
+    except ValueError:
+        value = raw.strip("'\"")
+        if op not in ("==", "!="):
+            raise ValueError(f"{op} needs a number: {text!r}") from None
+    return Predicate(field, op, value)
+
+
+@dataclass
+class ScanStats:
+    candidates: int = 0
+    skipped_day: int = 0
+    skipped_file: int = 0
+    scanned: int = 0
+    scanned_unindexed: int = 0
+    records_read: int = 0
+    matched: int = 0
+
+
+def select_files(paths: list[Path], zone_dir: Path, preds: list[Predicate], stats: ScanStats) -> list[Path]:
+    """Candidate paths that zone maps cannot rule out, in input order."""
+    stats.candidates += len(paths)
+    if not preds:
+        return list(paths)
+    by_date: dict[str | None, list[Path]] = {}
+    for p in paths:
+        by_date.setdefault(stem_date(data_stem(p)), []).append(p)
+    keep = set()
+    for date, group in by_date.items():
+        day = load_day(zone_dir, date) if date else None
+        entries = (day or {}).get("files", {})
+        current = {p: entries.get(p.name) if is_current(entries.get(p.name), p) else None for p in group}
+        if day and all(current.values()) and not all(pr.may_match(day["day"]) for pr in preds):
+            stats.skipped_day += len(group)
+            continue
+        for p, entry in current.items():
+            if entry is None:
+                stats.scanned_unindexed += 1
+                keep.add(p)
+            elif all(pr.may_match(entry) for pr in preds):
+                keep.add(p)
+            else:
+                stats.skipped_file += 1
+    return [p for p in paths if p in keep]
+
+
+def scan(paths: list[Path], preds: list[Predicate], stats: ScanStats, limit: int = 0):
+    """Yield the records of paths matching every predicate (at most limit if > 0)."""
+    for p in paths:
+        stats.scanned += 1
+        with open_text(p) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                stats.records_read += 1
+                if all(pr.matches(rec) for pr in preds):
+                    stats.matched += 1
+                    yield rec
+                    if limit and stats.matched >= limit:
+                        return
+
+
+def _write(records, fields: list[str] | None, fmt: str, out) -> None:
+    if fmt == "jsonl":
+        for rec in records:
+            if fields:
+                rec = {k: rec.get(k) for k in fields}
+            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        return
+    writer = None
+    for rec in records:
+        if writer is None:
+            writer = csv.DictWriter(out, fieldnames=fields or list(rec), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow(rec)
+
+
+def main() -> None:
+    data_base = os.environ.get("DATA_BASE") or os.environ.get("FIN_DATA") or os.path.expanduser("~/Fin/Data")
+
+    p = argparse.ArgumentParser(description="Query classified records (predicates, projection) with zone-map file pruning.")
+    p.add_argument("--classified-dir", default=os.path.join(data_base, "classified"), help="Classified directory")
+    p.add_argument("--zone-dir", default="", help=f"Zone maps (default: sibling '{ZONE_MAP_DIRNAME}').")
+    p.add_argument("--ticker", default="", help="Comma-separated tickers (default: all).")
+    p.add_argument("--tf", default=None, help="Only this tf.")
+    p.add_argument("--date-from", default=None, metavar="YYMMDD")
+    p.add_argument("--date-to", default=None, metavar="YYMMDD")
+    p.add_argument("--where", action="append", default=[], help='Predicate, e.g. "efficiency>0.7" or "tier==elite"; repeat to AND.')
+    p.add_argument("--fields", default="", help="Comma-separated fields to output (default: all).")
+    p.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    p.add_argument("--out", default="", help="Output file (default: stdout).")
+    p.add_argument("--limit", type=int, default=0, help="Stop after this many records (0 = all).")
+    args = p.parse_args()
+
+    classified_dir = Path(args.classified_dir)
+    if not classified_dir.is_dir():
+        p.error(f"classified-dir not found: {classified_dir}")
+    zone_dir = Path(args.zone_dir) if args.zone_dir else classified_dir.parent / ZONE_MAP_DIRNAME
+    try:
+        preds = [parse_predicate(w) for w in args.where]
+    except ValueError as e:
+        p.error(f"--where: {e}")
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()] or None
+    if args.format == "csv" and fields is None:
+        print("note: CSV columns are the first matching record's fields (use --fields to fix them)", file=sys.stderr)
+
+    t0 = time.perf_counter()
+    tickers = [t.strip() for t in args.ticker.split(",") if t.strip()] or [None]
+    paths = sorted({
+        q for t in tickers
+        for q in find_artifacts("classified", classified_dir, ticker=t, tf=args.tf, date_from=args.date_from, date_to=args.date_to)
+    })
+    stats = ScanStats()
+    selected = select_files(paths, zone_dir, preds, stats)
+    out = open(args.out, "w", encoding="utf-8", newline="") if args.out else sys.stdout
+    try:
+        _write(scan(selected, preds, stats, args.limit), fields, args.format, out)
+    finally:
+        if args.out:
+            out.close()
+    print(
+        f"{stats.matched} records from {stats.scanned} scanned files ({stats.records_read} records read);"
+        f" {stats.candidates} candidates by name, skipped {stats.skipped_day} by day and {stats.skipped_file} by file"
+        f" zone maps, {stats.scanned_unindexed} without a current zone map ({time.perf_counter() - t0:.2f}s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
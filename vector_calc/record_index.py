@@ -0,0 +1,121 @@
+"""Byte-offset sidecar for classified JSONL files: random access to record k without reading the file.
+
+classified/{stem}.idx = MAGIC + little-endian uint64 offsets: the start of every line plus the end of
+the last one (n records -> n + 1 offsets). Lines are in closing_bar_index order, so record k is bytes
+[off[k], off[k + 1]). Written by vector_calc after the next_* pass (which rewrites the files).
+
+RecordIndex memory-maps both files. A missing or stale sidecar (last offset != file size) is replaced
+by offsets computed in memory, so readers always work; they are just faster with the sidecar. Compressed
+classified files (.jsonl.gz / .jsonl.zst) have no sidecar: RecordIndex decompresses them into memory.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+from pathlib import Path
+
+import numpy as np
+
+from common.compressed import codec_of, read_bytes
+
+INDEX_SUFFIX = ".idx"
+MAGIC = b"VCIDX001"
+
+
+def index_path(jsonl_path: Path) -> Path:
+    return jsonl_path.with_suffix(INDEX_SUFFIX)
+
+
+def line_offsets(data) -> np.ndarray:
+    """Start offset of every line plus the end offset of the last one, for a bytes-like buffer."""
+    size = len(data)
+    if size == 0:
+        return np.zeros(1, dtype="<u8")
+    nl = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 10) + 1
+    starts = np.concatenate(([0], nl[:-1] if nl.size and nl[-1] == size else nl))
+    return np.concatenate((starts, [size])).astype("<u8")
+
+
+def write_record_index(jsonl_path: Path) -> Path:
+    """Write the .idx sidecar for one classified file (atomic replace). Returns its path."""
+    with open(jsonl_path, "rb") as f:
+        data = f.read()
+    out = index_path(jsonl_path)
+    tmp = out.with_suffix(INDEX_SUFFIX + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(line_offsets(data).tobytes())
+    os.replace(tmp, out)
+    return out
+
+
+class RecordIndex:
+    """Random access to the records of one classified JSONL file.
+
+    with RecordIndex(path) as ix:
+        ix.last(); ix.record(k); ix.slice(a, b); len(ix)
+    """
+
+    def __init__(self, jsonl_path: Path):
+        self.path = Path(jsonl_path)
+        if codec_of(self.path) != "none":
+            self._f = None
+            self._mm = read_bytes(self.path)
+            self.offsets = line_offsets(self._mm)
+            return
+        self._f = open(self.path, "rb")
+        size = os.fstat(self._f.fileno()).st_size
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.offsets = self._load_offsets(size)
+
+    def _load_offsets(self, size: int) -> np.ndarray:
+        ip = index_path(self.path)
+        try:
+            with open(ip, "rb") as f:
+                ok = f.read(len(MAGIC)) == MAGIC
+            if ok:
+                offs = np.memmap(ip, dtype="<u8", mode="r", offset=len(MAGIC))
+                if offs.size and int(offs[-1]) == size and int(offs[0]) == 0:
+                    return offs
+        except (OSError, ValueError):
+            pass
+        return line_offsets(self._mm)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def raw(self, k: int) -> bytes:
+        """Bytes of record k (negative k counts from the end), without the trailing newline."""
+        n = len(self)
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError(f"record {k} out of range ({n} records in {self.path.name})")
+        return self._mm[int(self.offsets[k]) : int(self.offsets[k + 1])].rstrip(b"\r\n")
+
+    def record(self, k: int) -> dict:
+        return json.loads(self.raw(k))
+
+    def last(self) -> dict | None:
+        return self.record(-1) if len(self) else None
+
+    def slice(self, start: int | None = None, stop: int | None = None) -> list[dict]:
+        """Records [start:stop) with Python slice semantics (one contiguous read)."""
+        lo, hi, _ = slice(start, stop).indices(len(self))
+        if lo >= hi:
+            return []
+        chunk = self._mm[int(self.offsets[lo]) : int(self.offsets[hi])]
+        return [json.loads(line) for line in chunk.splitlines() if line.strip()]
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        if self._f is not None:
+            self._f.close()
+
+    def __enter__(self) -> "RecordIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,136 @@
+"""Zone maps of the classified files: per-file and per-day min/max of every numeric field plus tier counts.
+
+zone_maps/{yymmdd}.json (sibling of classified/) holds, for one date, an entry per classified file
+({"size", "mtime_ns", "records", "fields": {field: [min, max]}, "tiers": {tier: count}}) and the same
+summary merged over the day ("day"). vector_calc rewrites the maps of dates whose classified files were
+added, changed or removed (an unchanged file keeps its mtime and its entry is reused, not re-read).
+NaN / null values are left out of min/max; a field with no numeric value in a file has no range there.
+
+An entry is current while its file still has the recorded size and mtime. vector_calc.query prunes with
+current entries only and scans every file whose entry is missing or stale, so writers that do not update
+the maps (pipeline, a hand edit) cost speed, never results.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+from pathlib import Path
+
+from common.compressed import data_files, data_stem, open_text
+
+ZONE_MAP_DIRNAME = "zone_maps"
+ZONE_MAP_VERSION = 1
+
+
+def _is_number(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and not (isinstance(v, float) and math.isnan(v))
+
+
+def summarize_records(records) -> dict:
+    """{"records", "fields", "tiers"} of an iterable of record dicts."""
+    fields: dict[str, list] = {}
+    tiers: dict[str, int] = {}
+    n = 0
+    for rec in records:
+        n += 1
+        for k, v in rec.items():
+            if _is_number(v):
+                rng = fields.get(k)
+                if rng is None:
+                    fields[k] = [v, v]
+                elif v < rng[0]:
+                    rng[0] = v
+                elif v > rng[1]:
+                    rng[1] = v
+        tier = rec.get("tier")
+        if isinstance(tier, str):
+            tiers[tier] = tiers.get(tier, 0) + 1
+    return {"records": n, "fields": fields, "tiers": tiers}
+
+
+def merge_summaries(summaries) -> dict:
+    out = {"records": 0, "fields": {}, "tiers": {}}
+    for s in summaries:
+        out["records"] += s["records"]
+        for k, (lo, hi) in s["fields"].items():
+            rng = out["fields"].get(k)
+            out["fields"][k] = [lo, hi] if rng is None else [min(rng[0], lo), max(rng[1], hi)]
+        for t, c in s["tiers"].items():
+            out["tiers"][t] = out["tiers"].get(t, 0) + c
+    return out
+
+
+def file_zone_map(path: Path) -> dict:
+    """Zone map entry of one classified file (any codec)."""
+    st = path.stat()
+    with open_text(path) as f:
+        summary = summarize_records(json.loads(line) for line in f if line.strip())
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, **summary}
+
+
+def is_current(entry: dict | None, path: Path) -> bool:
+    if not entry:
+        return False
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    return entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns
+
+
+def stem_date(stem: str) -> str | None:
+    parts = stem.split("_")
+    return parts[1] if len(parts) >= 2 and len(parts[1]) == 6 and parts[1].isdigit() else None
+
+
+def load_day(zone_dir: Path, date: str) -> dict | None:
+    """The zone map file of a date, or None if it is missing, unreadable or of another version."""
+    try:
+        data = json.loads((Path(zone_dir) / f"{date}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == ZONE_MAP_VERSION else None
+
+
+def write_zone_maps(classified_dir: Path, zone_dir: Path, dates) -> int:
+    """Rewrite the zone map files of the given dates (entries of unchanged files are reused). Returns files written."""
+    zone_dir = Path(zone_dir)
+    zone_dir.mkdir(parents=True, exist_ok=True)
+    by_date: dict[str, list[Path]] = {}
+    for p in data_files(classified_dir, "*.jsonl"):
+        date = stem_date(data_stem(p))
+        if date in dates:
+            by_date.setdefault(date, []).append(p)
+    n = 0
+    for date in sorted(dates):
+        out = zone_dir / f"{date}.json"
+        paths = by_date.get(date)
+        if not paths:
+            out.unlink(missing_ok=True)
+            continue
+        old = (load_day(zone_dir, date) or {}).get("files", {})
+        files = {}
+        for p in paths:
+            entry = old.get(p.name)
+            files[p.name] = entry if is_current(entry, p) else file_zone_map(p)
+        data = {"version": ZONE_MAP_VERSION, "date": date, "day": merge_summaries(files.values()), "files": files}
+        tmp = out.with_name(f".{out.name}.tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, out)
+        n += 1
+    return n
+
+
+def refresh_zone_maps(classified_dir: Path, zone_dir: Path, stats, full: bool) -> int:
+    """Rewrite the zone maps of dates with added, changed or removed classified files (common.atomic_output
+    OutputStats). full: also write missing maps and drop maps of dates without classified files."""
+    dates = {stem_date(data_stem(name)) for name in stats.added + stats.changed + stats.removed} - {None}
+    if full:
+        present = {stem_date(data_stem(p)) for p in data_files(classified_dir, "*.jsonl")} - {None}
+        dates |= {d for d in present if not (Path(zone_dir) / f"{d}.json").is_file()}
+        if Path(zone_dir).is_dir():
+            for f in Path(zone_dir).glob("*.json"):
+                if f.stem not in present:
+                    f.unlink()
+    return write_zone_maps(classified_dir, zone_dir, dates)
@@ -0,0 +1,3 @@
+"""In-process nearest-neighbour index over classified embeddings."""
+from .numpy_index import NumpyIndex, NumpyIndexBuilder
+from .record_store import RecordStore
@@ -0,0 +1,62 @@
+"""CLI: serve similarity queries from a warm index (HTTP on localhost or a Unix socket).
+
+Usage:
+  python -m vector_index [--index-dir DIR | --backend chroma --chroma-dir DIR] [--port 8765 | --socket PATH]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from .numpy_index import NumpyIndex
+from .record_store import STORE_NAME, RecordStore
+from .service import DEFAULT_CACHE_SIZE, ChromaBackend, NumpyBackend, QueryService, make_server
+
+
+def main() -> None:
+    data_base = os.environ.get("DATA_BASE") or os.environ.get("FIN_DATA") or os.path.expanduser("~/Fin/Data")
+
+    p = argparse.ArgumentParser(description="Serve nearest-neighbour queries over classified vectors.")
+    p.add_argument("--backend", choices=("numpy", "chroma"), default="numpy", help="Index to keep warm (default numpy).")
+    p.add_argument("--index-dir", default=os.path.join(data_base, "vector_index"), help="NumPy index dir.")
+    p.add_argument("--chroma-dir", default=os.path.join(data_base, "chroma"), help="Chroma persistent dir.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--socket", default="", help="Serve on this Unix socket path instead of TCP.")
+    p.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="LRU entries (0 disables caching).")
+    args = p.parse_args()
+
+    if args.backend == "numpy":
+        index_dir = Path(args.index_dir)
+        if not index_dir.is_dir():
+            p.error(f"index-dir not found: {index_dir} (build it with chroma_ingest.py --backend numpy)")
+        index = NumpyIndex(index_dir)
+        backend = NumpyBackend(index)
+        # Touch every page once so the first queries do not pay for page faults.
+        index.search(index.embeddings[:1], k=1)
+    else:
+        import chromadb
+
+        from chroma_ingest import COLLECTION_NAME, EMBED_FIELDS
+
+        client = chromadb.PersistentClient(path=args.chroma_dir)
+        backend = ChromaBackend(client.get_collection(COLLECTION_NAME), dim=len(EMBED_FIELDS))
+
+    store_path = Path(args.index_dir if args.backend == "numpy" else args.chroma_dir) / STORE_NAME
+    store = RecordStore(store_path) if store_path.is_file() else None
+    service = QueryService(backend, cache_size=args.cache_size, store=store)
+    server = make_server(service, host=args.host, port=args.port, unix_socket=args.socket or None)
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Serving {len(backend)} vectors ({args.backend}) on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Segment-level recall of a reduced index (coarser --granularity / collapse) against a full index.
+
+A reduced index keeps fewer closing bars per segment, so recall is measured on segments: for each
+probe, the share of segments in the full index's top-k that also appear in the reduced top-k.
+
+Usage:
+  python -m vector_index.evaluate --full DIR --reduced DIR [--probes 1000] [--k 50]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .numpy_index import NumpyIndex
+
+
+def _segments(index: NumpyIndex, rows: np.ndarray) -> list[set[str]]:
+    return [{str(index.ids[r]).rpartition("_")[0] for r in row} for row in rows]
+
+
+def segment_recall(full: NumpyIndex, reduced: NumpyIndex, probes: np.ndarray, k: int = 50) -> dict:
+    """Mean segment recall@k plus query timings for both indexes."""
+    t0 = time.perf_counter()
+    full_rows, _ = full.search(probes, k=k)
+    t1 = time.perf_counter()
+    red_rows, _ = reduced.search(probes, k=k)
+    t2 = time.perf_counter()
+    recalls = [
+        len(f & r) / len(f) if f else 1.0 for f, r in zip(_segments(full, full_rows), _segments(reduced, red_rows))
+    ]
+    return {
+        "probes": int(len(probes)),
+        "k": k,
+        "full_rows": len(full),
+        "reduced_rows": len(reduced),
+        "size_ratio": len(reduced) / len(full) if len(full) else 0.0,
+        "segment_recall": float(np.mean(recalls)) if recalls else 0.0,
+        "full_query_ms": (t1 - t0) * 1000.0 / max(1, len(probes)),
+        "reduced_query_ms": (t2 - t1) * 1000.0 / max(1, len(probes)),
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Segment recall@k of a reduced NumPy index vs the full one.")
+    p.add_argument("--full", required=True, help="Index built with --granularity all.")
+    p.add_argument("--reduced", required=True, help="Index built with a coarser granularity.")
+    p.add_argument("--probes", type=int, default=1000, help="Probe vectors sampled from the full index.")
+    p.add_argument("--k", type=int, default=50)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    full = NumpyIndex(Path(args.full))
+    reduced = NumpyIndex(Path(args.reduced))
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(len(full), size=min(args.probes, len(full)), replace=False)
+    probes = np.asarray(full.embeddings[np.sort(sample)], dtype=np.float32)
+    res = segment_recall(full, reduced, probes, k=args.k)
+    print(
+        f"rows {res['reduced_rows']}/{res['full_rows']} ({res['size_ratio']:.1%}), "
+        f"segment recall@{res['k']} {res['segment_recall']:.3f} over {res['probes']} probes, "
+        f"query {res['full_query_ms']:.2f} -> {res['reduced_query_ms']:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Exact top-k search over a contiguous float32 matrix (memory-mapped) with metadata pre-filters.
+
+Layout of an index directory:
+  embeddings.npy        float32 (n, dim), C-contiguous, opened with mmap_mode="r"
+  ids.npy               str (n,)   document ids (segment_id + '_' + closing_bar_index)
+  meta_<field>.npy      int32 (n,) one column per META_FIELDS entry; categorical fields are vocab codes
+  index.json            dim, embed fields, row count, vocabularies
+
+Distances are squared L2, the same metric as the default Chroma collection.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+
+INDEX_VERSION = 1
+INDEX_META = "index.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+IDS_FILE = "ids.npy"
+
+# Categorical metadata columns (stored as vocab codes) and integer columns.
+CATEGORICAL_FIELDS = ("ticker", "tf", "tier")
+INT_FIELDS = ("date", "closing_bar_index")
+META_FIELDS = CATEGORICAL_FIELDS + INT_FIELDS
+
+# Budget for one block of the (queries x rows) distance matrix.
+BLOCK_BYTES = 64 << 20
+
+
+def _as_int(v) -> int:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return -1
+
+
+def _save_npy(path: Path, arr: np.ndarray) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+class NumpyIndexBuilder:
+    """Accumulate (ids, embeddings, metadatas) batches, then save() an index directory."""
+
+    def __init__(self, fields: Sequence[str]) -> None:
+        self.fields = list(fields)
+        self._emb_chunks: list[np.ndarray] = []
+        self._ids: list[str] = []
+        self._vocab: dict[str, dict[str, int]] = {f: {} for f in CATEGORICAL_FIELDS}
+        self._meta: dict[str, list[int]] = {f: [] for f in META_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _code(self, field: str, value) -> int:
+        if value is None:
+            return -1
+        vocab = self._vocab[field]
+        return vocab.setdefault(str(value), len(vocab))
+
+    def add(self, ids: list[str], embeddings: list[list[float]], metadatas: list[dict]) -> None:
+        if not ids:
+            return
+        self._emb_chunks.append(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), len(self.fields)))
+        self._ids.extend(ids)
+        for md in metadatas:
+            for f in CATEGORICAL_FIELDS:
+                self._meta[f].append(self._code(f, md.get(f)))
+            for f in INT_FIELDS:
+                self._meta[f].append(_as_int(md.get(f)))
+
+    def add_existing(self, index: "NumpyIndex", keep: np.ndarray | None = None) -> None:
+        """Carry over rows of an existing index (all, or where keep is True)."""
+        rows = np.arange(len(index)) if keep is None else np.flatnonzero(keep)
+        if rows.size == 0:
+            return
+        self._emb_chunks.append(np.asarray(index.embeddings[rows], dtype=np.float32))
+        self._ids.extend(index.ids[rows].tolist())
+        for f in CATEGORICAL_FIELDS:
+            vocab = index.vocab[f]
+            self._meta[f].extend(self._code(f, vocab[c]) if c >= 0 else -1 for c in index.meta[f][rows].tolist())
+        for f in INT_FIELDS:
+            self._meta[f].extend(index.meta[f][rows].tolist())
+
+    def save(self, out_dir: Path) -> int:
+        """Write the index directory (index.json last, so readers never see a partial index). Returns rows."""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        dim = len(self.fields)
+        emb = np.concatenate(self._emb_chunks) if self._emb_chunks else np.empty((0, dim), dtype=np.float32)
+        _save_npy(out_dir / EMBEDDINGS_FILE, np.ascontiguousarray(emb, dtype=np.float32))
+        _save_npy(out_dir / IDS_FILE, np.array(self._ids, dtype=np.str_))
+        for f in META_FIELDS:
+            _save_npy(out_dir / f"meta_{f}.npy", np.array(self._meta[f], dtype=np.int32))
+        meta = {
+            "version": INDEX_VERSION,
+            "dim": dim,
+            "fields": self.fields,
+            "rows": len(self._ids),
+            "metric": "l2",
+            "vocab": {f: sorted(v, key=v.get) for f, v in self._vocab.items()},
+        }
+        tmp = out_dir / (INDEX_META + ".tmp")
+        tmp.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, out_dir / INDEX_META)
+        return len(self._ids)
+
+
+class NumpyIndex:
+    """Read side: exact squared-L2 top-k over the memory-mapped matrix, with cached filter masks."""
+
+    def __init__(self, index_dir: Path, mmap: bool = True) -> None:
+        self.index_dir = Path(index_dir)
+        info = json.loads((self.index_dir / INDEX_META).read_text(encoding="utf-8"))
+        if info.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version in {self.index_dir}: {info.get('version')}")
+        self.fields: list[str] = info["fields"]
+        self.vocab: dict[str, list[str]] = info["vocab"]
+        mode = "r" if mmap else None
+        self.embeddings: np.ndarray = np.load(self.index_dir / EMBEDDINGS_FILE, mmap_mode=mode)
+        self.ids: np.ndarray = np.load(self.index_dir / IDS_FILE)
+        self.meta: dict[str, np.ndarray] = {
+            f: np.load(self.index_dir / f"meta_{f}.npy", mmap_mode=mode) for f in META_FIELDS
+        }
+        self._sq_norms = np.einsum("ij,ij->i", self.embeddings, self.embeddings, dtype=np.float32)
+        self._codes = {f: {v: i for i, v in enumerate(self.vocab[f])} for f in CATEGORICAL_FIELDS}
+        self._masks: dict[tuple, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return int(self.embeddings.shape[0])
+
+    def _value_mask(self, field: str, values) -> np.ndarray:
+        """Cached boolean mask for field in values (categorical: names, int fields: ints)."""
+        if isinstance(values, (str, int)):
+            values = (values,)
+        key = (field, tuple(sorted(str(v) for v in values)))
+        mask = self._masks.get(key)
+        if mask is None:
+            if field in CATEGORICAL_FIELDS:
+                codes = [self._codes[field][str(v)] for v in values if str(v) in self._codes[field]]
+            else:
+                codes = [_as_int(v) for v in values]
+            mask = np.isin(self.meta[field], codes)
+            self._masks[key] = mask
+        return mask
+
+    def _date_range_mask(self, date_from: str | None, date_to: str | None) -> np.ndarray:
+        key = ("date_range", date_from, date_to)
+        mask = self._masks.get(key)
+        if mask is None:
+            dates = self.meta["date"]
+            mask = dates >= 0
+            if date_from:
+                mask &= dates >= int(date_from)
+            if date_to:
+                mask &= dates <= int(date_to)
+            self._masks[key] = mask
+        return mask
+
+    def mask(
+        self,
+        ticker=None,
+        tf=None,
+        tier=None,
+        date=None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> np.ndarray | None:
+        """Combined pre-filter mask; None means no filter. Each argument may be a value or a list of values."""
+        parts = [self._value_mask(f, v) for f, v in (("ticker", ticker), ("tf", tf), ("tier", tier), ("date", date)) if v]
+        if date_from or date_to:
+            parts.append(self._date_range_mask(date_from, date_to))
+        if not parts:
+            return None
+        out = parts[0].copy()
+        for m in parts[1:]:
+            out &= m
+        return out
+
+    def search(self, queries, k: int = 50, **filters) -> tuple[np.ndarray, np.ndarray]:
+        """Exact top-k for one (dim,) or many (m, dim) queries.
+
+        Returns (rows, distances), both (m, k') with k' = min(k, candidates), nearest first.
+        Filters are the keyword arguments of mask().
+        """
+        q = np.asarray(queries, dtype=np.float32)
+        if q.ndim == 1:
+            q = q[None, :]
+        m = self.mask(**filters)
+        if m is None:
+            cand = None
+            x, xn = self.embeddings, self._sq_norms
+        else:
+            cand = np.flatnonzero(m)
+            x, xn = self.embeddings[cand], self._sq_norms[cand]
+        n = x.shape[0]
+        kk = min(k, n)
+        rows = np.empty((q.shape[0], kk), dtype=np.int64)
+        dists = np.empty((q.shape[0], kk), dtype=np.float32)
+        if kk == 0:
+            return rows, dists
+        qn = np.einsum("ij,ij->i", q, q)
+        block = max(1, BLOCK_BYTES // (4 * n))
+        for b0 in range(0, q.shape[0], block):
+            qb = q[b0 : b0 + block]
+            d = qb @ x.T
+            d *= -2.0
+            d += xn[None, :]
+            d += qn[b0 : b0 + block, None]
+            np.maximum(d, 0.0, out=d)
+            if kk < n:
+                part = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+            else:
+                part = np.broadcast_to(np.arange(n), d.shape)
+            pd = np.take_along_axis(d, part, axis=1)
+            order = np.argsort(pd, axis=1, kind="stable")
+            top = np.take_along_axis(part, order, axis=1)
+            rows[b0 : b0 + block] = top if cand is None else cand[top]
+            dists[b0 : b0 + block] = np.take_along_axis(pd, order, axis=1)
+        return rows, dists
+
+    def metadata(self, row: int) -> dict:
+        """Filterable metadata of one row (categorical codes decoded)."""
+        out: dict = {"id": str(self.ids[row])}
+        for f in CATEGORICAL_FIELDS:
+            c = int(self.meta[f][row])
+            out[f] = self.vocab[f][c] if c >= 0 else None
+        for f in INT_FIELDS:
+            v = int(self.meta[f][row])
+            out[f] = v if v >= 0 else None
+        return out
+
+
+def build_index(batches: Iterable[tuple[list[str], list[list[float]], list[dict]]], fields: Sequence[str], out_dir: Path) -> int:
+    """Build an index directory from (ids, embeddings, metadatas) batches. Returns rows written."""
+    builder = NumpyIndexBuilder(fields)
+    for ids, embeddings, metadatas in batches:
+        builder.add(ids, embeddings, metadatas)
+    return builder.save(out_dir)
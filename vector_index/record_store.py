@@ -0,0 +1,95 @@
+"""Sidecar record store: document id -> (classified file, byte offset, length) in SQLite.
+
+Chroma/NumPy metadata keeps only filterable fields; full records stay in the classified JSONL files
+and are hydrated in bulk by seeking to their offsets (one open per file, offsets read in order). Offsets
+are into the uncompressed content, so compressed classified files are hydrated by forward seeks.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from common.compressed import open_bytes
+
+STORE_NAME = "records.sqlite"
+
+
+class RecordStore:
+    def __init__(self, db_path: Path, classified_dir: Path | None = None) -> None:
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                doc_id TEXT PRIMARY KEY,
+                file TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS records_file ON records(file);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+        if classified_dir is not None:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta(key, value) VALUES ('classified_dir', ?)", (str(Path(classified_dir).resolve()),)
+                )
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'classified_dir'").fetchone()
+        self.classified_dir = Path(row[0]) if row else None
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def replace_file(self, name: str, ids: list[str], offsets: list[tuple[int, int]]) -> None:
+        """Replace all rows of one classified file (name relative to classified_dir)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM records WHERE file = ?", (name,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records(doc_id, file, offset, length) VALUES (?, ?, ?, ?)",
+                [(doc_id, name, off, length) for doc_id, (off, length) in zip(ids, offsets)],
+            )
+
+    def drop_file(self, name: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM records WHERE file = ?", (name,))
+
+    def locate(self, ids: Iterable[str]) -> dict[str, tuple[str, int, int]]:
+        ids = list(ids)
+        out: dict[str, tuple[str, int, int]] = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i : i + 500]
+                q = f"SELECT doc_id, file, offset, length FROM records WHERE doc_id IN ({','.join('?' * len(chunk))})"
+                for doc_id, name, off, length in self._conn.execute(q, chunk):
+                    out[doc_id] = (name, off, length)
+        return out
+
+    def hydrate(self, ids: list[str]) -> list[dict | None]:
+        """Full records for ids (None when unknown or when the file changed since ingest)."""
+        if self.classified_dir is None:
+            raise ValueError(f"{self.db_path}: classified_dir not recorded")
+        located = self.locate(ids)
+        by_file: dict[str, list[tuple[int, int, str]]] = {}
+        for doc_id, (name, off, length) in located.items():
+            by_file.setdefault(name, []).append((off, length, doc_id))
+        found: dict[str, dict] = {}
+        for name, items in by_file.items():
+            try:
+                f = open_bytes(self.classified_dir / name)
+            except OSError:
+                continue
+            with f:
+                for off, length, doc_id in sorted(items):
+                    f.seek(off)
+                    try:
+                        rec = json.loads(f.read(length))
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+                    if f"{rec.get('segment_id')}_{rec.get('closing_bar_index')}" == doc_id:
+                        found[doc_id] = rec
+        return [found.get(doc_id) for doc_id in ids]
@@ -0,0 +1,272 @@
+"""Local similarity-search service: keeps an index warm, caches repeated probes, tracks latency.
+
+HTTP on localhost or a Unix socket:
+  POST /query   {"vector": [...]} or {"vectors": [[...], ...]}, optional "k" (default 50),
+                "filters": {"ticker", "tf", "tier", "date", "date_from", "date_to"} and
+                "hydrate": true (attach the full classified record from the sidecar record store)
+                -> {"results": [[{"id", "distance", ...metadata}, ...], ...], "cached": [...], "elapsed_ms"}
+  GET  /stats   latency histograms (ms buckets), cache hit/miss counts, index size
+  GET  /health  {"ok": true, "rows": n}
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+from .numpy_index import NumpyIndex
+
+DEFAULT_K = 50
+MAX_K = 1000
+DEFAULT_CACHE_SIZE = 4096
+FILTER_KEYS = ("ticker", "tf", "tier", "date", "date_from", "date_to")
+# Upper bounds (ms) of latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 1000.0, math.inf)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with bucket-resolution percentiles."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * len(self.bounds)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms: float) -> None:
+        i = next(i for i, b in enumerate(self.bounds) if ms <= b)
+        with self._lock:
+            self.counts[i] += 1
+            self.total += 1
+            self.sum_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (0 when empty)."""
+        if self.total == 0:
+            return 0.0
+        target = p / 100.0 * self.total
+        seen = 0
+        for bound, c in zip(self.bounds, self.counts):
+            seen += c
+            if seen >= target:
+                return bound if math.isfinite(bound) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.total,
+            "mean_ms": self.sum_ms / self.total if self.total else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": [{"le_ms": b if math.isfinite(b) else "inf", "count": c} for b, c in zip(self.bounds, self.counts)],
+        }
+
+
+class LRUCache:
+    """Thread-safe LRU of query results keyed by (vector bytes, k, filters)."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def to_dict(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class NumpyBackend:
+    def __init__(self, index: NumpyIndex) -> None:
+        self.index = index
+        self.dim = len(index.fields)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def query(self, vectors: np.ndarray, k: int, filters: dict) -> list[list[dict]]:
+        rows, dists = self.index.search(vectors, k=k, **filters)
+        return [
+            [{**self.index.metadata(int(r)), "distance": float(dd)} for r, dd in zip(row, drow)]
+            for row, drow in zip(rows, dists)
+        ]
+
+
+class ChromaBackend:
+    """Same interface over a persistent Chroma collection (date ranges are not supported there)."""
+
+    def __init__(self, collection, dim: int) -> None:
+        self.collection = collection
+        self.dim = dim
+
+    def __len__(self) -> int:
+        return self.collection.count()
+
+    @staticmethod
+    def _where(filters: dict) -> dict | None:
+        if filters.get("date_from") or filters.get("date_to"):
+            raise ValueError("date_from/date_to are only supported by the numpy backend")
+        clauses = []
+        for key in ("ticker", "tf", "tier", "date"):
+            v = filters.get(key)
+            if not v:
+                continue
+            clauses.append({key: {"$in": [str(x) for x in v]} if isinstance(v, list) else {"$eq": str(v)}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def query(self, vectors: np.ndarray, k: int, filters: dict) -> list[list[dict]]:
+        res = self.collection.query(
+            query_embeddings=vectors.tolist(),
+            n_results=k,
+            where=self._where(filters),
+            include=["metadatas", "distances"],
+        )
+        out = []
+        for ids, metas, dists in zip(res["ids"], res["metadatas"], res["distances"]):
+            out.append([{**(m or {}), "id": i, "distance": float(d)} for i, m, d in zip(ids, metas, dists)])
+        return out
+
+
+class QueryService:
+    """Validates requests, serves cache hits and batches misses into one backend call."""
+
+    def __init__(self, backend, cache_size: int = DEFAULT_CACHE_SIZE, store=None) -> None:
+        self.backend = backend
+        self.store = store
+        self.cache = LRUCache(cache_size)
+        self.latency = {"single": LatencyHistogram(), "batch": LatencyHistogram()}
+        self.started = time.time()
+
+    def query(self, payload: dict) -> dict:
+        t0 = time.perf_counter()
+        single = "vector" in payload
+        vectors = np.asarray([payload["vector"]] if single else payload.get("vectors", []), dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.backend.dim:
+            raise ValueError(f"expected vector(s) of length {self.backend.dim}")
+        k = int(payload.get("k", DEFAULT_K))
+        if not 1 <= k <= MAX_K:
+            raise ValueError(f"k must be in [1, {MAX_K}]")
+        filters = {key: v for key, v in (payload.get("filters") or {}).items() if v not in (None, "", [])}
+        unknown = set(filters) - set(FILTER_KEYS)
+        if unknown:
+            raise ValueError(f"unknown filters: {sorted(unknown)}")
+        fkey = json.dumps(filters, sort_keys=True)
+
+        keys = [(v.tobytes(), k, fkey) for v in vectors]
+        results: list = [self.cache.get(key) for key in keys]
+        cached = [r is not None for r in results]
+        miss = [i for i, r in enumerate(results) if r is None]
+        if miss:
+            fresh = self.backend.query(vectors[miss], k, filters)
+            for i, r in zip(miss, fresh):
+                results[i] = r
+                self.cache.put(keys[i], r)
+        if payload.get("hydrate"):
+            if self.store is None:
+                raise ValueError("hydrate requested but no record store is loaded")
+            records = iter(self.store.hydrate([r["id"] for row in results for r in row]))
+            results = [[{**r, "record": next(records)} for r in row] for row in results]
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        self.latency["single" if len(vectors) == 1 else "batch"].observe(elapsed_ms)
+        return {"results": results, "cached": cached, "elapsed_ms": elapsed_ms}
+
+    def stats(self) -> dict:
+        return {
+            "rows": len(self.backend),
+            "uptime_sec": time.time() - self.started,
+            "cache": self.cache.to_dict(),
+            "latency": {name: h.to_dict() for name, h in self.latency.items()},
+        }
+
+
+def _make_handler(service: QueryService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, code: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            if self.path == "/stats":
+                self._send(200, service.stats())
+            elif self.path == "/health":
+                self._send(200, {"ok": True, "rows": len(service.backend)})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            if self.path != "/query":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                self._send(200, service.query(payload))
+            except (ValueError, TypeError, KeyError) as e:
+                self._send(400, {"error": str(e)})
+
+        def log_message(self, format, *args) -> None:  # keep the hot path quiet
+            pass
+
+    return Handler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    address_family = socket.AF_UNIX
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def make_server(service: QueryService, host: str = "127.0.0.1", port: int = 8765, unix_socket: str | Path | None = None):
+    handler = _make_handler(service)
+    if unix_socket:
+        return UnixHTTPServer(str(unix_socket), handler)
+    return ThreadingHTTPServer((host, port), handler)
@@ -12,6 +12,9 @@ import re
 from collections import defaultdict
 from pathlib import Path
 
+from artifact_catalog import code_version, find_artifacts, register_outputs
+from common.compressed import data_stem, read_text
+
 from .finder import find_trades_for_segment, get_deadline_for_current_vec
 
 STEM_RE = re.compile(r"^([A-Z]+)_(\d{6})_(\w+)_(\d{4})_(\d{4})$")
@@ -19,7 +22,7 @@ STEM_RE = re.compile(r"^([A-Z]+)_(\d{6})_(\w+)_(\d{4})_(\d{4})$")
 
 def _load_bars(path: Path) -> list[dict]:
     bars = []
-    for line in path.read_text(encoding="utf-8").splitlines():
+    for line in read_text(path).splitlines():
         line = line.strip()
         if not line:
             continue
@@ -30,6 +33,27 @@ def _load_bars(path: Path) -> list[dict]:
     return bars
 
 
+def write_group_trades(asset: str, date: str, tf: str, files: list[Path], out_dir: Path) -> int:
+    """Find trades for one (asset, date, tf) group of raw segment files; write {asset}_{date}_{tf}.jsonl. Returns trade count."""
+    files = sorted(files, key=data_stem)
+    all_bars = [_load_bars(f) for f in files]
+    vector_ids = [data_stem(f) for f in files]
+    trades = []
+
+    for i, (bars, vid) in enumerate(zip(all_bars, vector_ids)):
+        next_bars = all_bars[i + 1] if i + 1 < len(all_bars) else None
+        deadline = get_deadline_for_current_vec(bars, next_bars)
+        trade = find_trades_for_segment(bars, deadline, vid, asset, date, tf)
+        if trade is not None:
+            trades.append(trade)
+
+    out_path = out_dir / f"{asset}_{date}_{tf}.jsonl"
+    with open(out_path, "w", encoding="utf-8") as f:
+        for t in trades:
+            f.write(json.dumps(t, ensure_ascii=False) + "\n")
+    return len(trades)
+
+
 def main() -> None:
     data_base = os.environ.get("DATA_BASE") or os.environ.get("FIN_DATA") or os.path.expanduser("~/Fin/Data")
     default_raw = os.environ.get("RAW_VECTORS_DIR") or os.path.join(data_base, "raw_vectors")
@@ -44,34 +68,20 @@ def main() -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
 
     groups: dict[tuple[str, str, str], list[Path]] = defaultdict(list)
-    for fp in sorted(raw_dir.glob("*.jsonl")):
-        m = STEM_RE.match(fp.stem)
+    for fp in find_artifacts("raw", raw_dir, date=args.date):
+        m = STEM_RE.match(data_stem(fp))
         if not m:
             continue
         asset, date, tf, start_hm, end_hm = m.groups()
-        if args.date and date != args.date:
-            continue
         groups[(asset, date, tf)].append(fp)
 
+    written = []
     for (asset, date, tf), files in sorted(groups.items()):
-        files.sort(key=lambda p: p.stem)
-        all_bars = [_load_bars(f) for f in files]
-        vector_ids = [f.stem for f in files]
-        trades = []
-
-        for i, (bars, vid) in enumerate(zip(all_bars, vector_ids)):
-            next_bars = all_bars[i + 1] if i + 1 < len(all_bars) else None
-            deadline = get_deadline_for_current_vec(bars, next_bars)
-            trade = find_trades_for_segment(bars, deadline, vid, asset, date, tf)
-            if trade is not None:
-                trades.append(trade)
-
-        out_path = out_dir / f"{asset}_{date}_{tf}.jsonl"
-        with open(out_path, "w", encoding="utf-8") as f:
-            for t in trades:
-                f.write(json.dumps(t, ensure_ascii=False) + "\n")
-        if trades:
-            print(f"{asset}_{date}_{tf}.jsonl: {len(trades)} trades")
+        n = write_group_trades(asset, date, tf, files, out_dir)
+        written.append(out_dir / f"{asset}_{date}_{tf}.jsonl")
+        if n:
+            print(f"{asset}_{date}_{tf}.jsonl: {n} trades")
+    register_outputs("trades", out_dir, written, stage="virtual_trades", version=code_version("virtual_trades"))
 
 
 if __name__ == "__main__":
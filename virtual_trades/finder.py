@@ -1,26 +1,17 @@
 """Find the best virtual trade (long or short) in a single raw-vector segment."""
 from __future__ import annotations
 
-import re
 from datetime import datetime
 from typing import Optional
 
-TIME_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})\s+(\d{2}):(\d{2}):(\d{2})")
+from common.timeparse import parse_time as _parse_time
+
 TRADE_SIZE = 500.0
 MIN_PNL = 18.0
 RTH_START = (9, 30)
 RTH_END = (16, 0)
 
 
-def _parse_time(s: str) -> Optional[datetime]:
-    if not s or not isinstance(s, str):
-        return None
-    m = TIME_RE.match(s.strip()[:19])
-    if not m:
-        return None
-    return datetime(*map(int, m.groups()))
-
-
 def _in_rth(dt: datetime) -> bool:
     hm = (dt.hour, dt.minute)
     return RTH_START <= hm <= RTH_END
@@ -44,6 +35,9 @@ def find_trades_for_segment(
 ) -> Optional[dict]:
     """Return the single best trade (highest pnl) or None.
 
+    Bars are taken in time order, whatever their order in the file, so bar_start / bar_end are the
+    closing_bar_index values of vector_calc's records (which sorts each segment by time).
+
     Rules:
       - Entry bar index in segment >= 1 (not the first bar).
       - Exit bar index > entry bar index.
@@ -67,6 +61,9 @@ def find_trades_for_segment(
         except (TypeError, ValueError):
             return None
         times.append(t)
+    order = sorted(range(len(bars)), key=times.__getitem__)
+    times = [times[k] for k in order]
+    closes = [closes[k] for k in order]
 
     best = None
     for i in range(1, len(bars)):
@@ -104,8 +101,84 @@ def get_deadline_for_current_vec(
     current_bars: list[dict],
     next_bars: Optional[list[dict]],
 ) -> Optional[datetime]:
-    """Deadline = next vector's 2nd bar time, or last bar if < 2 bars. None if no next vec."""
+    """Deadline = next vector's 2nd bar time (in time order), or its only bar's. None if no next vec."""
     if not next_bars:
         return None
-    idx = min(1, len(next_bars) - 1)
-    return _parse_time(next_bars[idx].get("time", ""))
+    times = sorted(t for t in (_parse_time(b.get("time", "")) for b in next_bars) if t is not None)
+    return times[min(1, len(times) - 1)] if times else None
+
+
+class RunningBestTrade:
+    """Best trade of a segment that grows one bar at a time (live mode), O(1) per bar.
+
+    For exit bar j the best long entry is the lowest RTH close among bars [1, j) and the best short the
+    highest, so only those two are tracked. After every add() best matches find_trades_for_segment on the
+    bars seen so far with no deadline (a closed segment's deadline lies after its last bar); equal pnl
+    keeps the trade the batch loop finds first (earliest entry, then earliest exit, long before short).
+    """
+
+    def __init__(self, vector_id: str, asset: str, date: str, tf: str):
+        self.vector_id = vector_id
+        self.asset = asset
+        self.date = date
+        self.tf = tf
+        self.n = 0
+        self.valid = True
+        self.best: Optional[dict] = None
+        self._best_key: Optional[tuple] = None
+        self._low: Optional[tuple[float, int, datetime]] = None
+        self._high: Optional[tuple[float, int, datetime]] = None
+
+    def _trade(self, i: int, t_i: datetime, c_i: float, j: int, t_j: datetime, c_j: float, side: str, p: float) -> dict:
+        return {
+            "vector_id": self.vector_id,
+            "bar_start": i,
+            "bar_end": j,
+            "asset": self.asset,
+            "date": self.date,
+            "tf": self.tf,
+            "entry_time": t_i.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_bars": j - i + 1,
+            "duration_minutes": (t_j - t_i).total_seconds() / 60.0,
+            "entry_price": c_i,
+            "exit_price": c_j,
+            "pnl": round(p, 2),
+            "side": side,
+        }
+
+    def add(self, bar: dict) -> bool:
+        """Append the segment's next bar. Returns True if best changed."""
+        j = self.n
+        self.n += 1
+        if not self.valid:
+            return False
+        t = _parse_time(bar.get("time", ""))
+        try:
+            c = float(bar.get("close"))
+        except (TypeError, ValueError):
+            c = None
+        if t is None or c is None or c != c:
+            # find_trades_for_segment rejects the whole segment when any bar lacks a time or close.
+            self.valid = False
+            changed = self.best is not None
+            self.best = self._best_key = None
+            return changed
+        if not _in_rth(t):
+            return False
+        changed = False
+        for side, entry in (("long", self._low), ("short", self._high)):
+            if entry is None:
+                continue
+            c_i, i, t_i = entry
+            p = _pnl(c_i, c, side)
+            key = (i, j, side != "long")
+            if p >= MIN_PNL and (self.best is None or p > self._best_key[0] or (p == self._best_key[0] and key < self._best_key[1])):
+                self.best = self._trade(i, t_i, c_i, j, t, c, side, p)
+                self._best_key = (p, key)
+                changed = True
+        if j >= 1:
+            if self._low is None or c < self._low[0]:
+                self._low = (c, j, t)
+            if self._high is None or c > self._high[0]:
+                self._high = (c, j, t)
+        return changed